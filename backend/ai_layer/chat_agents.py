@@ -1,6 +1,10 @@
-from agents import Agent, OpenAIChatCompletionsModel
+from agents import Agent, OpenAIChatCompletionsModel, RunContextWrapper, Runner, function_tool
 from openai import AsyncOpenAI
 from ai_layer.context import UserSessionContext, ReportCardContext
+from ai_layer.feedback_cache import feedback_cache, make_cache_key
+from ai_layer.llm_metrics import llm_metrics_hooks
+from ai_layer.registry import registry
+import json
 import os
 import logging
 from dotenv import load_dotenv
@@ -29,48 +33,59 @@ LANGUAGE_CONFIG = {
     },
 }
 
-# Load env variables
-DEEPSEEK_BASE_URL = os.getenv("DEEPSEEK_BASE_URL")
-DEEPSEEK_API_KEY = os.getenv("DEEPSEEK_API_KEY")
-DEEPSEEK_MODEL_NAME = os.getenv("DEEPSEEK_MODEL_NAME")
-GEMINI_BASE_URL = os.getenv("GEMINI_BASE_URL")
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL_NAME")
+# Provider clients, models and default agents are built lazily through the
+# registry on first use, so importing this module has no side effects.
+REQUIRED_ENV_VARS = (
+    "DEEPSEEK_BASE_URL", "DEEPSEEK_API_KEY", "DEEPSEEK_MODEL_NAME",
+    "GEMINI_BASE_URL", "GEMINI_API_KEY", "GEMINI_MODEL_NAME",
+)
 
-env_list = [DEEPSEEK_BASE_URL, DEEPSEEK_API_KEY, DEEPSEEK_MODEL_NAME, GEMINI_BASE_URL, GEMINI_API_KEY, GEMINI_MODEL_NAME]
 
-if None in env_list:
-    raise ValueError(
-        "Please set all required BASE_URL, API_KEY, MODEL_NAME via env vars."
-    )
+def _load_provider_settings() -> dict:
+    """Read provider env vars, raising if any required one is missing."""
+    settings = {name: os.getenv(name) for name in REQUIRED_ENV_VARS}
+    if None in settings.values():
+        raise ValueError(
+            "Please set all required BASE_URL, API_KEY, MODEL_NAME via env vars."
+        )
+    settings["ANTHROPIC_API_KEY"] = os.getenv("ANTHROPIC_API_KEY")
+    settings["ANTHROPIC_MODEL_NAME"] = os.getenv("ANTHROPIC_MODEL_NAME", "claude-3-5-sonnet-20241022")
+    return settings
+
+
+def _settings() -> dict:
+    return registry.get("provider_settings")
+
 
-# Create custom model wrapper compatible with OpenAI agents sdk for gemini and deepseek
-deepseek_client = AsyncOpenAI(base_url=DEEPSEEK_BASE_URL, api_key=DEEPSEEK_API_KEY)
-deepseek_model = OpenAIChatCompletionsModel(model=DEEPSEEK_MODEL_NAME, openai_client=deepseek_client)
+def _build_model(base_url, api_key, model_name):
+    """Create a model wrapper compatible with the OpenAI agents SDK for an OpenAI-compatible provider."""
+    client = AsyncOpenAI(base_url=base_url, api_key=api_key)
+    return OpenAIChatCompletionsModel(model=model_name, openai_client=client)
 
-gemini_client = AsyncOpenAI(base_url=GEMINI_BASE_URL, api_key=GEMINI_API_KEY)
-gemini_model = OpenAIChatCompletionsModel(model=GEMINI_MODEL_NAME, openai_client=gemini_client)
 
-# Claude model for Japanese feedback (optional -- only if ANTHROPIC_API_KEY is set)
-ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
-ANTHROPIC_MODEL_NAME = os.getenv("ANTHROPIC_MODEL_NAME", "claude-3-5-sonnet-20241022")
+def _build_deepseek_model():
+    s = _settings()
+    return _build_model(s["DEEPSEEK_BASE_URL"], s["DEEPSEEK_API_KEY"], s["DEEPSEEK_MODEL_NAME"])
 
-claude_model = None
-if ANTHROPIC_API_KEY:
+
+def _build_gemini_model():
+    s = _settings()
+    return _build_model(s["GEMINI_BASE_URL"], s["GEMINI_API_KEY"], s["GEMINI_MODEL_NAME"])
+
+
+def _build_claude_model():
+    """Claude model for Japanese feedback (optional -- only if ANTHROPIC_API_KEY is set)."""
+    s = _settings()
+    if not s["ANTHROPIC_API_KEY"]:
+        logger.info("ANTHROPIC_API_KEY not set. Japanese feedback will use DeepSeek fallback.")
+        return None
     try:
-        claude_client = AsyncOpenAI(
-            base_url="https://api.anthropic.com/v1",
-            api_key=ANTHROPIC_API_KEY,
-        )
-        claude_model = OpenAIChatCompletionsModel(
-            model=ANTHROPIC_MODEL_NAME,
-            openai_client=claude_client,
-        )
+        model = _build_model("https://api.anthropic.com/v1", s["ANTHROPIC_API_KEY"], s["ANTHROPIC_MODEL_NAME"])
         logger.info("Claude model initialized for JP feedback")
+        return model
     except Exception as e:
         logger.warning(f"Failed to initialize Claude model: {e}. JP feedback will be unavailable.")
-else:
-    logger.info("ANTHROPIC_API_KEY not set. Japanese feedback will use DeepSeek fallback.")
+        return None
 
 
 def build_feedback_prompt(ctx_wrapper, agent) -> str:
@@ -202,45 +217,95 @@ Rules:
 - Relay the feedback in English. Translate if needed."""
 
 
-# Define summary agent (used as handoff target)
-summary_agent = Agent[UserSessionContext](
-    name="summary_agent",
-    instructions=build_summary_prompt,
-    model=gemini_model
-)
+def _model_name(agent) -> str:
+    """Return the underlying model name of an agent (used in feedback cache keys)."""
+    return str(getattr(agent.model, 'model', agent.model))
 
 
-# Define feedback agent (used as tool)
-feedback_agent = Agent[UserSessionContext](
-    name="feedback_agent",
-    instructions=build_feedback_prompt,
-    model=deepseek_model
-)
+async def evaluate_sentence_cached(feedback_agent, context: UserSessionContext, sentence: str) -> str:
+    """Run the feedback agent for a sentence, serving exact repeats from the feedback cache.
 
+    On a hit the nested feedback-agent LLM call is skipped entirely and the
+    cached, already-validated feedback is returned as JSON. Only feedback that
+    passes validate_feedback is ever stored.
+    """
+    from ai_layer.practice_runner import _parse_json_from_string, validate_feedback
 
-# Define laoshi orchestrator agent
-laoshi_agent = Agent[UserSessionContext](
-    name="laoshi_orchestrator",
-    instructions=build_orchestrator_prompt,
-    model=gemini_model,
-    tools=[
-        feedback_agent.as_tool(
-            tool_name="evaluate_sentence",
-            tool_description=(
-                "Evaluate student's Mandarin sentence and give feedback and score in structured output. "
-                "Pass the student's sentence as input."
-            )
+    word = context.current_word
+    cache_key = None
+    if word is not None:
+        cache_key = make_cache_key(
+            context.language, word.word, word.reading, sentence, _model_name(feedback_agent)
         )
-    ],
-)
+        cached = feedback_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Feedback cache hit for session {context.session_id}")
+            return json.dumps(cached, ensure_ascii=False)
+
+    result = await Runner.run(feedback_agent, input=sentence, context=context, hooks=llm_metrics_hooks)
+    output = result.final_output if hasattr(result, 'final_output') else str(result)
+    output = output if isinstance(output, str) else str(output)
+
+    if cache_key is not None:
+        data = _parse_json_from_string(output)
+        validated = validate_feedback(data) if data else None
+        if validated:
+            feedback_cache.set(cache_key, validated)
+    return output
+
+
+def build_evaluate_sentence_tool(feedback_agent, language_name: str):
+    """Wrap a feedback agent as the evaluate_sentence tool, backed by the feedback cache."""
+
+    @function_tool(
+        name_override="evaluate_sentence",
+        description_override=(
+            f"Evaluate student's {language_name} sentence and give feedback and score in structured output. "
+            "Pass the student's sentence as input."
+        ),
+    )
+    async def evaluate_sentence(ctx: RunContextWrapper[UserSessionContext], input: str) -> str:
+        """Evaluate the student's sentence.
+
+        Args:
+            input: The student's sentence.
+        """
+        return await evaluate_sentence_cached(feedback_agent, ctx.context, input)
+
+    return evaluate_sentence
 
 
-## JP agent singletons (cached at module level, created if claude_model available)
-jp_feedback_agent = None
-jp_laoshi_agent = None
-jp_summary_agent = None
+def _build_zh_agents():
+    """Default agents: Gemini orchestrator/summary with DeepSeek feedback as a tool.
+
+    Returns (orchestrator_agent, summary_agent, feedback_agent).
+    """
+    gemini_model = registry.get("gemini_model")
+    summary_agent = Agent[UserSessionContext](
+        name="summary_agent",
+        instructions=build_summary_prompt,
+        model=gemini_model
+    )
+    feedback_agent = Agent[UserSessionContext](
+        name="feedback_agent",
+        instructions=build_feedback_prompt,
+        model=registry.get("deepseek_model")
+    )
+    laoshi_agent = Agent[UserSessionContext](
+        name="laoshi_orchestrator",
+        instructions=build_orchestrator_prompt,
+        model=gemini_model,
+        tools=[build_evaluate_sentence_tool(feedback_agent, 'Mandarin')],
+    )
+    return laoshi_agent, summary_agent, feedback_agent
+
 
-if claude_model:
+def _build_jp_agents():
+    """JP agents with Claude feedback, or None when no Claude model is available."""
+    claude_model = registry.get("claude_model")
+    if not claude_model:
+        return None
+    gemini_model = registry.get("gemini_model")
     jp_feedback_agent = Agent[UserSessionContext](
         name="feedback_agent",
         instructions=build_feedback_prompt,
@@ -255,17 +320,10 @@ if claude_model:
         name="laoshi_orchestrator",
         instructions=build_orchestrator_prompt,
         model=gemini_model,
-        tools=[
-            jp_feedback_agent.as_tool(
-                tool_name="evaluate_sentence",
-                tool_description=(
-                    "Evaluate student's Japanese sentence and give feedback and score in structured output. "
-                    "Pass the student's sentence as input."
-                )
-            )
-        ],
+        tools=[build_evaluate_sentence_tool(jp_feedback_agent, 'Japanese')],
     )
     logger.info("JP agent singletons created with Claude feedback model")
+    return jp_laoshi_agent, jp_summary_agent, jp_feedback_agent
 
 
 def build_agents(deepseek_api_key=None, gemini_api_key=None, language='ZH'):
@@ -276,28 +334,25 @@ def build_agents(deepseek_api_key=None, gemini_api_key=None, language='ZH'):
     Returns (orchestrator_agent, summary_agent).
     """
     if not deepseek_api_key and not gemini_api_key:
-        if language == 'JP' and jp_laoshi_agent:
-            return jp_laoshi_agent, jp_summary_agent
-        return laoshi_agent, summary_agent
-
-    # Build custom clients - use custom key if provided, else default
-    custom_ds_client = AsyncOpenAI(
-        base_url=DEEPSEEK_BASE_URL,
-        api_key=deepseek_api_key if deepseek_api_key else DEEPSEEK_API_KEY
+        if language == 'JP':
+            jp_agents = registry.get("jp_agents")
+            if jp_agents:
+                return jp_agents[0], jp_agents[1]
+        zh_agents = registry.get("zh_agents")
+        return zh_agents[0], zh_agents[1]
+
+    # Build custom models - use custom key if provided, else default
+    s = _settings()
+    custom_ds_model = _build_model(
+        s["DEEPSEEK_BASE_URL"], deepseek_api_key or s["DEEPSEEK_API_KEY"], s["DEEPSEEK_MODEL_NAME"]
     )
-    custom_ds_model = OpenAIChatCompletionsModel(
-        model=DEEPSEEK_MODEL_NAME, openai_client=custom_ds_client
-    )
-    custom_gemini_client = AsyncOpenAI(
-        base_url=GEMINI_BASE_URL,
-        api_key=gemini_api_key if gemini_api_key else GEMINI_API_KEY
-    )
-    custom_gemini_model = OpenAIChatCompletionsModel(
-        model=GEMINI_MODEL_NAME, openai_client=custom_gemini_client
+    custom_gemini_model = _build_model(
+        s["GEMINI_BASE_URL"], gemini_api_key or s["GEMINI_API_KEY"], s["GEMINI_MODEL_NAME"]
     )
 
     # Choose feedback model based on language
-    if language == 'JP' and claude_model:
+    claude_model = registry.get("claude_model") if language == 'JP' else None
+    if claude_model:
         feedback_model = claude_model
     else:
         feedback_model = custom_ds_model
@@ -319,15 +374,7 @@ def build_agents(deepseek_api_key=None, gemini_api_key=None, language='ZH'):
         name="laoshi_orchestrator",
         instructions=build_orchestrator_prompt,
         model=custom_gemini_model,
-        tools=[
-            custom_feedback.as_tool(
-                tool_name="evaluate_sentence",
-                tool_description=(
-                    f"Evaluate student's {lang['name']} sentence and give feedback and score in structured output. "
-                    "Pass the student's sentence as input."
-                )
-            )
-        ],
+        tools=[build_evaluate_sentence_tool(custom_feedback, lang['name'])],
     )
     return custom_orchestrator, custom_summary
 
@@ -365,12 +412,13 @@ Return response in JSON format:
 {{"feedback": string}}"""
 
 
-# Define report card agent (Gemini-based, no tools or handoffs)
-report_card_agent = Agent[ReportCardContext](
-    name="report_card_agent",
-    instructions=build_report_card_prompt,
-    model=gemini_model
-)
+def _build_report_card_agent():
+    """Default report card agent (Gemini-based, no tools or handoffs)."""
+    return Agent[ReportCardContext](
+        name="report_card_agent",
+        instructions=build_report_card_prompt,
+        model=registry.get("gemini_model")
+    )
 
 
 def build_report_card_agent(gemini_api_key=None, language='ZH'):
@@ -379,17 +427,41 @@ def build_report_card_agent(gemini_api_key=None, language='ZH'):
     Returns default module-level agent if no custom key.
     """
     if not gemini_api_key:
-        return report_card_agent
+        return registry.get("report_card_agent")
 
-    custom_client = AsyncOpenAI(
-        base_url=GEMINI_BASE_URL,
-        api_key=gemini_api_key
-    )
-    custom_model = OpenAIChatCompletionsModel(
-        model=GEMINI_MODEL_NAME, openai_client=custom_client
-    )
+    s = _settings()
+    custom_model = _build_model(s["GEMINI_BASE_URL"], gemini_api_key, s["GEMINI_MODEL_NAME"])
     return Agent[ReportCardContext](
         name="report_card_agent",
         instructions=build_report_card_prompt,
         model=custom_model
     )
+
+
+registry.register("provider_settings", _load_provider_settings)
+registry.register("deepseek_model", _build_deepseek_model)
+registry.register("gemini_model", _build_gemini_model)
+registry.register("claude_model", _build_claude_model)
+registry.register("zh_agents", _build_zh_agents)
+registry.register("jp_agents", _build_jp_agents)
+registry.register("report_card_agent", _build_report_card_agent)
+
+# Module-level names kept for existing imports; each resolves through the registry on access.
+_LEGACY_ATTRS = {
+    "deepseek_model": lambda: registry.get("deepseek_model"),
+    "gemini_model": lambda: registry.get("gemini_model"),
+    "claude_model": lambda: registry.get("claude_model"),
+    "laoshi_agent": lambda: registry.get("zh_agents")[0],
+    "summary_agent": lambda: registry.get("zh_agents")[1],
+    "feedback_agent": lambda: registry.get("zh_agents")[2],
+    "jp_laoshi_agent": lambda: (registry.get("jp_agents") or (None, None, None))[0],
+    "jp_summary_agent": lambda: (registry.get("jp_agents") or (None, None, None))[1],
+    "jp_feedback_agent": lambda: (registry.get("jp_agents") or (None, None, None))[2],
+    "report_card_agent": lambda: registry.get("report_card_agent"),
+}
+
+
+def __getattr__(name):
+    if name in _LEGACY_ATTRS:
+        return _LEGACY_ATTRS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,178 @@
+"""Exact-match cache for evaluate_sentence feedback.
+
+Students often resubmit the same sentence (or the same sentence with different
+whitespace), and the sample deck produces identical sentences across users.
+Caching the validated feedback JSON lets the evaluate_sentence tool skip the
+nested feedback-agent LLM call on a repeat.
+
+Two tiers:
+- In-process LRU (bounded by entry count, entries expire after a TTL)
+- Optional Redis tier shared across workers (SETEX with the same TTL)
+"""
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+from config import Config
+from metrics import redis_call_duration
+from server_timing import timed
+from redis_pool import get_redis_pool
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def normalize_sentence(sentence: str) -> str:
+    """Normalize a sentence for exact-match lookups.
+
+    NFKC folds full-width/half-width variants (common with CJK IMEs), and all
+    runs of whitespace collapse to a single space.
+    """
+    if not sentence:
+        return ''
+    text = unicodedata.normalize('NFKC', sentence)
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+
+def make_cache_key(language: str, word: str, reading: str, sentence: str, model: str) -> str:
+    """Build the cache key from (language, word, reading, normalized sentence, feedback model)."""
+    raw = json.dumps(
+        [language or '', word or '', reading or '', normalize_sentence(sentence), model or ''],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class FeedbackCache:
+    """Size-bounded, TTL-expiring LRU cache with an optional Redis tier."""
+
+    def __init__(self, max_entries=1024, ttl_seconds=86400, redis_client=None,
+                 use_shared_pool=False, key_prefix='feedback_cache:', clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.redis_client = redis_client
+        self.use_shared_pool = use_shared_pool
+        self.key_prefix = key_prefix
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._redis_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: str) -> dict | None:
+        """Return the cached feedback dict for key, or None on a miss."""
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return dict(value)
+                del self._entries[key]
+
+        value = self._redis_get(key)
+        with self._lock:
+            if value is None:
+                self._misses += 1
+                return None
+            self._redis_hits += 1
+            self._store_local(key, value, now)
+        return dict(value)
+
+    def set(self, key: str, value: dict):
+        """Store a validated feedback dict in both tiers."""
+        now = self._clock()
+        with self._lock:
+            self._store_local(key, dict(value), now)
+        self._redis_set(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._hits = self._redis_hits = self._misses = self._evictions = 0
+
+    def stats(self) -> dict:
+        """Return hit-rate metrics for the cache."""
+        with self._lock:
+            hits = self._hits + self._redis_hits
+            lookups = hits + self._misses
+            return {
+                'hits': self._hits,
+                'redis_hits': self._redis_hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def _store_local(self, key, value, now):
+        # Caller must hold self._lock
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (now + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def _redis(self):
+        """Return the Redis tier client, or None when the tier is disabled/unavailable."""
+        if self.redis_client is not None:
+            return self.redis_client
+        if not self.use_shared_pool:
+            return None
+        pool = get_redis_pool()
+        if not pool.enabled or not pool.is_available():
+            return None
+        return pool.sync_client()
+
+    def _redis_failed(self, action, error):
+        logger.warning(f"Feedback cache Redis {action} failed: {type(error).__name__}: {error}")
+        if self.redis_client is None and self.use_shared_pool:
+            get_redis_pool().record_failure()
+
+    def _redis_get(self, key):
+        client = self._redis()
+        if client is None:
+            return None
+        try:
+            with redis_call_duration.time(op='feedback_cache_get'), timed('redis'):
+                raw = client.get(self.key_prefix + key)
+            if raw is None:
+                return None
+            return json.loads(raw)
+        except Exception as e:
+            self._redis_failed('read', e)
+            return None
+
+    def _redis_set(self, key, value):
+        client = self._redis()
+        if client is None:
+            return
+        try:
+            with redis_call_duration.time(op='feedback_cache_set'), timed('redis'):
+                client.setex(
+                    self.key_prefix + key,
+                    int(self.ttl_seconds),
+                    json.dumps(value, ensure_ascii=False),
+                )
+        except Exception as e:
+            self._redis_failed('write', e)
+
+
+feedback_cache = FeedbackCache(
+    max_entries=Config.FEEDBACK_CACHE_MAX_ENTRIES,
+    ttl_seconds=Config.FEEDBACK_CACHE_TTL_SECONDS,
+    use_shared_pool=Config.FEEDBACK_CACHE_USE_REDIS,
+)
@@ -0,0 +1,34 @@
+"""Agent run hooks that record LLM latency and token usage per agent.
+
+Model-call time also goes to the request's Server-Timing `llm` phase.
+
+Passed as `hooks=` to every Runner.run(). Each run (including the nested
+feedback-agent run inside the evaluate_sentence tool) has its own context
+wrapper and its LLM calls are sequential, so the start time is kept on the
+wrapper; it goes away with the run even if the call fails.
+"""
+import time
+
+from agents import RunHooks
+
+from metrics import llm_call_duration, llm_tokens
+from server_timing import record
+
+
+class LLMMetricsHooks(RunHooks):
+    async def on_llm_start(self, context, agent, system_prompt, input_items):
+        context._llm_started = time.perf_counter()
+
+    async def on_llm_end(self, context, agent, response):
+        start = getattr(context, '_llm_started', None)
+        if start is not None:
+            elapsed = time.perf_counter() - start
+            llm_call_duration.observe(elapsed, agent=agent.name)
+            record('llm', elapsed)
+        usage = getattr(response, 'usage', None)
+        if usage is not None:
+            llm_tokens.inc(usage.input_tokens or 0, agent=agent.name, direction='input')
+            llm_tokens.inc(usage.output_tokens or 0, agent=agent.name, direction='output')
+
+
+llm_metrics_hooks = LLMMetricsHooks()
@@ -1,14 +1,17 @@
-# This file contains all function tool definitions for LLMs to use
-from mem0 import MemoryClient
-from dotenv import load_dotenv
+# mem0 client setup. The client is created lazily on first use (MemoryClient
+# validates the API key over the network), and the one-time project
+# configuration below is applied explicitly with `flask laoshi configure-mem0`.
 import os
-load_dotenv('C:/Users/Jasmine/Desktop/learningScripts/laoshi-coach/laoshi/.env')
 
+from dotenv import load_dotenv
+
+from ai_layer.registry import registry
+
+load_dotenv('C:/Users/Jasmine/Desktop/learningScripts/laoshi-coach/laoshi/.env')
 
-mem0_client = MemoryClient(api_key=os.getenv("MEM0_API_KEY"))
 
 # customise memory creation and update instructions
-mem0_client.project.update(custom_instructions="""
+CUSTOM_INSTRUCTIONS = """
 Extract and remember:
 - Language learning topics mentioned
 - Current skill level for each topic
@@ -22,17 +25,41 @@ Do not store:
 - Personal identifiers beyond the user_id
 - Payment or financial information
 - Off-topic conversation that isn't about learning
-""")
+"""
 
-# Add custom categories for the mem0 memory store
-mem0_client.project.update(custom_categories=[
+# Custom categories for the mem0 memory store
+CUSTOM_CATEGORIES = [
 	{"name": "weak_points", "description": "areas of weaknesses of the user in language learning"},
 	{"name": "common_mistakes", "description": "Recurring grammar errors, vocabulary misuse, or unnatural patterns the student repeatedly makes"},
 	{"name": "skill_levels", "description": "Proficiency: beginner, intermediate, advanced"},
 	{"name": "learning_goals", "description": "Learning objectives and targets"},
 	{"name": "personal_information", "description": "Basic information about the user including name, hobbies and personality traits"},
 	{"name": "preferences", "description": "Learning style, schedule, or feedback format preferences"}
-])
+]
+
+
+def _build_mem0_client():
+    from mem0 import MemoryClient
+    return MemoryClient(api_key=os.getenv("MEM0_API_KEY"))
+
+
+registry.register("mem0_client", _build_mem0_client)
+
+
+def get_mem0_client():
+    """Return the process-wide mem0 MemoryClient, creating it on first use."""
+    return registry.get("mem0_client")
+
 
+def configure_mem0_project(client=None):
+    """Push custom instructions and categories to the mem0 project (one-time setup)."""
+    client = client or get_mem0_client()
+    client.project.update(custom_instructions=CUSTOM_INSTRUCTIONS)
+    client.project.update(custom_categories=CUSTOM_CATEGORIES)
 
 
+def __getattr__(name):
+    # Keeps `from mem0_setup import mem0_client` working without an import-time client
+    if name == "mem0_client":
+        return get_mem0_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,288 @@
+"""Long-term memory service: cached mem0 searches and an asynchronous write outbox.
+
+Reads: search() results are cached per user with a TTL, so starting a session or
+generating report-card feedback doesn't block on a mem0 round-trip every time.
+A user's cached results are dropped as soon as new memories for them are written.
+
+Writes: enqueue_writes() inserts MemoryOutbox rows and returns immediately. The
+OutboxWorker thread flushes due rows in parallel, retrying failures with
+exponential backoff until MEMORY_OUTBOX_MAX_ATTEMPTS is reached. A batch is
+claimed and committed before calling mem0, so no transaction or row lock is
+held during the (LLM-backed, slow) adds. Rows survive restarts, so nothing is
+lost if the process dies before a flush.
+
+Backends: 'mem0' uses the hosted MemoryClient from mem0_setup; 'local' uses
+LocalMemoryClient, an in-process stand-in with the same search/add interface so
+development and tests run offline.
+"""
+import itertools
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+
+from flask import current_app, has_app_context
+
+from config import Config
+from extensions import db
+from metrics import memory_call_duration
+from server_timing import timed
+from models import MemoryOutbox
+from outbox import OutboxWorker
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+class LocalMemoryClient:
+    """In-process stand-in for mem0's MemoryClient (search/add only).
+
+    Memories are ranked by overlap with the query (word tokens, plus single
+    characters so CJK text matches), then by recency.
+    """
+
+    def __init__(self):
+        self._memories = {}  # user_id -> list of memory dicts
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _terms(text: str) -> set:
+        tokens = {t.lower() for t in _TOKEN_RE.findall(text or '')}
+        return tokens | {ch for t in tokens for ch in t if not ch.isascii()}
+
+    def add(self, text, user_id=None, **kwargs):
+        memory = {
+            'id': str(next(self._ids)),
+            'memory': text,
+            'user_id': str(user_id),
+            'created_at': datetime.now(timezone.utc).isoformat(),
+        }
+        with self._lock:
+            self._memories.setdefault(str(user_id), []).append(memory)
+        return [{'id': memory['id'], 'event': 'ADD', 'memory': text}]
+
+    def search(self, query, user_id=None, limit=100, **kwargs):  # mem0's default limit
+        with self._lock:
+            memories = list(self._memories.get(str(user_id), []))
+        terms = self._terms(query)
+        scored = [
+            (len(terms & self._terms(m['memory'])), i, m)
+            for i, m in enumerate(memories)
+        ]
+        scored.sort(key=lambda s: (s[0], s[1]), reverse=True)
+        return [dict(m, score=score) for score, _, m in scored[:limit]]
+
+
+def build_memory_client(backend: str):
+    """Return a client object exposing mem0's search/add interface."""
+    if backend == 'local':
+        return LocalMemoryClient()
+    from ai_layer.mem0_setup import get_mem0_client
+    return get_mem0_client()
+
+
+class ClaimedWrite(NamedTuple):
+    """What a mem0 write needs from an outbox row, read before the claim commits."""
+    id: int
+    user_id: int
+    text: str
+
+
+class MemoryService:
+    """Per-user cached searches in front of a memory client, plus outbox writes."""
+
+    def __init__(self, client, cache_ttl=300, max_cached_users=1024, max_workers=4,
+                 max_attempts=5, backoff_base=2.0, lease_seconds=600, clock=time.monotonic):
+        self.client = client
+        self.cache_ttl = cache_ttl
+        self.max_cached_users = max_cached_users
+        self.max_workers = max_workers
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.lease_seconds = lease_seconds
+        self._clock = clock
+        self._cache = OrderedDict()  # user_id -> {(query, limit): (expires_at, results)}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._search_errors = 0
+        self._writes_sent = 0
+        self._writes_failed = 0
+
+    # ---- reads ----
+
+    def search(self, user_id, query: str, limit: int | None = None):
+        """Return memories for user_id matching query, or None if the backend fails.
+
+        limit=None leaves the result count to the client (mem0 returns up to 100).
+        """
+        user_key = str(user_id)
+        cache_key = (query, limit)
+        now = self._clock()
+        with self._lock:
+            entry = self._cache.get(user_key, {}).get(cache_key)
+            if entry is not None and entry[0] > now:
+                self._cache.move_to_end(user_key)
+                self._hits += 1
+                return entry[1]
+            self._misses += 1
+
+        try:
+            with memory_call_duration.time(op='search'), timed('mem0'):
+                kwargs = {} if limit is None else {'limit': limit}
+                results = self.client.search(query=query, user_id=user_key, **kwargs)
+        except Exception as e:
+            with self._lock:
+                self._search_errors += 1
+            logger.warning(f"Memory search failed for user {user_id}: {type(e).__name__}: {e}")
+            return None
+
+        with self._lock:
+            self._cache.setdefault(user_key, {})[cache_key] = (now + self.cache_ttl, results)
+            self._cache.move_to_end(user_key)
+            while len(self._cache) > self.max_cached_users:
+                self._cache.popitem(last=False)
+        return results
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._cache.pop(str(user_id), None)
+
+    # ---- writes ----
+
+    def enqueue_writes(self, user_id: int, texts: list[str]) -> int:
+        """Queue memory texts for user_id in the outbox. Returns the number queued."""
+        rows = MemoryOutbox.enqueue(user_id, texts)
+        if rows:
+            outbox_worker.wake()
+        return len(rows)
+
+    def _write_one(self, user_id, text):
+        try:
+            with memory_call_duration.time(op='add'):
+                self.client.add(text, user_id=str(user_id))
+            return None
+        except Exception as e:
+            return e
+
+    def flush_outbox(self, batch_size: int = 50) -> dict:
+        """Send one batch of due outbox rows in parallel. Must run in an app context."""
+        now = datetime.now(timezone.utc)
+        rows = MemoryOutbox.get_due(now, batch_size)
+        result = {'sent': 0, 'retried': 0, 'failed': 0}
+        if not rows:
+            db.session.rollback()  # release row locks
+            return result
+
+        # Claim the batch: push its next attempt past the writes and commit, so other workers skip
+        # it and the mem0 calls hold no locks. If this worker dies mid-batch, the rows come due again.
+        claimed = [ClaimedWrite(row.id, row.user_id, row.text) for row in rows]
+        for row in rows:
+            row.next_attempt_ds = now + timedelta(seconds=self.lease_seconds)
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(claimed)))) as pool:
+            errors = dict(zip((write.id for write in claimed),
+                              pool.map(lambda write: self._write_one(write.user_id, write.text), claimed)))
+
+        now = datetime.now(timezone.utc)
+        written_users = set()
+        for row in MemoryOutbox.get_by_ids(errors):  # rows deleted meanwhile (with their user) are skipped
+            error = errors[row.id]
+            if error is None:
+                row.status = MemoryOutbox.STATUS_SENT
+                row.sent_ds = now
+                written_users.add(row.user_id)
+                result['sent'] += 1
+                continue
+            row.attempts += 1
+            row.last_error = f"{type(error).__name__}: {error}"[:500]
+            if row.attempts >= self.max_attempts:
+                row.status = MemoryOutbox.STATUS_FAILED
+                result['failed'] += 1
+                logger.error(f"Memory write {row.id} for user {row.user_id} failed permanently: {row.last_error}")
+            else:
+                row.next_attempt_ds = now + timedelta(seconds=self.backoff_base * 2 ** (row.attempts - 1))
+                result['retried'] += 1
+                logger.warning(f"Memory write {row.id} failed (attempt {row.attempts}): {row.last_error}")
+
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        for user_id in written_users:
+            self.invalidate(user_id)
+        with self._lock:
+            self._writes_sent += result['sent']
+            self._writes_failed += result['failed']
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'search_hits': self._hits,
+                'search_misses': self._misses,
+                'search_errors': self._search_errors,
+                'search_hit_rate': round(self._hits / lookups, 4) if lookups else 0.0,
+                'cached_users': len(self._cache),
+                'writes_sent': self._writes_sent,
+                'writes_failed': self._writes_failed,
+            }
+
+
+_service = None
+_service_lock = threading.Lock()
+outbox_worker = OutboxWorker(
+    'memory-outbox', 'MEMORY_OUTBOX', lambda batch_size: get_memory_service().flush_outbox(batch_size),
+    interval=Config.MEMORY_OUTBOX_INTERVAL_SECONDS, batch_size=Config.MEMORY_OUTBOX_BATCH_SIZE,
+)
+
+
+def get_memory_service() -> MemoryService:
+    """Return the process-wide memory service, built from the app config on first use."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            config = current_app.config if has_app_context() else vars(Config)
+            _service = MemoryService(
+                build_memory_client(config.get('MEMORY_BACKEND', Config.MEMORY_BACKEND)),
+                cache_ttl=config.get('MEMORY_SEARCH_CACHE_TTL_SECONDS', Config.MEMORY_SEARCH_CACHE_TTL_SECONDS),
+                max_cached_users=config.get('MEMORY_SEARCH_CACHE_MAX_USERS', Config.MEMORY_SEARCH_CACHE_MAX_USERS),
+                max_workers=config.get('MEMORY_OUTBOX_MAX_WORKERS', Config.MEMORY_OUTBOX_MAX_WORKERS),
+                max_attempts=config.get('MEMORY_OUTBOX_MAX_ATTEMPTS', Config.MEMORY_OUTBOX_MAX_ATTEMPTS),
+                lease_seconds=config.get('MEMORY_OUTBOX_LEASE_SECONDS', Config.MEMORY_OUTBOX_LEASE_SECONDS),
+            )
+        return _service
+
+
+def purge_memory_outbox(now: datetime | None = None) -> int:
+    """Delete sent and failed outbox rows older than MEMORY_OUTBOX_RETENTION_DAYS. Returns the number deleted."""
+    now = now or datetime.now(timezone.utc)
+    config = current_app.config if has_app_context() else vars(Config)
+    days = config.get('MEMORY_OUTBOX_RETENTION_DAYS', Config.MEMORY_OUTBOX_RETENTION_DAYS)
+    return MemoryOutbox.purge_finished_before(now - timedelta(days=days))
+
+
+def peek_memory_service() -> MemoryService | None:
+    """Return the memory service if it has been built, without building it."""
+    return _service
+
+
+def set_memory_service(service: MemoryService | None):
+    """Replace the process-wide memory service (used by tests)."""
+    global _service
+    with _service_lock:
+        _service = service
@@ -1,30 +1,46 @@
 """Practice session runner - core app code for AI-coached practice sessions."""
 import asyncio
+import heapq
 import json
 import logging
-import os
 import random
-import math
+from dataclasses import dataclass
 from datetime import datetime, date, timedelta, timezone
 from statistics import mean
 
 from agents import Runner
 from agents.extensions.memory import RedisSession
+from redis.exceptions import ConnectionError as RedisConnectionError, TimeoutError as RedisTimeoutError
 
-from models import Word, User, UserSession, SessionWord, SessionWordAttempt, UserProfile, Deck
+from models import Word, User, UserSession, SessionWord, SessionWordAttempt, Deck
 from ai_layer.context import UserSessionContext, WordContext
 from ai_layer.chat_agents import build_agents
-from ai_layer.mem0_setup import mem0_client
+from ai_layer.llm_metrics import llm_metrics_hooks
+from ai_layer.memory_service import get_memory_service
+from ai_layer.session_history import CompactingSession, build_word_digest
 from crypto_utils import decrypt_api_key
 from config import Config
+from metrics import llm_errors
+from server_timing import timed
+from streaks import update_streak
+from due_queue import due_queue
 from extensions import db
+from async_utils import agent_loop, run_in_db_pool, run_sync
+from redis_pool import get_redis_pool
 
 logger = logging.getLogger(__name__)
 
+# Rows per fetch while streaming a user's due words in select_all_due_words
+ALL_DUE_FETCH_ROWS = 1000
+
 
 def run_async(coro):
-    """Wraps async Runner.run() for synchronous Flask using asyncio.run()."""
-    return asyncio.run(coro)
+    """Wraps async Runner.run() for synchronous Flask.
+
+    Runs on the process-wide background event loop so pooled async
+    connections (Redis, LLM HTTP clients) are reused across requests.
+    """
+    return run_sync(coro)
 
 
 def validate_feedback(data: dict) -> dict | None:
@@ -54,61 +70,66 @@ async def run_with_retry(agent, input, context, session=None, max_attempts=3):
     When using a persistent session (e.g. Redis), only pass input on the first
     attempt.  Runner.run() appends input to the session history, so re-passing
     it on retries would duplicate messages.
-    """
-    for attempt in range(max_attempts):
-        try:
-            # On retries with a persistent session, the input is already in the
-            # session history from the first attempt — don't append it again.
-            run_input = input if attempt == 0 or session is None else []
-            result = await Runner.run(agent, input=run_input, context=context, session=session)
-            return result
-        except Exception as e:
-            if attempt == max_attempts - 1:
-                raise
-            wait_time = 2 ** attempt  # 1s, 2s, 4s
-            logger.warning(f"Agent retry {attempt + 1}/{max_attempts} after error: {e}")
-            await asyncio.sleep(wait_time)
 
-
-def get_session(session_id: int):
-    """Create a RedisSession for the given practice session.
-
-    Uses Redis-backed session storage for persistence across requests.
-    Falls back to in-memory if Redis URI is not configured or connection fails.
+    If Redis fails mid-run, the failure is reported to the shared pool's circuit
+    breaker and the remaining attempts fall back to an in-memory session.
     """
-    redis_url = os.getenv("REDIS_URI")
-    if redis_url:
-        redis_kwargs = {
-            "socket_connect_timeout": 10,
-            "socket_keepalive": True,
-        }
+    with timed('agent'):
+        for attempt in range(max_attempts):
+            try:
+                # On retries with a persistent session, the input is already in the
+                # session history from the first attempt — don't append it again.
+                run_input = input if attempt == 0 or session is None else []
+                result = await Runner.run(
+                    agent, input=run_input, context=context, session=session, hooks=llm_metrics_hooks
+                )
+                if session is not None:
+                    get_redis_pool().record_success()
+                return result
+            except Exception as e:
+                if session is not None and isinstance(e, (RedisConnectionError, RedisTimeoutError)):
+                    get_redis_pool().record_failure(e)
+                    logger.warning("Redis session failed mid-run; retrying with in-memory session")
+                    session = None
+                if attempt == max_attempts - 1:
+                    llm_errors.inc(agent=getattr(agent, 'name', 'unknown'))
+                    raise
+                wait_time = 2 ** attempt  # 1s, 2s, 4s
+                logger.warning(f"Agent retry {attempt + 1}/{max_attempts} after error: {e}")
+                await asyncio.sleep(wait_time)
+
+
+def get_session(session_id: int, session_words=None):
+    """Create a RedisSession for the given practice session.
 
-        try:
-            # Eagerly test Redis connectivity with a synchronous ping.
-            # RedisSession.from_url is lazy and won't fail until async usage,
-            # which bypasses this try/except block.
-            import redis as sync_redis
-            test_client = sync_redis.from_url(
-                redis_url,
-                socket_connect_timeout=5,
-                socket_timeout=5,
-            )
-            test_client.ping()
-            test_client.close()
+    Uses Redis-backed session storage for persistence across requests, sharing
+    the process-wide async connection pool. Availability comes from the pool's
+    cached health state and circuit breaker rather than a per-call PING.
+    Returns None (in-memory session behavior) if REDIS_URI is not configured
+    or Redis is unavailable; the pool records and logs each fallback.
 
-            return RedisSession.from_url(
-                session_id=f"session:{session_id}",
-                url=redis_url,
-                redis_kwargs=redis_kwargs
-            )
-        except Exception as e:
-            logger.warning(
-                f"Redis connection failed (session_id={session_id}). "
-                f"Using in-memory session. Error: {type(e).__name__}: {e}"
-            )
+    When session_words is given, the session is wrapped in a CompactingSession
+    so long sessions replay a per-word digest plus recent turns instead of the
+    full history (see SESSION_HISTORY_TOKEN_BUDGET).
+    """
+    with timed('session'):
+        pool = get_redis_pool()
+        if not pool.is_available():
             return None
-    # Fallback: return None to use default in-memory session behavior
-    return None
+        redis_session = RedisSession(
+            session_id=f"session:{session_id}",
+            redis_client=pool.async_client(agent_loop.get()),
+        )
+        if session_words is None or Config.SESSION_HISTORY_TOKEN_BUDGET <= 0:
+            return redis_session
+
+        digest = build_word_digest(session_words, SessionWordAttempt.get_by_session(session_id))
+        return CompactingSession(
+            redis_session,
+            token_budget=Config.SESSION_HISTORY_TOKEN_BUDGET,
+            digest=digest,
+            min_recent_turns=Config.SESSION_HISTORY_MIN_RECENT_TURNS,
+        )
 
 
 def get_user_agent(user, session_ds_version=None, session_gemini_version=None, language='ZH'):
@@ -152,20 +173,27 @@ def get_user_agent(user, session_ds_version=None, session_gemini_version=None, l
 
 
 def hydrate_context(user, session, session_words, mem0_prefs=None):
-    """Build UserSessionContext from DB objects."""
+    """Build UserSessionContext from DB objects.
+
+    All-due sessions have no deck and a roster drawn from several decks: each
+    word takes its own deck's language, and the session the first word's.
+    """
+    session_words_sorted = sorted(session_words, key=lambda sw: sw.word_order)
+
     # Determine language from deck
-    language = 'ZH'
     if session.deck:
         language = session.deck.language or 'ZH'
-
-    session_words_sorted = sorted(session_words, key=lambda sw: sw.word_order)
+        word_language = lambda w: language
+    else:
+        word_language = lambda w: (w.deck.language if w.deck else None) or 'ZH'
+        language = word_language(session_words_sorted[0].word) if session_words_sorted else 'ZH'
 
     # Build word roster
     word_roster = []
     for sw in session_words_sorted:
         w = sw.word
         word_roster.append(WordContext(
-            word_id=w.id, word=w.word, reading=w.reading, meaning=w.meaning, language=language
+            word_id=w.id, word=w.word, reading=w.reading, meaning=w.meaning, language=word_language(w)
         ))
 
     # Derive session_word_dict, current_word, and counts
@@ -182,7 +210,7 @@ def hydrate_context(user, session, session_words, mem0_prefs=None):
         elif sw.status == 0 and current_word is None:  # pending and first one
             w = sw.word
             current_word = WordContext(
-                word_id=w.id, word=w.word, reading=w.reading, meaning=w.meaning, language=language
+                word_id=w.id, word=w.word, reading=w.reading, meaning=w.meaning, language=word_language(w)
             )
 
     session_complete = all(v != 0 for v in session_word_dict.values())
@@ -259,149 +287,192 @@ def extract_feedback_from_result(result):
     return None
 
 
-def update_streak(user_id: int):
+def select_srs_words(deck_id: int, user_id: int, words_count: int):
     """
-    Update user's practice streak with database-level locking to prevent race conditions.
-    Uses SELECT FOR UPDATE to ensure atomic streak updates.
+    Select words using SRS algorithm:
+    - 40% new words (never reviewed)
+    - 60% due/overdue review words
+    - Buffer pools if either is insufficient
+    - Fallback to future words if both insufficient
+
+    The pools come from the per-user due queue (due_queue.py), so only the
+    selected words are loaded.
     """
-    try:
-        profile = db.session.query(UserProfile).filter_by(
-            user_id=user_id
-        ).with_for_update().first()
+    word_ids = due_queue.pick_session(user_id, deck_id, date.today(), words_count, random)
+    if not word_ids:
+        return []
+    words_by_id = {w.id: w for w in Word.query.filter(Word.id.in_(word_ids), Word.user_id == user_id)}
+    return [words_by_id[word_id] for word_id in word_ids if word_id in words_by_id]
 
-        if not profile:
-            return
 
-        today = date.today()
+def select_all_due_words(user_id: int, words_count: int, language: str | None = None):
+    """
+    Select words across all of the user's decks for an "all due" session:
+    - Due/overdue words, most urgent first by review_priority() (days overdue,
+      ease factor, failed last review)
+    - New words, oldest first, if fewer than words_count are due
 
-        if profile.last_practice_date == today:
-            return  # Already practiced today
-        elif profile.last_practice_date == today - timedelta(days=1):
-            profile.current_streak += 1
-        else:
-            profile.current_streak = 1
+    Agents are built per language, so a session sticks to one: `language`, or
+    else the language of the most urgent due word (of the oldest new word when
+    nothing is due). Due words stream from one SELECT into a words_count-sized
+    heap per language, so SQL and memory stay bounded however many are due.
 
-        profile.last_practice_date = today
-        db.session.commit()
-    except Exception:
-        db.session.rollback()
-        raise
+    Returns (words, language); words is empty when nothing is available.
+    """
+    from srs_engine import review_priority
 
+    today = date.today()
+    due_rows = (
+        db.session.query(Word.id, Word.next_review_date, Word.ease_factor, Word.last_quality, Deck.language)
+        .join(Deck, Word.deck_id == Deck.id)
+        .filter(Word.user_id == user_id, Word.next_review_date <= today)
+    )
+    if language:
+        due_rows = due_rows.filter(Deck.language == language)
+
+    heaps = {}  # language -> min-heap of (priority, -word_id); ties go to the older word
+    for word_id, due, ease, last_quality, word_language in due_rows.yield_per(ALL_DUE_FETCH_ROWS):
+        entry = (review_priority((today - due).days, ease, last_quality), -word_id)
+        heap = heaps.setdefault(word_language, [])
+        if len(heap) < words_count:
+            heapq.heappush(heap, entry)
+        elif entry > heap[0]:
+            heapq.heapreplace(heap, entry)
+
+    if not language and heaps:
+        language = max(heaps, key=lambda lang: max(heaps[lang]))
+    word_ids = [-neg_id for _, neg_id in sorted(heaps.get(language, ()), reverse=True)]
+
+    if len(word_ids) < words_count:
+        new_words = (
+            db.session.query(Word.id)
+            .join(Deck, Word.deck_id == Deck.id)
+            .filter(Word.user_id == user_id, Word.next_review_date.is_(None))
+            .order_by(Word.id)
+        )
+        if not language:
+            language = new_words.with_entities(Deck.language).limit(1).scalar()
+        if language:
+            new_words = new_words.filter(Deck.language == language).limit(words_count - len(word_ids))
+            word_ids += [word_id for word_id, in new_words]
+
+    if not word_ids:
+        return [], language
+    words_by_id = {w.id: w for w in Word.query.filter(Word.id.in_(word_ids), Word.user_id == user_id)}
+    return [words_by_id[word_id] for word_id in word_ids if word_id in words_by_id], language
+
+
+@dataclass
+class AgentCall:
+    """An agent run requested by a practice flow. The driver sends back the RunResult."""
+    agent: object
+    input: str
+    context: UserSessionContext
+    session: object = None
+
+
+# Practice operations are written once as generator "flows": plain synchronous
+# DB/SRS code that yields an AgentCall wherever it needs the LLM and receives the
+# result (or the raised exception) back. The sync driver serves Flask views via
+# run_async(); the async driver serves asgi.py, awaiting agent runs on the server
+# loop and running the DB segments in the DB thread pool.
+
+def _resume(flow, value=None, error=None):
+    """Resume a flow. Returns (next AgentCall, None), or (None, final value) when done."""
+    try:
+        if error is not None:
+            return flow.throw(error), None
+        return flow.send(value), None
+    except StopIteration as stop:
+        return None, stop.value
 
-def update_srs(word, quality: int):
-    """
-    Update word SRS state using modified SM-2 algorithm.
 
-    Args:
-        quality: 0-5 rating from user self-assessment
-    """
-    # Fast-track perfect first attempts
-    if word.repetitions == 0 and quality == 5:
-        word.interval_days = 14
-        word.repetitions = 2
-        word.ease_factor = 2.5
-    elif quality < 3:
-        # Harsh reset on failure (fair since user controls quality)
-        word.repetitions = 0
-        word.interval_days = 1
-    else:
-        # Standard SM-2 progression with gentler early intervals
-        if word.repetitions == 0:
-            word.interval_days = 1
-        elif word.repetitions == 1:
-            word.interval_days = 3
-        elif word.repetitions == 2:
-            word.interval_days = 7
+def _drive_sync(flow):
+    call, outcome = _resume(flow)
+    while call is not None:
+        try:
+            result = run_async(run_with_retry(
+                call.agent, input=call.input, context=call.context, session=call.session
+            ))
+        except Exception as e:
+            call, outcome = _resume(flow, error=e)
         else:
-            new_interval = word.interval_days * word.ease_factor
-            # Use ceil for intervals < 7 to prevent stuck at 1 day
-            if new_interval < 7:
-                word.interval_days = math.ceil(new_interval)
+            call, outcome = _resume(flow, result)
+    return outcome
+
+
+async def _drive_async(flow):
+    token = agent_loop.set(asyncio.get_running_loop())
+    try:
+        call, outcome = await run_in_db_pool(_resume, flow)
+        while call is not None:
+            try:
+                result = await run_with_retry(
+                    call.agent, input=call.input, context=call.context, session=call.session
+                )
+            except Exception as e:
+                call, outcome = await run_in_db_pool(_resume, flow, error=e)
             else:
-                word.interval_days = round(new_interval)
+                call, outcome = await run_in_db_pool(_resume, flow, result)
+        return outcome
+    finally:
+        agent_loop.reset(token)
 
-        word.repetitions += 1
 
-    # Update ease factor (SM-2 formula)
-    word.ease_factor += (0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
-    word.ease_factor = max(1.3, word.ease_factor)
+def initialize_session(user_id: int, deck_id: int | None, words_count: int | None = None,
+                       language: str | None = None):
+    """Start a new practice session using SRS word selection (deck_id None: all due words)."""
+    return _drive_sync(_initialize_session_flow(user_id, deck_id, words_count, language))
 
-    # Set next review date
-    word.next_review_date = date.today() + timedelta(days=word.interval_days)
 
+def handle_message(session_id: int, user_id: int, message: str):
+    """Process a user message during practice."""
+    return _drive_sync(_handle_message_flow(session_id, user_id, message))
 
-def select_srs_words(deck_id: int, user_id: int, words_count: int):
-    """
-    Select words using SRS algorithm:
-    - 40% new words (never reviewed)
-    - 60% due/overdue review words
-    - Buffer pools if either is insufficient
-    - Fallback to future words if both insufficient
-    """
-    today = date.today()
 
-    # Calculate target counts
-    target_new = round(words_count * 0.4)
-    target_review = words_count - target_new
+def advance_word(session_id: int, user_id: int, quality: int | None = None):
+    """Advance to the next word. Averages attempt scores, updates SRS, updates mastery."""
+    return _drive_sync(_advance_word_flow(session_id, user_id, quality))
 
-    # Pool 1: New words (never reviewed)
-    new_words = Word.query.filter_by(
-        deck_id=deck_id,
-        user_id=user_id,
-        next_review_date=None
-    ).all()
-
-    # Pool 2: Due/overdue review words
-    review_words = Word.query.filter(
-        Word.deck_id == deck_id,
-        Word.user_id == user_id,
-        Word.next_review_date <= today
-    ).order_by(Word.next_review_date.asc()).all()
-
-    # Take what's available
-    actual_new = min(target_new, len(new_words))
-    actual_review = min(target_review, len(review_words))
-
-    # Use buffer pools
-    new_shortfall = target_new - actual_new
-    review_shortfall = target_review - actual_review
-
-    if new_shortfall > 0:
-        actual_review = min(target_review + new_shortfall, len(review_words))
-    elif review_shortfall > 0:
-        actual_new = min(target_new + review_shortfall, len(new_words))
-
-    # Select words
-    selected_new = random.sample(new_words, actual_new) if actual_new > 0 else []
-    selected_review = review_words[:actual_review]
-    selected_words = selected_new + selected_review
-
-    # Fallback: if both pools insufficient, use future words
-    if len(selected_words) < words_count:
-        selected_ids = {w.id for w in selected_words}
-        future_words = Word.query.filter(
-            Word.deck_id == deck_id,
-            Word.user_id == user_id,
-            Word.next_review_date > today
-        ).order_by(Word.next_review_date.asc()).all()
-
-        remaining = [w for w in future_words if w.id not in selected_ids]
-        needed = words_count - len(selected_words)
-        selected_words.extend(remaining[:needed])
-
-    return selected_words
-
-
-def initialize_session(user_id: int, deck_id: int, words_count: int | None = None):
-    """Start a new practice session using SRS word selection."""
+
+def complete_session(session_id: int, user_id: int):
+    """Complete a practice session: generate summary directly via summary agent."""
+    return _drive_sync(_complete_session_flow(session_id, user_id))
+
+
+async def initialize_session_async(user_id: int, deck_id: int | None, words_count: int | None = None,
+                                   language: str | None = None):
+    return await _drive_async(_initialize_session_flow(user_id, deck_id, words_count, language))
+
+
+async def handle_message_async(session_id: int, user_id: int, message: str):
+    return await _drive_async(_handle_message_flow(session_id, user_id, message))
+
+
+async def advance_word_async(session_id: int, user_id: int, quality: int | None = None):
+    return await _drive_async(_advance_word_flow(session_id, user_id, quality))
+
+
+async def complete_session_async(session_id: int, user_id: int):
+    return await _drive_async(_complete_session_flow(session_id, user_id))
+
+
+def _initialize_session_flow(user_id: int, deck_id: int | None, words_count: int | None = None,
+                             language: str | None = None):
+    """Start a new practice session using SRS word selection.
+
+    With deck_id None this is an "all due" session across the user's decks,
+    optionally limited to decks in `language`.
+    """
     user = User.get_by_id(user_id)
     if not user:
         return None, "User not found"
 
     # Verify deck exists and belongs to user
-    deck = Deck.get_by_id(deck_id)
-    if not deck or deck.user_id != user_id:
-        return None, "Deck not found"
+    if deck_id is not None:
+        deck = Deck.get_by_id(deck_id)
+        if not deck or deck.user_id != user_id:
+            return None, "Deck not found"
 
     # Resolve word count - check user profile first, then fallback to config default
     if words_count is None:
@@ -410,14 +481,16 @@ def initialize_session(user_id: int, deck_id: int, words_count: int | None = Non
         else:
             words_count = Config.DEFAULT_WORDS_PER_SESSION
 
-    # Determine language from deck
-    language = deck.language or 'ZH'
-
     # Select words using SRS algorithm
-    selected_words = select_srs_words(deck_id, user_id, words_count)
-
-    if not selected_words:
-        return None, "No words available for practice in this deck."
+    if deck_id is None:
+        selected_words, language = select_all_due_words(user_id, words_count, language)
+        if not selected_words:
+            return None, "No words available for practice in your decks."
+    else:
+        language = deck.language or 'ZH'
+        selected_words = select_srs_words(deck_id, user_id, words_count)
+        if not selected_words:
+            return None, "No words available for practice in this deck."
 
     actual_count = len(selected_words)
 
@@ -442,15 +515,9 @@ def initialize_session(user_id: int, deck_id: int, words_count: int | None = Non
 
     # Fetch mem0 preferences
     mem0_prefs = None
-    try:
-        memories = mem0_client.search(
-            query="language learning preferences and patterns",
-            user_id=str(user_id)
-        )
-        if memories:
-            mem0_prefs = str(memories)
-    except Exception:
-        pass  # mem0 failure should not block session start
+    memories = get_memory_service().search(user_id, "language learning preferences and patterns")
+    if memories:
+        mem0_prefs = str(memories)
 
     # Hydrate context
     session_words = SessionWord.get_list_by_session_id(session.id)
@@ -461,12 +528,12 @@ def initialize_session(user_id: int, deck_id: int, words_count: int | None = Non
 
     # Generate greeting
     session_obj = get_session(session.id)
-    result = run_async(run_with_retry(
+    result = yield AgentCall(
         agent,
         input="Start the session. Greet the student and introduce the first word.",
         context=ctx,
         session=session_obj
-    ))
+    )
 
     greeting = result.final_output if hasattr(result, 'final_output') else str(result)
 
@@ -486,7 +553,7 @@ def initialize_session(user_id: int, deck_id: int, words_count: int | None = Non
     }, None
 
 
-def handle_message(session_id: int, user_id: int, message: str):
+def _handle_message_flow(session_id: int, user_id: int, message: str):
     """Process a user message during practice."""
     user = User.get_by_id(user_id)
     session = UserSession.get_by_id(session_id)
@@ -497,11 +564,6 @@ def handle_message(session_id: int, user_id: int, message: str):
     if session.session_end_ds is not None:
         return None, "Session is already complete"
 
-    # Determine language from deck
-    language = 'ZH'
-    if session.deck:
-        language = session.deck.language or 'ZH'
-
     # Hydrate context
     session_words = SessionWord.get_list_by_session_id(session_id)
     ctx = hydrate_context(user, session, session_words)
@@ -511,31 +573,26 @@ def handle_message(session_id: int, user_id: int, message: str):
 
     # Get user-specific agent (with BYOK support and version tracking)
     try:
-        logger.info(f"Getting agent for user {user_id}")
-        agent, _, ds_ver, gemini_ver = get_user_agent(user, language=language)
+        logger.debug(f"Getting agent for user {user_id}")
+        agent, _, ds_ver, gemini_ver = get_user_agent(user, language=ctx.language)
 
         # Run orchestrator
-        logger.info(f"Running agent for session {session_id}")
-        session_obj = get_session(session_id)
-        result = run_async(run_with_retry(
+        logger.debug(f"Running agent for session {session_id}")
+        session_obj = get_session(session_id, session_words)
+        result = yield AgentCall(
             agent, input=message, context=ctx, session=session_obj
-        ))
-        logger.info(f"Agent execution completed for session {session_id}")
+        )
+        logger.debug(f"Agent execution completed for session {session_id}")
 
         laoshi_response = result.final_output if hasattr(result, 'final_output') else str(result)
     except Exception as e:
         logger.error(f"AGENT ERROR in session {session_id}: {type(e).__name__}: {e}", exc_info=True)
         raise  # Re-raise to let the endpoint handler deal with it
 
-    # Debug: log all items from the agent run - safely, without crashing
-    try:
-        from agents.items import ToolCallItem, ToolCallOutputItem
-        for item in result.new_items:
-            # Just log the item type safely without accessing potentially non-existent attributes
-            logger.info(f"[DIAG] Agent result item: {type(item).__name__}")
-    except Exception as e:
-        # Don't crash if diagnostic logging fails
-        logger.debug(f"Diagnostic logging skipped: {e}")
+    # Diagnostic: item types from the agent run (sampled; one record per message)
+    if logger.isEnabledFor(logging.DEBUG):
+        item_types = [type(item).__name__ for item in getattr(result, 'new_items', None) or []]
+        logger.debug(f"Agent result items for session {session_id}: {item_types}", extra={'sampled': True})
 
     # Defensive score extraction
     feedback = extract_feedback_from_result(result)
@@ -577,7 +634,7 @@ def handle_message(session_id: int, user_id: int, message: str):
     }, None
 
 
-def advance_word(session_id: int, user_id: int, quality: int | None = None):
+def _advance_word_flow(session_id: int, user_id: int, quality: int | None = None):
     """Advance to the next word. Averages attempt scores, updates SRS, updates mastery."""
     user = User.get_by_id(user_id)
     session = UserSession.get_by_id(session_id)
@@ -635,7 +692,7 @@ def advance_word(session_id: int, user_id: int, quality: int | None = None):
 
         if quality is not None:
             word.last_quality = quality
-            update_srs(word, quality)
+            word.update_srs(quality)
             word.update_mastery_status()
         word.update()
     else:
@@ -651,31 +708,26 @@ def advance_word(session_id: int, user_id: int, quality: int | None = None):
             word.next_review_date = date.today() + timedelta(days=1)
         word.update()
 
-    # Determine language from deck
-    language = 'ZH'
-    if session.deck:
-        language = session.deck.language or 'ZH'
-
     # Re-hydrate context to check completion and find next word
     session_words = SessionWord.get_list_by_session_id(session_id)
     ctx = hydrate_context(user, session, session_words)
 
     # Check completion
     if ctx.session_complete:
-        result, err = complete_session(session_id, user_id)
+        result, err = yield from _complete_session_flow(session_id, user_id)
         if err:
             return None, err
         return result, None
 
     # Get user-specific agent (with BYOK support and version tracking)
-    agent, _, ds_ver, gemini_ver = get_user_agent(user, language=language)
+    agent, _, ds_ver, gemini_ver = get_user_agent(user, language=ctx.language)
 
     # Introduce next word
-    session_obj = get_session(session_id)
+    session_obj = get_session(session_id, session_words)
     next_word_msg = f"The student has moved to the next word. Introduce it: {ctx.current_word.word} ({ctx.current_word.reading}) - {ctx.current_word.meaning}"
-    result = run_async(run_with_retry(
+    result = yield AgentCall(
         agent, input=next_word_msg, context=ctx, session=session_obj
-    ))
+    )
 
     laoshi_response = result.final_output if hasattr(result, 'final_output') else str(result)
 
@@ -695,7 +747,7 @@ def advance_word(session_id: int, user_id: int, quality: int | None = None):
     }, None
 
 
-def complete_session(session_id: int, user_id: int):
+def _complete_session_flow(session_id: int, user_id: int):
     """Complete a practice session: generate summary directly via summary agent."""
     user = User.get_by_id(user_id)
     session = UserSession.get_by_id(session_id)
@@ -705,25 +757,21 @@ def complete_session(session_id: int, user_id: int):
 
     session_words = SessionWord.get_list_by_session_id(session_id)
 
-    language = 'ZH'
-    if session.deck:
-        language = session.deck.language or 'ZH'
-
     ctx = hydrate_context(user, session, session_words)
     ctx.session_complete = True
 
     # Get user-specific summary agent (with BYOK support)
-    _, summ_agent, ds_ver, gemini_ver = get_user_agent(user, language=language)
+    _, summ_agent, ds_ver, gemini_ver = get_user_agent(user, language=ctx.language)
 
     # Run summary agent directly (no handoff needed)
-    session_obj = get_session(session_id)
+    session_obj = get_session(session_id, session_words)
     try:
-        result = run_async(run_with_retry(
+        result = yield AgentCall(
             summ_agent,
             input="Generate session summary.",
             context=ctx,
             session=session_obj
-        ))
+        )
 
         summary_text = result.final_output if hasattr(result, 'final_output') else str(result)
 
@@ -733,12 +781,11 @@ def complete_session(session_id: int, user_id: int):
             validated = validate_summary(summary_data)
             if validated:
                 summary_text = validated['summary_text']
-                # Write mem0 updates
-                for update in validated.get('mem0_updates', []):
-                    try:
-                        mem0_client.add(update, user_id=str(user_id))
-                    except Exception:
-                        pass  # mem0 write failure shouldn't block session close
+                # Queue mem0 updates; the outbox worker writes them in the background
+                try:
+                    get_memory_service().enqueue_writes(user_id, validated.get('mem0_updates', []))
+                except Exception:
+                    logger.exception(f"Failed to queue mem0 updates for session {session_id}")
 
     except Exception:
         summary_data = None
@@ -761,8 +808,8 @@ def complete_session(session_id: int, user_id: int):
                 deck.laoshi_message = "Laoshi is waiting for your next practice session"
                 deck.update()
 
-    # Update streak
-    update_streak(user_id)
+    # Update streak (one atomic UPDATE, dated in the user's timezone)
+    update_streak(user_id, timezone_name=user.profile.timezone if user and user.profile else None)
 
     # Close session
     session.summary_text = summary_text
@@ -0,0 +1,52 @@
+"""Lazy registry for AI-layer singletons (provider models, default agents, mem0 client).
+
+Modules register a factory under a name at import time, which is cheap and has
+no side effects. The object is built on the first get() and cached for the life
+of the process, so importing the app never opens clients, validates provider
+env vars, or touches the network.
+"""
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class Registry:
+    """Name -> factory map whose instances are built once, on first use."""
+
+    def __init__(self):
+        self._factories = {}
+        self._instances = {}
+        self._lock = threading.RLock()  # factories may get() their dependencies
+
+    def register(self, name: str, factory):
+        with self._lock:
+            self._factories[name] = factory
+            self._instances.pop(name, None)
+
+    def get(self, name: str):
+        try:
+            return self._instances[name]
+        except KeyError:
+            pass
+        with self._lock:
+            if name not in self._instances:
+                if name not in self._factories:
+                    raise KeyError(f"No AI component registered as '{name}'")
+                logger.info(f"Building AI component '{name}'")
+                self._instances[name] = self._factories[name]()
+            return self._instances[name]
+
+    def is_built(self, name: str) -> bool:
+        return name in self._instances
+
+    def reset(self, name: str | None = None):
+        """Drop cached instances (all, or one) so they are rebuilt on next use."""
+        with self._lock:
+            if name is None:
+                self._instances.clear()
+            else:
+                self._instances.pop(name, None)
+
+
+registry = Registry()
@@ -0,0 +1,176 @@
+"""Token-budgeted conversation history for practice sessions.
+
+Every Runner.run() replays the whole RedisSession history, so prompt size and
+latency grow linearly with session length. CompactingSession wraps the stored
+session and, once the history exceeds a token budget, replays only:
+
+1. One compact digest message covering completed/skipped words (averaged
+   scores and the key correction from SessionWordAttempt), and
+2. The most recent turns verbatim, cut on user-message boundaries so tool
+   calls are never separated from their outputs.
+
+The full history stays in Redis untouched; compaction only affects what is
+sent to the model.
+"""
+import json
+import logging
+import math
+import re
+
+from agents.memory.session import SessionABC
+
+from metrics import redis_call_duration
+from server_timing import timed
+
+logger = logging.getLogger(__name__)
+
+_CJK_RE = re.compile(r'[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff\uff00-\uffef]')
+MAX_CORRECTION_CHARS = 160
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate: ~1 token per CJK character, ~4 characters per token otherwise."""
+    if not text:
+        return 0
+    cjk = len(_CJK_RE.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
+
+
+def estimate_item_tokens(item) -> int:
+    return estimate_tokens(json.dumps(item, ensure_ascii=False, default=str))
+
+
+def _is_user_message(item) -> bool:
+    return isinstance(item, dict) and item.get('role') == 'user' and item.get('type', 'message') == 'message'
+
+
+def split_turns(items: list) -> list[list]:
+    """Group history items into turns, each starting at a user message."""
+    turns = []
+    for item in items:
+        if _is_user_message(item) or not turns:
+            turns.append([item])
+        else:
+            turns[-1].append(item)
+    return turns
+
+
+def build_word_digest(session_words, attempts) -> str | None:
+    """Build one compact line per finished word from SessionWord and SessionWordAttempt rows.
+
+    Returns None when no word has been completed or skipped yet.
+    """
+    latest_attempt = {}
+    for a in attempts:
+        prev = latest_attempt.get(a.word_id)
+        if prev is None or a.attempt_number > prev.attempt_number:
+            latest_attempt[a.word_id] = a
+
+    lines = []
+    for sw in sorted(session_words, key=lambda s: s.word_order):
+        if sw.status == 0:
+            continue
+        w = sw.word
+        label = f"{w.word} ({w.reading})"
+        if sw.status == -1:
+            lines.append(f"- {label}: skipped")
+            continue
+        scores = ", ".join(
+            f"{name} {score:.1f}"
+            for name, score in (('grammar', sw.grammar_score), ('usage', sw.usage_score),
+                                ('naturalness', sw.naturalness_score))
+            if score is not None
+        )
+        line = f"- {label}: {'correct' if sw.is_correct else 'needs work'}"
+        if scores:
+            line += f"; {scores}"
+        attempt = latest_attempt.get(sw.word_id)
+        if attempt is not None:
+            line += f"; last sentence: {attempt.sentence}"
+            if attempt.feedback_text:
+                correction = attempt.feedback_text.strip().replace("\n", " ")
+                if len(correction) > MAX_CORRECTION_CHARS:
+                    correction = correction[:MAX_CORRECTION_CHARS].rstrip() + "..."
+                line += f"; key correction: {correction}"
+        lines.append(line)
+
+    if not lines:
+        return None
+    return "Earlier in this session (older turns compacted):\n" + "\n".join(lines)
+
+
+def fit_digest(digest: str, max_tokens: int) -> str:
+    """Drop the oldest digest lines until it fits max_tokens (the header line is kept)."""
+    header, *lines = digest.split("\n")
+    costs = [estimate_tokens(line) + 1 for line in lines]
+    total = estimate_tokens(header) + sum(costs)
+    dropped = 0
+    while dropped < len(lines) and total > max_tokens:
+        total -= costs[dropped]
+        dropped += 1
+    lines = lines[dropped:]
+    if dropped:
+        lines.insert(0, f"- ({dropped} earlier word(s) omitted)")
+    return "\n".join([header] + lines)
+
+
+def compact_history(items: list, token_budget: int, digest: str | None = None,
+                    min_recent_turns: int = 1) -> list:
+    """Return items unchanged if within budget, else digest + most recent whole turns.
+
+    The digest may use at most half of the budget.
+    """
+    if token_budget <= 0:
+        return items
+    total = sum(estimate_item_tokens(i) for i in items)
+    if total <= token_budget:
+        return items
+
+    digest_item = None
+    remaining = token_budget
+    if digest:
+        digest = fit_digest(digest, token_budget // 2)
+        digest_item = {'role': 'system', 'content': f"[DATA]{digest}[/DATA]"}
+        remaining -= estimate_item_tokens(digest_item)
+
+    kept = []
+    for i, turn in enumerate(reversed(split_turns(items))):
+        cost = sum(estimate_item_tokens(t) for t in turn)
+        if i >= min_recent_turns and cost > remaining:
+            break
+        kept[:0] = turn
+        remaining -= cost
+
+    return ([digest_item] if digest_item else []) + kept
+
+
+class CompactingSession(SessionABC):
+    """Session wrapper that replays a token-budgeted view of the wrapped session."""
+
+    def __init__(self, inner, token_budget: int, digest: str | None = None, min_recent_turns: int = 1):
+        self.inner = inner
+        self.session_id = inner.session_id
+        self.session_settings = getattr(inner, 'session_settings', None)
+        self.token_budget = token_budget
+        self.digest = digest
+        self.min_recent_turns = min_recent_turns
+
+    async def get_items(self, limit: int | None = None) -> list:
+        with redis_call_duration.time(op='session_get_items'), timed('redis'):
+            items = await self.inner.get_items(limit)
+        compacted = compact_history(items, self.token_budget, self.digest, self.min_recent_turns)
+        if len(compacted) != len(items):
+            logger.debug(
+                f"Compacted history for {self.session_id}: {len(items)} -> {len(compacted)} items"
+            )
+        return compacted
+
+    async def add_items(self, items: list) -> None:
+        with redis_call_duration.time(op='session_add_items'), timed('redis'):
+            await self.inner.add_items(items)
+
+    async def pop_item(self):
+        return await self.inner.pop_item()
+
+    async def clear_session(self) -> None:
+        await self.inner.clear_session()
@@ -3,7 +3,6 @@
 # Import libraries
 import os
 import logging
-import sys
 from flask import Flask, request
 from flask_restful import Api
 from flask_migrate import Migrate
@@ -12,14 +11,27 @@ from flask_cors import CORS
 from extensions import db, jwt, limiter
 from resources import WordListResource, WordResource, WordMarkAsMasteredResource, RerateWordResource, UserListResource, UserResource, HomeResource, TokenResource, TokenRefreshResource, TokenRevokeResource, MeResource
 from practice_resources import PracticeSessionResource, PracticeSessionDetailResource, PracticeMessageResource, PracticeNextWordResource, PracticeSummaryResource, PracticeEndSessionResource
-from progress_resources import ProgressStatsResource
+from progress_resources import ProgressStatsResource, ForecastResource
 from settings_resources import UserSettingsResource, UserSettingsKeyResource, UserSettingsKeyValidateResource
 from report_card_resources import ReportCardResource, GenerateFeedbackResource, StreakResource
 from password_reset_resources import PasswordResetRequestResource, PasswordResetResource
 from account_resources import AccountDeleteResource
+from bootstrap_resources import BootstrapResource
+from sync_resources import SyncResource
 from deck_resources import deck_bp
+from ai_layer.memory_service import outbox_worker
+from email_service import email_outbox_worker
+from cli import laoshi_cli
+from schema import migrate_database, migration_lock
 from models import TokenBlocklist
 from config import Config
+from logging_setup import configure_logging
+from metrics import MetricsResource, init_app as init_metrics
+from server_timing import init_app as init_server_timing
+from query_inspector import init_app as init_query_inspector
+from due_queue import init_app as init_due_queue
+from sync import init_app as init_sync
+import password_hashing
 
 
 def register_extensions(app):
@@ -29,6 +41,11 @@ def register_extensions(app):
     jwt.init_app(app)
     CORS(app)
     limiter.init_app(app)
+    init_metrics(app)
+    init_server_timing(app)
+    init_query_inspector(app)
+    init_due_queue(app)
+    init_sync(app)
     # Set default rate limits
     limiter.default_limits = ["200 per minute"]
 
@@ -71,6 +88,7 @@ def register_resources(app):
 
     # Progress and settings endpoints
     api.add_resource(ProgressStatsResource, '/progress/stats')
+    api.add_resource(ForecastResource, '/progress/forecast')
     api.add_resource(UserSettingsResource, '/settings')
     api.add_resource(UserSettingsKeyResource, '/settings/keys/<string:provider>')
     api.add_resource(UserSettingsKeyValidateResource, '/settings/keys/<string:provider>/validate')
@@ -80,6 +98,12 @@ def register_resources(app):
     api.add_resource(GenerateFeedbackResource, '/progress/generate-feedback')
     api.add_resource(StreakResource, '/progress/streak')
 
+    # Home screen data in one request
+    api.add_resource(BootstrapResource, '/bootstrap')
+
+    # Delta sync for offline clients
+    api.add_resource(SyncResource, '/sync')
+
     # Password reset endpoints (public)
     api.add_resource(PasswordResetRequestResource, '/password-reset/request')
     api.add_resource(PasswordResetResource, '/password-reset/reset')
@@ -87,32 +111,20 @@ def register_resources(app):
     # Account management
     api.add_resource(AccountDeleteResource, '/account')
 
+    # Prometheus metrics (optionally protected by METRICS_TOKEN)
+    api.add_resource(MetricsResource, '/metrics')
+
 def create_app(config_class=None):
     app = Flask(__name__)
     if config_class is None:
         config_class = Config
     app.config.from_object(config_class)
 
-    # Configure logging to stdout - force reconfiguration
-    logging.basicConfig(
-        stream=sys.stdout,
-        level=logging.DEBUG,
-        format='%(asctime)s %(levelname)s [%(name)s] %(message)s',
-        force=True  # Force reconfiguration even if already configured
-    )
-
-    # Also configure specific loggers explicitly
-    app.logger.setLevel(logging.DEBUG)
-    logging.getLogger('practice_resources').setLevel(logging.DEBUG)
-    logging.getLogger('ai_layer.practice_runner').setLevel(logging.DEBUG)
+    configure_logging(app.config)
+    password_hashing.configure(app.config)
 
     logger = logging.getLogger(__name__)
-    logger.info("=" * 80)
-    logger.info("BACKEND SERVER STARTING")
-    logger.info("=" * 80)
-    print("=" * 80, flush=True)  # Also print directly to ensure it appears
-    print("BACKEND SERVER STARTING", flush=True)
-    print("=" * 80, flush=True)
+    logger.info("Backend server starting")
 
     # Validate required config
     if not app.config.get('ENCRYPTION_KEY'):
@@ -120,6 +132,7 @@ def create_app(config_class=None):
 
     register_extensions(app)
     register_resources(app)
+    app.cli.add_command(laoshi_cli)
 
     # API versioning: rewrite /api/v1/ to /api/ for development
     # In production, Nginx handles this rewrite
@@ -128,29 +141,27 @@ def create_app(config_class=None):
         if request.path.startswith('/api/v1/'):
             request.environ['PATH_INFO'] = request.path.replace('/api/v1/', '/api/', 1)
 
+    @app.errorhandler(password_hashing.HashingBusy)
+    def handle_hashing_busy(e):
+        return {"message": "Server is busy, please try again shortly."}, 503, {"Retry-After": "1"}
+
     @app.errorhandler(Exception)
     def handle_unhandled_exception(e):
         logger.exception("Unhandled exception: %s", e)
         return {"error": "An internal error occurred"}, 500
 
-    # Ensure all tables exist before first request
-    with app.app_context():
-        from flask_migrate import upgrade, stamp
-        from sqlalchemy import inspect
-
-        inspector = inspect(db.engine)
-        tables = inspector.get_table_names()
+    # Schema changes are applied with `flask laoshi migrate`. AUTO_MIGRATE opts back
+    # into migrating at startup, serialized across workers by an advisory lock.
+    if app.config.get('AUTO_MIGRATE'):
+        with app.app_context():
+            with migration_lock(app.config.get('MIGRATION_LOCK_TIMEOUT_SECONDS')):
+                migrate_database()
 
-        if not tables or tables == ['alembic_version']:
-            # Fresh database: create all tables from current models, then
-            # stamp migration head so Alembic knows no migrations need to run
-            db.create_all()
-            stamp(revision='head')
-        else:
-            # Existing database: apply any pending migrations
-            upgrade()
+    # Background writers for queued mem0 updates and transactional emails
+    outbox_worker.init_app(app)
+    email_outbox_worker.init_app(app)
 
-    logger.info("App startup complete. Tables verified.")
+    logger.info("App startup complete.")
     return app
 
 app = create_app()
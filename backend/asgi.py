@@ -0,0 +1,47 @@
+"""ASGI entry point: async practice endpoints in front of the Flask app.
+
+    uvicorn asgi:app --host 0.0.0.0 --port 5000 --workers 4
+
+The endpoints that wait on LLM calls (see async_resources.py) are served
+natively on the event loop; every other route falls through to the Flask app,
+which runs in a thread pool of ASGI_WSGI_THREADS threads.
+"""
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.routing import Mount, Route
+
+from async_resources import ASYNC_ROUTES
+
+
+def create_asgi_app(flask_app, async_routes=True, wsgi_threads=None):
+    """Wrap flask_app for ASGI. With async_routes=False every request goes through Flask."""
+    routes = []
+    if async_routes:
+        # Same CORS behaviour as flask_cors' CORS(app) for the Flask routes
+        cors = [Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'])]
+        for prefix in ('/api', '/api/v1'):
+            for path, handler in ASYNC_ROUTES:
+                routes.append(Route(prefix + path, handler, methods=['POST', 'OPTIONS'], middleware=cors))
+    if wsgi_threads is None:
+        wsgi_threads = flask_app.config['ASGI_WSGI_THREADS']
+    routes.append(Mount('/', app=WSGIMiddleware(flask_app, workers=wsgi_threads)))
+
+    asgi_app = Starlette(routes=routes)
+    asgi_app.state.flask_app = flask_app
+    return asgi_app
+
+
+def _default_app():
+    from app import app as flask_app
+    return create_asgi_app(flask_app)
+
+
+def __getattr__(name):
+    # Build the default app on first access so tests can import create_asgi_app
+    # without constructing the module-level Flask app.
+    if name == 'app':
+        globals()['app'] = _default_app()
+        return globals()['app']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
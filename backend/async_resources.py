@@ -0,0 +1,212 @@
+"""Async (ASGI) handlers for the endpoints that wait on LLM calls.
+
+Served by asgi.py. Each handler pushes a Flask app context for the request,
+runs blocking work (auth, DB) in the DB thread pool and awaits agent runs on
+the server's event loop, so a worker isn't tied up for the seconds an LLM
+call takes. Validation, error bodies and status codes match the Flask
+resources in practice_resources.py and settings_resources.py.
+"""
+import logging
+
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException, NoAuthorizationError, RevokedTokenError
+from jwt.exceptions import ExpiredSignatureError, PyJWTError
+from limits import parse
+from openai import RateLimitError
+from starlette.responses import JSONResponse
+
+from ai_layer.practice_runner import (
+    initialize_session_async, handle_message_async, advance_word_async, complete_session_async,
+)
+from async_utils import run_in_db_pool
+from extensions import db, limiter
+from metrics import finish_request, start_request
+import server_timing
+import query_inspector
+from practice_resources import (
+    RATE_LIMIT_RESPONSE, MESSAGE_RATE_LIMIT, validate_session_request, validate_message_request,
+    validate_quality_request, skip_remaining_words, error_status, PracticeMessageResource,
+)
+from settings_resources import validate_key_request, check_provider_key, save_provider_key
+
+logger = logging.getLogger(__name__)
+
+
+# Flask-JWT-Extended's status codes for the auth failures it raises; anything else is 422
+AUTH_ERROR_STATUS = {NoAuthorizationError: 401, ExpiredSignatureError: 401, RevokedTokenError: 401}
+
+
+def _authenticate(flask_app, authorization: str | None):
+    """Verify the access token as @jwt_required() does. Returns (user_id, None) or (None, (body, status))."""
+    headers = {'Authorization': authorization} if authorization else {}
+    with flask_app.test_request_context(headers=headers):
+        try:
+            verify_jwt_in_request()
+        except (JWTExtendedException, PyJWTError) as e:
+            return None, ({'message': str(e)}, AUTH_ERROR_STATUS.get(type(e), 422))
+        return int(get_jwt_identity()), None
+
+
+async def _json_body(request):
+    try:
+        return await request.json()
+    except ValueError:
+        return None
+
+
+def _rate_limited(request, limit: str, resource) -> bool:
+    """Count the request against resource's Flask-Limiter bucket.
+
+    Flask-Limiter keys a decorated limit by client address and endpoint name
+    (Flask-RESTful's is the lowercased class name), not by URL, so every
+    session id and both /api prefixes share one budget on either server.
+    """
+    if not limiter.enabled or limiter.limiter is None:
+        return False
+    key = request.client.host if request.client else '127.0.0.1'
+    return not limiter.limiter.hit(parse(limit), key, resource.__name__.lower())
+
+
+def async_endpoint(handler):
+    """Run handler(request, user_id) inside a Flask app context with JWT auth."""
+    async def endpoint(request):
+        flask_app = request.app.state.flask_app
+        app_ctx = flask_app.app_context()
+        app_ctx.push()
+        metrics_token = start_request()
+        timing_token = server_timing.start()
+        inspector_mode = flask_app.config.get('SQL_INSPECTOR_MODE', 'log')
+        inspector_token = query_inspector.start() if inspector_mode != 'off' else None
+        status = 500
+        try:
+            try:
+                user_id, auth_error = await run_in_db_pool(
+                    _authenticate, flask_app, request.headers.get('Authorization')
+                )
+                body, status = auth_error or await handler(request, user_id)
+            except Exception as e:
+                logger.exception(f"Unhandled exception in {request.url.path}: {e}")
+                body, status = {'error': 'An internal error occurred'}, 500
+            finally:
+                # Release the DB connection from a pool thread; popping then runs teardown on a clean session
+                await run_in_db_pool(db.session.remove)
+            timings = server_timing.finish(timing_token)
+            finish_request(metrics_token, f'async.{handler.__name__}', request.method, status)
+            if inspector_token is not None:
+                violation = query_inspector.finish(inspector_token, f'async.{handler.__name__}', flask_app.config)
+                if violation is not None:
+                    query_inspector.handle(violation, inspector_mode)
+
+            headers = {}
+            if flask_app.config.get('SERVER_TIMING_ENABLED', True):
+                headers['Server-Timing'] = server_timing.header_value(timings)
+                headers['Timing-Allow-Origin'] = '*'
+                if flask_app.config.get('SERVER_TIMING_JSON') and isinstance(body, dict):
+                    body = {**body, server_timing.JSON_FIELD: server_timing.json_value(timings)}
+            return JSONResponse(body, status_code=status, headers=headers)
+        finally:
+            app_ctx.pop()
+    endpoint.__name__ = handler.__name__
+    return endpoint
+
+
+@async_endpoint
+async def create_session(request, user_id):
+    data = await _json_body(request) or {}
+    deck_id, words_count, language, error = validate_session_request(data)
+    if error:
+        return {'error': error}, 400
+
+    try:
+        result, error = await initialize_session_async(user_id, deck_id, words_count, language)
+    except RateLimitError as e:
+        logger.warning(f"AI rate limit hit during session init: {e}")
+        return RATE_LIMIT_RESPONSE, 429
+    if error:
+        return {'error': error}, 400
+    return result, 201
+
+
+@async_endpoint
+async def send_message(request, user_id):
+    if _rate_limited(request, MESSAGE_RATE_LIMIT, PracticeMessageResource):
+        return {"error": "Rate limit exceeded. Try again later."}, 429
+    session_id = request.path_params['id']
+    message, error = validate_message_request(await _json_body(request))
+    if error:
+        return {'error': error}, 400
+
+    try:
+        logger.debug(f"Processing message for session {session_id}, user {user_id}")
+        result, error = await handle_message_async(session_id, user_id, message)
+    except RateLimitError as e:
+        logger.warning(f"AI rate limit hit during message: {e}")
+        return RATE_LIMIT_RESPONSE, 429
+    except Exception as e:
+        logger.error(f"Error in handle_message for session {session_id}, user {user_id}: "
+                     f"{type(e).__name__}: {e}", exc_info=True)
+        return {'error': 'An internal error occurred'}, 500
+    if error:
+        return {'error': error}, error_status(error)
+    return result, 200
+
+
+@async_endpoint
+async def next_word(request, user_id):
+    session_id = request.path_params['id']
+    quality, error = validate_quality_request(await _json_body(request) or {})
+    if error:
+        return {'error': error}, 400
+
+    try:
+        result, error = await advance_word_async(session_id, user_id, quality)
+    except RateLimitError as e:
+        logger.warning(f"AI rate limit hit during advance_word: {e}")
+        return RATE_LIMIT_RESPONSE, 429
+    except Exception as e:
+        logger.exception(f"Unexpected error in next-word for session {session_id}: {type(e).__name__}: {e}")
+        return {'error': 'An unexpected error occurred. Please try again.'}, 500
+    if error:
+        return {'error': error}, error_status(error)
+    return result, 200
+
+
+@async_endpoint
+async def end_session(request, user_id):
+    session_id = request.path_params['id']
+    error, status = await run_in_db_pool(skip_remaining_words, session_id, user_id)
+    if error:
+        return {'error': error}, status
+
+    try:
+        result, error = await complete_session_async(session_id, user_id)
+    except RateLimitError as e:
+        logger.warning(f"AI rate limit hit during session end: {e}")
+        return RATE_LIMIT_RESPONSE, 429
+    if error:
+        return {'error': error}, 400
+    return result, 200
+
+
+@async_endpoint
+async def validate_key(request, user_id):
+    provider = request.path_params['provider']
+    api_key, error = validate_key_request(provider, await _json_body(request))
+    if error:
+        return {"error": error}, 400
+
+    is_valid, error = await check_provider_key(provider, api_key)
+    if not is_valid:
+        return {"valid": False, "error": error}, 200
+
+    return await run_in_db_pool(save_provider_key, user_id, provider, api_key), 200
+
+
+# (path, handler) pairs, mounted under /api and /api/v1 by asgi.py
+ASYNC_ROUTES = [
+    ('/practice/sessions', create_session),
+    ('/practice/sessions/{id:int}/messages', send_message),
+    ('/practice/sessions/{id:int}/next-word', next_word),
+    ('/practice/sessions/{id:int}/end', end_session),
+    ('/settings/keys/{provider:str}/validate', validate_key),
+]
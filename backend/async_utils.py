@@ -0,0 +1,115 @@
+"""Process-wide background event loop for running async code from sync Flask views.
+
+asyncio.run() creates (and tears down) a fresh event loop on every call, so
+nothing bound to a loop -- async Redis connections, httpx connection pools
+inside AsyncOpenAI clients -- can be reused across requests. Instead, all
+async work is dispatched onto one long-lived loop running in a daemon thread.
+The loop is recreated after fork (e.g. in each gunicorn worker).
+
+In ASGI mode the roles flip: agent runs are awaited on the server's loop and
+blocking DB work is pushed to a bounded thread pool with run_in_db_pool().
+"""
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_loop = None
+_thread = None
+_pid = None
+_db_executor = None
+_db_executor_pid = None
+
+# Loop that agent runs for the current request will be awaited on. Set by the
+# ASGI handlers so code running in the DB pool binds async clients to it.
+agent_loop: contextvars.ContextVar[asyncio.AbstractEventLoop | None] = contextvars.ContextVar(
+    'agent_loop', default=None
+)
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    """Return the shared background loop, starting it on first use (per process)."""
+    global _loop, _thread, _pid
+    with _lock:
+        if _loop is None or _pid != os.getpid() or not _thread.is_alive():
+            _loop = asyncio.new_event_loop()
+            _thread = threading.Thread(
+                target=_loop.run_forever, name='laoshi-async-loop', daemon=True
+            )
+            _thread.start()
+            _pid = os.getpid()
+            logger.info("Started background event loop")
+        return _loop
+
+
+async def _run_in_context(coro, ctx):
+    # Run the coroutine as a task bound to the caller's contextvars (e.g. the
+    # Flask app context), not the background thread's.
+    return await asyncio.get_running_loop().create_task(coro, context=ctx)
+
+
+def run_sync(coro, timeout=None):
+    """Run a coroutine on the background loop and block until it completes."""
+    loop = get_loop()
+    if threading.current_thread() is _thread:
+        coro.close()
+        raise RuntimeError("run_sync() cannot be called from the background event loop")
+    ctx = contextvars.copy_context()
+    future = asyncio.run_coroutine_threadsafe(_run_in_context(coro, ctx), loop)
+    return future.result(timeout=timeout)
+
+
+def _get_db_executor() -> ThreadPoolExecutor:
+    global _db_executor, _db_executor_pid
+    with _lock:
+        if _db_executor is None or _db_executor_pid != os.getpid():
+            from config import Config
+            _db_executor = ThreadPoolExecutor(
+                max_workers=Config.ASYNC_DB_THREADS, thread_name_prefix='laoshi-db'
+            )
+            _db_executor_pid = os.getpid()
+        return _db_executor
+
+
+def release_db_connection():
+    """Commit the open transaction without expiring loaded objects.
+
+    Hands the connection back to the pool while keeping ORM state usable, so
+    a request awaiting an LLM call between DB segments doesn't hold one.
+    """
+    from flask import has_app_context
+    from extensions import db
+
+    if not has_app_context():
+        return
+    session = db.session()
+    expire_on_commit = session.expire_on_commit
+    session.expire_on_commit = False
+    try:
+        session.commit()
+    finally:
+        session.expire_on_commit = expire_on_commit
+
+
+def _call_and_release(fn, args, kwargs):
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        release_db_connection()
+
+
+async def run_in_db_pool(fn, *args, **kwargs):
+    """Run blocking (DB) work in the bounded DB thread pool with the caller's contextvars.
+
+    The connection is released when fn returns: a request holding one while it
+    waits for a pool thread could otherwise deadlock the pool under load.
+    """
+    ctx = contextvars.copy_context()
+    call = functools.partial(ctx.run, _call_and_release, fn, args, kwargs)
+    return await asyncio.get_running_loop().run_in_executor(_get_db_executor(), call)
@@ -0,0 +1,168 @@
+"""Benchmark: concurrent practice sessions per worker, threaded Flask vs async endpoints.
+
+Serves the app with uvicorn (one worker, in-process) against a temporary SQLite
+database, with both LLM providers pointed at an in-process benchmarks.fake_llm
+server that answers after --latency seconds per call. Fires --sessions
+concurrent practice messages, each in its own session, and reports throughput,
+latency percentiles and how many LLM calls were in flight at once:
+
+- sync:  every request goes through Flask in a pool of --threads threads
+         (the gunicorn gthread model), so at most --threads calls overlap.
+- async: the practice endpoints are served by async_resources.py and await
+         the LLM on the event loop; only the DB work uses threads.
+
+Usage (from backend/):
+    python -m benchmarks.bench_async_load --sessions 64 --latency 3 --threads 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(BACKEND_DIR))
+_TMP = tempfile.TemporaryDirectory()
+
+from benchmarks.fake_llm import Behaviour, create_app as create_fake_llm  # noqa: E402
+from benchmarks.serving import free_port, serve  # noqa: E402
+
+# The fake LLM is started in run(); the app needs its URL at import time
+LLM_PORT = free_port()
+
+# The app reads its configuration at import time
+os.environ.update({
+    'SQLALCHEMY_DATABASE_URI': f"sqlite:///{Path(_TMP.name) / 'load.db'}",
+    'MEMORY_OUTBOX_WORKER': 'false',
+    'EMAIL_OUTBOX_WORKER': 'false',
+    'MEMORY_BACKEND': 'local',
+    'JWT_SECRET_KEY': os.environ.get('JWT_SECRET_KEY', 'bench-secret-key-bench-secret-key'),
+    'OPENAI_AGENTS_DISABLE_TRACING': '1',
+})
+for provider in ('DEEPSEEK', 'GEMINI'):
+    os.environ.update({f'{provider}_BASE_URL': f'http://127.0.0.1:{LLM_PORT}/v1', f'{provider}_API_KEY': 'fake',
+                       f'{provider}_MODEL_NAME': 'fake'})
+os.environ.pop('REDIS_URI', None)
+os.environ.pop('ANTHROPIC_API_KEY', None)
+
+import httpx  # noqa: E402
+from flask_jwt_extended import create_access_token  # noqa: E402
+
+from ai_layer.registry import registry  # noqa: E402
+from app import create_app  # noqa: E402
+from asgi import create_asgi_app  # noqa: E402
+from config import Config  # noqa: E402
+from models import User, Deck, Word, UserSession, SessionWord  # noqa: E402
+from schema import migrate_database  # noqa: E402
+
+
+class BenchConfig(Config):
+    RATELIMIT_ENABLED = False
+    # SQLite connections may be used from more than one DB pool thread per request
+    SQLALCHEMY_ENGINE_OPTIONS = {'connect_args': {'check_same_thread': False, 'timeout': 30}}
+
+
+def seed(flask_app, sessions):
+    """Create one user, a deck and `sessions` open practice sessions. Returns (token, session ids)."""
+    with flask_app.app_context():
+        migrate_database()
+        user = User(username='loaduser', email='load@example.com', password='unused')
+        user.add()
+        deck = Deck(name='Load Deck', user_id=user.id, language='ZH')
+        deck.add()
+        word = Word(user_id=user.id, deck_id=deck.id, word='你好', reading='ni hao', meaning='hello')
+        word.add()
+        ids = []
+        for _ in range(sessions):
+            session = UserSession(user_id=user.id, deck_id=deck.id)
+            session.add()
+            SessionWord(session_id=session.id, word_id=word.id, word_order=0, status=0).add()
+            ids.append(session.id)
+        return create_access_token(identity=str(user.id)), ids
+
+
+async def fire(base_url, token, session_ids):
+    headers = {'Authorization': f'Bearer {token}'}
+    limits = httpx.Limits(max_connections=len(session_ids))
+    async with httpx.AsyncClient(base_url=base_url, headers=headers, limits=limits, timeout=600) as client:
+        async def one(session_id):
+            start = time.perf_counter()
+            resp = await client.post(f'/api/practice/sessions/{session_id}/messages',
+                                     json={'message': '你好，我是学生。'})
+            return resp.status_code, time.perf_counter() - start
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(one(sid) for sid in session_ids))
+        return results, time.perf_counter() - start
+
+
+def run_mode(flask_app, llm, token, session_ids, async_routes, threads):
+    llm.stats.clear()
+    llm.peak_in_flight = llm.in_flight
+    registry.reset()  # provider clients are bound to the event loop that built them
+    server, thread, base_url = serve(create_asgi_app(flask_app, async_routes=async_routes, wsgi_threads=threads))
+    try:
+        results, wall = asyncio.run(fire(base_url, token, session_ids))
+    finally:
+        server.should_exit = True
+        thread.join()
+    latencies = sorted(t for _, t in results)
+    errors = [status for status, _ in results if status != 200]
+    return {
+        'requests': len(results),
+        'errors': len(errors),
+        'wall_s': round(wall, 2),
+        'req_per_s': round(len(results) / wall, 2),
+        'p50_s': round(statistics.median(latencies), 2),
+        'p95_s': round(latencies[int(0.95 * (len(latencies) - 1))], 2),
+        'llm_calls': llm.stats['requests'],
+        'peak_concurrent_llm_calls': llm.peak_in_flight,
+    }
+
+
+def run(sessions, latency, threads):
+    flask_app = create_app(config_class=BenchConfig)
+    token, session_ids = seed(flask_app, sessions * 2)
+    fake_llm = create_fake_llm(Behaviour(latency=f'fixed:{latency * 1000}', tokens_per_s=0))
+    llm_server, llm_thread, _ = serve(fake_llm, port=LLM_PORT)
+    llm = fake_llm.state.fake
+    try:
+        return {
+            'sync': run_mode(flask_app, llm, token, session_ids[:sessions], False, threads),
+            'async': run_mode(flask_app, llm, token, session_ids[sessions:], True, threads),
+        }
+    finally:
+        llm_server.should_exit = True
+        llm_thread.join()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=64, help='concurrent practice sessions')
+    parser.add_argument('--latency', type=float, default=3.0, help='fake LLM latency per call in seconds')
+    parser.add_argument('--threads', type=int, default=4, help='Flask threads per worker')
+    parser.add_argument('--json', action='store_true', help='print raw JSON results')
+    args = parser.parse_args()
+
+    results = run(args.sessions, args.latency, args.threads)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.sessions} concurrent sessions, {args.latency}s LLM latency, 1 worker, {args.threads} Flask threads\n")
+    print(f"{'mode':<6} {'wall s':>8} {'req/s':>8} {'p50 s':>8} {'p95 s':>8} {'peak LLM':>9} {'errors':>7}")
+    for mode, r in results.items():
+        print(f"{mode:<6} {r['wall_s']:>8} {r['req_per_s']:>8} {r['p50_s']:>8} {r['p95_s']:>8} "
+              f"{r['peak_concurrent_llm_calls']:>9} {r['errors']:>7}")
+    sync, async_ = results['sync'], results['async']
+    print(f"\nConcurrent sessions per worker: {sync['peak_concurrent_llm_calls']} -> "
+          f"{async_['peak_concurrent_llm_calls']} "
+          f"({async_['peak_concurrent_llm_calls'] / max(sync['peak_concurrent_llm_calls'], 1):.0f}x); "
+          f"throughput {async_['req_per_s'] / sync['req_per_s']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""Benchmark: replayed prompt size vs. turn count, with and without history compaction.
+
+Simulates a practice session where each word gets a few sentence attempts
+(user message -> evaluate_sentence tool call/output -> Laoshi reply) plus a
+next-word introduction, and reports the estimated tokens the orchestrator would
+replay on each turn.
+
+Usage (from backend/):
+    python -m benchmarks.bench_history_compaction --words 50 --attempts 2 --budget 3000
+"""
+import argparse
+import json
+import time
+from types import SimpleNamespace
+
+from ai_layer.session_history import build_word_digest, compact_history, estimate_item_tokens
+
+SENTENCE = "我们今天在会议上讨论了这个项目的进度和下一步的计划。"
+FEEDBACK = {
+    'grammarScore': 8, 'usageScore': 9, 'naturalnessScore': 7, 'isCorrect': False,
+    'feedback': '句子结构很好，但是"进度"的搭配可以更自然。',
+    'corrections': ['Consider 项目进展 instead of 项目的进度 in casual speech.'],
+    'explanations': ['进展 emphasises progress made; 进度 is closer to schedule.'],
+    'exampleSentences': ['这个项目进展得很顺利。', '我们要加快进度。'],
+}
+REPLY = ("Nice one! Your grammar is solid, but 进展 would sound more natural here. "
+         "Try: 这个项目进展得很顺利。 Want another go, or move on?")
+
+
+def simulate_turn(word_index, attempt):
+    call_id = f"call_{word_index}_{attempt}"
+    return [
+        {'role': 'user', 'content': SENTENCE},
+        {'type': 'function_call', 'call_id': call_id, 'name': 'evaluate_sentence',
+         'arguments': json.dumps({'input': SENTENCE}, ensure_ascii=False)},
+        {'type': 'function_call_output', 'call_id': call_id,
+         'output': json.dumps(FEEDBACK, ensure_ascii=False)},
+        {'type': 'message', 'role': 'assistant',
+         'content': [{'type': 'output_text', 'text': REPLY}]},
+    ]
+
+
+def simulate_session_words(completed):
+    rows, attempts = [], []
+    for i in range(completed):
+        word = SimpleNamespace(word=f"词{i}", reading=f"ci{i}")
+        rows.append(SimpleNamespace(
+            word_id=i, word=word, word_order=i, status=1, is_correct=False,
+            grammar_score=8.0, usage_score=9.0, naturalness_score=7.0,
+        ))
+        attempts.append(SimpleNamespace(
+            word_id=i, attempt_number=1, sentence=SENTENCE, feedback_text=FEEDBACK['feedback'],
+        ))
+    return rows, attempts
+
+
+def run(words, attempts_per_word, budget, min_recent_turns):
+    history = []
+    results = []
+    turn = 0
+    for w in range(words):
+        history.append({'role': 'user', 'content': f"The student has moved to the next word. Introduce it: 词{w}"})
+        history.append({'type': 'message', 'role': 'assistant',
+                        'content': [{'type': 'output_text', 'text': REPLY}]})
+        for a in range(attempts_per_word):
+            history.extend(simulate_turn(w, a))
+            turn += 1
+
+            full_tokens = sum(estimate_item_tokens(i) for i in history)
+            session_words, attempts = simulate_session_words(w)
+            start = time.perf_counter()
+            digest = build_word_digest(session_words, attempts)
+            compacted = compact_history(history, budget, digest, min_recent_turns)
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            compacted_tokens = sum(estimate_item_tokens(i) for i in compacted)
+            results.append({
+                'turn': turn,
+                'word': w + 1,
+                'items_full': len(history),
+                'items_compacted': len(compacted),
+                'tokens_full': full_tokens,
+                'tokens_compacted': compacted_tokens,
+                'compaction_ms': round(elapsed_ms, 3),
+            })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--words', type=int, default=50)
+    parser.add_argument('--attempts', type=int, default=2, help='sentence attempts per word')
+    parser.add_argument('--budget', type=int, default=3000, help='token budget')
+    parser.add_argument('--min-recent-turns', type=int, default=2)
+    parser.add_argument('--every', type=int, default=10, help='print every Nth turn')
+    parser.add_argument('--json', action='store_true', help='print raw JSON results')
+    args = parser.parse_args()
+
+    results = run(args.words, args.attempts, args.budget, args.min_recent_turns)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'turn':>5} {'word':>5} {'items':>7} {'->':>3} {'kept':>5} {'tokens':>8} {'->':>3} {'kept':>7} {'ms':>7}")
+    for r in results:
+        if r['turn'] % args.every == 0 or r is results[-1]:
+            print(f"{r['turn']:>5} {r['word']:>5} {r['items_full']:>7} {'':>3} {r['items_compacted']:>5} "
+                  f"{r['tokens_full']:>8} {'':>3} {r['tokens_compacted']:>7} {r['compaction_ms']:>7}")
+    last = results[-1]
+    saved = 1 - last['tokens_compacted'] / last['tokens_full']
+    print(f"\nFinal turn replays {last['tokens_compacted']} of {last['tokens_full']} estimated tokens "
+          f"({saved:.0%} smaller).")
+
+
+if __name__ == '__main__':
+    main()
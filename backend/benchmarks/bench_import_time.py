@@ -0,0 +1,103 @@
+"""Benchmark: cold import time of the backend (python -X importtime), as a regression check.
+
+Imports the target module in a fresh interpreter several times, reports the
+median total import time and the slowest top-level imports, and fails when the
+median exceeds --max-ms or when any --forbid module (by default the mem0 SDK,
+which must only load on first use) shows up in the import graph.
+
+Usage (from backend/):
+    python -m benchmarks.bench_import_time --runs 5 --max-ms 4000
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def parse_importtime(stderr: str) -> list[dict]:
+    """Parse `-X importtime` lines into {'module', 'self_us', 'cumulative_us', 'depth'} dicts."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+        rows.append({
+            'module': name.strip(),
+            'self_us': int(self_us),
+            'cumulative_us': int(cumulative_us),
+            'depth': (len(name) - len(name.lstrip(' '))) // 2,
+        })
+    return rows
+
+
+def measure(module: str) -> list[dict]:
+    env = dict(os.environ)
+    env.setdefault('SQLALCHEMY_DATABASE_URI', 'sqlite:///:memory:')
+    env.setdefault('MEMORY_OUTBOX_WORKER', 'false')
+    env.setdefault('EMAIL_OUTBOX_WORKER', 'false')
+    proc = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    return parse_importtime(proc.stderr)
+
+
+def run(module: str, runs: int, forbid: list[str]) -> dict:
+    totals, last = [], []
+    for _ in range(runs):
+        rows = measure(module)
+        target = next(r for r in reversed(rows) if r['module'] == module)
+        totals.append(target['cumulative_us'] / 1000)
+        last = rows
+    imported = {r['module'] for r in last}
+    forbidden = sorted(m for m in imported for f in forbid if m == f or m.startswith(f + '.'))
+    top_level = sorted((r for r in last if r['depth'] == 1), key=lambda r: r['cumulative_us'], reverse=True)
+    return {
+        'module': module,
+        'runs': [round(t, 1) for t in totals],
+        'median_ms': round(statistics.median(totals), 1),
+        'modules_imported': len(imported),
+        'forbidden_imported': forbidden,
+        'slowest': [{'module': r['module'], 'ms': round(r['cumulative_us'] / 1000, 1)} for r in top_level],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--module', default='app', help='module to import')
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--top', type=int, default=12, help='number of slowest imports to list')
+    parser.add_argument('--max-ms', type=float, default=None, help='fail if the median exceeds this')
+    parser.add_argument('--forbid', nargs='*', default=['mem0'], help='modules that must not be imported')
+    parser.add_argument('--json', action='store_true', help='print raw JSON results')
+    args = parser.parse_args()
+
+    result = run(args.module, args.runs, args.forbid)
+    result['slowest'] = result['slowest'][:args.top]
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print(f"import {result['module']}: median {result['median_ms']} ms over {args.runs} runs "
+              f"({result['modules_imported']} modules)")
+        print(f"\n{'ms':>9}  top-level import")
+        for r in result['slowest']:
+            print(f"{r['ms']:>9}  {r['module']}")
+
+    failures = []
+    if result['forbidden_imported']:
+        failures.append(f"forbidden modules imported: {', '.join(result['forbidden_imported'])}")
+    if args.max_ms is not None and result['median_ms'] > args.max_ms:
+        failures.append(f"median {result['median_ms']} ms exceeds --max-ms {args.max_ms}")
+    if failures:
+        raise SystemExit("FAIL: " + "; ".join(failures))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""Benchmark: login throughput under concurrency, and what a login storm does to other requests.
+
+Serves the app with uvicorn (one worker, in-process, --threads Flask threads)
+against a temporary SQLite database with --users users hashed at production
+cost. For --duration seconds, --logins clients log in back to back while
+--probes clients keep fetching GET /api/decks (cheap, practice-like traffic).
+Runs twice:
+
+- inline:  hashing runs in the request thread (PASSWORD_HASH_THREADS=0), the
+           old behaviour: every thread can be busy hashing at once
+- bounded: hashing runs in a --hash-threads pool with a short queue; excess
+           logins are shed with 503 + Retry-After
+
+Reports logins/s, login latency, shed logins and probe latency per mode.
+
+Usage (from backend/):
+    python -m benchmarks.bench_login --logins 32 --probes 4 --duration 10 --rounds 29000
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+_TMP = tempfile.TemporaryDirectory()
+
+# The app reads its configuration at import time
+os.environ.update({
+    'SQLALCHEMY_DATABASE_URI': f"sqlite:///{Path(_TMP.name) / 'login.db'}",
+    'MEMORY_OUTBOX_WORKER': 'false',
+    'EMAIL_OUTBOX_WORKER': 'false',
+    'MEMORY_BACKEND': 'local',
+    'SQL_INSPECTOR_MODE': 'off',
+    'JWT_SECRET_KEY': os.environ.get('JWT_SECRET_KEY', 'bench-secret-key-bench-secret-key'),
+})
+for provider in ('DEEPSEEK', 'GEMINI'):
+    os.environ.setdefault(f'{provider}_BASE_URL', 'http://fake-llm.invalid/v1')
+    os.environ.setdefault(f'{provider}_API_KEY', 'fake')
+    os.environ.setdefault(f'{provider}_MODEL_NAME', 'fake')
+os.environ.pop('REDIS_URI', None)
+sys.path.insert(0, str(BACKEND_DIR))
+
+import httpx  # noqa: E402
+from flask_jwt_extended import create_access_token  # noqa: E402
+
+import password_hashing  # noqa: E402
+from app import create_app  # noqa: E402
+from asgi import create_asgi_app  # noqa: E402
+from benchmarks.serving import serve  # noqa: E402
+from config import Config  # noqa: E402
+from models import User  # noqa: E402
+from schema import migrate_database  # noqa: E402
+
+PASSWORD = 'BenchPass123'
+
+
+class BenchConfig(Config):
+    RATELIMIT_ENABLED = False
+    SQLALCHEMY_ENGINE_OPTIONS = {'connect_args': {'check_same_thread': False, 'timeout': 30}}
+
+
+def seed(flask_app, users):
+    """Create `users` users sharing one password hash. Returns (usernames, a token for probes)."""
+    with flask_app.app_context():
+        migrate_database()
+        hashed = password_hashing.hash_password(PASSWORD)
+        names = []
+        for n in range(users):
+            user = User(username=f'login{n}', email=f'login{n}@bench.example.com', password=hashed)
+            user.add()
+            names.append(user.username)
+        return names, create_access_token(identity=str(user.id))
+
+
+async def storm(base_url, usernames, token, logins, probes, duration):
+    results = {'login': [], 'shed': 0, 'login_errors': 0, 'probe': []}
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=logins + probes)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        async def login_client(n):
+            i = n
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                resp = await client.post('/api/token', json={
+                    'username': usernames[i % len(usernames)], 'password': PASSWORD})
+                if resp.status_code == 200:
+                    results['login'].append(time.perf_counter() - start)
+                elif resp.status_code == 503:
+                    results['shed'] += 1
+                    await asyncio.sleep(float(resp.headers.get('Retry-After', 1)))
+                else:
+                    results['login_errors'] += 1
+                i += logins
+
+        async def probe_client():
+            headers = {'Authorization': f'Bearer {token}'}
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                await client.get('/api/decks', headers=headers)
+                results['probe'].append(time.perf_counter() - start)
+                await asyncio.sleep(0.05)
+
+        await asyncio.gather(*(login_client(n) for n in range(logins)), *(probe_client() for _ in range(probes)))
+    return results
+
+
+def summarize(results, duration):
+    def pct(values, fraction):
+        values = sorted(values)
+        return round(values[int(fraction * (len(values) - 1))] * 1000, 1) if values else None
+
+    return {
+        'logins': len(results['login']),
+        'logins_per_s': round(len(results['login']) / duration, 2),
+        'login_p50_ms': pct(results['login'], 0.5),
+        'login_p95_ms': pct(results['login'], 0.95),
+        'shed_503': results['shed'],
+        'login_errors': results['login_errors'],
+        'probe_requests': len(results['probe']),
+        'probe_p50_ms': pct(results['probe'], 0.5),
+        'probe_p95_ms': pct(results['probe'], 0.95),
+        'probe_mean_ms': round(statistics.fmean(results['probe']) * 1000, 1) if results['probe'] else None,
+    }
+
+
+def run(users, logins, probes, duration, threads, hash_threads, hash_queue, rounds):
+    config = type('LoginBenchConfig', (BenchConfig,), {'PASSWORD_PBKDF2_ROUNDS': rounds})
+    flask_app = create_app(config_class=config)
+    usernames, token = seed(flask_app, users)
+    modes = {
+        'inline': {'PASSWORD_HASH_THREADS': 0},
+        'bounded': {'PASSWORD_HASH_THREADS': hash_threads, 'PASSWORD_HASH_QUEUE': hash_queue,
+                    'PASSWORD_HASH_WAIT': 0.5},
+    }
+    report = {}
+    for mode, settings in modes.items():
+        password_hashing.configure({**flask_app.config, **settings})
+        server, thread, base_url = serve(create_asgi_app(flask_app, wsgi_threads=threads))
+        try:
+            results = asyncio.run(storm(base_url, usernames, token, logins, probes, duration))
+        finally:
+            server.should_exit = True
+            thread.join()
+        report[mode] = summarize(results, duration)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--logins', type=int, default=32, help='concurrent login clients')
+    parser.add_argument('--probes', type=int, default=4, help='concurrent clients fetching /api/decks')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per mode')
+    parser.add_argument('--threads', type=int, default=16, help='Flask threads per worker')
+    parser.add_argument('--hash-threads', type=int, default=2, help='bounded mode: hashing threads')
+    parser.add_argument('--hash-queue', type=int, default=4, help='bounded mode: queued hashing calls')
+    parser.add_argument('--rounds', type=int, default=Config.PASSWORD_PBKDF2_ROUNDS, help='PBKDF2 rounds')
+    parser.add_argument('--json', action='store_true', help='print raw JSON results')
+    args = parser.parse_args()
+
+    report = run(args.users, args.logins, args.probes, args.duration, args.threads,
+                 args.hash_threads, args.hash_queue, args.rounds)
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+    print(f"{args.logins} login clients + {args.probes} probe clients for {args.duration}s, "
+          f"{args.threads} Flask threads, pbkdf2_sha256 {args.rounds} rounds, {os.cpu_count()} CPU(s)\n")
+    print(f"{'mode':<8} {'logins/s':>9} {'login p50':>10} {'login p95':>10} {'shed':>6} "
+          f"{'probe p50':>10} {'probe p95':>10}")
+    for mode, r in report.items():
+        print(f"{mode:<8} {r['logins_per_s']:>9} {r['login_p50_ms']:>10} {r['login_p95_ms']:>10} "
+              f"{r['shed_503']:>6} {r['probe_p50_ms']:>10} {r['probe_p95_ms']:>10}")
+
+
+if __name__ == '__main__':
+    main()
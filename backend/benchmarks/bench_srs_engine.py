@@ -0,0 +1,90 @@
+"""Benchmark: per-word SRS updates vs the array-based engine.
+
+Times, over the same random word states and ratings:
+
+- loop: per-word updates (srs_engine.review_scalar, as Word.update_srs uses) in a Python loop
+- vectorized: one srs_engine.review call over all words
+- replay: --steps reviews per word, per-word loop vs srs_engine.replay
+
+Pure computation; no database or app is involved.
+
+Usage (from backend/):
+    python -m benchmarks.bench_srs_engine --words 1 100 10000 100000 --steps 30
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from srs_engine import NO_REVIEW, replay, review, review_scalar
+
+
+def best_of(fn, repeats: int) -> float:
+    """Return the fastest of `repeats` runs of fn(), in milliseconds."""
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return min(times)
+
+
+def make_states(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return (rng.integers(0, 12, n), rng.integers(1, 400, n),
+            np.round(rng.uniform(1.3, 3.2, n), 2), rng.integers(0, 6, n))
+
+
+def run(sizes: list[int], steps: int, repeats: int) -> list[dict]:
+    results = []
+    for n in sizes:
+        reps, intervals, eases, qualities = make_states(n)
+        py_states = list(zip(reps.tolist(), intervals.tolist(), eases.tolist(), qualities.tolist()))
+        history = np.random.default_rng(1).integers(0, 6, (n, steps))
+        history[np.random.default_rng(2).random((n, steps)) < 0.2] = NO_REVIEW
+        py_history = history.tolist()
+
+        def replay_loop():
+            for row in py_history:
+                state = (0, 1, 2.5)
+                for q in row:
+                    if q != NO_REVIEW:
+                        state = review_scalar(*state, q)
+
+        row = {
+            'words': n,
+            'loop_ms': best_of(lambda: [review_scalar(*s) for s in py_states], repeats),
+            'vectorized_ms': best_of(lambda: review(reps, intervals, eases, qualities), repeats),
+            'replay_loop_ms': best_of(replay_loop, repeats),
+            'replay_vectorized_ms': best_of(lambda: replay(history), repeats),
+        }
+        row['speedup'] = row['loop_ms'] / row['vectorized_ms'] if row['vectorized_ms'] else None
+        row['replay_speedup'] = (row['replay_loop_ms'] / row['replay_vectorized_ms']
+                                 if row['replay_vectorized_ms'] else None)
+        results.append(row)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--words', type=int, nargs='+', default=[1, 100, 10_000, 100_000])
+    parser.add_argument('--steps', type=int, default=30, help='reviews per word for the replay comparison')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--json', action='store_true', help='print raw JSON results')
+    args = parser.parse_args()
+
+    results = run(args.words, args.steps, args.repeats)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'words':>8} {'loop ms':>10} {'vector ms':>10} {'x':>7}"
+          f" {'replay loop':>12} {'replay vec':>11} {'x':>7}")
+    for r in results:
+        print(f"{r['words']:>8} {r['loop_ms']:>10.2f} {r['vectorized_ms']:>10.2f}"
+              f" {r['speedup']:>7.1f} {r['replay_loop_ms']:>12.1f} {r['replay_vectorized_ms']:>11.1f}"
+              f" {r['replay_speedup']:>7.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,217 @@
+"""Benchmark suite: timed API scenarios against a synthetic large user.
+
+Generates a user with benchmarks.datagen (--profile 1k/10k/100k words) in a
+temporary SQLite database, or in --database-url, and times each scenario
+through the Flask test client. The agent runner is stubbed to answer
+instantly, so practice scenarios measure only our own code and SQL. Each
+scenario reports latency percentiles and SQL statements per request.
+Results are written as JSON for benchmarks.compare.
+
+Usage (from backend/):
+    python -m benchmarks.bench_suite --profile 10k --repeat 20 --output results.json
+    python -m benchmarks.compare benchmarks/baselines/suite-1k.json results.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+_TMP = tempfile.TemporaryDirectory()
+
+
+def _configure_environment(database_url):
+    # The app reads its configuration at import time
+    os.environ.update({
+        'SQLALCHEMY_DATABASE_URI': database_url or f"sqlite:///{Path(_TMP.name) / 'suite.db'}",
+        'MEMORY_OUTBOX_WORKER': 'false',
+        'EMAIL_OUTBOX_WORKER': 'false',
+        'MEMORY_BACKEND': 'local',
+        'SQL_INSPECTOR_MODE': 'off',
+        'JWT_SECRET_KEY': os.environ.get('JWT_SECRET_KEY', 'bench-secret-key-bench-secret-key'),
+    })
+    for provider in ('DEEPSEEK', 'GEMINI'):
+        os.environ.setdefault(f'{provider}_BASE_URL', 'http://fake-llm.invalid/v1')
+        os.environ.setdefault(f'{provider}_API_KEY', 'fake')
+        os.environ.setdefault(f'{provider}_MODEL_NAME', 'fake')
+    os.environ.pop('REDIS_URI', None)
+    sys.path.insert(0, str(BACKEND_DIR))
+
+
+async def fake_run(agent, input, context=None, session=None, **kwargs):
+    """Stands in for agents.Runner.run: answers immediately."""
+    return SimpleNamespace(final_output="很好！Try another sentence.", new_items=[])
+
+
+class StatementCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+class Suite:
+    """Shared state for scenarios: a test client, auth headers and the generated user's decks."""
+
+    def __init__(self, client, headers, deck_ids):
+        self.client = client
+        self.headers = headers
+        self.deck_ids = deck_ids
+
+    def get(self, url):
+        return self.client.get(url, headers=self.headers)
+
+    def post(self, url, body=None):
+        return self.client.post(url, json=body or {}, headers=self.headers)
+
+    def open_session(self):
+        resp = self.post('/api/practice/sessions', {'deck_id': self.deck_ids[0], 'words_count': 10})
+        return resp.get_json()['session']['id']
+
+
+# name -> (prepare(suite) -> arg, timed(suite, arg) -> response); prepare is not timed
+SCENARIOS = {
+    'decks_list': (None, lambda s, _: s.get('/api/decks')),
+    'deck_detail': (None, lambda s, _: s.get(f'/api/decks/{s.deck_ids[0]}')),
+    'deck_words_page': (None, lambda s, _: s.get(f'/api/decks/{s.deck_ids[0]}/words?page=3&per_page=50')),
+    'words_list': (None, lambda s, _: s.get('/api/words?page=2&per_page=50')),
+    'words_search': (None, lambda s, _: s.get('/api/words?search=ci12&per_page=50')),
+    'progress_stats': (None, lambda s, _: s.get('/api/progress/stats')),
+    'report_card': (None, lambda s, _: s.get('/api/progress/report-card')),
+    'session_start': (None, lambda s, _: s.post('/api/practice/sessions', {'deck_id': s.deck_ids[0], 'words_count': 10})),
+    'session_message': (Suite.open_session, lambda s, sid: s.post(
+        f'/api/practice/sessions/{sid}/messages', {'message': '我们今天讨论了项目的进度。'})),
+    'session_next_word': (Suite.open_session, lambda s, sid: s.post(
+        f'/api/practice/sessions/{sid}/next-word', {'quality': 4})),
+    'deck_combine': (None, lambda s, _: s.post('/api/decks/combine', {
+        'name': 'Combined', 'source_deck_ids': s.deck_ids[:2]})),
+}
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[int(fraction * (len(sorted_values) - 1))]
+
+
+def run_scenario(suite, counter, prepare, timed, repeat, warmup):
+    timings, statements, statuses = [], [], set()
+    for i in range(warmup + repeat):
+        arg = prepare(suite) if prepare else None
+        counter.count = 0
+        start = time.perf_counter()
+        resp = timed(suite, arg)
+        elapsed = time.perf_counter() - start
+        statuses.add(resp.status_code)
+        if i >= warmup:
+            timings.append(elapsed * 1000)
+            statements.append(counter.count)
+    timings.sort()
+    return {
+        'runs': repeat,
+        'status': sorted(statuses),
+        'mean_ms': round(statistics.fmean(timings), 2),
+        'p50_ms': round(percentile(timings, 0.5), 2),
+        'p95_ms': round(percentile(timings, 0.95), 2),
+        'min_ms': round(timings[0], 2),
+        'queries': max(statements),
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(profile, repeat, warmup, only=None, database_url=None, seed=0):
+    _configure_environment(database_url)
+    from flask_jwt_extended import create_access_token
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    from app import create_app
+    from benchmarks.datagen import PROFILES, generate_profile
+    from config import Config
+    from models import Deck
+    from schema import migrate_database
+
+    class BenchConfig(Config):
+        RATELIMIT_ENABLED = False
+
+    flask_app = create_app(config_class=BenchConfig)
+    with flask_app.app_context():
+        migrate_database()
+        start = time.perf_counter()
+        user_id = generate_profile(profile, f'suite{profile}_{int(time.time())}', seed)
+        generate_s = time.perf_counter() - start
+        token = create_access_token(identity=str(user_id))
+        deck_ids = [d.id for d in Deck.query.filter_by(user_id=user_id).order_by(Deck.id)]
+
+    counter = StatementCounter()
+    event.listen(Engine, 'after_cursor_execute', counter)
+    suite = Suite(flask_app.test_client(), {'Authorization': f'Bearer {token}'}, deck_ids)
+    results = {}
+    try:
+        with patch('ai_layer.practice_runner.Runner.run', new=fake_run):
+            for name, (prepare, timed) in SCENARIOS.items():
+                if only and name not in only:
+                    continue
+                results[name] = run_scenario(suite, counter, prepare, timed, repeat, warmup)
+    finally:
+        event.remove(Engine, 'after_cursor_execute', counter)
+
+    return {
+        'meta': {
+            'profile': profile,
+            'sizes': PROFILES[profile],
+            'repeat': repeat,
+            'warmup': warmup,
+            'database': flask_app.config['SQLALCHEMY_DATABASE_URI'].split(':', 1)[0],
+            'generate_s': round(generate_s, 2),
+            'git_revision': _git_revision(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        },
+        'scenarios': results,
+    }
+
+
+def main():
+    from benchmarks.datagen import PROFILES
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--profile', choices=PROFILES, default='1k')
+    parser.add_argument('--repeat', type=int, default=20, help='timed runs per scenario')
+    parser.add_argument('--warmup', type=int, default=2, help='untimed runs per scenario')
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS, help='run only these (repeatable)')
+    parser.add_argument('--database-url', help='benchmark against this database instead of a temporary SQLite file')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='write JSON results to this file')
+    args = parser.parse_args()
+
+    results = run(args.profile, args.repeat, args.warmup, args.scenario, args.database_url, args.seed)
+    if args.output:
+        Path(args.output).write_text(json.dumps(results, indent=2) + '\n')
+
+    meta = results['meta']
+    print(f"profile {meta['profile']} ({meta['sizes']['words']} words, {meta['sizes']['sessions']} sessions), "
+          f"{meta['repeat']} runs per scenario, data generated in {meta['generate_s']}s\n")
+    print(f"{'scenario':<20} {'p50 ms':>9} {'p95 ms':>9} {'mean ms':>9} {'queries':>8}  status")
+    for name, r in results['scenarios'].items():
+        print(f"{name:<20} {r['p50_ms']:>9} {r['p95_ms']:>9} {r['mean_ms']:>9} {r['queries']:>8}  {r['status']}")
+
+
+if __name__ == '__main__':
+    main()
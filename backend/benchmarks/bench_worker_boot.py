@@ -0,0 +1,79 @@
+"""Benchmark: worker boot time with and without schema management in the app factory.
+
+Prepares a SQLite database at migration head with `flask laoshi migrate`, then
+times fresh interpreters importing app (which builds the app, as a gunicorn
+worker does) with AUTO_MIGRATE off (the default) and on (the old behaviour of
+inspecting the schema and running alembic upgrade on every start).
+
+Usage (from backend/):
+    python -m benchmarks.bench_worker_boot --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+def _env(db_uri, auto_migrate):
+    env = dict(os.environ)
+    env.update({
+        'SQLALCHEMY_DATABASE_URI': db_uri,
+        'AUTO_MIGRATE': 'true' if auto_migrate else 'false',
+        'MEMORY_OUTBOX_WORKER': 'false',
+        'EMAIL_OUTBOX_WORKER': 'false',
+    })
+    return env
+
+
+def boot_once(db_uri, auto_migrate) -> float:
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-c', 'import app'], cwd=BACKEND_DIR,
+                          env=_env(db_uri, auto_migrate), capture_output=True, text=True)
+    elapsed = (time.perf_counter() - start) * 1000
+    if proc.returncode != 0:
+        raise SystemExit(f"boot failed (AUTO_MIGRATE={auto_migrate}):\n{proc.stderr[-2000:]}")
+    return elapsed
+
+
+def run(runs: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        db_uri = f"sqlite:///{Path(tmp) / 'boot.db'}"
+        subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'laoshi', 'migrate'],
+                       cwd=BACKEND_DIR, env=_env(db_uri, False), check=True, capture_output=True)
+        results = {}
+        for label, auto_migrate in (('no_ddl', False), ('auto_migrate', True)):
+            boot_once(db_uri, auto_migrate)  # warm the filesystem/bytecode caches
+            times = [boot_once(db_uri, auto_migrate) for _ in range(runs)]
+            results[label] = {
+                'runs_ms': [round(t, 1) for t in times],
+                'median_ms': round(statistics.median(times), 1),
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--json', action='store_true', help='print raw JSON results')
+    args = parser.parse_args()
+
+    results = run(args.runs)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    fast, slow = results['no_ddl']['median_ms'], results['auto_migrate']['median_ms']
+    print(f"{'mode':<14} {'median ms':>10}")
+    print(f"{'no DDL':<14} {fast:>10}")
+    print(f"{'AUTO_MIGRATE':<14} {slow:>10}")
+    print(f"\nSkipping schema management saves {slow - fast:.0f} ms per worker boot.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Compare benchmark suite results against a stored baseline and flag regressions.
+
+A scenario regresses when its p50 latency grows by more than --threshold
+(relative) and --min-ms (absolute, to ignore noise on fast endpoints), or when
+it runs more SQL statements than the baseline. Query counts don't depend on
+the machine; latencies only compare meaningfully on the same hardware.
+Exits 1 on any regression, so it can gate CI.
+
+Usage (from backend/):
+    python -m benchmarks.compare benchmarks/baselines/suite-1k.json results.json --threshold 0.25
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def compare(baseline: dict, current: dict, threshold: float, min_ms: float) -> list[dict]:
+    """Return one row per scenario: {'scenario', 'base_ms', 'ms', 'change', 'base_queries', 'queries', 'verdict'}."""
+    rows = []
+    base_scenarios, scenarios = baseline['scenarios'], current['scenarios']
+    for name in sorted(base_scenarios.keys() | scenarios.keys()):
+        base, result = base_scenarios.get(name), scenarios.get(name)
+        if base is None or result is None:
+            rows.append({'scenario': name, 'verdict': 'new' if base is None else 'missing'})
+            continue
+        change = (result['p50_ms'] - base['p50_ms']) / base['p50_ms'] if base['p50_ms'] else 0.0
+        slower = change > threshold and result['p50_ms'] - base['p50_ms'] > min_ms
+        more_queries = result['queries'] > base['queries']
+        if slower or more_queries:
+            verdict = 'REGRESSION'
+        elif change < -threshold and base['p50_ms'] - result['p50_ms'] > min_ms or result['queries'] < base['queries']:
+            verdict = 'improved'
+        else:
+            verdict = 'ok'
+        rows.append({
+            'scenario': name, 'base_ms': base['p50_ms'], 'ms': result['p50_ms'], 'change': change,
+            'base_queries': base['queries'], 'queries': result['queries'], 'verdict': verdict,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('baseline', type=Path)
+    parser.add_argument('current', type=Path)
+    parser.add_argument('--threshold', type=float, default=0.25, help='relative p50 slowdown allowed (default 0.25)')
+    parser.add_argument('--min-ms', type=float, default=5.0, help='absolute p50 slowdown ignored (default 5ms)')
+    args = parser.parse_args()
+
+    baseline = json.loads(args.baseline.read_text())
+    current = json.loads(args.current.read_text())
+    if baseline['meta']['profile'] != current['meta']['profile']:
+        print(f"warning: comparing profile {current['meta']['profile']} against a "
+              f"{baseline['meta']['profile']} baseline", file=sys.stderr)
+
+    rows = compare(baseline, current, args.threshold, args.min_ms)
+    print(f"{'scenario':<20} {'base p50':>9} {'p50':>9} {'change':>8} {'queries':>11}  verdict")
+    for row in rows:
+        if 'change' not in row:
+            print(f"{row['scenario']:<20} {'':>9} {'':>9} {'':>8} {'':>11}  {row['verdict']}")
+            continue
+        queries = f"{row['base_queries']}->{row['queries']}"
+        print(f"{row['scenario']:<20} {row['base_ms']:>9} {row['ms']:>9} {row['change']:>+8.0%} {queries:>11}  {row['verdict']}")
+
+    regressions = [row['scenario'] for row in rows if row['verdict'] == 'REGRESSION']
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+"""Synthetic data for benchmarks: one user with a realistic vocabulary and practice history.
+
+Rows are written with executemany in chunks and explicit ids (no RETURNING),
+so even the 100k profile loads in seconds; PostgreSQL id sequences are then
+moved past those ids so later inserts by the app don't collide. Generation is deterministic for a
+given seed, so runs against the same profile are comparable.
+
+Usage (from backend/, against the configured database):
+    python -m benchmarks.datagen --profile 10k --username bench10k
+"""
+import argparse
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import func, insert, select, text
+
+from extensions import db
+from models import Deck, SessionWord, SessionWordAttempt, User, UserSession, Word
+
+# words, decks, finished sessions, words per session, attempts per session word
+PROFILES = {
+    '1k': dict(words=1_000, decks=5, sessions=300, words_per_session=10, attempts_per_word=2),
+    '10k': dict(words=10_000, decks=20, sessions=2_000, words_per_session=10, attempts_per_word=2),
+    '100k': dict(words=100_000, decks=50, sessions=5_000, words_per_session=15, attempts_per_word=2),
+}
+
+CHUNK = 5_000
+HISTORY_DAYS = 365
+
+SENTENCES = [
+    "我们今天在会议上讨论了这个项目的进度。",
+    "这个接口的响应时间太长了，需要优化。",
+    "他每天早上都会检查服务器的日志。",
+    "请把这个需求写进下一个迭代的计划里。",
+]
+FEEDBACK = "句子结构很好，用词也很自然。"
+
+
+def _next_id(column) -> int:
+    return (db.session.execute(select(func.max(column))).scalar() or 0) + 1
+
+
+def _insert_chunked(model, rows):
+    for i in range(0, len(rows), CHUNK):
+        db.session.execute(insert(model), rows[i:i + CHUNK])
+
+
+def _advance_sequences(*models):
+    """Set PostgreSQL id sequences to max(id); SQLite derives the next id from the table itself."""
+    if db.session.get_bind().dialect.name != 'postgresql':
+        return
+    for model in models:
+        table = model.__tablename__
+        db.session.execute(text(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))"
+        ))
+
+
+def generate_user(username: str, words: int, decks: int, sessions: int,
+                  words_per_session: int, attempts_per_word: int, seed: int = 0) -> int:
+    """Create a user with `words` words spread over `decks` decks and `sessions` finished
+    practice sessions (each with session words and attempts). Returns the user id."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    today = date.today()
+
+    user = User(username=username, email=f'{username}@bench.example.com', password='unused')
+    user.add()
+
+    deck_start = _next_id(Deck.id)
+    deck_ids = list(range(deck_start, deck_start + decks))
+    _insert_chunked(Deck, [
+        dict(id=deck_id, name=f'Bench Deck {n}', description='Synthetic benchmark deck',
+             user_id=user.id, language='ZH', created_ds=now, updated_ds=now)
+        for n, deck_id in enumerate(deck_ids)
+    ])
+
+    word_start = _next_id(Word.id)
+    word_rows = []
+    for n in range(words):
+        repetitions = rng.choice((0, 0, 1, 2, 3, 5, 8))
+        practiced = repetitions > 0
+        word_rows.append(dict(
+            id=word_start + n, word=f'词{n}', reading=f'ci{n}', meaning=f'meaning {n}',
+            user_id=user.id, deck_id=deck_ids[n % decks],
+            repetitions=repetitions,
+            interval_days=max(1, repetitions * 3),
+            ease_factor=round(rng.uniform(1.3, 2.8), 2),
+            next_review_date=today + timedelta(days=rng.randint(-30, 60)) if practiced else None,
+            last_quality=rng.randint(0, 5) if practiced else None,
+            marked_as_known=False,
+            is_mastered=repetitions >= 5,
+        ))
+    _insert_chunked(Word, word_rows)
+    words_by_deck = {deck_id: [] for deck_id in deck_ids}
+    for row in word_rows:
+        words_by_deck[row['deck_id']].append(row['id'])
+
+    session_start = _next_id(UserSession.id)
+    session_rows, session_word_rows, attempt_rows = [], [], []
+    for n in range(sessions):
+        session_id = session_start + n
+        deck_id = rng.choice(deck_ids)
+        started = now - timedelta(days=rng.uniform(0, HISTORY_DAYS))
+        session_rows.append(dict(
+            id=session_id, user_id=user.id, deck_id=deck_id, words_per_session=words_per_session,
+            session_start_ds=started, session_end_ds=started + timedelta(minutes=rng.randint(5, 30)),
+            summary_text='Good session.',
+        ))
+        deck_words = words_by_deck[deck_id]
+        for order, word_id in enumerate(rng.sample(deck_words, min(words_per_session, len(deck_words)))):
+            scores = [round(rng.uniform(4, 10), 1) for _ in range(3)]
+            session_word_rows.append(dict(
+                word_id=word_id, session_id=session_id, word_order=order, status=1,
+                session_word_load_ds=started, is_skipped=False, is_correct=min(scores) >= 7,
+                grammar_score=scores[0], usage_score=scores[1], naturalness_score=scores[2],
+            ))
+            for attempt in range(1, attempts_per_word + 1):
+                attempt_rows.append(dict(
+                    word_id=word_id, session_id=session_id, attempt_number=attempt,
+                    sentence=rng.choice(SENTENCES), feedback_text=FEEDBACK,
+                    grammar_score=scores[0], usage_score=scores[1], naturalness_score=scores[2],
+                    is_correct=min(scores) >= 7, created_ds=started + timedelta(minutes=attempt),
+                ))
+    _insert_chunked(UserSession, session_rows)
+    _insert_chunked(SessionWord, session_word_rows)
+    _insert_chunked(SessionWordAttempt, attempt_rows)
+    _advance_sequences(Deck, Word, UserSession)
+    db.session.commit()
+    return user.id
+
+
+def generate_profile(profile: str, username: str | None = None, seed: int = 0) -> int:
+    return generate_user(username or f'bench{profile}', seed=seed, **PROFILES[profile])
+
+
+def main():
+    from app import create_app
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--profile', choices=PROFILES, default='1k')
+    parser.add_argument('--username', help='defaults to bench<profile>')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    with create_app().app_context():
+        start = time.perf_counter()
+        user_id = generate_profile(args.profile, args.username, args.seed)
+        print(f"Generated {args.profile} profile for user {user_id} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
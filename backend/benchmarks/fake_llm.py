@@ -0,0 +1,360 @@
+"""Fake OpenAI-compatible LLM server for load and latency testing.
+
+Serves the chat-completions API that chat_agents.py targets, so the full
+practice flow (orchestrator -> evaluate_sentence tool -> feedback agent ->
+reply, session summaries, report cards) runs end to end without DeepSeek or
+Gemini. Point the app at it:
+
+    DEEPSEEK_BASE_URL=http://127.0.0.1:8089/v1 GEMINI_BASE_URL=http://127.0.0.1:8089/v1
+
+It answers by recognising the agent from its system prompt:
+
+- feedback agent: schema-valid feedback JSON (passes validate_feedback)
+- summary agent: {"summary_text": ..., "mem0_updates": []}
+- report card agent: {"feedback": ...}
+- orchestrator with tools: a student sentence gets an evaluate_sentence tool
+  call, a tool result or an instruction ("Start the session...") gets a reply
+
+Latency is time-to-first-token drawn from --latency plus output tokens at
+--tokens-per-s, for both plain and streamed (SSE) responses. --error-rate and
+--rate-limit-rate inject 500s and 429s, and --rpm caps requests per minute
+with 429s. GET /_stats reports counts and peak concurrency; POST /_config
+changes the behaviour of a running server.
+
+Usage (from backend/):
+    python -m benchmarks.fake_llm --port 8089 --latency lognormal:800:0.5 --tokens-per-s 60 --rate-limit-rate 0.02
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import random
+import re
+import time
+from collections import Counter, deque
+from dataclasses import asdict, dataclass, fields
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+STREAM_CHUNK_CHARS = 4
+
+
+def parse_latency(spec: str):
+    """Parse a latency distribution spec (milliseconds) into a sampler returning seconds.
+
+    fixed:MS | uniform:MIN:MAX | normal:MEAN:STDDEV | lognormal:MEDIAN:SIGMA | exp:MEAN
+    """
+    kind, *args = spec.split(':')
+    try:
+        args = [float(a) for a in args]
+        samplers = {
+            'fixed': lambda rng: args[0],
+            'uniform': lambda rng: rng.uniform(args[0], args[1]),
+            'normal': lambda rng: rng.gauss(args[0], args[1]),
+            'lognormal': lambda rng: rng.lognormvariate(math.log(args[0]), args[1]),
+            'exp': lambda rng: rng.expovariate(1 / args[0]),
+        }
+        sampler = samplers[kind]
+        sampler(random.Random(0))  # validate the argument count
+    except (KeyError, IndexError, ValueError, ZeroDivisionError):
+        raise ValueError(f"Invalid latency spec {spec!r}") from None
+    return lambda rng: max(0.0, sampler(rng)) / 1000
+
+
+def estimate_tokens(text: str) -> int:
+    # ~1 token per CJK character, ~4 characters per token otherwise
+    cjk = sum(1 for ch in text if '\u3000' <= ch <= '\u9fff')
+    return max(1, cjk + (len(text) - cjk) // 4)
+
+
+@dataclass
+class Behaviour:
+    latency: str = 'lognormal:800:0.5'
+    tokens_per_s: float = 60.0
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    rpm: int = 0  # 0 = unlimited
+    api_key: str | None = None  # require this bearer token when set
+
+    def update(self, changes: dict):
+        allowed = {f.name for f in fields(self)}
+        unknown = set(changes) - allowed
+        if unknown:
+            raise ValueError(f"Unknown settings: {', '.join(sorted(unknown))}")
+        if 'latency' in changes:
+            parse_latency(changes['latency'])
+        for name, value in changes.items():
+            setattr(self, name, value)
+
+
+# Agent recognition (see the prompt builders in ai_layer/chat_agents.py)
+_FEEDBACK_MARKER = "evaluating a student's sentence"
+_SUMMARY_MARKER = "wrapping up a"
+_REPORT_CARD_MARKER = "report card"
+_TARGET_WORD_RE = re.compile(r"Target vocabulary word: \[DATA\](.+?) \(")
+_INSTRUCTION_PREFIXES = ("Start the session", "The student has moved to the next word")
+
+
+def _text(content) -> str:
+    if isinstance(content, list):
+        return ''.join(part.get('text', '') for part in content if isinstance(part, dict))
+    return content or ''
+
+
+class FakeLLM:
+    def __init__(self, behaviour: Behaviour, seed: int | None = None):
+        self.behaviour = behaviour
+        self.rng = random.Random(seed)
+        self.ids = itertools.count(1)
+        self.stats = Counter()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.recent = deque()  # request timestamps within the last minute, for --rpm
+
+    # -- responses -------------------------------------------------------
+
+    def classify(self, messages: list, tools: list) -> str:
+        system = _text(messages[0].get('content')) if messages and messages[0].get('role') == 'system' else ''
+        if _FEEDBACK_MARKER in system:
+            return 'feedback'
+        if _SUMMARY_MARKER in system:
+            return 'summary'
+        if _REPORT_CARD_MARKER in system:
+            return 'report_card'
+        last = messages[-1] if messages else {}
+        student_message = last.get('role') == 'user' and not _text(last.get('content')).startswith(_INSTRUCTION_PREFIXES)
+        if student_message and any(t.get('function', {}).get('name') == 'evaluate_sentence' for t in tools):
+            return 'tool_call'
+        return 'reply'
+
+    def feedback(self, system: str) -> str:
+        match = _TARGET_WORD_RE.search(system)
+        word = match.group(1) if match else '词'
+        grammar, usage, naturalness = (self.rng.randint(6, 10) for _ in range(3))
+        return json.dumps({
+            'grammarScore': grammar,
+            'usageScore': usage,
+            'naturalnessScore': naturalness,
+            'isCorrect': grammar == 10 and usage >= 8,
+            'feedback': f"句子不错！“{word}”用得很自然。",
+            'corrections': [] if grammar == 10 else ["Check the word order after the time expression."],
+            'explanations': [] if grammar == 10 else ["Time expressions usually come before the verb."],
+            'exampleSentences': [f"我们明天讨论{word}。", f"这个{word}很重要。"],
+        }, ensure_ascii=False)
+
+    def respond(self, kind: str, messages: list) -> dict:
+        """Return the assistant message for a request of the given kind."""
+        if kind == 'tool_call':
+            sentence = _text(messages[-1].get('content'))
+            return {'role': 'assistant', 'content': None, 'tool_calls': [{
+                'id': f"call_fake_{next(self.ids)}", 'type': 'function',
+                'function': {'name': 'evaluate_sentence',
+                             'arguments': json.dumps({'input': sentence}, ensure_ascii=False)},
+            }]}
+        if kind == 'feedback':
+            content = self.feedback(_text(messages[0].get('content')))
+        elif kind == 'summary':
+            content = json.dumps({
+                'summary_text': "Solid session: good sentence structure, watch measure words.",
+                'mem0_updates': [],
+            })
+        elif kind == 'report_card':
+            content = json.dumps({'feedback': "Your grammar is getting sharp. Now make it sound less like a textbook."})
+        else:
+            content = "很好！Nice work. Try another sentence with this word, or move on when you're ready."
+        return {'role': 'assistant', 'content': content}
+
+    # -- timing and failure injection ------------------------------------
+
+    def output_seconds(self, message: dict) -> float:
+        text = message.get('content') or json.dumps(message.get('tool_calls'))
+        return estimate_tokens(text) / self.behaviour.tokens_per_s if self.behaviour.tokens_per_s > 0 else 0.0
+
+    def injected_failure(self):
+        """Return an error response to inject, or None."""
+        b = self.behaviour
+        if b.rpm:
+            now = time.monotonic()
+            while self.recent and now - self.recent[0] > 60:
+                self.recent.popleft()
+            if len(self.recent) >= b.rpm:
+                return self.rate_limited()
+            self.recent.append(now)
+        roll = self.rng.random()
+        if roll < b.rate_limit_rate:
+            return self.rate_limited()
+        if roll < b.rate_limit_rate + b.error_rate:
+            self.stats['injected_500'] += 1
+            return JSONResponse({'error': {'message': 'Injected server error', 'type': 'server_error'}},
+                                status_code=500)
+        return None
+
+    def rate_limited(self):
+        self.stats['injected_429'] += 1
+        return JSONResponse(
+            {'error': {'message': 'Rate limit reached (fake)', 'type': 'rate_limit_error',
+                       'code': 'rate_limit_exceeded'}},
+            status_code=429, headers={'Retry-After': '1'},
+        )
+
+    def authorized(self, request: Request) -> bool:
+        expected = self.behaviour.api_key
+        return expected is None or request.headers.get('Authorization') == f'Bearer {expected}'
+
+    # -- endpoints -------------------------------------------------------
+
+    async def chat_completions(self, request: Request):
+        if not self.authorized(request):
+            return JSONResponse({'error': {'message': 'Invalid API key', 'type': 'invalid_request_error'}},
+                                status_code=401)
+        body = await request.json()
+        self.stats['requests'] += 1
+        failure = self.injected_failure()
+        if failure is not None:
+            return failure
+
+        messages = body.get('messages', [])
+        kind = self.classify(messages, body.get('tools') or [])
+        self.stats[kind] += 1
+        message = self.respond(kind, messages)
+        usage = {
+            'prompt_tokens': sum(estimate_tokens(_text(m.get('content'))) for m in messages),
+            'completion_tokens': estimate_tokens(message.get('content') or json.dumps(message.get('tool_calls'))),
+        }
+        usage['total_tokens'] = usage['prompt_tokens'] + usage['completion_tokens']
+        completion = {
+            'id': f"chatcmpl-fake-{next(self.ids)}",
+            'created': int(time.time()),
+            'model': body.get('model', 'fake'),
+        }
+        first_token = parse_latency(self.behaviour.latency)(self.rng)
+
+        if body.get('stream'):
+            include_usage = (body.get('stream_options') or {}).get('include_usage', False)
+            return StreamingResponse(self.stream(completion, message, usage if include_usage else None, first_token),
+                                     media_type='text/event-stream')
+
+        self.enter()
+        try:
+            await asyncio.sleep(first_token + self.output_seconds(message))
+        finally:
+            self.leave()
+        return JSONResponse({
+            **completion,
+            'object': 'chat.completion',
+            'choices': [{'index': 0, 'message': message,
+                         'finish_reason': 'tool_calls' if message.get('tool_calls') else 'stop'}],
+            'usage': usage,
+        })
+
+    async def stream(self, completion: dict, message: dict, usage: dict | None, first_token: float):
+        def chunk(delta, finish_reason=None, **extra):
+            payload = {**completion, 'object': 'chat.completion.chunk',
+                       'choices': [{'index': 0, 'delta': delta, 'finish_reason': finish_reason}], **extra}
+            return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+        self.enter()
+        try:
+            await asyncio.sleep(first_token)
+            yield chunk({'role': 'assistant', 'content': ''})
+            if message.get('tool_calls'):
+                call = message['tool_calls'][0]
+                yield chunk({'tool_calls': [{'index': 0, 'id': call['id'], 'type': 'function',
+                                             'function': {'name': call['function']['name'], 'arguments': ''}}]})
+                pieces = [('arguments', call['function']['arguments'])]
+            else:
+                pieces = [('content', message['content'])]
+            for field, text in pieces:
+                for i in range(0, len(text), STREAM_CHUNK_CHARS):
+                    piece = text[i:i + STREAM_CHUNK_CHARS]
+                    if self.behaviour.tokens_per_s > 0:
+                        await asyncio.sleep(estimate_tokens(piece) / self.behaviour.tokens_per_s)
+                    if field == 'arguments':
+                        yield chunk({'tool_calls': [{'index': 0, 'function': {'arguments': piece}}]})
+                    else:
+                        yield chunk({'content': piece})
+            yield chunk({}, 'tool_calls' if message.get('tool_calls') else 'stop')
+            if usage is not None:
+                yield f"data: {json.dumps({**completion, 'object': 'chat.completion.chunk', 'choices': [], 'usage': usage})}\n\n"
+            yield "data: [DONE]\n\n"
+        finally:
+            self.leave()
+
+    async def models(self, request: Request):
+        if not self.authorized(request):
+            return JSONResponse({'error': {'message': 'Invalid API key', 'type': 'invalid_request_error'}},
+                                status_code=401)
+        return JSONResponse({'object': 'list', 'data': [{'id': 'fake', 'object': 'model', 'owned_by': 'laoshi'}]})
+
+    async def get_stats(self, request: Request):
+        return JSONResponse({**self.stats, 'in_flight': self.in_flight, 'peak_in_flight': self.peak_in_flight,
+                             'behaviour': asdict(self.behaviour)})
+
+    async def set_config(self, request: Request):
+        changes = await request.json()
+        reset_stats = changes.pop('reset_stats', False)
+        try:
+            self.behaviour.update(changes)
+        except ValueError as e:
+            return JSONResponse({'error': str(e)}, status_code=400)
+        if reset_stats:
+            self.stats.clear()
+            self.peak_in_flight = self.in_flight
+        return JSONResponse(asdict(self.behaviour))
+
+    def enter(self):
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def leave(self):
+        self.in_flight -= 1
+
+
+def create_app(behaviour: Behaviour | None = None, seed: int | None = None) -> Starlette:
+    """Build the fake server. Both /v1/... and unprefixed paths are served."""
+    fake = FakeLLM(behaviour or Behaviour(), seed)
+    routes = []
+    for prefix in ('', '/v1'):
+        routes += [
+            Route(f'{prefix}/chat/completions', fake.chat_completions, methods=['POST']),
+            Route(f'{prefix}/models', fake.models, methods=['GET']),
+        ]
+    routes += [
+        Route('/_stats', fake.get_stats, methods=['GET']),
+        Route('/_config', fake.set_config, methods=['POST']),
+    ]
+    app = Starlette(routes=routes)
+    app.state.fake = fake
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', default=Behaviour.latency,
+                        help='time to first token in ms: fixed:MS, uniform:MIN:MAX, normal:MEAN:SD, '
+                             'lognormal:MEDIAN:SIGMA or exp:MEAN (default %(default)s)')
+    parser.add_argument('--tokens-per-s', type=float, default=Behaviour.tokens_per_s,
+                        help='output token rate, 0 for instant (default %(default)s)')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of requests answered with 500')
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='fraction of requests answered with 429')
+    parser.add_argument('--rpm', type=int, default=0, help='requests per minute before 429s (0 = unlimited)')
+    parser.add_argument('--api-key', help='require this API key')
+    parser.add_argument('--seed', type=int, help='seed for latencies, scores and failures')
+    args = parser.parse_args()
+
+    parse_latency(args.latency)
+    behaviour = Behaviour(args.latency, args.tokens_per_s, args.error_rate, args.rate_limit_rate, args.rpm,
+                          args.api_key)
+    uvicorn.run(create_app(behaviour, args.seed), host=args.host, port=args.port, log_level='warning')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,256 @@
+"""Load generator: N concurrent learners running the full practice flow.
+
+Each learner registers, logs in, picks a deck (the seeded sample deck),
+starts a practice session, sends --messages sentences per word, rates each
+word with next-word (quality 3-5), and when the session completes views the
+summary and the report card. Learners pause for a random think time between
+actions and start staggered over --ramp-up seconds.
+
+By default the backend is served in-process (uvicorn, ASGI app with the async
+practice endpoints, temporary SQLite database or --database-url, rate limits
+off) with both LLM providers pointed at an in-process benchmarks.fake_llm
+server, so the agents, tool calls and DB writes all run for real. Use
+--base-url to target an already running instance instead (its rate limits
+still apply to registration and login).
+
+Reports throughput, latency percentiles and error rates per endpoint, to size
+workers for peak evening traffic.
+
+Usage (from backend/):
+    python -m benchmarks.load_learners --learners 50 --words 5 --llm-latency lognormal:800:0.5
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+_TMP = tempfile.TemporaryDirectory()
+
+SENTENCES = [
+    "我们今天在会议上讨论了这个项目的进度。",
+    "这个接口的响应时间太长了，需要优化。",
+    "他每天早上都会检查服务器的日志。",
+    "请把这个需求写进下一个迭代的计划里。",
+]
+
+
+class Recorder:
+    """Latencies and outcomes per endpoint label."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(lambda: defaultdict(int))
+
+    async def call(self, client, label, method, url, **kwargs):
+        start = time.perf_counter()
+        try:
+            resp = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            self.latencies[label].append(time.perf_counter() - start)
+            self.errors[label][type(e).__name__] += 1
+            return None
+        self.latencies[label].append(time.perf_counter() - start)
+        if resp.status_code >= 400:
+            self.errors[label][str(resp.status_code)] += 1
+            return None
+        return resp.json()
+
+    def report(self, wall):
+        rows = {}
+        for label, latencies in self.latencies.items():
+            latencies = sorted(latencies)
+            errors = sum(self.errors[label].values())
+            rows[label] = {
+                'requests': len(latencies),
+                'req_per_s': round(len(latencies) / wall, 2),
+                'error_rate': round(errors / len(latencies), 4),
+                'errors': dict(self.errors[label]),
+                'p50_ms': round(_percentile(latencies, 0.5) * 1000, 1),
+                'p95_ms': round(_percentile(latencies, 0.95) * 1000, 1),
+                'p99_ms': round(_percentile(latencies, 0.99) * 1000, 1),
+                'mean_ms': round(statistics.fmean(latencies) * 1000, 1),
+            }
+        return rows
+
+
+def _percentile(sorted_values, fraction):
+    return sorted_values[int(fraction * (len(sorted_values) - 1))]
+
+
+async def learner(n, client, recorder, args, rng):
+    async def think():
+        await asyncio.sleep(rng.uniform(args.think_min, args.think_max))
+
+    username = f"learner{n}_{rng.randrange(10**8)}"
+    password = 'LoadTest123'
+    if await recorder.call(client, 'POST /users', 'POST', '/api/users', json={
+            'username': username, 'email': f'{username}@load.example.com', 'password': password}) is None:
+        return
+    token = await recorder.call(client, 'POST /token', 'POST', '/api/token',
+                                json={'username': username, 'password': password})
+    if token is None:
+        return
+    headers = {'Authorization': f"Bearer {token['access_token']}"}
+
+    for _ in range(args.sessions):
+        await think()
+        decks = await recorder.call(client, 'GET /decks', 'GET', '/api/decks', headers=headers)
+        if not decks or not decks['decks']:
+            return
+        deck_id = rng.choice(decks['decks'])['id']
+
+        await think()
+        started = await recorder.call(client, 'POST /practice/sessions', 'POST', '/api/practice/sessions',
+                                      json={'deck_id': deck_id, 'words_count': args.words}, headers=headers)
+        if started is None:
+            return
+        session_id = started['session']['id']
+
+        complete = False
+        for _ in range(args.words):
+            for _ in range(args.messages):
+                await think()
+                await recorder.call(client, 'POST /practice/sessions/:id/messages', 'POST',
+                                    f'/api/practice/sessions/{session_id}/messages',
+                                    json={'message': rng.choice(SENTENCES)}, headers=headers)
+            await think()
+            advanced = await recorder.call(client, 'POST /practice/sessions/:id/next-word', 'POST',
+                                           f'/api/practice/sessions/{session_id}/next-word',
+                                           json={'quality': rng.randint(3, 5)}, headers=headers)
+            if advanced is None:
+                break
+            if advanced.get('session_complete'):
+                complete = True
+                break
+        if not complete:
+            await recorder.call(client, 'POST /practice/sessions/:id/end', 'POST',
+                                f'/api/practice/sessions/{session_id}/end', headers=headers)
+
+        await think()
+        await recorder.call(client, 'GET /practice/sessions/:id/summary', 'GET',
+                            f'/api/practice/sessions/{session_id}/summary', headers=headers)
+        await think()
+        await recorder.call(client, 'GET /progress/report-card', 'GET', '/api/progress/report-card', headers=headers)
+
+
+async def run_learners(base_url, args):
+    recorder = Recorder()
+    rng = random.Random(args.seed)
+    limits = httpx.Limits(max_connections=args.learners)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=args.timeout) as client:
+        async def staggered(n):
+            await asyncio.sleep(args.ramp_up * n / max(args.learners, 1))
+            await learner(n, client, recorder, args, random.Random(rng.random()))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(staggered(n) for n in range(args.learners)))
+        wall = time.perf_counter() - start
+    return recorder.report(wall), wall
+
+
+def start_local_stack(args):
+    """Serve the fake LLM and the app in-process. Returns (servers, app base URL, fake LLM app)."""
+    from benchmarks.fake_llm import Behaviour, create_app as create_fake_llm
+    from benchmarks.serving import serve
+
+    fake_llm = create_fake_llm(Behaviour(latency=args.llm_latency, tokens_per_s=args.llm_tokens_per_s,
+                                         rate_limit_rate=args.llm_rate_limit_rate), seed=args.seed)
+    llm_server, llm_thread, llm_url = serve(fake_llm)
+
+    # The app reads its configuration at import time
+    os.environ.update({
+        'SQLALCHEMY_DATABASE_URI': args.database_url or f"sqlite:///{Path(_TMP.name) / 'learners.db'}",
+        'MEMORY_OUTBOX_WORKER': 'false',
+        'EMAIL_OUTBOX_WORKER': 'false',
+        'MEMORY_BACKEND': 'local',
+        'SQL_INSPECTOR_MODE': 'off',
+        'JWT_SECRET_KEY': os.environ.get('JWT_SECRET_KEY', 'load-secret-key-load-secret-key'),
+        'OPENAI_AGENTS_DISABLE_TRACING': '1',
+    })
+    for provider in ('DEEPSEEK', 'GEMINI'):
+        os.environ.update({f'{provider}_BASE_URL': f'{llm_url}/v1', f'{provider}_API_KEY': 'fake',
+                           f'{provider}_MODEL_NAME': 'fake'})
+    os.environ.pop('REDIS_URI', None)
+    os.environ.pop('ANTHROPIC_API_KEY', None)
+    sys.path.insert(0, str(BACKEND_DIR))
+
+    from app import create_app
+    from asgi import create_asgi_app
+    from config import Config
+    from schema import migrate_database
+
+    class LoadConfig(Config):
+        RATELIMIT_ENABLED = False
+        # SQLite connections may be used from more than one DB pool thread per request
+        SQLALCHEMY_ENGINE_OPTIONS = ({'connect_args': {'check_same_thread': False, 'timeout': 30}}
+                                     if not args.database_url else Config.SQLALCHEMY_ENGINE_OPTIONS)
+
+    flask_app = create_app(config_class=LoadConfig)
+    with flask_app.app_context():
+        migrate_database()
+    app_server, app_thread, app_url = serve(create_asgi_app(flask_app, wsgi_threads=args.threads))
+    return [(app_server, app_thread), (llm_server, llm_thread)], app_url, fake_llm
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--learners', type=int, default=20, help='concurrent learners')
+    parser.add_argument('--sessions', type=int, default=1, help='practice sessions per learner')
+    parser.add_argument('--words', type=int, default=5, help='words per session')
+    parser.add_argument('--messages', type=int, default=2, help='sentences sent per word')
+    parser.add_argument('--think-min', type=float, default=0.5, help='minimum think time in seconds')
+    parser.add_argument('--think-max', type=float, default=3.0, help='maximum think time in seconds')
+    parser.add_argument('--ramp-up', type=float, default=5.0, help='seconds over which learners start')
+    parser.add_argument('--timeout', type=float, default=120.0, help='per-request timeout in seconds')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--base-url', help='target a running instance instead of serving one in-process')
+    parser.add_argument('--database-url', help='in-process mode: use this database instead of temporary SQLite')
+    parser.add_argument('--threads', type=int, default=None, help='in-process mode: Flask threads (ASGI_WSGI_THREADS)')
+    parser.add_argument('--llm-latency', default='lognormal:800:0.5', help='in-process fake LLM time to first token')
+    parser.add_argument('--llm-tokens-per-s', type=float, default=60.0, help='in-process fake LLM output rate')
+    parser.add_argument('--llm-rate-limit-rate', type=float, default=0.0, help='in-process fake LLM 429 fraction')
+    parser.add_argument('--json', action='store_true', help='print raw JSON results')
+    args = parser.parse_args()
+
+    servers, fake_llm = [], None
+    base_url = args.base_url
+    if base_url is None:
+        servers, base_url, fake_llm = start_local_stack(args)
+    try:
+        rows, wall = asyncio.run(run_learners(base_url, args))
+    finally:
+        for server, thread in servers:
+            server.should_exit = True
+            thread.join()
+
+    llm_stats = dict(fake_llm.state.fake.stats, peak_in_flight=fake_llm.state.fake.peak_in_flight) if fake_llm else None
+    if args.json:
+        print(json.dumps({'wall_s': round(wall, 2), 'endpoints': rows, 'llm': llm_stats}, indent=2))
+        return
+
+    total = sum(r['requests'] for r in rows.values())
+    print(f"{args.learners} learners x {args.sessions} session(s) of {args.words} words, "
+          f"think {args.think_min}-{args.think_max}s: {total} requests in {wall:.1f}s "
+          f"({total / wall:.1f} req/s)\n")
+    print(f"{'endpoint':<38} {'reqs':>6} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for label, r in rows.items():
+        print(f"{label:<38} {r['requests']:>6} {r['req_per_s']:>7} {r['p50_ms']:>8} {r['p95_ms']:>8} "
+              f"{r['p99_ms']:>8} {r['error_rate']:>7.1%}")
+        for reason, count in r['errors'].items():
+            print(f"{'':<40}{count} x {reason}")
+    if llm_stats:
+        print(f"\nfake LLM: {llm_stats.get('requests', 0)} calls, peak {llm_stats['peak_in_flight']} in flight")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+"""Serve ASGI apps (the backend, the fake LLM) in-process for the load benchmarks."""
+import socket
+import threading
+import time
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def serve(asgi_app, port=None):
+    """Run `asgi_app` with uvicorn on a daemon thread. Returns (server, thread, base URL).
+
+    Stop it with `server.should_exit = True` and `thread.join()`.
+    """
+    import uvicorn
+
+    port = port or free_port()
+    server = uvicorn.Server(uvicorn.Config(asgi_app, host='127.0.0.1', port=port,
+                                           log_level='warning', lifespan='off'))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    return server, thread, f"http://127.0.0.1:{port}"
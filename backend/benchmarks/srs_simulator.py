@@ -0,0 +1,283 @@
+"""SRS simulator: months of daily practice on one deck, offline, to see the load a schedule creates.
+
+Each virtual day runs --sessions-per-day practice sessions. A session picks its
+words the way select_srs_words does:
+- new words at random and due words soonest first, mixed by srs_engine.session_mix
+- open slots filled with not-yet-due words, soonest first
+
+Every picked word gets a rating drawn from --ratings and goes through the SRS
+update (srs_engine.review). Word state lives in NumPy arrays, and each session
+is a few whole-array operations, so 100k words x 365 days runs in seconds.
+
+The deck is synthetic (--words, optionally with --reviewed-fraction already in
+review), a CSV file (--csv: sample-deck columns plus optional repetitions,
+interval_days, ease_factor, next_review_date), or a deck in the configured
+database (--deck-id).
+
+Reports:
+- the due-queue size at the start of each day and the backlog left at its end
+- session composition: new, due and early (not yet due) words, and short sessions
+- throughput: reviews per day, days overdue at review, simulated word-days per second
+
+Usage (from backend/):
+    python -m benchmarks.srs_simulator --words 100000 --days 365 --words-per-session 20 --sessions-per-day 3
+    python -m benchmarks.srs_simulator --csv sample_decks/swe_vocab_list.csv --days 180 --ratings 3:0.3,4:0.5,5:0.2
+    python -m benchmarks.srs_simulator --deck-id 12 --days 90 --json
+"""
+import argparse
+import csv
+import json
+import os
+import time
+from datetime import date
+from typing import NamedTuple
+
+import numpy as np
+
+from srs_engine import INITIAL_EASE, review, session_mix
+
+DEFAULT_RATINGS = '2:0.1,3:0.2,4:0.45,5:0.25'
+
+
+class DeckState(NamedTuple):
+    repetitions: np.ndarray
+    interval_days: np.ndarray
+    ease_factor: np.ndarray
+    due_in: np.ndarray   # days from day 0 until due (ignored for new words)
+    is_new: np.ndarray   # never reviewed (next_review_date is NULL)
+
+
+def _deck_state(repetitions, interval_days, ease_factor, due_in, is_new) -> DeckState:
+    return DeckState(np.asarray(repetitions, dtype=np.int64), np.asarray(interval_days, dtype=np.int64),
+                     np.asarray(ease_factor, dtype=np.float64), np.asarray(due_in, dtype=np.int64),
+                     np.asarray(is_new, dtype=bool))
+
+
+def synthetic_deck(words: int, reviewed_fraction: float = 0.0, seed: int = 0) -> DeckState:
+    """A deck of new words, with reviewed_fraction of them given random review states."""
+    rng = np.random.default_rng(seed)
+    is_new = rng.random(words) >= reviewed_fraction
+    repetitions = np.where(is_new, 0, rng.integers(1, 9, words))
+    interval_days = np.where(is_new, 1, np.maximum(1, repetitions * rng.integers(1, 8, words)))
+    ease_factor = np.where(is_new, INITIAL_EASE, np.round(rng.uniform(1.3, 2.8, words), 2))
+    due_in = np.where(is_new, 0, rng.integers(-30, 1, words) + interval_days)
+    return _deck_state(repetitions, interval_days, ease_factor, due_in, is_new)
+
+
+def csv_deck(path: str, today: date | None = None) -> DeckState:
+    """Read a deck from CSV. Rows without a next_review_date are new words."""
+    today = today or date.today()
+    columns = ([], [], [], [], [])
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            row = {k.strip().lower(): (v or '').strip() for k, v in row.items() if k}
+            next_review = row.get('next_review_date')
+            for column, value in zip(columns, (
+                int(row.get('repetitions') or 0),
+                int(row.get('interval_days') or 1),
+                float(row.get('ease_factor') or INITIAL_EASE),
+                (date.fromisoformat(next_review) - today).days if next_review else 0,
+                not next_review,
+            )):
+                column.append(value)
+    return _deck_state(*columns)
+
+
+def database_deck(deck_id: int) -> DeckState:
+    """Read a deck's SRS columns from the configured database with one SELECT."""
+    os.environ.setdefault('MEMORY_OUTBOX_WORKER', 'false')  # the app reads these at import
+    os.environ.setdefault('EMAIL_OUTBOX_WORKER', 'false')
+    from app import create_app
+    from extensions import db
+    from models import Word
+
+    today = date.today()
+    with create_app().app_context():
+        rows = db.session.query(
+            db.func.coalesce(Word.repetitions, 0),
+            db.func.coalesce(Word.interval_days, 1),
+            db.func.coalesce(Word.ease_factor, INITIAL_EASE),
+            Word.next_review_date,
+        ).filter(Word.deck_id == deck_id).all()
+    if not rows:
+        raise SystemExit(f"Deck {deck_id} has no words")
+    repetitions, interval_days, ease_factor, next_review = zip(*rows)
+    due_in = [(d - today).days if d is not None else 0 for d in next_review]
+    return _deck_state(repetitions, interval_days, ease_factor, due_in, [d is None for d in next_review])
+
+
+def parse_ratings(spec: str) -> tuple[np.ndarray, np.ndarray]:
+    """'3:0.2,4:0.5,5:0.3' -> (qualities, probabilities normalised to sum to 1)."""
+    pairs = [part.split(':') for part in spec.split(',') if part.strip()]
+    qualities = np.array([int(q) for q, _ in pairs], dtype=np.int64)
+    weights = np.array([float(w) for _, w in pairs], dtype=np.float64)
+    if not len(pairs) or (qualities < 0).any() or (qualities > 5).any() or (weights < 0).any() or weights.sum() <= 0:
+        raise ValueError(f"invalid ratings {spec!r}: expected quality:weight pairs with qualities 0-5")
+    return qualities, weights / weights.sum()
+
+
+def _soonest(candidates: np.ndarray, due: np.ndarray, k: int) -> np.ndarray:
+    """The k candidates due soonest (ties by word order), in no particular order."""
+    if k <= 0:
+        return candidates[:0]
+    if k >= candidates.size:
+        return candidates
+    key = due[candidates] * due.size + candidates
+    return candidates[np.argpartition(key, k - 1)[:k]]
+
+
+def _percentiles(values: np.ndarray) -> dict:
+    p50, p90, p99 = np.percentile(values, [50, 90, 99]) if values.size else (0, 0, 0)
+    return {'mean': round(float(values.mean()), 1) if values.size else 0,
+            'p50': float(p50), 'p90': float(p90), 'p99': float(p99),
+            'max': int(values.max()) if values.size else 0}
+
+
+def simulate(deck: DeckState, days: int, words_per_session: int, sessions_per_day: int = 1,
+             ratings: str = DEFAULT_RATINGS, seed: int = 0) -> dict:
+    """Run the simulation and return the report (daily series under 'daily')."""
+    qualities, probabilities = parse_ratings(ratings)
+    rng = np.random.default_rng(seed)
+    started = time.perf_counter()
+
+    reps, interval, ease = deck.repetitions.copy(), deck.interval_days.copy(), deck.ease_factor.copy()
+    due, is_new = deck.due_in.copy(), deck.is_new.copy()
+    new_queue = rng.permutation(np.flatnonzero(is_new))  # random.sample order, drawn once
+    next_new = 0
+
+    due_at_start = np.zeros(days, dtype=np.int64)
+    backlog = np.zeros(days, dtype=np.int64)
+    reviews = np.zeros(days, dtype=np.int64)
+    taken = {'new': 0, 'due': 0, 'early': 0}
+    short_sessions = 0
+    days_overdue = 0
+
+    for day in range(days):
+        for session in range(sessions_per_day):
+            due_idx = np.flatnonzero(~is_new & (due <= day))
+            if session == 0:
+                due_at_start[day] = due_idx.size
+            take_new, take_due = session_mix(words_per_session, new_queue.size - next_new, due_idx.size)
+            picked_new = new_queue[next_new:next_new + take_new]
+            next_new += take_new
+            picked_due = _soonest(due_idx, due, take_due)
+            days_overdue += int((day - due[picked_due]).sum())
+            picked = np.concatenate([picked_new, picked_due])
+            picked_early = picked[:0]
+            if picked.size < words_per_session:
+                future = np.flatnonzero(~is_new & (due > day))
+                picked_early = _soonest(future, due, words_per_session - picked.size)
+                picked = np.concatenate([picked, picked_early])
+            taken['new'] += picked_new.size
+            taken['due'] += picked_due.size
+            taken['early'] += picked_early.size
+            if picked.size < words_per_session:
+                short_sessions += 1
+            if not picked.size:
+                continue
+
+            state = review(reps[picked], interval[picked], ease[picked],
+                           rng.choice(qualities, picked.size, p=probabilities))
+            reps[picked], interval[picked], ease[picked] = state
+            due[picked] = day + state.interval_days
+            is_new[picked] = False
+            reviews[day] += picked.size
+        backlog[day] = np.count_nonzero(~is_new & (due <= day))
+
+    wall = time.perf_counter() - started
+    sessions = days * sessions_per_day
+    total_reviews = int(reviews.sum())
+    return {
+        'words': int(reps.size),
+        'days': days,
+        'sessions_per_day': sessions_per_day,
+        'words_per_session': words_per_session,
+        'ratings': {int(q): round(float(p), 4) for q, p in zip(qualities, probabilities)},
+        'seed': seed,
+        'due_queue': {
+            'start_of_day': _percentiles(due_at_start),
+            'end_of_day_backlog': _percentiles(backlog),
+        },
+        'sessions': {
+            'count': sessions,
+            'short': short_sessions,
+            **taken,
+            'share': {k: round(v / total_reviews, 3) if total_reviews else 0 for k, v in taken.items()},
+        },
+        'throughput': {
+            'reviews': total_reviews,
+            'reviews_per_day': round(total_reviews / days, 1) if days else 0,
+            'mean_days_overdue': round(days_overdue / taken['due'], 2) if taken['due'] else 0,
+            'wall_seconds': round(wall, 3),
+            'word_days_per_second': round(reps.size * days / wall) if wall else None,
+        },
+        'final_state': {
+            'new_words': int(is_new.sum()),
+            'median_interval_days': float(np.median(interval[~is_new])) if (~is_new).any() else None,
+            'mean_ease': round(float(ease[~is_new].mean()), 3) if (~is_new).any() else None,
+        },
+        'daily': {
+            'due_at_start': due_at_start.tolist(),
+            'reviews': reviews.tolist(),
+            'backlog': backlog.tolist(),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--words', type=int, default=10_000, help='synthetic deck size')
+    source.add_argument('--csv', help='read the deck from a CSV file')
+    source.add_argument('--deck-id', type=int, help='read the deck from the configured database')
+    parser.add_argument('--reviewed-fraction', type=float, default=0.0,
+                        help='synthetic deck: share of words already in review')
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--words-per-session', type=int, default=20)
+    parser.add_argument('--sessions-per-day', type=int, default=1)
+    parser.add_argument('--ratings', default=DEFAULT_RATINGS, help='quality:weight pairs, e.g. 3:0.2,4:0.5,5:0.3')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--daily', action='store_true', help='include per-day series in --json output')
+    parser.add_argument('--max-seconds', type=float, default=None, help='fail if the simulation takes longer')
+    parser.add_argument('--json', action='store_true', help='print raw JSON results')
+    args = parser.parse_args()
+
+    if args.csv:
+        deck = csv_deck(args.csv)
+    elif args.deck_id is not None:
+        deck = database_deck(args.deck_id)
+    else:
+        deck = synthetic_deck(args.words, args.reviewed_fraction, args.seed)
+    try:
+        result = simulate(deck, args.days, args.words_per_session, args.sessions_per_day, args.ratings, args.seed)
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+    if not args.daily:
+        result.pop('daily')
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        queue, backlog = result['due_queue']['start_of_day'], result['due_queue']['end_of_day_backlog']
+        sessions, throughput = result['sessions'], result['throughput']
+        print(f"{result['words']} words, {result['days']} days, {result['sessions_per_day']} x "
+              f"{result['words_per_session']}-word sessions/day, ratings {result['ratings']}")
+        print(f"\n{'':<22}{'mean':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}")
+        for label, dist in (('due at start of day', queue), ('backlog at end of day', backlog)):
+            print(f"{label:<22}{dist['mean']:>9}{dist['p50']:>9.0f}{dist['p90']:>9.0f}"
+                  f"{dist['p99']:>9.0f}{dist['max']:>9}")
+        print(f"\nsessions: {sessions['count']} ({sessions['short']} short); words: "
+              f"{sessions['new']} new / {sessions['due']} due / {sessions['early']} early "
+              f"({sessions['share']['new']:.0%} / {sessions['share']['due']:.0%} / {sessions['share']['early']:.0%})")
+        print(f"reviews: {throughput['reviews']} ({throughput['reviews_per_day']}/day), "
+              f"{throughput['mean_days_overdue']} days overdue on average")
+        print(f"final: {result['final_state']}")
+        print(f"simulated in {throughput['wall_seconds']}s ({throughput['word_days_per_second']:,} word-days/s)")
+
+    if args.max_seconds is not None and result['throughput']['wall_seconds'] > args.max_seconds:
+        raise SystemExit(f"FAIL: simulation took {result['throughput']['wall_seconds']}s, "
+                         f"over --max-seconds {args.max_seconds}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""Home screen bootstrap endpoint: several home page payloads in one request."""
+from flask import request, jsonify
+from flask_restful import Resource
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from models import User
+from deck_resources import list_decks_with_stats
+from progress_resources import progress_stats
+from report_card_resources import format_streak
+from settings_resources import format_settings
+
+# Field -> payload builder, each returning what its endpoint returns
+BOOTSTRAP_FIELDS = {
+    'me': lambda user: user.format_data(user),                                      # GET /me
+    'decks': lambda user: list_decks_with_stats(user),                              # GET /decks ('decks')
+    'stats': lambda user: progress_stats(user.id),                                  # GET /progress/stats
+    'streak': lambda user: format_streak(user.profile) if user.profile else None,   # GET /progress/streak
+    'settings': lambda user: format_settings(user.profile),                         # GET /settings
+}
+
+
+class BootstrapResource(Resource):
+    @jwt_required()
+    def get(self):
+        """The home screen's data in one response.
+
+        ?fields=decks,stats returns only those keys (default: all of
+        BOOTSTRAP_FIELDS). The user and profile are loaded once for all of
+        them. Responses carry an ETag of the body, and a matching
+        If-None-Match gets an empty 304.
+        """
+        fields = list(BOOTSTRAP_FIELDS)
+        if request.args.get('fields'):
+            fields = [f.strip() for f in request.args['fields'].split(',') if f.strip()]
+            if not fields or any(f not in BOOTSTRAP_FIELDS for f in fields):
+                return {'error': f"fields must be a comma-separated subset of {','.join(BOOTSTRAP_FIELDS)}"}, 400
+
+        user = User.get_by_id(int(get_jwt_identity()))
+        if not user:
+            return {'error': 'User not found'}, 404
+
+        response = jsonify({field: BOOTSTRAP_FIELDS[field](user) for field in fields})
+        response.add_etag()
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response.make_conditional(request)
@@ -0,0 +1,97 @@
+"""Operational commands, run as `flask --app app laoshi <command>`."""
+import click
+from flask.cli import AppGroup
+
+laoshi_cli = AppGroup('laoshi', help='Laoshi maintenance commands.')
+
+
+@laoshi_cli.command('configure-mem0')
+def configure_mem0():
+    """Push custom instructions and categories to the mem0 project.
+
+    Run once per mem0 project (and again after editing them in mem0_setup.py).
+    """
+    from ai_layer.mem0_setup import configure_mem0_project
+
+    try:
+        configure_mem0_project()
+    except Exception as e:
+        raise click.ClickException(f"mem0 project update failed: {type(e).__name__}: {e}")
+    click.echo("mem0 project instructions and categories updated.")
+
+
+@laoshi_cli.command('migrate')
+@click.option('--lock-timeout', type=float, default=None,
+              help='Seconds to wait for another migrating process (default: MIGRATION_LOCK_TIMEOUT_SECONDS).')
+def migrate(lock_timeout):
+    """Create or upgrade the database schema to the latest migration."""
+    from flask import current_app
+    from schema import migrate_database, migration_lock
+
+    if lock_timeout is None:
+        lock_timeout = current_app.config.get('MIGRATION_LOCK_TIMEOUT_SECONDS')
+    try:
+        with migration_lock(lock_timeout):
+            action = migrate_database()
+    except TimeoutError as e:
+        raise click.ClickException(str(e))
+    click.echo("Database created at migration head." if action == 'created' else "Database is at migration head.")
+
+
+@laoshi_cli.command('reset-streaks')
+def reset_streaks():
+    """Zero practice streaks that lapsed before yesterday in each user's timezone.
+
+    Idempotent; schedule hourly so every timezone is covered soon after its midnight.
+    """
+    from streaks import reset_lapsed_streaks
+
+    count = reset_lapsed_streaks()
+    click.echo(f"Reset {count} lapsed streak(s).")
+
+
+@laoshi_cli.command('rebuild-due-queue')
+@click.option('--user-id', type=int, default=None, help='Rebuild one user (default: every user).')
+def rebuild_due_queue(user_id):
+    """Rebuild per-user due queues from the word table.
+
+    Run after restoring the database or writing words outside the app.
+    """
+    from due_queue import due_queue
+    from extensions import db
+    from models import User
+
+    user_ids = [user_id] if user_id is not None else [uid for (uid,) in db.session.query(User.id).order_by(User.id)]
+    for uid in user_ids:
+        due_queue.rebuild(uid)
+    click.echo(f"Rebuilt the due queue for {len(user_ids)} user(s).")
+
+
+@laoshi_cli.command('purge-memory-outbox')
+def purge_memory_outbox():
+    """Delete sent and failed memory writes older than MEMORY_OUTBOX_RETENTION_DAYS. Schedule daily."""
+    from ai_layer.memory_service import purge_memory_outbox
+
+    count = purge_memory_outbox()
+    click.echo(f"Purged {count} finished memory write(s).")
+
+
+@laoshi_cli.command('purge-email-outbox')
+def purge_email_outbox():
+    """Delete sent and failed emails older than EMAIL_OUTBOX_RETENTION_DAYS. Schedule daily."""
+    from email_service import purge_email_outbox
+
+    count = purge_email_outbox()
+    click.echo(f"Purged {count} finished email(s).")
+
+
+@laoshi_cli.command('purge-sync-tombstones')
+def purge_sync_tombstones():
+    """Delete sync tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS.
+
+    Clients with an older cursor get a full sync instead. Schedule daily.
+    """
+    from sync import purge_tombstones
+
+    count = purge_tombstones()
+    click.echo(f"Purged {count} sync tombstone(s).")
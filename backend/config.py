@@ -32,8 +32,100 @@ class Config():
     DEBUG=True
     PROPAGATE_EXCEPTIONS = True
 
+    # Logging: level, 'text' or 'json', per-logger overrides ('ai_layer=DEBUG,werkzeug=WARNING')
+    # and the fraction of high-volume diagnostic events (extra={'sampled': True}) emitted
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO').upper()
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'text').lower()
+    LOG_LEVELS = os.getenv('LOG_LEVELS', '')
+    LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', '0.01'))
+
+    # Server-Timing header with per-request phase durations (db, redis, mem0, decrypt, agent, llm);
+    # SERVER_TIMING_JSON also adds them to JSON responses as `_server_timing` (debugging only)
+    SERVER_TIMING_ENABLED = os.getenv('SERVER_TIMING_ENABLED', 'true').lower() == 'true'
+    SERVER_TIMING_JSON = os.getenv('SERVER_TIMING_JSON', 'false').lower() == 'true'
+
+    # SQL inspection per request (query_inspector.py): 'off', 'log' or 'raise' on N+1 patterns
+    # (a statement repeated SQL_REPEAT_THRESHOLD+ times) and on exceeding the endpoint's budget
+    SQL_INSPECTOR_MODE = os.getenv('SQL_INSPECTOR_MODE', 'log').lower()
+    SQL_REPEAT_THRESHOLD = int(os.getenv('SQL_REPEAT_THRESHOLD', '5'))
+    SQL_QUERY_BUDGET_DEFAULT = int(os.getenv('SQL_QUERY_BUDGET_DEFAULT', '50'))
+    SQL_QUERY_BUDGETS = {}  # {endpoint: max statements}, overrides the default
+
+    # Bearer token required to scrape /api/metrics. Unset, anyone who can reach the backend
+    # directly can scrape it; the gateway denies /api/metrics to public traffic either way.
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+
+    # Schema management: run `flask laoshi migrate` on deploy, or opt into
+    # migrating at startup (serialized by an advisory lock on PostgreSQL)
+    AUTO_MIGRATE = os.getenv('AUTO_MIGRATE', 'false').lower() == 'true'
+    MIGRATION_LOCK_TIMEOUT_SECONDS = int(os.getenv('MIGRATION_LOCK_TIMEOUT_SECONDS', '300'))
+
+    # ASGI mode (asgi.py): threads for blocking DB work while agent runs are awaited on the loop
+    ASYNC_DB_THREADS = int(os.getenv('ASYNC_DB_THREADS', '16'))
+    ASGI_WSGI_THREADS = int(os.getenv('ASGI_WSGI_THREADS', '16'))
+
+    # Password hashing (password_hashing.py). Changing the scheme or cost rehashes
+    # each user's password on their next login. argon2 needs argon2-cffi installed.
+    PASSWORD_HASH_SCHEME = os.getenv('PASSWORD_HASH_SCHEME', 'pbkdf2_sha256')
+    PASSWORD_PBKDF2_ROUNDS = int(os.getenv('PASSWORD_PBKDF2_ROUNDS', '29000'))
+    PASSWORD_ARGON2_TIME_COST = int(os.getenv('PASSWORD_ARGON2_TIME_COST', '3'))
+    PASSWORD_ARGON2_MEMORY_KIB = int(os.getenv('PASSWORD_ARGON2_MEMORY_KIB', '65536'))
+    PASSWORD_ARGON2_PARALLELISM = int(os.getenv('PASSWORD_ARGON2_PARALLELISM', '4'))
+    # Threads that compute hashes (0 = inline), and how many calls may queue for them;
+    # further calls, and calls not done within PASSWORD_HASH_WAIT seconds, get a 503
+    PASSWORD_HASH_THREADS = int(os.getenv('PASSWORD_HASH_THREADS', '2'))
+    PASSWORD_HASH_QUEUE = int(os.getenv('PASSWORD_HASH_QUEUE', '16'))
+    PASSWORD_HASH_WAIT = float(os.getenv('PASSWORD_HASH_WAIT', '5'))
+
     # Practice session settings
     DEFAULT_WORDS_PER_SESSION = 5
+    # Timezone for streak days when a user hasn't set one (IANA name)
+    DEFAULT_USER_TIMEZONE = os.getenv('DEFAULT_USER_TIMEZONE', 'UTC')
+
+    # Review-load forecast (/api/progress/forecast)
+    FORECAST_MAX_DAYS = int(os.getenv('FORECAST_MAX_DAYS', '90'))
+    FORECAST_CACHE_MAX_USERS = int(os.getenv('FORECAST_CACHE_MAX_USERS', '1024'))
+
+    # Feedback cache for repeated evaluate_sentence calls
+    FEEDBACK_CACHE_MAX_ENTRIES = int(os.getenv('FEEDBACK_CACHE_MAX_ENTRIES', '2048'))
+    FEEDBACK_CACHE_TTL_SECONDS = int(os.getenv('FEEDBACK_CACHE_TTL_SECONDS', str(7 * 24 * 3600)))
+    FEEDBACK_CACHE_USE_REDIS = os.getenv('FEEDBACK_CACHE_USE_REDIS', 'true').lower() == 'true'
+
+    # Per-user due queue (due_queue.py): Redis sorted sets, in-process fallback
+    DUE_QUEUE_USE_REDIS = os.getenv('DUE_QUEUE_USE_REDIS', 'true').lower() == 'true'
+    DUE_QUEUE_TTL_SECONDS = int(os.getenv('DUE_QUEUE_TTL_SECONDS', str(24 * 3600)))
+    DUE_QUEUE_LOCAL_TTL_SECONDS = int(os.getenv('DUE_QUEUE_LOCAL_TTL_SECONDS', '60'))
+    DUE_QUEUE_LOCAL_MAX_USERS = int(os.getenv('DUE_QUEUE_LOCAL_MAX_USERS', '1024'))
+
+    # Delta sync (/api/sync): changes per page, and how long deletions are remembered
+    SYNC_BATCH_SIZE = int(os.getenv('SYNC_BATCH_SIZE', '500'))
+    SYNC_MAX_BATCH_SIZE = int(os.getenv('SYNC_MAX_BATCH_SIZE', '2000'))
+    SYNC_SETTLE_SECONDS = float(os.getenv('SYNC_SETTLE_SECONDS', '5'))
+    SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv('SYNC_TOMBSTONE_RETENTION_DAYS', '90'))
+
+    # Conversation history compaction (estimated tokens replayed per agent run; 0 disables)
+    SESSION_HISTORY_TOKEN_BUDGET = int(os.getenv('SESSION_HISTORY_TOKEN_BUDGET', '3000'))
+    SESSION_HISTORY_MIN_RECENT_TURNS = int(os.getenv('SESSION_HISTORY_MIN_RECENT_TURNS', '2'))
+
+    # Shared Redis connection pool and circuit breaker
+    REDIS_MAX_CONNECTIONS = int(os.getenv('REDIS_MAX_CONNECTIONS', '20'))
+    REDIS_HEALTH_TTL_SECONDS = int(os.getenv('REDIS_HEALTH_TTL_SECONDS', '30'))
+    REDIS_BREAKER_FAILURE_THRESHOLD = int(os.getenv('REDIS_BREAKER_FAILURE_THRESHOLD', '3'))
+    REDIS_BREAKER_RESET_SECONDS = int(os.getenv('REDIS_BREAKER_RESET_SECONDS', '30'))
+
+    # Long-term memory (mem0). 'local' keeps memories in-process for offline dev/tests.
+    MEMORY_BACKEND = os.getenv('MEMORY_BACKEND', 'mem0' if os.getenv('MEM0_API_KEY') else 'local')
+    MEMORY_SEARCH_CACHE_TTL_SECONDS = int(os.getenv('MEMORY_SEARCH_CACHE_TTL_SECONDS', '300'))
+    MEMORY_SEARCH_CACHE_MAX_USERS = int(os.getenv('MEMORY_SEARCH_CACHE_MAX_USERS', '1024'))
+    MEMORY_OUTBOX_WORKER = os.getenv('MEMORY_OUTBOX_WORKER', 'true').lower() == 'true'
+    MEMORY_OUTBOX_INTERVAL_SECONDS = float(os.getenv('MEMORY_OUTBOX_INTERVAL_SECONDS', '5'))
+    MEMORY_OUTBOX_BATCH_SIZE = int(os.getenv('MEMORY_OUTBOX_BATCH_SIZE', '50'))
+    MEMORY_OUTBOX_MAX_WORKERS = int(os.getenv('MEMORY_OUTBOX_MAX_WORKERS', '4'))
+    MEMORY_OUTBOX_MAX_ATTEMPTS = int(os.getenv('MEMORY_OUTBOX_MAX_ATTEMPTS', '5'))
+    # Claimed rows aren't retried for this long (covers a batch of slow, LLM-backed mem0 adds)
+    MEMORY_OUTBOX_LEASE_SECONDS = int(os.getenv('MEMORY_OUTBOX_LEASE_SECONDS', '600'))
+    # Sent and failed rows are deleted after this many days by `flask laoshi purge-memory-outbox`
+    MEMORY_OUTBOX_RETENTION_DAYS = int(os.getenv('MEMORY_OUTBOX_RETENTION_DAYS', '30'))
 
     # Encryption for BYOK API keys
     ENCRYPTION_KEY = os.getenv('ENCRYPTION_KEY')
@@ -44,6 +136,19 @@ class Config():
     APP_BASE_URL = os.getenv('APP_BASE_URL', 'https://laoshi.zeabur.app')
     ONBOARDING_EMAIL_TEMPLATE = os.getenv('ONBOARDING_EMAIL_TEMPLATE')
     PASSWORD_RESET_EMAIL_TEMPLATE = os.getenv('PASSWORD_RESET_EMAIL_TEMPLATE')
+    # Emails are queued in the email_outbox table and delivered by a background worker.
+    # 'local' records messages in-process instead of sending them.
+    EMAIL_BACKEND = os.getenv('EMAIL_BACKEND', 'sendgrid')
+    SENDGRID_API_BASE_URL = os.getenv('SENDGRID_API_BASE_URL', 'https://api.sendgrid.com')
+    EMAIL_SEND_TIMEOUT_SECONDS = float(os.getenv('EMAIL_SEND_TIMEOUT_SECONDS', '10'))
+    EMAIL_OUTBOX_WORKER = os.getenv('EMAIL_OUTBOX_WORKER', 'true').lower() == 'true'
+    EMAIL_OUTBOX_INTERVAL_SECONDS = float(os.getenv('EMAIL_OUTBOX_INTERVAL_SECONDS', '5'))
+    EMAIL_OUTBOX_BATCH_SIZE = int(os.getenv('EMAIL_OUTBOX_BATCH_SIZE', '50'))
+    EMAIL_OUTBOX_MAX_ATTEMPTS = int(os.getenv('EMAIL_OUTBOX_MAX_ATTEMPTS', '5'))
+    # Claimed rows aren't retried for this long (covers a batch sent row by row at the send timeout)
+    EMAIL_OUTBOX_LEASE_SECONDS = int(os.getenv('EMAIL_OUTBOX_LEASE_SECONDS', '600'))
+    # Sent and failed rows are deleted after this many days by `flask laoshi purge-email-outbox`
+    EMAIL_OUTBOX_RETENTION_DAYS = int(os.getenv('EMAIL_OUTBOX_RETENTION_DAYS', '30'))
 
     # Rate limiting - use memory storage to avoid Redis connection issues
     RATELIMIT_STORAGE_URI = 'memory://'
@@ -73,6 +178,11 @@ class TestConfig(Config):
     # Valid Fernet key for deterministic tests (32 bytes base64-encoded)
     ENCRYPTION_KEY = 'dGVzdC1lbmNyeXB0aW9uLWtleS0xMjM0NTY3ODkwMTIzNDU2Nzg5MA=='
     RATELIMIT_ENABLED = False  # Disable rate limiting in tests
+    MEMORY_BACKEND = 'local'
+    MEMORY_OUTBOX_WORKER = False  # Tests flush the outbox explicitly
+    EMAIL_BACKEND = 'local'
+    EMAIL_OUTBOX_WORKER = False
+    PASSWORD_PBKDF2_ROUNDS = 1000  # Cheap hashes for faster tests
     OAUTH_CLIENTS = {
         'laoshi-web': {
             'type': 'web',
@@ -4,6 +4,8 @@ import logging
 from cryptography.fernet import Fernet, InvalidToken
 from flask import current_app
 
+from server_timing import timed
+
 logger = logging.getLogger(__name__)
 
 
@@ -46,8 +48,9 @@ def decrypt_api_key(ciphertext: str) -> str | None:
             logger.error("ENCRYPTION_KEY is not configured")
             return None
         
-        f = Fernet(key.encode() if isinstance(key, str) else key)
-        return f.decrypt(ciphertext.encode()).decode()
+        with timed('decrypt'):
+            f = Fernet(key.encode() if isinstance(key, str) else key)
+            return f.decrypt(ciphertext.encode()).decode()
     except InvalidToken as e:
         logger.error(f"Failed to decrypt API key - invalid token (wrong key?): {e}")
         return None
@@ -10,6 +10,7 @@ from datetime import date
 
 from extensions import db
 from models import Deck, Word, User
+from due_queue import due_queue
 from utils import paginate_query
 
 deck_bp = Blueprint('deck_bp', __name__)
@@ -79,35 +80,83 @@ def compute_deck_stats(deck_id):
     }
 
 
-@deck_bp.route('/decks', methods=['GET'])
-@jwt_required()
-def get_decks():
-    """Get all decks for the current user with computed stats."""
-    user = get_current_user()
-    if not user:
-        return jsonify({'error': 'User not found'}), 404
+def compute_stats_for_decks(deck_ids):
+    """
+    Compute compute_deck_stats() for many decks with one grouped query per table
+    instead of one query per deck. Returns {deck_id: stats}.
+    """
+    from models import UserSession
+    if not deck_ids:
+        return {}
 
+    word_rows = db.session.execute(
+        select(
+            Word.deck_id,
+            func.count(Word.id),
+            func.count(Word.id).filter(Word.is_mastered == True),
+            func.count(Word.id).filter(Word.last_quality.isnot(None)),
+        )
+        .where(Word.deck_id.in_(deck_ids))
+        .group_by(Word.deck_id)
+    ).all()
+    word_counts = {deck_id: (total, mastered, practiced) for deck_id, total, mastered, practiced in word_rows}
+
+    last_practiced = dict(db.session.execute(
+        select(UserSession.deck_id, func.max(UserSession.session_end_ds))
+        .where(UserSession.deck_id.in_(deck_ids))
+        .group_by(UserSession.deck_id)
+    ).all())
+
+    stats = {}
+    for deck_id in deck_ids:
+        word_count, mastered_count, practiced_count = word_counts.get(deck_id, (0, 0, 0))
+        last_practiced_at = last_practiced.get(deck_id)
+        stats[deck_id] = {
+            'word_count': word_count,
+            'mastered_count': mastered_count,
+            'practiced_count': practiced_count,
+            'mastery_percentage': round((mastered_count / word_count) * 100) if word_count > 0 else 0,
+            'last_practiced_at': last_practiced_at.isoformat() if last_practiced_at else None,
+        }
+    return stats
+
+
+def list_decks_with_stats(user, language_filter=None):
+    """The user's decks with stats and due/new counts, least recently practiced
+    first (GET /decks, shared with /api/bootstrap)."""
     # Get all decks for user
     decks = Deck.get_by_user_id(user.id)
 
     # Optional language filter
-    language_filter = request.args.get('language')
     if language_filter:
         decks = [d for d in decks if d.language == language_filter]
 
     # Build response with stats for each deck
     decks_data = []
+    stats_by_deck = compute_stats_for_decks([deck.id for deck in decks])
+    due_by_deck = due_queue.deck_counts(user.id, [deck.id for deck in decks], date.today())
     for deck in decks:
         deck_data = deck.format_data(viewer=user)
         if deck_data:
-            stats = compute_deck_stats(deck.id)
-            deck_data.update(stats)
+            deck_data.update(stats_by_deck[deck.id])
+            deck_data['due_count'] = due_by_deck[deck.id]['due']
+            deck_data['new_count'] = due_by_deck[deck.id]['new']
             decks_data.append(deck_data)
 
     # Sort by reverse recency (least recently practiced first, nulls first)
     decks_data.sort(key=lambda d: (d['last_practiced_at'] is not None, d['last_practiced_at'] or ''))
+    return decks_data
+
+
+@deck_bp.route('/decks', methods=['GET'])
+@jwt_required()
+def get_decks():
+    """Get all decks for the current user with computed stats."""
+    user = get_current_user()
+    if not user:
+        return jsonify({'error': 'User not found'}), 404
 
-    return jsonify({'decks': decks_data}), 200
+    return jsonify({'decks': list_decks_with_stats(user, request.args.get('language'))}), 200
 
 
 @deck_bp.route('/decks', methods=['POST'])
@@ -341,14 +390,15 @@ def add_words_to_deck(deck_id):
         return jsonify({'error': 'Validation errors', 'details': errors}), 400
 
     try:
+        db.session.flush()
+        # Serialize before commit expires the rows (avoids a refresh SELECT per word)
+        created = [word.format_data(viewer=user) for word in created_words]
         db.session.commit()
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': 'Failed to create words', 'message': str(e)}), 500
 
-    return jsonify({
-        'created': [word.format_data(viewer=user) for word in created_words]
-    }), 201
+    return jsonify({'created': created}), 201
 
 
 @deck_bp.route('/decks/combine', methods=['POST'])
@@ -0,0 +1,561 @@
+"""Per-user due queue: words sorted by (next_review_date, word_id), per deck, kept current.
+
+Session start (select_srs_words), progress stats and the deck list ask "what is
+due" through this index instead of scanning the word table. Counts and the
+first k due words are O(log n + k).
+
+Layout: one sorted set per (user, deck), plus one for all of the user's words.
+Each entry is a word id scored date_ordinal * 2**32 + word_id (new words, with no
+next_review_date, score just word_id), so ties on the date fall back to word id
+and new / due / upcoming words are contiguous score ranges. Decks live in Redis
+when it is available (DUE_QUEUE_USE_REDIS and REDIS_URI), otherwise in a
+per-process store bisecting sorted lists.
+
+Maintenance is incremental. Session hooks collect Word inserts, deletes and
+changes to next_review_date or deck_id at flush time and apply them after the
+commit (and drop them on rollback). That covers update_srs, the skip path,
+re-rating, mark/unmark-as-mastered, word create/delete and deck or account
+deletion without touching those call sites. Bulk statements that bypass the
+ORM unit of work (sample-deck seeding, Word.reschedule_deck) call invalidate()
+after committing instead.
+
+A user's queue is rebuilt from the database on first use after invalidation,
+or after the Redis copy expires (DUE_QUEUE_TTL_SECONDS, bounding drift from
+writes made outside the app). `flask laoshi rebuild-due-queue` rebuilds it
+explicitly. The in-process fallback only sees this worker's writes, so its
+entries expire after DUE_QUEUE_LOCAL_TTL_SECONDS. Users whose changes missed
+Redis during an outage are invalidated there once it is reachable again.
+"""
+import bisect
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from config import Config
+from extensions import db
+from metrics import redis_call_duration
+from models import Deck, User, Word
+from redis_pool import get_redis_pool
+from server_timing import timed
+
+logger = logging.getLogger(__name__)
+
+NO_DECK = 0  # key for words outside any deck
+DAY = 2 ** 32
+_CHANGES_KEY = 'due_queue_changes'
+_INVALIDATE_KEY = 'due_queue_invalidate'
+
+
+def score(word_id: int, next_review_date: date | None) -> int:
+    return (next_review_date.toordinal() * DAY if next_review_date else 0) + word_id
+
+
+def score_ranges(today: date):
+    """(min, max) scores of new, due (today or earlier) and upcoming words."""
+    end_of_today = (today.toordinal() + 1) * DAY
+    return (0, DAY - 1), (DAY, end_of_today - 1), (end_of_today, float('inf'))
+
+
+class _UserQueue:
+    def __init__(self, built_at):
+        self.built_at = built_at
+        self.decks = {}    # deck_id -> sorted scores
+        self.all = []      # sorted scores across decks
+        self.members = {}  # word_id -> (deck_id, score)
+
+    def scores(self, deck_id):
+        return self.all if deck_id is None else self.decks.get(deck_id, [])
+
+    def remove(self, word_id):
+        deck_id, old = self.members.pop(word_id, (None, None))
+        if old is None:
+            return
+        for scores in (self.decks.get(deck_id, []), self.all):
+            i = bisect.bisect_left(scores, old)
+            if i < len(scores) and scores[i] == old:
+                del scores[i]
+
+    def add(self, word_id, deck_id, value):
+        self.remove(word_id)
+        self.members[word_id] = (deck_id, value)
+        bisect.insort(self.decks.setdefault(deck_id, []), value)
+        bisect.insort(self.all, value)
+
+
+class LocalDueStore:
+    """In-process queues for recently used users (LRU), each valid for ttl_seconds."""
+
+    def __init__(self, ttl_seconds=60, max_users=1024, clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self.max_users = max_users
+        self._clock = clock
+        self._queues = OrderedDict()  # user_id -> _UserQueue
+        self._rebuilding = {}         # user_id -> changes applied since its rebuild started
+        self._lock = threading.Lock()
+
+    def _queue(self, user_id):
+        # Caller must hold self._lock
+        queue = self._queues.get(user_id)
+        if queue is not None and self._clock() - queue.built_at >= self.ttl_seconds:
+            del self._queues[user_id]
+            return None
+        return queue
+
+    def is_built(self, user_id) -> bool:
+        with self._lock:
+            return self._queue(user_id) is not None
+
+    def version(self, user_id):
+        """Start a rebuild: returns the token replace() checks for racing changes."""
+        with self._lock:
+            return self._rebuilding.setdefault(user_id, 0)
+
+    def _changed(self, user_id):
+        # Caller must hold self._lock
+        if user_id in self._rebuilding:
+            self._rebuilding[user_id] += 1
+
+    def replace(self, user_id, entries, version) -> bool:
+        queue = _UserQueue(self._clock())
+        for word_id, deck_id, value in sorted(entries, key=lambda e: e[2]):
+            queue.members[word_id] = (deck_id, value)
+            queue.decks.setdefault(deck_id, []).append(value)
+            queue.all.append(value)
+        with self._lock:
+            if self._rebuilding.pop(user_id, None) != version:
+                return False
+            self._queues[user_id] = queue
+            self._queues.move_to_end(user_id)
+            while len(self._queues) > self.max_users:
+                self._queues.popitem(last=False)
+        return True
+
+    def apply(self, user_id, changes):
+        with self._lock:
+            self._changed(user_id)
+            queue = self._queue(user_id)
+            if queue is None:
+                return
+            for word_id, deck_id, value in changes:
+                if deck_id is None:
+                    queue.remove(word_id)
+                else:
+                    queue.add(word_id, deck_id, value)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._queues.pop(user_id, None)
+            self._changed(user_id)
+
+    def clear(self):
+        with self._lock:
+            self._queues.clear()
+            self._rebuilding.clear()
+
+    def counts(self, user_id, deck_ids, ranges):
+        with self._lock:
+            queue = self._queue(user_id) or _UserQueue(0)
+            return [[bisect.bisect_right(queue.scores(d), hi) - bisect.bisect_left(queue.scores(d), lo)
+                     for lo, hi in ranges] for d in deck_ids]
+
+    def at_ranks(self, user_id, deck_id, ranks):
+        with self._lock:
+            scores = (self._queue(user_id) or _UserQueue(0)).scores(deck_id)
+            return [scores[r] % DAY for r in ranks if r < len(scores)]
+
+    def first(self, user_id, deck_id, score_range, limit):
+        with self._lock:
+            scores = (self._queue(user_id) or _UserQueue(0)).scores(deck_id)
+            start = bisect.bisect_left(scores, score_range[0])
+            end = min(bisect.bisect_right(scores, score_range[1]), start + limit)
+            return [s % DAY for s in scores[start:end]]
+
+
+class RedisDueStore:
+    """The same queues as sorted sets, shared by all workers."""
+
+    def __init__(self, client, key_prefix='due_queue:', ttl_seconds=86400):
+        self.client = client
+        self.key_prefix = key_prefix
+        self.ttl_seconds = ttl_seconds
+
+    def _key(self, user_id, part):
+        return f"{self.key_prefix}{user_id}:{part}"
+
+    def _set_key(self, user_id, deck_id):
+        return self._key(user_id, 'all' if deck_id is None else f'deck:{deck_id}')
+
+    @staticmethod
+    def _bound(value):
+        return '+inf' if value == float('inf') else int(value)
+
+    def is_built(self, user_id) -> bool:
+        with redis_call_duration.time(op='due_queue_read'), timed('redis'):
+            return bool(self.client.exists(self._key(user_id, 'built')))
+
+    def version(self, user_id):
+        with redis_call_duration.time(op='due_queue_read'), timed('redis'):
+            return self.client.get(self._key(user_id, 'version'))
+
+    def replace(self, user_id, entries, version) -> bool:
+        """Rewrite the user's sets, unless a change was applied since `version` was read."""
+        import redis
+
+        version_key, decks_key = self._key(user_id, 'version'), self._key(user_id, 'decks')
+        by_deck = {}
+        for word_id, deck_id, value in entries:
+            by_deck.setdefault(deck_id, {})[word_id] = value
+        with redis_call_duration.time(op='due_queue_rebuild'), timed('redis'):
+            with self.client.pipeline() as pipe:
+                try:
+                    pipe.watch(version_key)
+                    if pipe.get(version_key) != version:
+                        return False
+                    old_decks = pipe.smembers(decks_key)
+                    pipe.multi()
+                    pipe.delete(self._set_key(user_id, None), decks_key,
+                                *(self._key(user_id, f"deck:{d.decode() if isinstance(d, bytes) else d}")
+                                  for d in old_decks))
+                    for deck_id, mapping in by_deck.items():
+                        pipe.zadd(self._set_key(user_id, deck_id), mapping)
+                        pipe.zadd(self._set_key(user_id, None), mapping)
+                        pipe.expire(self._set_key(user_id, deck_id), 2 * self.ttl_seconds)
+                    if by_deck:
+                        pipe.sadd(decks_key, *by_deck)
+                    pipe.expire(self._set_key(user_id, None), 2 * self.ttl_seconds)
+                    pipe.expire(decks_key, 2 * self.ttl_seconds)
+                    pipe.set(self._key(user_id, 'built'), 1, ex=self.ttl_seconds)
+                    pipe.execute()
+                except redis.WatchError:
+                    return False
+        return True
+
+    def apply(self, user_id, changes):
+        all_key = self._set_key(user_id, None)
+        with redis_call_duration.time(op='due_queue_write'), timed('redis'):
+            pipe = self.client.pipeline(transaction=False)
+            for word_id, old_deck_id, deck_id, value in changes:
+                if old_deck_id is not None and old_deck_id != deck_id:
+                    pipe.zrem(self._set_key(user_id, old_deck_id), word_id)
+                if deck_id is None:
+                    pipe.zrem(all_key, word_id)
+                    continue
+                pipe.zadd(self._set_key(user_id, deck_id), {word_id: value})
+                pipe.zadd(all_key, {word_id: value})
+                pipe.sadd(self._key(user_id, 'decks'), deck_id)
+                pipe.expire(self._set_key(user_id, deck_id), 2 * self.ttl_seconds)
+            pipe.incr(self._key(user_id, 'version'))
+            pipe.expire(self._key(user_id, 'version'), 2 * self.ttl_seconds)
+            pipe.expire(all_key, 2 * self.ttl_seconds)
+            pipe.execute()
+
+    def invalidate(self, *user_ids):
+        with redis_call_duration.time(op='due_queue_write'), timed('redis'):
+            pipe = self.client.pipeline(transaction=False)
+            for user_id in user_ids:
+                pipe.delete(self._key(user_id, 'built'))
+                pipe.incr(self._key(user_id, 'version'))
+            pipe.execute()
+
+    def counts(self, user_id, deck_ids, ranges):
+        with redis_call_duration.time(op='due_queue_read'), timed('redis'):
+            pipe = self.client.pipeline(transaction=False)
+            for deck_id in deck_ids:
+                for lo, hi in ranges:
+                    pipe.zcount(self._set_key(user_id, deck_id), self._bound(lo), self._bound(hi))
+            results = pipe.execute()
+        return [results[i:i + len(ranges)] for i in range(0, len(results), len(ranges))]
+
+    def at_ranks(self, user_id, deck_id, ranks):
+        if not ranks:
+            return []
+        with redis_call_duration.time(op='due_queue_read'), timed('redis'):
+            pipe = self.client.pipeline(transaction=False)
+            for r in ranks:
+                pipe.zrange(self._set_key(user_id, deck_id), r, r)
+            return [int(ids[0]) for ids in pipe.execute() if ids]
+
+    def first(self, user_id, deck_id, score_range, limit):
+        if limit <= 0:
+            return []
+        with redis_call_duration.time(op='due_queue_read'), timed('redis'):
+            ids = self.client.zrangebyscore(self._set_key(user_id, deck_id), self._bound(score_range[0]),
+                                            self._bound(score_range[1]), start=0, num=limit)
+        return [int(i) for i in ids]
+
+
+class DueQueue:
+    """Due lookups served from Redis when available, else from the in-process store."""
+
+    def __init__(self, use_shared_pool=True, redis_client=None, key_prefix='due_queue:',
+                 ttl_seconds=86400, local_ttl_seconds=60, max_local_users=1024, clock=time.monotonic):
+        self.use_shared_pool = use_shared_pool
+        self.redis_client = redis_client
+        self.key_prefix = key_prefix
+        self.ttl_seconds = ttl_seconds
+        self.local = LocalDueStore(local_ttl_seconds, max_local_users, clock)
+        self._dirty = set()  # users whose Redis copy missed changes
+        self._lock = threading.Lock()
+        self._rebuilds = 0
+        self._redis_errors = 0
+
+    # ---- store selection ----
+
+    def _redis_configured(self) -> bool:
+        return self.redis_client is not None or (self.use_shared_pool and get_redis_pool().enabled)
+
+    def _redis(self) -> RedisDueStore | None:
+        """Return the Redis store, or None when it is disabled or unavailable."""
+        client = self.redis_client
+        if client is None:
+            if not self.use_shared_pool:
+                return None
+            pool = get_redis_pool()
+            if not pool.enabled or not pool.is_available():
+                return None
+            client = pool.sync_client()
+        store = RedisDueStore(client, self.key_prefix, self.ttl_seconds)
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        if dirty:
+            try:
+                store.invalidate(*dirty)
+            except Exception as e:
+                with self._lock:
+                    self._dirty |= dirty
+                self._redis_failed('invalidate', e)
+                return None
+        return store
+
+    def _redis_failed(self, action, error):
+        logger.warning(f"Due queue Redis {action} failed: {type(error).__name__}: {error}")
+        with self._lock:
+            self._redis_errors += 1
+        if self.redis_client is None and self.use_shared_pool:
+            get_redis_pool().record_failure()
+
+    def _mark_dirty(self, user_ids):
+        if self._redis_configured():
+            with self._lock:
+                self._dirty.update(user_ids)
+
+    # ---- rebuild ----
+
+    @staticmethod
+    def load_entries(user_id: int) -> list[tuple[int, int, int]]:
+        """(word_id, deck_id, score) for all the user's words, in one SELECT."""
+        rows = db.session.query(Word.id, Word.deck_id, Word.next_review_date).filter(Word.user_id == user_id).all()
+        return [(word_id, deck_id or NO_DECK, score(word_id, due)) for word_id, deck_id, due in rows]
+
+    def _rebuild(self, store, user_id):
+        """Rebuild the user's queue in store. Returns None, or the loaded entries if a
+        change raced the rebuild (the queue stays unbuilt and the next lookup retries)."""
+        version = store.version(user_id)
+        entries = self.load_entries(user_id)
+        with self._lock:
+            self._rebuilds += 1
+        if store.replace(user_id, entries, version):
+            return None
+        logger.info(f"Due queue for user {user_id} changed during rebuild; answering from a snapshot")
+        return entries
+
+    def rebuild(self, user_id: int):
+        """Rebuild the user's queue from the database now."""
+        self.local.invalidate(user_id)
+        store = self._redis()
+        if store is not None:
+            try:
+                store.invalidate(user_id)
+                self._rebuild(store, user_id)
+                return
+            except Exception as e:
+                self._redis_failed('rebuild', e)
+                self._mark_dirty([user_id])
+        self._rebuild(self.local, user_id)
+
+    def _read(self, user_id, op):
+        store = self._redis()
+        if store is not None:
+            try:
+                return self._read_from(store, user_id, op)
+            except Exception as e:
+                self._redis_failed('read', e)
+        return self._read_from(self.local, user_id, op)
+
+    def _read_from(self, store, user_id, op):
+        if not store.is_built(user_id):
+            raced = self._rebuild(store, user_id)
+            if raced is not None:
+                store = LocalDueStore(ttl_seconds=float('inf'))
+                store.replace(user_id, raced, store.version(user_id))
+        return op(store)
+
+    # ---- maintenance ----
+
+    def apply(self, changes_by_user: dict):
+        """Apply {user_id: [(word_id, old_deck_id, deck_id, score)]}; deck_id None removes the word."""
+        store = self._redis()
+        for user_id, changes in changes_by_user.items():
+            if store is not None:
+                try:
+                    store.apply(user_id, changes)
+                    self.local.invalidate(user_id)
+                    continue
+                except Exception as e:
+                    self._redis_failed('write', e)
+                    store = None
+            self._mark_dirty([user_id])
+            self.local.apply(user_id, [(word_id, deck_id, value) for word_id, _, deck_id, value in changes])
+
+    def invalidate(self, *user_ids):
+        """Drop the users' queues; the next lookup rebuilds them from the database."""
+        for user_id in user_ids:
+            self.local.invalidate(user_id)
+        store = self._redis()
+        if store is not None:
+            try:
+                store.invalidate(*user_ids)
+                return
+            except Exception as e:
+                self._redis_failed('invalidate', e)
+        self._mark_dirty(user_ids)
+
+    def clear(self):
+        """Forget all in-process state (tests)."""
+        self.local.clear()
+        with self._lock:
+            self._dirty.clear()
+            self._rebuilds = self._redis_errors = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'rebuilds': self._rebuilds, 'redis_errors': self._redis_errors, 'dirty_users': len(self._dirty)}
+
+    # ---- lookups ----
+
+    def user_counts(self, user_id: int, today: date) -> dict:
+        """{'new': n, 'due': n} across all of the user's words (due: next_review_date <= today)."""
+        new_range, due_range, _ = score_ranges(today)
+        (new, due), = self._read(user_id, lambda store: store.counts(user_id, [None], [new_range, due_range]))
+        return {'new': new, 'due': due}
+
+    def deck_counts(self, user_id: int, deck_ids, today: date) -> dict:
+        """{deck_id: {'new': n, 'due': n}} for the user's decks."""
+        deck_ids = list(deck_ids)
+        if not deck_ids:
+            return {}
+        new_range, due_range, _ = score_ranges(today)
+        rows = self._read(user_id, lambda store: store.counts(user_id, deck_ids, [new_range, due_range]))
+        return {deck_id: {'new': new, 'due': due} for deck_id, (new, due) in zip(deck_ids, rows)}
+
+    def pick_session(self, user_id: int, deck_id: int, today: date, words_count: int, rng) -> list[int]:
+        """Word ids for a practice session, composed as select_srs_words describes.
+
+        New words are sampled with rng; due words come soonest first, then words
+        not yet due fill any open slots.
+        """
+        from srs_engine import session_mix
+
+        new_range, due_range, upcoming_range = score_ranges(today)
+
+        def op(store):
+            (new, due), = store.counts(user_id, [deck_id], [new_range, due_range])
+            take_new, take_due = session_mix(words_count, new, due)
+            picked = store.at_ranks(user_id, deck_id, rng.sample(range(new), take_new))
+            picked += store.first(user_id, deck_id, due_range, take_due)
+            picked += store.first(user_id, deck_id, upcoming_range, words_count - len(picked))
+            return picked
+
+        return self._read(user_id, op)
+
+
+due_queue = DueQueue(
+    use_shared_pool=Config.DUE_QUEUE_USE_REDIS,
+    ttl_seconds=Config.DUE_QUEUE_TTL_SECONDS,
+    local_ttl_seconds=Config.DUE_QUEUE_LOCAL_TTL_SECONDS,
+    max_local_users=Config.DUE_QUEUE_LOCAL_MAX_USERS,
+)
+
+
+# ---- session hooks ----
+
+def _committed(obj, attr):
+    """The value of attr as of the last load or commit."""
+    history = inspect(obj).attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(obj, attr)
+
+
+def _collect_changes(session, flush_context):
+    changes = session.info.setdefault(_CHANGES_KEY, [])
+    for obj in session.new:
+        if isinstance(obj, Word) and obj.user_id is not None:
+            changes.append((obj.user_id, obj.id, None, obj.deck_id or NO_DECK, score(obj.id, obj.next_review_date)))
+    for obj in session.dirty:
+        if not isinstance(obj, Word) or obj.user_id is None:
+            continue
+        state = inspect(obj)
+        if state.attrs.next_review_date.history.has_changes() or state.attrs.deck_id.history.has_changes():
+            changes.append((obj.user_id, obj.id, _committed(obj, 'deck_id') or NO_DECK,
+                            obj.deck_id or NO_DECK, score(obj.id, obj.next_review_date)))
+    for obj in session.deleted:
+        if isinstance(obj, Word) and obj.user_id is not None:
+            changes.append((obj.user_id, obj.id, _committed(obj, 'deck_id') or NO_DECK, None, None))
+        elif isinstance(obj, User):
+            session.info.setdefault(_INVALIDATE_KEY, set()).add(obj.id)
+        elif isinstance(obj, Deck):
+            session.info.setdefault(_INVALIDATE_KEY, set()).add(obj.user_id)
+
+
+def _apply_changes(session):
+    changes = session.info.pop(_CHANGES_KEY, None)
+    invalidated = session.info.pop(_INVALIDATE_KEY, set())
+    if not changes and not invalidated:
+        return
+    by_user = {}
+    for user_id, word_id, old_deck_id, deck_id, value in changes or ():
+        if user_id not in invalidated:
+            by_user.setdefault(user_id, []).append((word_id, old_deck_id, deck_id, value))
+    try:
+        if by_user:
+            due_queue.apply(by_user)
+        if invalidated:
+            due_queue.invalidate(*invalidated)
+    except Exception:
+        # The commit already succeeded; a stale queue is rebuilt once it expires
+        logger.exception("Failed to update the due queue after commit")
+
+
+def _discard_changes(session):
+    session.info.pop(_CHANGES_KEY, None)
+    session.info.pop(_INVALIDATE_KEY, None)
+
+
+def _keep_old_deck(target, value, oldvalue, initiator):
+    """No-op; registering it with active_history is what matters."""
+
+
+_hooks_installed = False
+
+
+def install_hooks():
+    """Keep the due queue in step with committed Word changes (idempotent)."""
+    global _hooks_installed
+    if not _hooks_installed:
+        event.listen(Session, 'after_flush', _collect_changes)
+        event.listen(Session, 'after_commit', _apply_changes)
+        event.listen(Session, 'after_rollback', _discard_changes)
+        # Load the old deck_id on assignment even when the Word was expired by a
+        # commit, so a moved word is removed from its previous deck's set
+        event.listen(Word.deck_id, 'set', _keep_old_deck, active_history=True)
+        _hooks_installed = True
+
+
+def init_app(app):
+    install_hooks()
@@ -1,9 +1,37 @@
-"""Email service for Laoshi Coach using SendGrid dynamic templates."""
+"""Email service for Laoshi Coach: a transactional outbox in front of SendGrid dynamic templates.
+
+Request handlers only enqueue: send_welcome_email() and send_password_reset_email()
+insert an EmailOutbox row and return, so registration and password reset no
+longer wait on SendGrid. The email outbox worker thread delivers due rows in
+batches: rows sharing a template go out in one v3 mail/send call (one
+personalization per recipient) over a reused HTTP connection. A batch is
+claimed and committed before sending, so no transaction or row lock is held
+while waiting on SendGrid. Failures are retried with exponential backoff until
+EMAIL_OUTBOX_MAX_ATTEMPTS; each row records its status, attempts and last
+error. Template data (which holds reset links) is cleared once a row is sent
+or has failed for good, and finished rows are purged after
+EMAIL_OUTBOX_RETENTION_DAYS.
+
+Backends: 'sendgrid' posts to SENDGRID_API_BASE_URL; 'local' is an in-process
+stand-in that records messages instead of sending them, for development and
+tests.
+"""
 
 import logging
 import os
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
+import threading
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple
+
+import httpx
+from flask import current_app, has_app_context
+
+from config import Config
+from extensions import db
+from metrics import email_send_duration
+from models import EmailOutbox
+from outbox import OutboxWorker
 
 logger = logging.getLogger(__name__)
 
@@ -14,9 +42,233 @@ ONBOARDING_EMAIL_TEMPLATE = os.getenv('ONBOARDING_EMAIL_TEMPLATE')
 PASSWORD_RESET_EMAIL_TEMPLATE = os.getenv('PASSWORD_RESET_EMAIL_TEMPLATE')
 
 
-def _send_email(to_email: str, template_id: str, dynamic_data: dict) -> bool:
-    """Send an email via SendGrid dynamic template. Returns True on success, False on failure."""
-    if not SENDGRID_API_KEY:
+class EmailDeliveryError(Exception):
+    """The email provider rejected a send request."""
+
+    def __init__(self, message: str, status_code: int | None = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+    @property
+    def retryable(self) -> bool:
+        return self.status_code is None or self.status_code in (408, 429) or self.status_code >= 500
+
+
+class LocalEmailBackend:
+    """In-process stand-in for SendGrid: records messages instead of sending them."""
+
+    def __init__(self, max_messages: int = 1000):
+        self.sent = deque(maxlen=max_messages)
+        self._lock = threading.Lock()
+
+    def send(self, template_id: str, messages: list[tuple[str, dict]]):
+        with self._lock:
+            for to_email, data in messages:
+                self.sent.append({'to': to_email, 'template_id': template_id, 'data': data})
+        logger.info(f"Local email backend: recorded {len(messages)} message(s) for template {template_id}")
+
+
+class SendGridBackend:
+    """Sends batches through SendGrid's v3 mail/send API over one pooled HTTP client."""
+
+    def __init__(self, api_key: str, from_email: str, base_url: str = 'https://api.sendgrid.com',
+                 timeout: float = 10.0, transport: httpx.BaseTransport | None = None):
+        self.api_key = api_key
+        self.from_email = from_email
+        self.base_url = base_url
+        self.timeout = timeout
+        self.transport = transport
+        self._http = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def _client(self) -> httpx.Client:
+        with self._lock:
+            if self._http is None or self._pid != os.getpid():  # don't share sockets across a fork
+                self._http = httpx.Client(
+                    base_url=self.base_url, timeout=self.timeout, transport=self.transport,
+                    headers={'Authorization': f'Bearer {self.api_key}'},
+                )
+                self._pid = os.getpid()
+            return self._http
+
+    def send(self, template_id: str, messages: list[tuple[str, dict]]):
+        payload = {
+            'from': {'email': self.from_email},
+            'template_id': template_id,
+            'personalizations': [
+                {'to': [{'email': to_email}], 'dynamic_template_data': data}
+                for to_email, data in messages
+            ],
+        }
+        try:
+            response = self._client().post('/v3/mail/send', json=payload)
+        except httpx.HTTPError as e:
+            raise EmailDeliveryError(f"{type(e).__name__}: {e}") from e
+        if response.status_code not in (200, 201, 202):
+            raise EmailDeliveryError(f"SendGrid returned {response.status_code}: {response.text[:200]}",
+                                     response.status_code)
+
+
+def _config():
+    return current_app.config if has_app_context() else vars(Config)
+
+
+def build_email_backend(backend: str):
+    """Return an object exposing send(template_id, [(to_email, data), ...])."""
+    if backend == 'local':
+        return LocalEmailBackend()
+    config = _config()
+    return SendGridBackend(
+        SENDGRID_API_KEY, FROM_EMAIL,
+        base_url=config.get('SENDGRID_API_BASE_URL', Config.SENDGRID_API_BASE_URL),
+        timeout=config.get('EMAIL_SEND_TIMEOUT_SECONDS', Config.EMAIL_SEND_TIMEOUT_SECONDS),
+    )
+
+
+class ClaimedEmail(NamedTuple):
+    """What delivery needs from an outbox row, read before the claim commits."""
+    id: int
+    to_email: str
+    template_id: str
+    template_data: dict | None
+
+
+class EmailSender:
+    """Delivers batches of due outbox rows through an email backend."""
+
+    def __init__(self, backend, max_attempts=5, backoff_base=2.0, lease_seconds=600):
+        self.backend = backend
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.lease_seconds = lease_seconds
+        self._lock = threading.Lock()
+        self._sent = 0
+        self._failed = 0
+
+    def _deliver(self, template_id: str, rows: list[ClaimedEmail]) -> list:
+        """Send rows sharing a template. Returns one exception (or None) per row."""
+        try:
+            with email_send_duration.time():
+                self.backend.send(template_id, [(row.to_email, row.template_data or {}) for row in rows])
+            return [None] * len(rows)
+        except EmailDeliveryError as e:
+            if len(rows) > 1 and not e.retryable:
+                # One bad recipient rejects the whole request, so find it by sending one at a time
+                return [self._deliver(template_id, [row])[0] for row in rows]
+            return [e] * len(rows)
+        except Exception as e:
+            return [e] * len(rows)
+
+    def flush_outbox(self, batch_size: int = 50) -> dict:
+        """Deliver one batch of due outbox rows. Must run in an app context."""
+        now = datetime.now(timezone.utc)
+        rows = EmailOutbox.get_due(now, batch_size)
+        result = {'sent': 0, 'retried': 0, 'failed': 0}
+        if not rows:
+            db.session.rollback()  # release row locks
+            return result
+
+        # Claim the batch: push its next attempt past the send and commit, so other workers skip
+        # it and delivery holds no locks. If this worker dies mid-send, the rows come due again.
+        claimed = [ClaimedEmail(row.id, row.to_email, row.template_id, row.template_data) for row in rows]
+        for row in rows:
+            row.next_attempt_ds = now + timedelta(seconds=self.lease_seconds)
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        by_template = {}
+        for email in claimed:
+            by_template.setdefault(email.template_id, []).append(email)
+        errors = {}
+        for template_id, group in by_template.items():
+            for email, error in zip(group, self._deliver(template_id, group)):
+                errors[email.id] = error
+
+        now = datetime.now(timezone.utc)
+        for row in EmailOutbox.get_by_ids(errors):  # rows deleted meanwhile (with their user) are skipped
+            error = errors[row.id]
+            if error is None:
+                row.status = EmailOutbox.STATUS_SENT
+                row.sent_ds = now
+                row.template_data = None
+                result['sent'] += 1
+                continue
+            row.attempts += 1
+            row.last_error = f"{type(error).__name__}: {error}"[:500]
+            if row.attempts >= self.max_attempts or not getattr(error, 'retryable', True):
+                row.status = EmailOutbox.STATUS_FAILED
+                row.template_data = None
+                result['failed'] += 1
+                logger.error(f"Email {row.id} failed permanently: {row.last_error}")
+            else:
+                row.next_attempt_ds = now + timedelta(seconds=self.backoff_base * 2 ** (row.attempts - 1))
+                result['retried'] += 1
+                logger.warning(f"Email {row.id} failed (attempt {row.attempts}): {row.last_error}")
+
+        try:
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        with self._lock:
+            self._sent += result['sent']
+            self._failed += result['failed']
+        return result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'sent': self._sent, 'failed': self._failed}
+
+
+_sender = None
+_sender_lock = threading.Lock()
+email_outbox_worker = OutboxWorker(
+    'email-outbox', 'EMAIL_OUTBOX', lambda batch_size: get_email_sender().flush_outbox(batch_size),
+    interval=Config.EMAIL_OUTBOX_INTERVAL_SECONDS, batch_size=Config.EMAIL_OUTBOX_BATCH_SIZE,
+)
+
+
+def get_email_sender() -> EmailSender:
+    """Return the process-wide email sender, built from the app config on first use."""
+    global _sender
+    with _sender_lock:
+        if _sender is None:
+            config = _config()
+            _sender = EmailSender(
+                build_email_backend(config.get('EMAIL_BACKEND', Config.EMAIL_BACKEND)),
+                max_attempts=config.get('EMAIL_OUTBOX_MAX_ATTEMPTS', Config.EMAIL_OUTBOX_MAX_ATTEMPTS),
+                lease_seconds=config.get('EMAIL_OUTBOX_LEASE_SECONDS', Config.EMAIL_OUTBOX_LEASE_SECONDS),
+            )
+        return _sender
+
+
+def purge_email_outbox(now: datetime | None = None) -> int:
+    """Delete sent and failed outbox rows older than EMAIL_OUTBOX_RETENTION_DAYS. Returns the number deleted."""
+    now = now or datetime.now(timezone.utc)
+    days = _config().get('EMAIL_OUTBOX_RETENTION_DAYS', Config.EMAIL_OUTBOX_RETENTION_DAYS)
+    return EmailOutbox.purge_finished_before(now - timedelta(days=days))
+
+
+def peek_email_sender() -> EmailSender | None:
+    """Return the email sender if it has been built, without building it."""
+    return _sender
+
+
+def set_email_sender(sender: EmailSender | None):
+    """Replace the process-wide email sender (used by tests)."""
+    global _sender
+    with _sender_lock:
+        _sender = sender
+
+
+def _enqueue_email(to_email: str, template_id: str, dynamic_data: dict, user_id: int | None = None) -> bool:
+    """Queue a dynamic-template email for background delivery. Returns True if queued."""
+    if _config().get('EMAIL_BACKEND', Config.EMAIL_BACKEND) == 'sendgrid' and not SENDGRID_API_KEY:
         logger.warning("SENDGRID_API_KEY not set, skipping email send")
         return False
 
@@ -24,35 +276,23 @@ def _send_email(to_email: str, template_id: str, dynamic_data: dict) -> bool:
         logger.warning("Template ID not set, skipping email send")
         return False
 
-    message = Mail(
-        from_email=FROM_EMAIL,
-        to_emails=to_email,
-    )
-    message.template_id = template_id
-    message.dynamic_template_data = dynamic_data
-
-    try:
-        sg = SendGridAPIClient(SENDGRID_API_KEY)
-        response = sg.send(message)
-        logger.info(f"Email sent to {to_email}, status={response.status_code}")
-        return response.status_code in (200, 201, 202)
-    except Exception:
-        logger.exception(f"Failed to send email to {to_email}")
-        return False
+    EmailOutbox.enqueue(to_email, template_id, dynamic_data, user_id=user_id)
+    email_outbox_worker.wake()
+    return True
 
 
-def send_welcome_email(to_email: str, first_name: str, username: str) -> bool:
-    """Send a welcome email to a newly registered user."""
-    return _send_email(to_email, ONBOARDING_EMAIL_TEMPLATE, {
+def send_welcome_email(to_email: str, first_name: str, username: str, user_id: int | None = None) -> bool:
+    """Queue a welcome email to a newly registered user."""
+    return _enqueue_email(to_email, ONBOARDING_EMAIL_TEMPLATE, {
         'first_name': first_name,
         'username': username,
-    })
+    }, user_id=user_id)
 
 
-def send_password_reset_email(to_email: str, first_name: str, reset_token: str) -> bool:
-    """Send a password reset email with a one-time link."""
+def send_password_reset_email(to_email: str, first_name: str, reset_token: str, user_id: int | None = None) -> bool:
+    """Queue a password reset email with a one-time link."""
     reset_link = f"{APP_BASE_URL}/reset-password?token={reset_token}"
-    return _send_email(to_email, PASSWORD_RESET_EMAIL_TEMPLATE, {
+    return _enqueue_email(to_email, PASSWORD_RESET_EMAIL_TEMPLATE, {
         'first_name': first_name,
         'password_reset_link': reset_link,
-    })
+    }, user_id=user_id)
@@ -0,0 +1,164 @@
+"""Review-load forecast: how many reviews fall due per day and per deck.
+
+due_forecast() answers from one grouped query on word.next_review_date.
+Overdue and never-scheduled words count as due today, later words on their due
+date, up to `days` ahead. Each word is counted once, at its next review.
+
+With project=True it also counts the reviews those reviews lead to. It loads the
+states of the words due inside the window and runs srs_engine.project() over
+them, assuming every review is rated `quality`. Projections are cached per user
+in-process. The cache key includes a fingerprint of the user's word state (per
+deck and day: count and the sums of the SRS columns) taken from the same grouped
+query. So a rating, new word or deletion made through any worker recomputes the
+projection on the next request, and an unchanged deck reuses it.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+
+from sqlalchemy import case, func, literal, or_
+
+from config import Config
+from extensions import db
+from models import Deck, Word
+
+logger = logging.getLogger(__name__)
+
+NO_DECK = 0  # deck_id stand-in for words outside any deck
+
+
+class ProjectionCache:
+    """Latest projection per user, bounded LRU, validated by the word-state fingerprint."""
+
+    def __init__(self, max_users=1024):
+        self.max_users = max_users
+        self._entries = OrderedDict()  # user_id -> (key, counts by deck)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id, key):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] == key:
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def set(self, user_id, key, value):
+        with self._lock:
+            self._entries[user_id] = (key, value)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_users:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+projection_cache = ProjectionCache(max_users=Config.FORECAST_CACHE_MAX_USERS)
+
+
+def _due_day(today: date):
+    """next_review_date, with overdue and unscheduled words moved to today."""
+    return case(
+        (or_(Word.next_review_date.is_(None), Word.next_review_date < today), literal(today, db.Date)),
+        else_=Word.next_review_date,
+    )
+
+
+def _window(user_id: int, today: date, days: int):
+    return (Word.user_id == user_id,
+            or_(Word.next_review_date.is_(None), Word.next_review_date < today + timedelta(days=days)))
+
+
+def _grouped_due(user_id: int, today: date, days: int):
+    """One row per (deck, due day): deck_id, deck name, day, count, SRS column sums."""
+    day = _due_day(today).label('day')
+    deck_id = func.coalesce(Word.deck_id, NO_DECK).label('deck_id')
+    return (
+        db.session.query(
+            deck_id,
+            Deck.name,
+            day,
+            func.count(Word.id),
+            func.coalesce(func.sum(Word.repetitions), 0),
+            func.coalesce(func.sum(Word.interval_days), 0),
+            func.coalesce(func.sum(Word.ease_factor), 0.0),
+        )
+        .outerjoin(Deck, Deck.id == Word.deck_id)
+        .filter(*_window(user_id, today, days))
+        .group_by(deck_id, Deck.name, day)
+        .all()
+    )
+
+
+def _project(user_id: int, today: date, days: int, quality: int, deck_index: dict) -> dict:
+    """Run the SRS engine over the window's words. Returns {deck_id: [reviews per day]}."""
+    import numpy as np
+    from srs_engine import project
+
+    rows = db.session.query(
+        func.coalesce(Word.deck_id, NO_DECK),
+        Word.next_review_date,
+        func.coalesce(Word.repetitions, 0),
+        func.coalesce(Word.interval_days, 1),
+        func.coalesce(Word.ease_factor, 2.5),
+    ).filter(*_window(user_id, today, days)).all()
+    if not rows:
+        return {}
+
+    deck_ids, due_dates, repetitions, intervals, eases = zip(*rows)
+    due_in = [(d - today).days if d is not None else 0 for d in due_dates]
+    groups = np.array([deck_index[d] for d in deck_ids])
+    counts = project(due_in, repetitions, intervals, eases, quality, days, groups, len(deck_index))
+    return {deck_id: counts[:, i].tolist() for deck_id, i in deck_index.items()}
+
+
+def due_forecast(user_id: int, today: date, days: int = 30, project: bool = False, quality: int = 4) -> dict:
+    """Reviews due per day over `days` days from today, in total and per deck.
+
+    project=True counts follow-up reviews too, assuming every review is rated quality.
+    """
+    rows = _grouped_due(user_id, today, days)
+    names = {}
+    by_deck = {}
+    for deck_id, name, day, count, *_ in rows:
+        names[deck_id] = name
+        by_deck.setdefault(deck_id, [0] * days)[(day - today).days] += count
+
+    if project and rows:
+        fingerprint = tuple(sorted((r[0], r[2], r[3], r[4], r[5], round(r[6], 6)) for r in rows))
+        key = (today, days, quality, fingerprint)
+        projected = projection_cache.get(user_id, key)
+        if projected is None:
+            deck_index = {deck_id: i for i, deck_id in enumerate(sorted(by_deck))}
+            projected = _project(user_id, today, days, quality, deck_index)
+            projection_cache.set(user_id, key, projected)
+            logger.debug(f"Projected {days}-day forecast for user {user_id} over {len(rows)} groups")
+        by_deck = projected
+
+    totals = [sum(day_counts) for day_counts in zip(*by_deck.values())] or [0] * days
+    result = {
+        'start_date': today.isoformat(),
+        'days': days,
+        'projected': project,
+        'total': sum(totals),
+        'by_day': [{'date': (today + timedelta(days=i)).isoformat(), 'due': n} for i, n in enumerate(totals)],
+        'by_deck': [
+            {
+                'deck_id': None if deck_id == NO_DECK else deck_id,
+                'deck_name': names.get(deck_id),
+                'total': sum(counts),
+                'by_day': counts,
+            }
+            for deck_id, counts in sorted(by_deck.items())
+        ],
+    }
+    if project:
+        result['quality'] = quality
+    return result
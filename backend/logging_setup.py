@@ -0,0 +1,144 @@
+"""Logging configuration.
+
+Request threads only put records on an in-memory queue (QueueHandler); a
+QueueListener thread formats them and does the stdout I/O. Level, format
+(text or JSON), per-logger overrides and the sampling rate for high-volume
+diagnostic events come from config (LOG_LEVEL, LOG_FORMAT, LOG_LEVELS,
+LOG_SAMPLE_RATE).
+
+Diagnostic events that would flood the log at full volume are marked as
+sampled and only a fraction of them are emitted:
+
+    logger.debug("Agent result items: ...", extra={'sampled': True})
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import traceback
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+TEXT_FORMAT = '%(asctime)s %(levelname)s [%(name)s] %(message)s'
+
+# LogRecord attributes that aren't user-supplied `extra` fields
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'sampled'}
+
+_listener = None
+_queue_handler = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, with any `extra` fields as top-level keys."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exc_info'] = record.exc_text
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and key not in entry:
+                entry[key] = value
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only `rate` of the records logged with extra={'sampled': True}."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        if not getattr(record, 'sampled', False):
+            return True
+        return self.rate >= 1 or random.random() < self.rate
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler that leaves formatting to the listener.
+
+    The stock prepare() formats the record on the calling thread and folds the
+    traceback into the message; here only the message and traceback text are
+    rendered (so args and exc_info needn't cross threads) and the listener's
+    formatter still sees them as separate fields.
+    """
+
+    def prepare(self, record):
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = ''.join(traceback.format_exception(*record.exc_info)).rstrip()
+            record.exc_info = None
+        return record
+
+
+def _parse_levels(spec: str) -> dict:
+    """'ai_layer=DEBUG,werkzeug=WARNING' -> {'ai_layer': 'DEBUG', 'werkzeug': 'WARNING'}"""
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        name, _, level = item.partition('=')
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(config, stream=None):
+    """Install the queue handler on the root logger and start the listener.
+
+    Safe to call again (e.g. once per app created in tests): the previous
+    handler and listener are replaced, other root handlers are left alone.
+    """
+    global _listener, _queue_handler
+    stop_logging()
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    if config.get('LOG_FORMAT', 'text') == 'json':
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter(TEXT_FORMAT))
+    output.addFilter(SamplingFilter(config.get('LOG_SAMPLE_RATE', 1.0)))
+
+    log_queue = queue.SimpleQueue()
+    _queue_handler = _DeferredQueueHandler(log_queue)
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+
+    root = logging.getLogger()
+    root.addHandler(_queue_handler)
+    root.setLevel(config.get('LOG_LEVEL', 'INFO'))
+    for name, level in _parse_levels(config.get('LOG_LEVELS', '')).items():
+        logging.getLogger(name).setLevel(level)
+
+
+def stop_logging():
+    """Flush queued records and remove the queue handler."""
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _restart_listener_after_fork():
+    # The listener thread doesn't survive fork (e.g. gunicorn --preload)
+    if _listener is not None:
+        _listener._thread = None
+        _listener.start()
+
+
+atexit.register(stop_logging)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_listener_after_fork)
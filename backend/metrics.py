@@ -0,0 +1,401 @@
+"""Process-local metrics, exposed in Prometheus text format at /api/metrics.
+
+Counters and histograms are sharded per thread: each thread only ever writes
+its own shard (a plain dict), so recording takes no locks and never contends
+with other requests. A scrape sums the shards, folding those of finished
+threads into a base total and dropping them, so totals never go backwards and
+thread-per-request servers don't pile up shards.
+
+Values are per process; with several gunicorn/uvicorn workers, scrape each
+worker (or aggregate in Prometheus) as usual.
+
+What is recorded where:
+- HTTP latency per endpoint, DB queries and DB time per request: init_app()
+  hooks for Flask, async_resources.async_endpoint() for the ASGI handlers
+- DB query latency: SQLAlchemy cursor events (install_db_hooks())
+- LLM latency and token usage per agent: ai_layer.llm_metrics.LLMMetricsHooks
+- Redis and memory (mem0) call latency: the call sites, via Histogram.time()
+- Cache hit ratios: collectors reading the existing stats() of the caches
+"""
+import contextvars
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from flask import Response, current_app, g, request
+from flask_restful import Resource
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+import server_timing
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()) -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)] + list(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value) -> str:
+    if isinstance(value, float):
+        if math.isinf(value):
+            return '+Inf' if value > 0 else '-Inf'
+        return repr(value)
+    return str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards = []  # (thread, shard)
+        self._base = {}    # folded-in shards of finished threads
+        self._scrape_lock = threading.Lock()  # scrapes only; recording never takes it
+
+    def _shard(self) -> dict:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            self._shards.append((threading.current_thread(), shard))  # list.append is atomic
+        return shard
+
+    def _add(self, totals: dict, shard: dict):
+        raise NotImplementedError
+
+    def _totals(self) -> dict:
+        """Sum of all shards. A finished thread's shard can no longer change, so it moves into the base."""
+        totals = {}
+        with self._scrape_lock:
+            for entry in list(self._shards):
+                thread, shard = entry
+                if thread.is_alive():
+                    self._add(totals, shard)
+                else:
+                    self._add(self._base, shard)
+                    self._shards.remove(entry)
+            self._add(totals, self._base)
+        return totals
+
+    def _key(self, labels) -> tuple:
+        try:
+            if len(labels) == len(self.labelnames):
+                return tuple([str(labels[n]) for n in self.labelnames])
+        except KeyError:
+            pass
+        raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+
+    def reset(self):
+        with self._scrape_lock:
+            self._base.clear()
+            for _, shard in list(self._shards):
+                shard.clear()
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._render_samples())
+        return lines
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def _add(self, totals, shard):
+        for key, value in list(shard.items()):
+            totals[key] = totals.get(key, 0) + value
+
+    def values(self) -> dict:
+        return self._totals()
+
+    def _render_samples(self):
+        for key, value in sorted(self.values().items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        shard = self._shard()
+        key = self._key(labels)
+        slots = shard.get(key)
+        if slots is None:
+            # one slot per bucket, one for +Inf, then the sum
+            slots = shard[key] = [0] * (len(self.buckets) + 2)
+        slots[bisect_left(self.buckets, value)] += 1
+        slots[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _add(self, totals, shard):
+        for key, slots in list(shard.items()):
+            slots = list(slots)
+            if key not in totals:
+                totals[key] = slots
+            else:
+                totals[key] = [a + b for a, b in zip(totals[key], slots)]
+
+    def values(self) -> dict:
+        """{label values: (per-bucket counts incl. +Inf, sum)}"""
+        return {key: (slots[:-1], slots[-1]) for key, slots in self._totals().items()}
+
+    def _render_samples(self):
+        bounds = [_format_value(float(b)) for b in self.buckets] + ['+Inf']
+        for key, (counts, total) in sorted(self.values().items()):
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, [f'le="{bound}"'])
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(float(total))}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class Registry:
+    """Metrics plus collectors (callables returning gauge samples computed at scrape time)."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collector):
+        """collector() -> iterable of (name, documentation, {label: value}, value) gauge samples."""
+        self._collectors.append(collector)
+
+    def reset(self):
+        for metric in self._metrics.values():
+            metric.reset()
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+
+        gauges = {}
+        for collector in self._collectors:
+            try:
+                samples = list(collector())
+            except Exception as e:
+                samples = [('laoshi_metrics_collector_errors', 'Collectors that failed during this scrape',
+                            {'collector': getattr(collector, '__name__', 'unknown'),
+                             'error': type(e).__name__}, 1)]
+            for name, documentation, labels, value in samples:
+                gauges.setdefault(name, (documentation, []))[1].append((labels, value))
+        for name, (documentation, samples) in gauges.items():
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} gauge")
+            for labels, value in samples:
+                rendered = _format_labels(labels.keys(), labels.values())
+                lines.append(f"{name}{rendered} {_format_value(value)}")
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+http_request_duration = registry.histogram(
+    'laoshi_http_request_duration_seconds', 'HTTP request latency by endpoint',
+    ('endpoint', 'method', 'status'),
+)
+db_queries_per_request = registry.histogram(
+    'laoshi_db_queries_per_request', 'SQL statements executed per HTTP request',
+    ('endpoint',), buckets=COUNT_BUCKETS,
+)
+db_time_per_request = registry.histogram(
+    'laoshi_db_time_per_request_seconds', 'Time spent in SQL per HTTP request', ('endpoint',),
+)
+db_query_duration = registry.histogram(
+    'laoshi_db_query_duration_seconds', 'Latency of individual SQL statements',
+)
+llm_call_duration = registry.histogram(
+    'laoshi_llm_call_duration_seconds', 'Latency of LLM calls by agent', ('agent',),
+    buckets=(0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 13.0, 20.0, 30.0, 60.0),
+)
+llm_tokens = registry.counter(
+    'laoshi_llm_tokens_total', 'LLM tokens used by agent and direction', ('agent', 'direction'),
+)
+llm_errors = registry.counter(
+    'laoshi_llm_errors_total', 'Agent runs that raised, by starting agent', ('agent',),
+)
+redis_call_duration = registry.histogram(
+    'laoshi_redis_call_duration_seconds', 'Latency of Redis calls by operation', ('op',),
+)
+memory_call_duration = registry.histogram(
+    'laoshi_memory_call_duration_seconds', 'Latency of memory (mem0) calls by operation', ('op',),
+)
+email_send_duration = registry.histogram(
+    'laoshi_email_send_duration_seconds', 'Latency of email provider send calls (one per batch)',
+)
+
+
+# ---------------------------------------------------------------------------
+# Per-request DB accounting
+# ---------------------------------------------------------------------------
+
+# [statement count, seconds] for the current request; shared with DB pool threads via copied contexts
+_request_db = contextvars.ContextVar('request_db', default=None)
+_hooks_installed = False
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('laoshi_query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('laoshi_query_start')
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    db_query_duration.observe(elapsed)
+    server_timing.record('db', elapsed)
+    stats = _request_db.get()
+    if stats is not None:
+        stats[0] += 1
+        stats[1] += elapsed
+
+
+def install_db_hooks():
+    """Time every SQL statement on every engine (idempotent)."""
+    global _hooks_installed
+    if not _hooks_installed:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        _hooks_installed = True
+
+
+def start_request():
+    """Begin per-request accounting. Returns a token for finish_request()."""
+    return time.perf_counter(), _request_db.set([0, 0.0])
+
+
+def finish_request(token, endpoint: str, method: str, status: int):
+    start, db_token = token
+    stats = _request_db.get() or [0, 0.0]
+    _request_db.reset(db_token)
+    http_request_duration.observe(time.perf_counter() - start, endpoint=endpoint, method=method, status=status)
+    db_queries_per_request.observe(stats[0], endpoint=endpoint)
+    db_time_per_request.observe(stats[1], endpoint=endpoint)
+
+
+def init_app(app):
+    """Record latency and DB usage for every Flask request."""
+    install_db_hooks()
+
+    @app.before_request
+    def _metrics_start():
+        g._metrics_token = start_request()
+
+    @app.after_request
+    def _metrics_finish(response):
+        token = g.pop('_metrics_token', None)
+        if token is not None:
+            finish_request(token, request.endpoint or 'unmatched', request.method, response.status_code)
+        return response
+
+
+class MetricsResource(Resource):
+    def get(self):
+        token = current_app.config.get('METRICS_TOKEN')
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            return {'error': 'Unauthorized'}, 401
+        return Response(registry.render(), mimetype=None, content_type=CONTENT_TYPE)
+
+
+# ---------------------------------------------------------------------------
+# Collectors over existing stats
+# ---------------------------------------------------------------------------
+
+def _feedback_cache_samples():
+    from ai_layer.feedback_cache import feedback_cache
+
+    stats = feedback_cache.stats()
+    labels = {'cache': 'feedback'}
+    yield 'laoshi_cache_hits', 'Cache hits (both tiers)', labels, stats['hits'] + stats['redis_hits']
+    yield 'laoshi_cache_misses', 'Cache misses', labels, stats['misses']
+    yield 'laoshi_cache_hit_ratio', 'Cache hit ratio since start', labels, stats['hit_rate']
+    yield 'laoshi_cache_entries', 'Entries held in process', labels, stats['size']
+
+
+def _memory_samples():
+    from ai_layer.memory_service import peek_memory_service
+
+    service = peek_memory_service()
+    if service is None:
+        return
+    stats = service.stats()
+    labels = {'cache': 'memory_search'}
+    yield 'laoshi_cache_hits', 'Cache hits (both tiers)', labels, stats['search_hits']
+    yield 'laoshi_cache_misses', 'Cache misses', labels, stats['search_misses']
+    yield 'laoshi_cache_hit_ratio', 'Cache hit ratio since start', labels, stats['search_hit_rate']
+    yield 'laoshi_cache_entries', 'Entries held in process', labels, stats['cached_users']
+    yield 'laoshi_memory_writes', 'Memory outbox writes by outcome', {'outcome': 'sent'}, stats['writes_sent']
+    yield 'laoshi_memory_writes', 'Memory outbox writes by outcome', {'outcome': 'failed'}, stats['writes_failed']
+
+
+def _email_samples():
+    from email_service import peek_email_sender
+
+    sender = peek_email_sender()
+    if sender is None:
+        return
+    stats = sender.stats()
+    yield 'laoshi_emails', 'Email outbox deliveries by outcome', {'outcome': 'sent'}, stats['sent']
+    yield 'laoshi_emails', 'Email outbox deliveries by outcome', {'outcome': 'failed'}, stats['failed']
+
+
+def _redis_samples():
+    from redis_pool import get_redis_pool
+
+    status = get_redis_pool().status()
+    yield 'laoshi_redis_enabled', 'Whether REDIS_URI is configured', {}, int(bool(status['enabled']))
+    yield 'laoshi_redis_healthy', 'Last cached Redis health check result', {}, int(bool(status['healthy']))
+    for state in ('closed', 'open', 'half_open'):
+        yield ('laoshi_redis_breaker_state', 'Redis circuit breaker state (1 = current)',
+               {'state': state}, int(status['breaker_state'] == state))
+    yield 'laoshi_redis_fallbacks', 'Times callers fell back to in-memory behaviour', {}, status['fallbacks']
+
+
+registry.add_collector(_feedback_cache_samples)
+registry.add_collector(_memory_samples)
+registry.add_collector(_email_samples)
+registry.add_collector(_redis_samples)
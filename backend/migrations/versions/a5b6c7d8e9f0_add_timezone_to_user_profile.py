@@ -0,0 +1,30 @@
+"""add_timezone_to_user_profile
+
+Revision ID: a5b6c7d8e9f0
+Revises: f4a5b6c7d8e9
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a5b6c7d8e9f0'
+down_revision = 'f4a5b6c7d8e9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Only add if the column doesn't already exist (may have been created via db.create_all())
+    conn = op.get_bind()
+    columns = {c['name'] for c in sa.inspect(conn).get_columns('user_profile')}
+    if 'timezone' not in columns:
+        with op.batch_alter_table('user_profile', schema=None) as batch_op:
+            batch_op.add_column(sa.Column('timezone', sa.String(length=64), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('user_profile', schema=None) as batch_op:
+        batch_op.drop_column('timezone')
@@ -0,0 +1,64 @@
+"""add_sync_change_tracking
+
+Revision ID: b6c7d8e9f0a1
+Revises: a5b6c7d8e9f0
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from datetime import datetime, timezone
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b6c7d8e9f0a1'
+down_revision = 'a5b6c7d8e9f0'
+branch_labels = None
+depends_on = None
+
+CHANGE_INDEXES = {
+    'deck': 'ix_deck_user_updated',
+    'word': 'ix_word_user_updated',
+    'user_session': 'ix_user_session_user_updated',
+}
+
+
+def upgrade():
+    # Only add what doesn't already exist (may have been created via db.create_all())
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+
+    for table in ('word', 'user_session'):
+        columns = {c['name'] for c in inspector.get_columns(table)}
+        if 'updated_ds' not in columns:
+            with op.batch_alter_table(table, schema=None) as batch_op:
+                batch_op.add_column(sa.Column('updated_ds', sa.DateTime(), nullable=True))
+        # Existing rows count as changed now, so the first sync sends them
+        conn.execute(sa.text(f'UPDATE {table} SET updated_ds = :now WHERE updated_ds IS NULL'), {'now': now})
+
+    for table, index in CHANGE_INDEXES.items():
+        if index not in {i['name'] for i in inspector.get_indexes(table)}:
+            op.create_index(index, table, ['user_id', 'updated_ds'])
+
+    if 'sync_tombstone' not in inspector.get_table_names():
+        op.create_table(
+            'sync_tombstone',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('user.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('entity', sa.String(10), nullable=False),
+            sa.Column('entity_id', sa.Integer(), nullable=False),
+            sa.Column('deleted_ds', sa.DateTime(), nullable=False),
+        )
+        op.create_index('ix_sync_tombstone_user_deleted', 'sync_tombstone', ['user_id', 'deleted_ds'])
+
+
+def downgrade():
+    op.drop_index('ix_sync_tombstone_user_deleted', table_name='sync_tombstone')
+    op.drop_table('sync_tombstone')
+    for table, index in CHANGE_INDEXES.items():
+        op.drop_index(index, table_name=table)
+    for table in ('word', 'user_session'):
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.drop_column('updated_ds')
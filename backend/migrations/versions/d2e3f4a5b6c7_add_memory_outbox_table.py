@@ -0,0 +1,41 @@
+"""add_memory_outbox_table
+
+Revision ID: d2e3f4a5b6c7
+Revises: c1d2e3f4a5b6
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2e3f4a5b6c7'
+down_revision = 'c1d2e3f4a5b6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Only create if table doesn't already exist (may have been created via db.create_all())
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'memory_outbox' not in inspector.get_table_names():
+        op.create_table(
+            'memory_outbox',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('user.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('text', sa.Text(), nullable=False),
+            sa.Column('status', sa.String(10), nullable=False, server_default='pending'),
+            sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('last_error', sa.String(500), nullable=True),
+            sa.Column('next_attempt_ds', sa.DateTime(), nullable=False),
+            sa.Column('created_ds', sa.DateTime(), nullable=False),
+            sa.Column('sent_ds', sa.DateTime(), nullable=True),
+        )
+        op.create_index('ix_memory_outbox_status', 'memory_outbox', ['status'])
+
+
+def downgrade():
+    op.drop_index('ix_memory_outbox_status', table_name='memory_outbox')
+    op.drop_table('memory_outbox')
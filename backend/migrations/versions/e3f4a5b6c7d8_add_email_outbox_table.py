@@ -0,0 +1,43 @@
+"""add_email_outbox_table
+
+Revision ID: e3f4a5b6c7d8
+Revises: d2e3f4a5b6c7
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3f4a5b6c7d8'
+down_revision = 'd2e3f4a5b6c7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Only create if table doesn't already exist (may have been created via db.create_all())
+    conn = op.get_bind()
+    inspector = sa.inspect(conn)
+    if 'email_outbox' not in inspector.get_table_names():
+        op.create_table(
+            'email_outbox',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('user_id', sa.Integer(), sa.ForeignKey('user.id', ondelete='CASCADE'), nullable=True),
+            sa.Column('to_email', sa.String(255), nullable=False),
+            sa.Column('template_id', sa.String(100), nullable=False),
+            sa.Column('template_data', sa.JSON(), nullable=True),
+            sa.Column('status', sa.String(10), nullable=False, server_default='pending'),
+            sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('last_error', sa.String(500), nullable=True),
+            sa.Column('next_attempt_ds', sa.DateTime(), nullable=False),
+            sa.Column('created_ds', sa.DateTime(), nullable=False),
+            sa.Column('sent_ds', sa.DateTime(), nullable=True),
+        )
+        op.create_index('ix_email_outbox_status', 'email_outbox', ['status'])
+
+
+def downgrade():
+    op.drop_index('ix_email_outbox_status', table_name='email_outbox')
+    op.drop_table('email_outbox')
@@ -0,0 +1,42 @@
+"""add_case_insensitive_user_indexes
+
+Revision ID: f4a5b6c7d8e9
+Revises: e3f4a5b6c7d8
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f4a5b6c7d8e9'
+down_revision = 'e3f4a5b6c7d8'
+branch_labels = None
+depends_on = None
+
+INDEXES = {
+    'uq_user_username_lower': 'username',
+    'uq_user_email_lower': 'email',
+}
+
+
+def upgrade():
+    # IF NOT EXISTS rather than the inspector: SQLite reflection skips expression indexes,
+    # and the indexes may already have been created via db.create_all()
+    conn = op.get_bind()
+    for name, column in INDEXES.items():
+        duplicates = conn.execute(sa.text(
+            f'SELECT lower({column}) FROM "user" GROUP BY lower({column}) HAVING count(*) > 1'
+        )).scalars().all()
+        if duplicates:
+            raise RuntimeError(
+                f"Cannot create {name}: {len(duplicates)} {column} value(s) differ only by case, "
+                f"e.g. {duplicates[0]!r}. Merge or rename those accounts first."
+            )
+        op.create_index(name, 'user', [sa.text(f'lower({column})')], unique=True, if_not_exists=True)
+
+
+def downgrade():
+    for name in INDEXES:
+        op.drop_index(name, table_name='user')
@@ -4,7 +4,6 @@
 from extensions import db
 from datetime import datetime, date, timedelta, timezone
 from utils import construct_date_range_filter
-import math
 
 
 # Define models
@@ -22,6 +21,10 @@ class Deck(db.Model):
     created_ds = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     updated_ds = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
+    __table_args__ = (
+        db.Index('ix_deck_user_updated', 'user_id', 'updated_ds'),  # /api/sync
+    )
+
     # Relationships
     user = db.relationship('User', back_populates='decks')
     words = db.relationship('Word', back_populates='deck', cascade='all, delete-orphan')
@@ -104,6 +107,13 @@ class Word(db.Model):
     marked_as_known = db.Column(db.Boolean, default=False)
     is_mastered = db.Column(db.Boolean, default=False)
 
+    # Change tracking for /api/sync (deletions are recorded as SyncTombstone rows)
+    updated_ds = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        db.Index('ix_word_user_updated', 'user_id', 'updated_ds'),
+    )
+
     user = db.relationship('User', back_populates='words')
     sessions = db.relationship('SessionWord', back_populates='word', cascade='all, delete')
 
@@ -166,46 +176,56 @@ class Word(db.Model):
         return viewer.id == self.user_id
     
 
-    def update_srs(self, quality: int):
+    def update_srs(self, quality: int, today: date | None = None):
         """
-        Update word SRS state using modified SM-2 algorithm.
+        Update word SRS state using modified SM-2 algorithm (rules in srs_engine).
 
         Args:
             quality: 0-5 rating from user self-assessment
         """
-        # Fast-track perfect first attempts
-        if self.repetitions == 0 and quality == 5:
-            self.interval_days = 14
-            self.repetitions = 2
-            self.ease_factor = 2.5
-        elif quality < 3:
-            # Harsh reset on failure (fair since user controls quality)
-            self.repetitions = 0
-            self.interval_days = 1
-        else:
-            # Standard SM-2 progression with gentler early intervals
-            if self.repetitions == 0:
-                self.interval_days = 1
-            elif self.repetitions == 1:
-                self.interval_days = 3
-            elif self.repetitions == 2:
-                self.interval_days = 7
-            else:
-                new_interval = self.interval_days * self.ease_factor
-                # Use ceil for intervals < 7 to prevent stuck at 1 day
-                if new_interval < 7:
-                    self.interval_days = math.ceil(new_interval)
-                else:
-                    self.interval_days = round(new_interval)
-
-            self.repetitions += 1
-
-        # Update ease factor (SM-2 formula)
-        self.ease_factor += (0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
-        self.ease_factor = max(1.3, self.ease_factor)
-
-        # Set next review date
-        self.next_review_date = date.today() + timedelta(days=self.interval_days)
+        # Single words skip the array path (review_one is srs_engine's scalar form of the same rules).
+        # The import is deferred so NumPy only loads once a word is rated.
+        from srs_engine import review_one
+
+        self.repetitions, self.interval_days, self.ease_factor = review_one(
+            self.repetitions, self.interval_days, self.ease_factor, quality
+        )
+        self.next_review_date = (today or date.today()) + timedelta(days=self.interval_days)
+
+    @classmethod
+    def reschedule_deck(cls, deck_id: int, user_id: int, quality: int, today: date | None = None) -> int:
+        """Rate every word in a deck with `quality` in one pass. Returns the number of words updated.
+
+        One SELECT of the SRS columns, one vectorized review, one bulk UPDATE by primary key.
+        """
+        import numpy as np
+        from srs_engine import due_dates, review
+
+        rows = db.session.query(
+            cls.id,
+            db.func.coalesce(cls.repetitions, 0),
+            db.func.coalesce(cls.interval_days, 1),
+            db.func.coalesce(cls.ease_factor, 2.5),
+        ).filter(cls.deck_id == deck_id, cls.user_id == user_id).all()
+        if not rows:
+            return 0
+
+        ids, repetitions, intervals, eases = (np.array(column) for column in zip(*rows))
+        state = review(repetitions, intervals, eases, quality)
+        due = due_dates(today or date.today(), state.interval_days).astype(date)
+        try:
+            db.session.execute(db.update(cls), [
+                {'id': int(i), 'repetitions': int(r), 'interval_days': int(d), 'ease_factor': float(e),
+                 'next_review_date': n}
+                for i, r, d, e, n in zip(ids, state.repetitions, state.interval_days, state.ease_factor, due)
+            ])
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        from due_queue import due_queue  # bulk UPDATE bypasses its session hooks
+        due_queue.invalidate(user_id)
+        return len(ids)
 
     def mark_as_mastered(self):
         """Fast-track word to mastered state with long interval."""
@@ -263,11 +283,15 @@ class Word(db.Model):
     def delete_all(cls, viewer):
         # delete all words for the logged in user
         try:
+            # The bulk DELETE bypasses the sync session hooks, so record the tombstones here
+            SyncTombstone.record_bulk('word', db.select(Word.user_id, Word.id).where(Word.user_id == viewer.id))
             db.session.query(Word).filter_by(user_id=viewer.id).delete(synchronize_session=False)
             db.session.commit()
         except Exception:
             db.session.rollback()
             raise
+        from due_queue import due_queue  # bulk DELETE bypasses its session hooks
+        due_queue.invalidate(viewer.id)
     
 
     @classmethod
@@ -339,11 +363,20 @@ class User(db.Model):
     created_ds = db.Column(db.DateTime)
     is_admin = db.Column(db.Boolean, default=False)
 
+    __table_args__ = (
+        # Usernames and emails are unique regardless of case. The validity checks and
+        # lookups compare lower() on both sides so they are served by these indexes.
+        db.Index('uq_user_username_lower', db.func.lower(username), unique=True),
+        db.Index('uq_user_email_lower', db.func.lower(email), unique=True),
+    )
+
     words = db.relationship('Word', back_populates='user', cascade='all, delete-orphan')
     decks = db.relationship('Deck', back_populates='user', cascade='all, delete-orphan')
     sessions = db.relationship('UserSession', back_populates='user', cascade='all, delete-orphan')
     profile = db.relationship('UserProfile', uselist=False, back_populates='user', cascade='all, delete-orphan', lazy='joined')
     reset_tokens = db.relationship('PasswordResetToken', back_populates='user', cascade='all, delete-orphan')
+    memory_outbox = db.relationship('MemoryOutbox', back_populates='user', cascade='all, delete-orphan')
+    email_outbox = db.relationship('EmailOutbox', back_populates='user', cascade='all, delete-orphan')
 
     def __repr__(self):
         name = (self.profile.preferred_name if self.profile else None) or self.username
@@ -402,14 +435,18 @@ class User(db.Model):
     def exists(cls, id: int) -> bool:
         return cls.query.filter_by(id=id).first() is not None
 
+    @classmethod
+    def get_by_email(cls, email: str):
+        # Case-insensitive; served by the uq_user_email_lower index
+        return cls.query.filter(db.func.lower(cls.email) == db.func.lower(email)).first()
+
     @classmethod
     def is_username_valid(cls, username: str) -> bool:
         if username is None:
             return False
-        # Check if username already exists in database
-        # use ilike for case INSENSITIVE match, also supports SQL % wildcard. filter_by is case sensitive
-        existing_username = cls.query.filter(cls.username.ilike(username)).first()
-        return existing_username is None
+        # Case-insensitive match on lower(username), so the lookup uses uq_user_username_lower
+        existing = db.session.query(cls.id).filter(db.func.lower(cls.username) == db.func.lower(username)).first()
+        return existing is None
     
     @classmethod
     def is_email_valid(cls, email: str) -> bool:
@@ -427,10 +464,9 @@ class User(db.Model):
         if domain.startswith(".") or domain.endswith("."):
             return False
 
-        # Check if email already exists in database
-        email_query = email.lower()
-        existing_user = cls.query.filter(cls.email.ilike(email_query)).first()
-        return existing_user is None
+        # Check if email already exists in database (case-insensitive, via uq_user_email_lower)
+        existing = db.session.query(cls.id).filter(db.func.lower(cls.email) == db.func.lower(email)).first()
+        return existing is None
 
 
 class UserProfile(db.Model):
@@ -446,7 +482,8 @@ class UserProfile(db.Model):
     gemini_key_version = db.Column(db.Integer, default=1)
     report_card_feedback = db.Column(db.Text, nullable=True)
     current_streak = db.Column(db.Integer, default=0)
-    last_practice_date = db.Column(db.Date, nullable=True)
+    last_practice_date = db.Column(db.Date, nullable=True)  # in the user's timezone
+    timezone = db.Column(db.String(64), nullable=True)  # IANA name; None uses DEFAULT_USER_TIMEZONE
     onboarding_complete = db.Column(db.Boolean, default=False, nullable=False)
     created_ds = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc))
     updated_ds = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
@@ -460,6 +497,7 @@ class UserProfile(db.Model):
             'has_deepseek_key': self.encrypted_deepseek_api_key is not None,
             'has_gemini_key': self.encrypted_gemini_api_key is not None,
             'onboarding_complete': self.onboarding_complete,
+            'timezone': self.timezone,
         }
 
     def increment_key_version(self, provider: str):
@@ -502,6 +540,11 @@ class UserSession(db.Model):
     deck_id = db.Column(db.Integer, db.ForeignKey("deck.id", ondelete="SET NULL"), nullable=True)
     summary_text = db.Column(db.Text, nullable=True)
     words_per_session = db.Column(db.Integer, nullable=False, default=10)
+    updated_ds = db.Column(db.DateTime, default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        db.Index('ix_user_session_user_updated', 'user_id', 'updated_ds'),  # /api/sync
+    )
 
     user = db.relationship('User', back_populates='sessions')
     deck = db.relationship('Deck', back_populates='sessions')
@@ -667,8 +710,10 @@ class SessionWord(db.Model):
 
     @classmethod
     def get_list_by_session_id(cls, session_id: int):
-        # Returns a list of Session_Word objects
-        return cls.query.filter_by(session_id=session_id).all()
+        # Returns a list of Session_Word objects, with their words and the words' decks loaded
+        # in the same query (callers read sw.word for each row; all-due sessions read
+        # sw.word.deck for each word's language)
+        return cls.query.options(db.joinedload(cls.word).joinedload(Word.deck)).filter_by(session_id=session_id).all()
     
     @classmethod
     def get_by_session_word_id(cls, word_id: int, session_id: int):
@@ -732,6 +777,11 @@ class SessionWordAttempt(db.Model):
         """Return all attempts for a specific word in a specific session, ordered by attempt_number."""
         return cls.query.filter_by(word_id=word_id, session_id=session_id).order_by(cls.attempt_number).all()
 
+    @classmethod
+    def get_by_session(cls, session_id: int):
+        """Return all attempts in a session, ordered by word then attempt_number."""
+        return cls.query.filter_by(session_id=session_id).order_by(cls.word_id, cls.attempt_number).all()
+
     @classmethod
     def count_by_word_session(cls, word_id: int, session_id: int) -> int:
         """Return the number of attempts for a specific word in a session."""
@@ -787,3 +837,175 @@ class PasswordResetToken(db.Model):
             db.session.rollback()
             raise
 
+
+
+class MemoryOutbox(db.Model):
+    """Pending mem0 writes, flushed in the background by ai_layer.memory_service."""
+    __tablename__ = 'memory_outbox'
+
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete="CASCADE"), nullable=False)
+    text = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(10), nullable=False, default=STATUS_PENDING, server_default=STATUS_PENDING, index=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    last_error = db.Column(db.String(500), nullable=True)
+    next_attempt_ds = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    created_ds = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    sent_ds = db.Column(db.DateTime, nullable=True)
+
+    user = db.relationship('User', back_populates='memory_outbox')
+
+    @classmethod
+    def enqueue(cls, user_id: int, texts: list[str]) -> list:
+        """Insert one pending row per memory text in a single commit."""
+        rows = [cls(user_id=user_id, text=text) for text in texts if text and text.strip()]
+        if not rows:
+            return []
+        try:
+            db.session.add_all(rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return rows
+
+    @classmethod
+    def get_due(cls, now: datetime, limit: int) -> list:
+        """Return pending rows whose next attempt is due, oldest first.
+
+        Rows are locked with SKIP LOCKED where supported so concurrent workers
+        never pick up the same write.
+        """
+        return cls.query.filter(
+            cls.status == cls.STATUS_PENDING,
+            cls.next_attempt_ds <= now,
+        ).order_by(cls.id).limit(limit).with_for_update(skip_locked=True).all()
+
+    @classmethod
+    def count_pending(cls) -> int:
+        return cls.query.filter_by(status=cls.STATUS_PENDING).count()
+
+    @classmethod
+    def get_by_ids(cls, ids) -> list:
+        return cls.query.filter(cls.id.in_(list(ids))).all()
+
+    @classmethod
+    def purge_finished_before(cls, cutoff: datetime) -> int:
+        """Delete sent and failed rows created before cutoff. Returns the number deleted."""
+        try:
+            count = cls.query.filter(
+                cls.status.in_([cls.STATUS_SENT, cls.STATUS_FAILED]),
+                cls.created_ds < cutoff,
+            ).delete(synchronize_session=False)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return count
+
+
+class EmailOutbox(db.Model):
+    """Transactional emails waiting to be delivered in the background by email_service."""
+    __tablename__ = 'email_outbox'
+
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete="CASCADE"), nullable=True)
+    to_email = db.Column(db.String(255), nullable=False)
+    template_id = db.Column(db.String(100), nullable=False)
+    template_data = db.Column(db.JSON, nullable=True)  # cleared once the row is finished
+    status = db.Column(db.String(10), nullable=False, default=STATUS_PENDING, server_default=STATUS_PENDING, index=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    last_error = db.Column(db.String(500), nullable=True)
+    next_attempt_ds = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    created_ds = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+    sent_ds = db.Column(db.DateTime, nullable=True)
+
+    user = db.relationship('User', back_populates='email_outbox')
+
+    @classmethod
+    def enqueue(cls, to_email: str, template_id: str, template_data: dict, user_id: int | None = None):
+        row = cls(user_id=user_id, to_email=to_email, template_id=template_id, template_data=template_data)
+        try:
+            db.session.add(row)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return row
+
+    @classmethod
+    def get_due(cls, now: datetime, limit: int) -> list:
+        """Return pending rows whose next attempt is due, oldest first, locked with SKIP LOCKED where supported."""
+        return cls.query.filter(
+            cls.status == cls.STATUS_PENDING,
+            cls.next_attempt_ds <= now,
+        ).order_by(cls.id).limit(limit).with_for_update(skip_locked=True).all()
+
+    @classmethod
+    def count_pending(cls) -> int:
+        return cls.query.filter_by(status=cls.STATUS_PENDING).count()
+
+    @classmethod
+    def get_by_ids(cls, ids) -> list:
+        return cls.query.filter(cls.id.in_(list(ids))).all()
+
+    @classmethod
+    def purge_finished_before(cls, cutoff: datetime) -> int:
+        """Delete sent and failed rows created before cutoff. Returns the number deleted."""
+        try:
+            count = cls.query.filter(
+                cls.status.in_([cls.STATUS_SENT, cls.STATUS_FAILED]),
+                cls.created_ds < cutoff,
+            ).delete(synchronize_session=False)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return count
+
+
+class SyncTombstone(db.Model):
+    """A deleted deck, word or session, kept so /api/sync can report the deletion (see sync.py)."""
+    __tablename__ = 'sync_tombstone'
+
+    ENTITIES = ('deck', 'word', 'session')
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete="CASCADE"), nullable=False)
+    entity = db.Column(db.String(10), nullable=False)
+    entity_id = db.Column(db.Integer, nullable=False)
+    deleted_ds = db.Column(db.DateTime, nullable=False, default=lambda: datetime.now(timezone.utc))
+
+    __table_args__ = (
+        db.Index('ix_sync_tombstone_user_deleted', 'user_id', 'deleted_ds'),
+    )
+
+    @classmethod
+    def record_bulk(cls, entity: str, rows_select):
+        """Insert a tombstone per (user_id, id) row of rows_select, in the current transaction.
+
+        For bulk DELETEs, which the session hooks in sync.py don't see; call before deleting.
+        """
+        db.session.execute(db.insert(cls).from_select(
+            ['user_id', 'entity_id', 'entity', 'deleted_ds'],
+            rows_select.add_columns(db.literal(entity), db.literal(datetime.now(timezone.utc), db.DateTime)),
+        ))
+
+    @classmethod
+    def purge_before(cls, cutoff: datetime) -> int:
+        """Delete tombstones older than cutoff. Returns the number deleted."""
+        try:
+            count = cls.query.filter(cls.deleted_ds < cutoff).delete(synchronize_session=False)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return count
@@ -0,0 +1,78 @@
+"""Background worker shared by the database-backed outboxes (memory writes, email).
+
+Each outbox stores pending work as rows; an OutboxWorker thread calls its flush
+function inside an app context every <PREFIX>_INTERVAL_SECONDS, draining full
+batches back to back. wake() triggers an immediate flush; it also restarts the
+thread after a fork. The worker only runs when <PREFIX>_WORKER is enabled.
+"""
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxWorker:
+    """Daemon thread that periodically flushes one outbox inside an app context.
+
+    flush(batch_size) must return a dict with a 'sent' count; a full batch sent
+    means more rows may be due, so the worker flushes again straight away.
+    """
+
+    def __init__(self, name: str, config_prefix: str, flush, interval: float = 5.0, batch_size: int = 50):
+        self.name = name
+        self.config_prefix = config_prefix
+        self.flush = flush
+        self.app = None
+        self.interval = interval
+        self.batch_size = batch_size
+        self._thread = None
+        self._pid = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def _enabled(self) -> bool:
+        return self.app is not None and bool(self.app.config.get(f'{self.config_prefix}_WORKER', False))
+
+    def init_app(self, app):
+        if self._thread is not None and self._thread.is_alive():
+            self.stop()
+        self.app = app
+        self.interval = app.config.get(f'{self.config_prefix}_INTERVAL_SECONDS', self.interval)
+        self.batch_size = app.config.get(f'{self.config_prefix}_BATCH_SIZE', self.batch_size)
+        if self._enabled():
+            self.start()
+
+    def start(self):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._stop.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def wake(self):
+        if not self._enabled():
+            return
+        self.start()
+        self._wake.set()
+
+    def _run(self):
+        app = self.app
+        while not self._stop.is_set():
+            try:
+                with app.app_context():
+                    while self.flush(self.batch_size)['sent'] == self.batch_size:
+                        pass  # keep draining full batches
+            except Exception:
+                logger.exception(f"{self.name} flush failed")
+            self._wake.wait(self.interval)
+            self._wake.clear()
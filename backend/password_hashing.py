@@ -0,0 +1,142 @@
+"""Password hashing service: tunable KDF, transparent rehash, bounded executor.
+
+Hashes use PASSWORD_HASH_SCHEME ('pbkdf2_sha256', the default, or 'argon2'
+for argon2id, which needs the optional argon2-cffi package) with the
+configured cost. Existing hashes in any supported scheme keep verifying, and
+verify_and_update() returns a fresh hash when the stored one uses an old
+scheme or cost, so the login path can upgrade it in place.
+
+KDF work is deliberately slow CPU work, so it runs in a small dedicated pool
+(PASSWORD_HASH_THREADS, 0 = inline in the request thread). At most
+PASSWORD_HASH_QUEUE calls may wait for it. A call past that gets HashingBusy
+(and the request a 503) straight away, and so does a call whose hash isn't
+done within PASSWORD_HASH_WAIT seconds.
+A login storm is then shed instead of tying up every worker thread and core
+that practice requests need. hashlib's PBKDF2 and argon2-cffi release the GIL,
+so other requests keep running while a hash is computed.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+logger = logging.getLogger(__name__)
+
+SCHEMES = ('pbkdf2_sha256', 'argon2')
+
+_lock = threading.Lock()
+_context = None
+_executor = None
+_executor_pid = None
+_slots = None
+_threads = 0
+_wait = 5.0
+
+
+class HashingBusy(Exception):
+    """The hashing pool is saturated; the caller should retry later."""
+
+
+def _argon2_available() -> bool:
+    try:
+        import argon2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def build_context(config) -> CryptContext:
+    scheme = config.get('PASSWORD_HASH_SCHEME', 'pbkdf2_sha256')
+    if scheme not in SCHEMES:
+        raise ValueError(f"PASSWORD_HASH_SCHEME must be one of {', '.join(SCHEMES)}, got {scheme!r}")
+    schemes = ['pbkdf2_sha256']
+    if scheme == 'argon2' or _argon2_available():
+        if not _argon2_available():
+            logger.warning("PASSWORD_HASH_SCHEME=argon2 but argon2-cffi is not installed; using pbkdf2_sha256")
+            scheme = 'pbkdf2_sha256'
+        else:
+            schemes.insert(0, 'argon2')
+    return CryptContext(
+        schemes=schemes,
+        default=scheme,
+        deprecated='auto',  # every scheme but the default gets rehashed
+        pbkdf2_sha256__rounds=config.get('PASSWORD_PBKDF2_ROUNDS', 29000),
+        argon2__type='ID',
+        argon2__time_cost=config.get('PASSWORD_ARGON2_TIME_COST', 3),
+        argon2__memory_cost=config.get('PASSWORD_ARGON2_MEMORY_KIB', 65536),
+        argon2__parallelism=config.get('PASSWORD_ARGON2_PARALLELISM', 4),
+    )
+
+
+def configure(config):
+    """Apply the app's hashing settings (called from create_app)."""
+    global _context, _threads, _wait, _slots, _executor
+    context = build_context(config)
+    threads = config.get('PASSWORD_HASH_THREADS', 2)
+    with _lock:
+        _context = context
+        if threads != _threads and _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
+        _threads = threads
+        _wait = config.get('PASSWORD_HASH_WAIT', 5.0)
+        _slots = threading.BoundedSemaphore(threads + config.get('PASSWORD_HASH_QUEUE', 16)) if threads else None
+
+
+def _get_context() -> CryptContext:
+    if _context is None:
+        from config import Config
+        configure({k: getattr(Config, k) for k in dir(Config) if k.startswith('PASSWORD_')})
+    return _context
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor, _executor_pid
+    with _lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=_threads, thread_name_prefix='laoshi-hash')
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _run(fn, *args):
+    context = _get_context()
+    slots = _slots
+    if not _threads or slots is None:
+        return fn(context, *args)
+    if not slots.acquire(blocking=False):
+        logger.warning("Password hashing pool saturated, shedding request", extra={'sampled': True})
+        raise HashingBusy()
+    try:
+        future = _get_executor().submit(fn, context, *args)
+    except Exception:
+        slots.release()
+        raise
+    # The slot is held until the hash finishes or is cancelled, even if this caller gives up
+    future.add_done_callback(lambda _: slots.release())
+    try:
+        return future.result(timeout=_wait)
+    except TimeoutError:
+        future.cancel()  # only succeeds while still queued
+        logger.warning(f"Password hash not done within {_wait}s, shedding request", extra={'sampled': True})
+        raise HashingBusy()
+
+
+def hash_password(password: str) -> str:
+    return _run(lambda context, secret: context.hash(secret), password)
+
+
+def verify_and_update(password: str, hashed: str | None) -> tuple[bool, str | None]:
+    """Return (matches, new_hash); new_hash is set when the stored hash should be replaced."""
+    if not password or not hashed:
+        return False, None
+    try:
+        return _run(lambda context, secret, stored: context.verify_and_update(secret, stored), password, hashed)
+    except ValueError:  # not a hash we recognise
+        return False, None
+
+
+def check_password(password: str, hashed: str | None) -> bool:
+    return verify_and_update(password, hashed)[0]
@@ -35,9 +35,7 @@ class PasswordResetRequestResource(Resource):
         if not email:
             return {"error": "Email is required"}, 400
 
-        user = User.query.filter(
-            db.func.lower(User.email) == email
-        ).first()
+        user = User.get_by_email(email)
 
         if not user:
             return {"registered": False}, 200
@@ -60,10 +58,10 @@ class PasswordResetRequestResource(Resource):
         )
         reset_token.add()
 
-        # Send reset email (non-blocking)
+        # Queue the reset email (delivered in the background)
         try:
             first_name = (user.profile.preferred_name if user.profile else None) or user.username
-            send_password_reset_email(user.email, first_name, raw_token)
+            send_password_reset_email(user.email, first_name, raw_token, user_id=user.id)
         except Exception:
             logger.exception("Failed to send password reset email")
 
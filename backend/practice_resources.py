@@ -17,30 +17,98 @@ RATE_LIMIT_RESPONSE = {
 
 # Maximum message length to prevent abuse
 MAX_MESSAGE_LENGTH = 2000
+MESSAGE_RATE_LIMIT = "30 per minute"
 
 
-class PracticeSessionResource(Resource):
-    @jwt_required()
-    def post(self):
-        user_id = int(get_jwt_identity())
-        data = request.get_json(silent=True) or {}
-        words_count = data.get('words_count')
-        deck_id = data.get('deck_id')
+# Request validation shared with the async (ASGI) handlers in async_resources.py
+
+def validate_session_request(data: dict):
+    """Return (deck_id, words_count, language, error) for a session-create body.
 
+    `"all_due": true` instead of a deck_id starts a session across all decks
+    (deck_id None), optionally limited to one `language`.
+    """
+    words_count = data.get('words_count')
+    deck_id = data.get('deck_id')
+    language = data.get('language')
+
+    if data.get('all_due') is True:
+        if deck_id is not None:
+            return None, None, None, 'deck_id cannot be combined with all_due'
+        if language is not None and language not in Deck.SUPPORTED_LANGUAGES:
+            return None, None, None, f"language must be one of {', '.join(Deck.SUPPORTED_LANGUAGES)}"
+    else:
         # Validate deck_id is required
         if not deck_id:
-            return {'error': 'deck_id is required'}, 400
+            return None, None, None, 'deck_id is required'
 
         if not isinstance(deck_id, int):
-            return {'error': 'deck_id must be an integer'}, 400
+            return None, None, None, 'deck_id must be an integer'
+        language = None
+
+    # Validate words_count if provided
+    if words_count is not None:
+        if not isinstance(words_count, int) or words_count < 1 or words_count > 50:
+            return None, None, None, 'words_count must be an integer between 1 and 50'
+    return deck_id, words_count, language, None
+
+
+def validate_message_request(data: dict | None):
+    """Return (message, error) for a practice message body."""
+    if not data or not data.get('message'):
+        return None, 'Message is required'
+
+    message = data['message']
+    if len(message) > MAX_MESSAGE_LENGTH:
+        return None, f'Message must be at most {MAX_MESSAGE_LENGTH} characters'
+    return message, None
+
 
-        # Validate words_count if provided
-        if words_count is not None:
-            if not isinstance(words_count, int) or words_count < 1 or words_count > 50:
-                return {'error': 'words_count must be an integer between 1 and 50'}, 400
+def validate_quality_request(data: dict):
+    """Return (quality, error) for a next-word body."""
+    quality = data.get('quality')
+
+    # Validate quality if provided
+    if quality is not None:
+        if not isinstance(quality, int) or quality < 0 or quality > 5:
+            return None, 'quality must be an integer between 0 and 5'
+    return quality, None
+
+
+def skip_remaining_words(session_id: int, user_id: int):
+    """Mark all pending words of an open session as skipped. Returns (error, status) or (None, None)."""
+    session = UserSession.get_by_id(session_id)
+
+    if not session or session.user_id != user_id:
+        return 'Session not found', 404
+
+    if session.session_end_ds is not None:
+        return 'Session is already complete', 400
+
+    session_words = SessionWord.get_list_by_session_id(session_id)
+    for sw in session_words:
+        if sw.status == 0:  # pending
+            sw.is_skipped = True
+            sw.status = -1  # skipped
+            sw.update()
+    return None, None
+
+
+def error_status(error: str) -> int:
+    return 404 if 'not found' in error.lower() else 400
+
+
+class PracticeSessionResource(Resource):
+    @jwt_required()
+    def post(self):
+        user_id = int(get_jwt_identity())
+        data = request.get_json(silent=True) or {}
+        deck_id, words_count, language, error = validate_session_request(data)
+        if error:
+            return {'error': error}, 400
 
         try:
-            result, error = initialize_session(user_id, deck_id, words_count)
+            result, error = initialize_session(user_id, deck_id, words_count, language)
         except RateLimitError as e:
             logger.warning(f"AI rate limit hit during session init: {e}")
             return RATE_LIMIT_RESPONSE, 429
@@ -98,41 +166,26 @@ class PracticeSessionDetailResource(Resource):
 class PracticeMessageResource(Resource):
     from extensions import limiter
 
-    @limiter.limit("30 per minute")
+    @limiter.limit(MESSAGE_RATE_LIMIT)
     @jwt_required()
     def post(self, id):
         user_id = int(get_jwt_identity())
-        data = request.get_json()
-        if not data or not data.get('message'):
-            return {'error': 'Message is required'}, 400
-
-        message = data['message']
-        if len(message) > MAX_MESSAGE_LENGTH:
-            return {'error': f'Message must be at most {MAX_MESSAGE_LENGTH} characters'}, 400
+        message, error = validate_message_request(request.get_json())
+        if error:
+            return {'error': error}, 400
 
         try:
-            print(f"[DEBUG] Processing message for session {id}, user {user_id}", flush=True)
-            logger.info(f"Processing message for session {id}, user {user_id}")
+            logger.debug(f"Processing message for session {id}, user {user_id}")
             result, error = handle_message(id, user_id, message)
-            print(f"[DEBUG] Message processed successfully for session {id}", flush=True)
-            logger.info(f"Message processed successfully for session {id}")
         except RateLimitError as e:
             logger.warning(f"AI rate limit hit during message: {e}")
             return RATE_LIMIT_RESPONSE, 429
         except Exception as e:
-            import traceback
-            print(f"\n{'='*80}", flush=True)
-            print(f"[ERROR] Exception in handle_message for session {id}, user {user_id}", flush=True)
-            print(f"Error type: {type(e).__name__}", flush=True)
-            print(f"Error message: {e}", flush=True)
-            print("Full traceback:", flush=True)
-            traceback.print_exc()
-            print(f"{'='*80}\n", flush=True)
-            logger.error(f"ERROR in handle_message for session {id}, user {user_id}: {e}", exc_info=True)
+            logger.error(f"Error in handle_message for session {id}, user {user_id}: {type(e).__name__}: {e}",
+                         exc_info=True)
             return {'error': 'An internal error occurred'}, 500
         if error:
-            status = 404 if 'not found' in error.lower() else 400
-            return {'error': error}, status
+            return {'error': error}, error_status(error)
         return result, 200
 
 
@@ -140,13 +193,9 @@ class PracticeNextWordResource(Resource):
     @jwt_required()
     def post(self, id):
         user_id = int(get_jwt_identity())
-        data = request.get_json(silent=True) or {}
-        quality = data.get('quality')
-
-        # Validate quality if provided
-        if quality is not None:
-            if not isinstance(quality, int) or quality < 0 or quality > 5:
-                return {'error': 'quality must be an integer between 0 and 5'}, 400
+        quality, error = validate_quality_request(request.get_json(silent=True) or {})
+        if error:
+            return {'error': error}, 400
 
         try:
             result, error = advance_word(id, user_id, quality)
@@ -157,8 +206,7 @@ class PracticeNextWordResource(Resource):
             logger.exception(f"Unexpected error in next-word for session {id}: {type(e).__name__}: {e}")
             return {'error': 'An unexpected error occurred. Please try again.'}, 500
         if error:
-            status = 404 if 'not found' in error.lower() else 400
-            return {'error': error}, status
+            return {'error': error}, error_status(error)
         return result, 200
 
 
@@ -167,22 +215,11 @@ class PracticeEndSessionResource(Resource):
     def post(self, id):
         """End a practice session early, marking remaining words as skipped."""
         user_id = int(get_jwt_identity())
-        user = User.get_by_id(user_id)
-        session = UserSession.get_by_id(id)
-
-        if not session or session.user_id != user_id:
-            return {'error': 'Session not found'}, 404
-
-        if session.session_end_ds is not None:
-            return {'error': 'Session is already complete'}, 400
 
         # Mark all remaining pending words as skipped
-        session_words = SessionWord.get_list_by_session_id(id)
-        for sw in session_words:
-            if sw.status == 0:  # pending
-                sw.is_skipped = True
-                sw.status = -1  # skipped
-                sw.update()
+        error, status = skip_remaining_words(id, user_id)
+        if error:
+            return {'error': error}, status
 
         # Complete the session
         try:
@@ -1,55 +1,95 @@
 """Progress stats API endpoints for home page."""
 from datetime import datetime, timezone
+from flask import request
 from flask_restful import Resource
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from models import Word, UserSession, SessionWord
+from models import Word, UserSession, SessionWord, UserProfile
 from extensions import db
+from config import Config
+from forecast import due_forecast
+from streaks import local_today
+from due_queue import due_queue
+
+
+def progress_stats(user_id):
+    """Home page progress stats (shared with /api/bootstrap)."""
+    # Total and mastered words in one query (is_mastered=True, set by SRS quality ratings)
+    total_words, mastered_count = db.session.query(
+        db.func.count(Word.id),
+        db.func.count(Word.id).filter(Word.is_mastered == True),
+    ).filter(Word.user_id == user_id).one()
+
+    if total_words == 0:
+        return {
+            'words_practiced_today': 0,
+            'mastery_percentage': 0,
+            'words_ready_for_review': 0,
+            'total_words': 0,
+        }
+
+    # Words practiced today (distinct word_ids from completed session words in today's sessions)
+    today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    words_today = db.session.query(
+        db.func.count(db.distinct(SessionWord.word_id))
+    ).join(
+        UserSession, SessionWord.session_id == UserSession.id
+    ).filter(
+        UserSession.user_id == user_id,
+        SessionWord.status == 1,  # completed
+        UserSession.session_start_ds >= today_start
+    ).scalar() or 0
+
+    mastery_percentage = round(mastered_count / total_words * 100)
+
+    # Words ready for review (due or overdue per SRS schedule, or new words never reviewed)
+    today = datetime.now(timezone.utc).date()
+    ready = due_queue.user_counts(user_id, today)
+    words_ready = ready['new'] + ready['due']
+
+    return {
+        'words_practiced_today': words_today,
+        'mastery_percentage': mastery_percentage,
+        'words_ready_for_review': words_ready,
+        'total_words': total_words,
+    }
 
 
 class ProgressStatsResource(Resource):
     @jwt_required()
     def get(self):
         user_id = int(get_jwt_identity())
+        return progress_stats(user_id), 200
 
-        # Total words
-        total_words = Word.query.filter_by(user_id=user_id).count()
-
-        if total_words == 0:
-            return {
-                'words_practiced_today': 0,
-                'mastery_percentage': 0,
-                'words_ready_for_review': 0,
-                'total_words': 0,
-            }, 200
-
-        # Words practiced today (distinct word_ids from completed session words in today's sessions)
-        today_start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
-        words_today = db.session.query(
-            db.func.count(db.distinct(SessionWord.word_id))
-        ).join(
-            UserSession, SessionWord.session_id == UserSession.id
-        ).filter(
-            UserSession.user_id == user_id,
-            SessionWord.status == 1,  # completed
-            UserSession.session_start_ds >= today_start
-        ).scalar() or 0
-
-        # Mastery percentage (is_mastered=True, set by SRS quality ratings)
-        mastered_count = Word.query.filter_by(user_id=user_id, is_mastered=True).count()
-        mastery_percentage = round(mastered_count / total_words * 100)
-
-        # Words ready for review (due or overdue per SRS schedule, or new words never reviewed)
-        today = datetime.now(timezone.utc).date()
-        words_ready = Word.query.filter_by(user_id=user_id).filter(
-            db.or_(
-                Word.next_review_date <= today,
-                Word.next_review_date.is_(None)
-            )
-        ).count()
 
-        return {
-            'words_practiced_today': words_today,
-            'mastery_percentage': mastery_percentage,
-            'words_ready_for_review': words_ready,
-            'total_words': total_words,
-        }, 200
+def _int_arg(name: str, default: int) -> int | None:
+    """Query parameter as an int: default when absent, None when not an integer."""
+    value = request.args.get(name)
+    if value is None:
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        return None
+
+
+class ForecastResource(Resource):
+    @jwt_required()
+    def get(self):
+        """Reviews due per day and per deck over the next `days` days (default 30).
+
+        ?project=true also counts the follow-up reviews, assuming each review is
+        rated `quality` (default 4).
+        """
+        user_id = int(get_jwt_identity())
+        days = _int_arg('days', 30)
+        quality = _int_arg('quality', 4)
+        project = request.args.get('project', 'false').lower() in ('true', '1')
+
+        if days is None or not 1 <= days <= Config.FORECAST_MAX_DAYS:
+            return {'error': f'days must be between 1 and {Config.FORECAST_MAX_DAYS}'}, 400
+        if quality is None or not 0 <= quality <= 5:
+            return {'error': 'quality must be between 0 and 5'}, 400
+
+        profile = UserProfile.get_by_user_id(user_id)
+        today = local_today(profile.timezone if profile else None)
+        return due_forecast(user_id, today, days=days, project=project, quality=quality), 200
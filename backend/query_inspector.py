@@ -0,0 +1,142 @@
+"""Per-request SQL inspection: N+1 detection and query budgets.
+
+Every statement executed during a request is recorded by shape (whitespace
+collapsed, IN lists folded). At the end of the request two checks run:
+
+- repeated shapes: the same SELECT executed SQL_REPEAT_THRESHOLD or more
+  times, the signature of an N+1 (e.g. a lazy `sw.word` in a loop). Writes
+  only count toward the budget: the ORM inserts row by row on SQLite, which
+  cannot batch INSERT .. RETURNING, so repeated INSERTs are not a code smell.
+- budget: more statements than the endpoint's budget, from SQL_QUERY_BUDGETS
+  ({endpoint: max statements}) or SQL_QUERY_BUDGET_DEFAULT
+
+SQL_INSPECTOR_MODE decides what a violation does: 'off' skips inspection,
+'log' logs a warning (the default, for dev), 'raise' raises SQLBudgetError.
+Violations are also counted in metrics and kept in `recent_violations`,
+which the test suite checks after every test (see tests/conftest.py).
+"""
+import contextvars
+import logging
+import re
+from collections import Counter, deque
+from dataclasses import dataclass, field
+
+from flask import current_app, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from metrics import registry
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_IN_LIST_RE = re.compile(r'\bIN \((?:[^()]|\([^()]*\))*\)', re.IGNORECASE)
+
+# Counter of statement shapes for the current request
+_statements = contextvars.ContextVar('sql_statements', default=None)
+_hooks_installed = False
+
+recent_violations = deque(maxlen=100)
+
+repeated_statements = registry.counter(
+    'laoshi_sql_repeated_statements_total', 'Requests with a statement repeated past the N+1 threshold',
+    ('endpoint',),
+)
+budget_exceeded = registry.counter(
+    'laoshi_sql_budget_exceeded_total', 'Requests that executed more statements than their budget',
+    ('endpoint',),
+)
+
+
+class SQLBudgetError(RuntimeError):
+    """Raised at the end of a request that broke its SQL budget (SQL_INSPECTOR_MODE='raise')."""
+
+
+@dataclass
+class Violation:
+    endpoint: str
+    total: int
+    budget: int | None = None
+    repeated: list = field(default_factory=list)  # [(shape, count)]
+
+    def describe(self) -> str:
+        parts = []
+        if self.budget is not None and self.total > self.budget:
+            parts.append(f"{self.total} statements (budget {self.budget})")
+        for shape, count in self.repeated:
+            parts.append(f"{count}x {shape[:200]}")
+        return f"{self.endpoint}: " + '; '.join(parts)
+
+
+def statement_shape(statement: str) -> str:
+    shape = _WHITESPACE_RE.sub(' ', statement).strip()
+    return _IN_LIST_RE.sub('IN (...)', shape)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    statements = _statements.get()
+    if statements is not None:
+        statements[statement_shape(statement)] += 1
+
+
+def install_hooks():
+    """Record statements on every engine (idempotent)."""
+    global _hooks_installed
+    if not _hooks_installed:
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        _hooks_installed = True
+
+
+def start():
+    """Begin recording statements. Returns a token for finish()."""
+    return _statements.set(Counter())
+
+
+def finish(token, endpoint: str, config) -> Violation | None:
+    """Stop recording and check the request. Returns the violation, if any."""
+    statements = _statements.get() or Counter()
+    _statements.reset(token)
+
+    total = sum(statements.values())
+    budget = (config.get('SQL_QUERY_BUDGETS') or {}).get(endpoint, config.get('SQL_QUERY_BUDGET_DEFAULT'))
+    threshold = config.get('SQL_REPEAT_THRESHOLD', 5)
+    repeated = [
+        (shape, count) for shape, count in statements.most_common()
+        if count >= threshold and shape[:6].upper() == 'SELECT'
+    ]
+    over_budget = budget is not None and total > budget
+    if not repeated and not over_budget:
+        return None
+
+    if repeated:
+        repeated_statements.inc(endpoint=endpoint)
+    if over_budget:
+        budget_exceeded.inc(endpoint=endpoint)
+    violation = Violation(endpoint, total, budget, repeated)
+    recent_violations.append(violation)
+    return violation
+
+
+def handle(violation: Violation, mode: str):
+    if mode == 'raise':
+        raise SQLBudgetError(violation.describe())
+    logger.warning(f"SQL budget violation in {violation.describe()}")
+
+
+def init_app(app):
+    """Inspect the SQL of every Flask request according to SQL_INSPECTOR_MODE."""
+    install_hooks()
+
+    @app.before_request
+    def _query_inspector_start():
+        if current_app.config.get('SQL_INSPECTOR_MODE', 'log') != 'off':
+            g._query_inspector = start()
+
+    @app.after_request
+    def _query_inspector_finish(response):
+        token = g.pop('_query_inspector', None)
+        if token is not None:
+            violation = finish(token, request.endpoint or 'unmatched', current_app.config)
+            if violation is not None:
+                handle(violation, current_app.config.get('SQL_INSPECTOR_MODE', 'log'))
+        return response
@@ -0,0 +1,230 @@
+"""Process-wide Redis connection pools with cached health and a circuit breaker.
+
+All Redis users (practice RedisSessions, caches) share one sync pool and one
+async pool per event loop instead of building a client and PINGing it on every
+call. Availability is decided by a cached health check plus a circuit breaker:
+after repeated failures the breaker opens and callers fall back to in-memory
+behaviour without touching the network until the reset timeout elapses.
+"""
+import asyncio
+import logging
+import os
+import threading
+import time
+import weakref
+
+from config import Config
+from metrics import redis_call_duration
+from server_timing import timed
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    """Classic closed -> open -> half-open breaker."""
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=3, reset_timeout=30, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+            return self._state
+
+    def allow_request(self) -> bool:
+        """False while open; half-open lets a trial request through."""
+        return self.state != self.OPEN
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                logger.info("Redis circuit breaker closed")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    logger.warning(
+                        f"Redis circuit breaker opened after {self._failures} failure(s); "
+                        f"using in-memory fallback for {self.reset_timeout}s"
+                    )
+                self._state = self.OPEN
+                self._opened_at = self._clock()
+
+
+class RedisPool:
+    """Shared sync/async Redis clients for one URL."""
+
+    def __init__(self, url, max_connections=20, socket_timeout=5, connect_timeout=5,
+                 health_ttl=30, failure_threshold=3, reset_timeout=30, clock=time.monotonic,
+                 sync_client_factory=None, async_client_factory=None):
+        self.url = url
+        self.max_connections = max_connections
+        self.socket_timeout = socket_timeout
+        self.connect_timeout = connect_timeout
+        self.health_ttl = health_ttl
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout, clock)
+        self._clock = clock
+        self._sync_client_factory = sync_client_factory or self._default_sync_client
+        self._async_client_factory = async_client_factory or self._default_async_client
+        self._sync_client = None
+        self._async_clients = weakref.WeakKeyDictionary()  # event loop -> client
+        self._lock = threading.Lock()
+        self._last_check = None
+        self._healthy = False
+        self._fallbacks = 0
+        self._fallback_reason = None
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.url)
+
+    def _client_kwargs(self):
+        return {
+            'max_connections': self.max_connections,
+            'socket_timeout': self.socket_timeout,
+            'socket_connect_timeout': self.connect_timeout,
+            'socket_keepalive': True,
+            'health_check_interval': self.health_ttl,
+        }
+
+    def _default_sync_client(self):
+        import redis as sync_redis
+        pool = sync_redis.ConnectionPool.from_url(self.url, **self._client_kwargs())
+        return sync_redis.Redis(connection_pool=pool)
+
+    def _default_async_client(self):
+        import redis.asyncio as async_redis
+        pool = async_redis.ConnectionPool.from_url(self.url, **self._client_kwargs())
+        return async_redis.Redis(connection_pool=pool)
+
+    def sync_client(self):
+        """Return the shared synchronous client (created lazily)."""
+        with self._lock:
+            if self._sync_client is None:
+                self._sync_client = self._sync_client_factory()
+            return self._sync_client
+
+    def async_client(self, loop=None):
+        """Return the shared async client for an event loop.
+
+        Async connections are bound to the loop they were opened on, so each
+        loop gets its own pool. Defaults to the running loop, or the shared
+        background loop used by async_utils.run_sync when called from sync code.
+        """
+        if loop is None:
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                from async_utils import get_loop
+                loop = get_loop()
+        with self._lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                client = self._async_client_factory()
+                self._async_clients[loop] = client
+            return client
+
+    def is_available(self) -> bool:
+        """Return whether callers should use Redis right now.
+
+        Uses the cached health state while it is fresh; otherwise issues a
+        single PING (also the half-open trial when the breaker is recovering).
+        """
+        if not self.enabled:
+            self._note_fallback('not_configured')
+            return False
+        if not self.breaker.allow_request():
+            self._note_fallback('circuit_open')
+            return False
+
+        now = self._clock()
+        with self._lock:
+            fresh = self._last_check is not None and now - self._last_check < self.health_ttl
+            if fresh and self._healthy and self.breaker.state == CircuitBreaker.CLOSED:
+                return True
+
+        try:
+            with redis_call_duration.time(op='ping'), timed('redis'):
+                self.sync_client().ping()
+        except Exception as e:
+            self.record_failure(e)
+            self._note_fallback('ping_failed')
+            return False
+        self.record_success()
+        return True
+
+    def record_success(self):
+        with self._lock:
+            self._healthy = True
+            self._last_check = self._clock()
+        self.breaker.record_success()
+
+    def record_failure(self, error=None):
+        if error is not None:
+            logger.warning(f"Redis call failed: {type(error).__name__}: {error}")
+        with self._lock:
+            self._healthy = False
+            self._last_check = self._clock()
+        self.breaker.record_failure()
+
+    def _note_fallback(self, reason):
+        with self._lock:
+            self._fallbacks += 1
+            if reason != self._fallback_reason:
+                logger.warning(f"Redis unavailable ({reason}); using in-memory session fallback")
+            self._fallback_reason = reason
+
+    def status(self) -> dict:
+        """Observable health/fallback state for logs and metrics."""
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'healthy': self._healthy,
+                'breaker_state': self.breaker.state,
+                'fallbacks': self._fallbacks,
+                'last_fallback_reason': self._fallback_reason,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_redis_pool() -> RedisPool:
+    """Return the process-wide pool for REDIS_URI, rebuilding it if the URL changes."""
+    global _pool
+    url = os.getenv("REDIS_URI")
+    with _pool_lock:
+        if _pool is None or _pool.url != url:
+            _pool = RedisPool(
+                url,
+                max_connections=Config.REDIS_MAX_CONNECTIONS,
+                health_ttl=Config.REDIS_HEALTH_TTL_SECONDS,
+                failure_threshold=Config.REDIS_BREAKER_FAILURE_THRESHOLD,
+                reset_timeout=Config.REDIS_BREAKER_RESET_SECONDS,
+            )
+        return _pool
+
+
+def set_redis_pool(pool: RedisPool | None):
+    """Replace the process-wide pool (used by tests to inject a fake Redis)."""
+    global _pool
+    with _pool_lock:
+        _pool = pool
@@ -49,6 +49,14 @@ class GenerateFeedbackResource(Resource):
         return {'feedback': feedback}, 200
 
 
+def format_streak(profile):
+    """Streak payload for a user's profile (shared with /api/bootstrap)."""
+    return {
+        'current_streak': profile.current_streak or 0,
+        'last_practice_date': profile.last_practice_date.isoformat() if profile.last_practice_date else None,
+    }
+
+
 class StreakResource(Resource):
     @jwt_required()
     def get(self):
@@ -59,7 +67,4 @@ class StreakResource(Resource):
         if not profile:
             return {'error': 'User profile not found'}, 404
 
-        return {
-            'current_streak': profile.current_streak or 0,
-            'last_practice_date': profile.last_practice_date.isoformat() if profile.last_practice_date else None,
-        }, 200
+        return format_streak(profile), 200
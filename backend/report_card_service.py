@@ -7,7 +7,8 @@ from extensions import db
 from models import User, UserProfile, UserSession, SessionWord, SessionWordAttempt
 from ai_layer.context import ReportCardContext
 from ai_layer.chat_agents import build_report_card_agent
-from ai_layer.mem0_setup import mem0_client
+from ai_layer.llm_metrics import llm_metrics_hooks
+from ai_layer.memory_service import get_memory_service
 from ai_layer.practice_runner import _parse_json_from_string
 from crypto_utils import decrypt_api_key
 
@@ -186,15 +187,9 @@ def generate_report_card_feedback(user_id: int, language: str = 'ZH') -> str:
 
         # Fetch mem0 memories
         mem0_prefs = None
-        try:
-            memories = mem0_client.search(
-                query="learning patterns and common mistakes",
-                user_id=str(user_id)
-            )
-            if memories:
-                mem0_prefs = str(memories)
-        except Exception:
-            pass  # mem0 failure should not block feedback
+        memories = get_memory_service().search(user_id, "learning patterns and common mistakes")
+        if memories:
+            mem0_prefs = str(memories)
 
         # Fetch last 3 session summaries
         recent_sessions = UserSession.query.filter_by(user_id=user_id).filter(
@@ -231,7 +226,9 @@ def generate_report_card_feedback(user_id: int, language: str = 'ZH') -> str:
         )
 
         from agents import RunContextWrapper
-        result = asyncio.run(Runner.run(agent, input="Generate report card feedback.", context=ctx))
+        result = asyncio.run(Runner.run(
+            agent, input="Generate report card feedback.", context=ctx, hooks=llm_metrics_hooks
+        ))
 
         output_text = result.final_output if hasattr(result, 'final_output') else str(result)
 
@@ -6,7 +6,8 @@ from flask_restful import Resource
 from http import HTTPStatus
 from models import Word, User, SessionWord, UserSession, TokenBlocklist
 from datetime import datetime, date
-from utils import hash_password, check_password, paginate_query
+from utils import hash_password, paginate_query
+from password_hashing import verify_and_update
 from extensions import db
 from flask_jwt_extended import (
     create_access_token, create_refresh_token,
@@ -293,19 +294,22 @@ class UserListResource(Resource):
         if not is_password_valid:
             return {"error": password_error}, 400
 
-        hashed_password = hash_password(password)
-
         if not User.is_email_valid(email):
             return {"error": "Email invalid or already registered"}, 400
         if not User.is_username_valid(username):
             return {"error": "Username invalid or already registered"}, 400
 
+        hashed_password = hash_password(password)
+
         current_ds = datetime.now()
         # Note: preferred_name is now on UserProfile, not User
         user_to_add = User(username=username, email=email, password=hashed_password, created_ds=current_ds)
 
         try:
             user_to_add.add()
+        except IntegrityError:
+            # A concurrent signup took the username or email since the checks above
+            return {"error": "Username or email already registered"}, 400
         except Exception:
             logger.exception("Error creating user")
             return {"error": "An internal error occurred"}, 500
@@ -317,10 +321,10 @@ class UserListResource(Resource):
         except Exception:
             logger.exception("Failed to seed sample deck, continuing registration")
 
-        # Send welcome email (non-blocking — failure doesn't affect registration)
+        # Queue the welcome email (delivered in the background; failure doesn't affect registration)
         try:
             from email_service import send_welcome_email
-            send_welcome_email(email, username, username)
+            send_welcome_email(email, username, username, user_id=user_to_add.id)
         except Exception:
             logger.exception("Failed to send welcome email, continuing registration")
 
@@ -389,6 +393,8 @@ class UserResource(Resource):
 
         try:
             found_user.update()
+        except IntegrityError:
+            return {"error": "Username or email already registered"}, 400
         except Exception:
             logger.exception("Error updating user")
             return {"error": "An internal error occurred"}, 500
@@ -645,8 +651,13 @@ class TokenResource(Resource):
 
         user = User.get_by_username(username)
 
-        if not user or not check_password(password, user.password):
+        matches, new_hash = verify_and_update(password, user.password) if user else (False, None)
+        if not matches:
             return {'message': 'Username or password is incorrect.'}, HTTPStatus.UNAUTHORIZED
+        if new_hash:
+            # Stored hash uses an old scheme or cost: upgrade it while we have the password
+            user.password = new_hash
+            user.update()
 
         try:
             identity = str(user.id)
@@ -2,8 +2,11 @@ import csv
 import os
 import logging
 
+from sqlalchemy import insert
+
 from models import Deck, Word
 from extensions import db
+from due_queue import due_queue
 
 logger = logging.getLogger(__name__)
 
@@ -88,8 +91,9 @@ def seed_sample_deck_for_user(user_id, language='ZH'):
         db.session.add(deck)
         db.session.flush()  # Get deck.id before inserting words
 
-        word_objects = [
-            Word(
+        # One executemany rather than an INSERT per word (no RETURNING needed)
+        word_rows = [
+            dict(
                 word=wd['word'],
                 reading=wd['reading'],
                 meaning=wd['meaning'],
@@ -102,9 +106,10 @@ def seed_sample_deck_for_user(user_id, language='ZH'):
             for wd in words_data
         ]
 
-        db.session.add_all(word_objects)
+        db.session.execute(insert(Word), word_rows)
         db.session.commit()
-        logger.info(f"Seeded {language} sample deck (id={deck.id}) with {len(word_objects)} words for user {user_id}.")
+        due_queue.invalidate(user_id)  # the executemany bypasses the due queue's session hooks
+        logger.info(f"Seeded {language} sample deck (id={deck.id}) with {len(word_rows)} words for user {user_id}.")
         return deck
     except Exception:
         db.session.rollback()
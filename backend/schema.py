@@ -0,0 +1,60 @@
+"""Database schema management.
+
+The app factory does no DDL. Schema changes are applied explicitly with
+`flask laoshi migrate` (e.g. as a release step before workers start), or at
+startup when AUTO_MIGRATE is set, in which case a PostgreSQL advisory lock
+ensures only one worker migrates at a time.
+"""
+import logging
+import time
+from contextlib import contextmanager
+
+from flask_migrate import stamp, upgrade
+from sqlalchemy import inspect, text
+
+from extensions import db
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_LOCK_KEY = 0x6C616F736869  # "laoshi"
+
+
+def migrate_database() -> str:
+    """Bring the schema to the migration head. Must run in an app context.
+
+    Returns 'created' for a fresh database (tables created from the current
+    models, then stamped at head) or 'upgraded' when pending migrations ran.
+    """
+    tables = inspect(db.engine).get_table_names()
+    if not tables or tables == ['alembic_version']:
+        db.create_all()
+        stamp(revision='head')
+        return 'created'
+    upgrade()
+    return 'upgraded'
+
+
+@contextmanager
+def migration_lock(timeout: float | None = 300, poll_interval: float = 0.5):
+    """Hold a PostgreSQL advisory lock for the duration of a migration.
+
+    Other dialects (SQLite in dev/tests) have a single writer, so this is a
+    no-op there. Raises TimeoutError if the lock isn't acquired within timeout.
+    """
+    if db.engine.dialect.name != 'postgresql':
+        yield
+        return
+
+    with db.engine.connect() as conn:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not conn.execute(text("SELECT pg_try_advisory_lock(:key)"),
+                               {'key': MIGRATION_LOCK_KEY}).scalar():
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"Timed out after {timeout}s waiting for the migration lock")
+            logger.info("Another process is migrating the database; waiting for the lock")
+            time.sleep(poll_interval)
+        try:
+            yield
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {'key': MIGRATION_LOCK_KEY})
+            conn.commit()
@@ -0,0 +1,104 @@
+"""Per-request phase timers, reported in a Server-Timing response header.
+
+    Server-Timing: db;dur=12.4;desc="7 queries", decrypt;dur=0.3, redis;dur=1.9,
+                   mem0;dur=88.0, session;dur=4.1, agent;dur=2512.7, llm;dur=2431.2,
+                   total;dur=2630.5
+
+Browser devtools show the header in the Timing tab, and the gateway logs it
+(see gateway/nginx.conf). With SERVER_TIMING_JSON on, JSON object responses
+also carry the breakdown in a `_server_timing` field.
+
+Phases may overlap: `agent` is the whole agent run (retries, tools, session
+history I/O) and includes `llm` (model calls only) and any `redis` time spent
+reading session history. Timers are no-ops outside a request.
+"""
+import contextvars
+import json
+import time
+from contextlib import contextmanager
+
+from flask import current_app, g
+
+# {phase: [seconds, count]} for the current request. Shared (not copied) with
+# DB pool threads and the background event loop via copied contexts.
+_phases = contextvars.ContextVar('server_timing_phases', default=None)
+
+JSON_FIELD = '_server_timing'
+
+
+def start():
+    """Begin timing a request. Returns a token for finish()."""
+    return time.perf_counter(), _phases.set({})
+
+
+def finish(token) -> dict:
+    """Stop timing. Returns {phase: (milliseconds, count)} including 'total'."""
+    started, phases_token = token
+    phases = _phases.get() or {}
+    _phases.reset(phases_token)
+    timings = {name: (seconds * 1000, count) for name, (seconds, count) in phases.items()}
+    timings['total'] = ((time.perf_counter() - started) * 1000, 1)
+    return timings
+
+
+def record(phase: str, seconds: float):
+    phases = _phases.get()
+    if phases is not None:
+        entry = phases.setdefault(phase, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+
+@contextmanager
+def timed(phase: str):
+    """Add the block's duration to phase for the current request."""
+    if _phases.get() is None:
+        yield
+        return
+    begin = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(phase, time.perf_counter() - begin)
+
+
+_COUNT_UNITS = {'db': 'queries', 'llm': 'calls', 'mem0': 'calls', 'redis': 'calls'}
+
+
+def header_value(timings: dict) -> str:
+    parts = []
+    for name, (ms, count) in timings.items():
+        part = f"{name};dur={ms:.1f}"
+        if name in _COUNT_UNITS:
+            part += f';desc="{count} {_COUNT_UNITS[name]}"'
+        parts.append(part)
+    return ', '.join(parts)
+
+
+def json_value(timings: dict) -> dict:
+    return {name: round(ms, 1) for name, (ms, _) in timings.items()}
+
+
+def init_app(app):
+    """Time every Flask request and attach the Server-Timing header."""
+
+    @app.before_request
+    def _server_timing_start():
+        g._server_timing = start()
+
+    @app.after_request
+    def _server_timing_finish(response):
+        token = g.pop('_server_timing', None)
+        if token is None:
+            return response
+        timings = finish(token)
+        if not current_app.config.get('SERVER_TIMING_ENABLED', True):
+            return response
+        response.headers['Server-Timing'] = header_value(timings)
+        response.headers['Timing-Allow-Origin'] = '*'  # let the cross-origin dev frontend see it
+        if current_app.config.get('SERVER_TIMING_JSON') and response.is_json and not response.direct_passthrough:
+            body = response.get_json(silent=True)
+            if isinstance(body, dict):
+                body[JSON_FIELD] = json_value(timings)
+                response.set_data(json.dumps(body))
+        return response
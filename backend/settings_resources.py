@@ -5,25 +5,30 @@ from flask_restful import Resource
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import UserProfile
 from crypto_utils import encrypt_api_key
+from streaks import is_valid_timezone
 from ai_layer.key_validator import validate_deepseek_key, validate_gemini_key
 
+# Settings reported before a user has saved any (no profile yet)
+DEFAULT_SETTINGS = {
+    'preferred_name': None,
+    'words_per_session': None,
+    'has_deepseek_key': False,
+    'has_gemini_key': False,
+    'onboarding_complete': False,
+    'timezone': None,
+}
+
+
+def format_settings(profile):
+    """Settings payload for a user's profile, which may be None (shared with /api/bootstrap)."""
+    return profile.format_settings() if profile else dict(DEFAULT_SETTINGS)
+
 
 class UserSettingsResource(Resource):
     @jwt_required()
     def get(self):
         user_id = int(get_jwt_identity())
-        profile = UserProfile.get_by_user_id(user_id)
-
-        if not profile:
-            return {
-                'preferred_name': None,
-                'words_per_session': None,
-                'has_deepseek_key': False,
-                'has_gemini_key': False,
-                'onboarding_complete': False,
-            }, 200
-
-        return profile.format_settings(), 200
+        return format_settings(UserProfile.get_by_user_id(user_id)), 200
 
     @jwt_required()
     def put(self):
@@ -42,6 +47,10 @@ class UserSettingsResource(Resource):
             if not isinstance(wps, int) or wps < 1 or wps > 50:
                 return {"error": "words_per_session must be between 1 and 50"}, 400
 
+        if 'timezone' in data and data['timezone'] is not None:
+            if not is_valid_timezone(data['timezone']):
+                return {"error": "timezone must be an IANA timezone name, e.g. Asia/Shanghai"}, 400
+
         # Lazy-create profile
         profile = UserProfile.get_by_user_id(user_id)
         if not profile:
@@ -55,6 +64,9 @@ class UserSettingsResource(Resource):
         if 'words_per_session' in data:
             profile.words_per_session = data['words_per_session']  # None resets to default
 
+        if 'timezone' in data:
+            profile.timezone = data['timezone']  # None falls back to DEFAULT_USER_TIMEZONE
+
         if 'onboarding_complete' in data:
             if not isinstance(data['onboarding_complete'], bool):
                 return {"error": "onboarding_complete must be a boolean"}, 400
@@ -94,49 +106,63 @@ class UserSettingsKeyResource(Resource):
         }, 200
 
 
+def validate_key_request(provider: str, data: dict | None):
+    """Return (api_key, error) for a key-validation request (shared with async_resources.py)."""
+    if provider not in ('deepseek', 'gemini'):
+        return None, "Invalid provider. Must be 'deepseek' or 'gemini'."
+
+    if not data or 'api_key' not in data:
+        return None, "api_key is required"
+
+    api_key = data['api_key']
+    if len(api_key) > 500:
+        return None, "api_key must be at most 500 characters"
+    return api_key, None
+
+
+def check_provider_key(provider: str, api_key: str):
+    """Coroutine validating the key with a real API call. Resolves to (is_valid, error)."""
+    if provider == 'deepseek':
+        return validate_deepseek_key(api_key)
+    return validate_gemini_key(api_key)
+
+
 class UserSettingsKeyValidateResource(Resource):
     @jwt_required()
     def post(self, provider):
-        if provider not in ('deepseek', 'gemini'):
-            return {"error": "Invalid provider. Must be 'deepseek' or 'gemini'."}, 400
-
-        data = request.get_json()
-        if not data or 'api_key' not in data:
-            return {"error": "api_key is required"}, 400
-
-        api_key = data['api_key']
-        if len(api_key) > 500:
-            return {"error": "api_key must be at most 500 characters"}, 400
+        api_key, error = validate_key_request(provider, request.get_json())
+        if error:
+            return {"error": error}, 400
 
         # Validate the key with real API call
-        if provider == 'deepseek':
-            is_valid, error = asyncio.run(validate_deepseek_key(api_key))
-        else:
-            is_valid, error = asyncio.run(validate_gemini_key(api_key))
+        is_valid, error = asyncio.run(check_provider_key(provider, api_key))
 
         if not is_valid:
             return {"valid": False, "error": error}, 200
 
-        # Key is valid - save it
-        user_id = int(get_jwt_identity())
-        profile = UserProfile.get_by_user_id(user_id)
+        return save_provider_key(int(get_jwt_identity()), provider, api_key), 200
 
-        if not profile:
-            profile = UserProfile(user_id=user_id)
-            profile.add()
 
-        # Encrypt and store
-        encrypted = encrypt_api_key(api_key)
-        if provider == 'deepseek':
-            profile.encrypted_deepseek_api_key = encrypted
-        else:
-            profile.encrypted_gemini_api_key = encrypted
+def save_provider_key(user_id: int, provider: str, api_key: str) -> dict:
+    """Encrypt and store a validated key, bumping its version. Returns the response body."""
+    profile = UserProfile.get_by_user_id(user_id)
 
-        profile.increment_key_version(provider)
-        profile.update()
+    if not profile:
+        profile = UserProfile(user_id=user_id)
+        profile.add()
 
-        return {
-            "valid": True,
-            "message": f"{provider.title()} API key saved",
-            f"has_{provider}_key": True
-        }, 200
+    # Encrypt and store
+    encrypted = encrypt_api_key(api_key)
+    if provider == 'deepseek':
+        profile.encrypted_deepseek_api_key = encrypted
+    else:
+        profile.encrypted_gemini_api_key = encrypted
+
+    profile.increment_key_version(provider)
+    profile.update()
+
+    return {
+        "valid": True,
+        "message": f"{provider.title()} API key saved",
+        f"has_{provider}_key": True
+    }
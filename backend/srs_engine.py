@@ -0,0 +1,194 @@
+"""Array-based SRS engine: the modified SM-2 schedule, on NumPy columns.
+
+review() takes columns (or scalars) of repetitions, interval_days, ease_factor
+and quality and returns the new state elementwise. Built on it:
+
+- due_dates(): next review dates for a column of intervals
+- replay(): folds a (words x reviews) matrix of ratings over starting states,
+  e.g. to recompute state under new parameters
+- project(): simulates the days ahead, reviewing each word whenever it falls
+  due, and counts the reviews per day (the review-load forecast)
+- Word.reschedule_deck() rates every word in a deck with one SELECT and one
+  bulk UPDATE
+
+session_mix() is the session composition select_srs_words uses (and the
+offline simulator in benchmarks/srs_simulator.py); review_priority() ranks due
+words for all-deck sessions (select_all_due_words).
+
+Rules (the original per-word code's; the numbers are the constants below):
+
+- quality 5 on a word with no repetitions fast-tracks it: interval 14,
+  repetitions 2, ease reset to 2.5
+- quality < 3 resets: repetitions 0, interval 1
+- otherwise intervals go 1, 3, 7 days for repetitions 0, 1, 2, then
+  interval * ease (ceil below 7 days, round half to even from 7); repetitions + 1
+- ease += ease_change(q) = 0.1 - (5 - q)(0.08 + (5 - q) 0.02) in every case,
+  floored at 1.3
+
+These branches are written twice, intentionally: review() over arrays, and
+review_scalar() in plain Python for a single word. Word.update_srs does not go
+through the array path (it calls review_one(), i.e. review_scalar()) because
+array dispatch costs far more than the arithmetic for one word. Both read the
+same constants and ease_change(), but a change to the rules must be made in
+both functions; the parity tests in tests/test_srs_engine.py hold them together.
+"""
+import math
+from datetime import date
+from typing import NamedTuple
+
+import numpy as np
+
+MIN_EASE = 1.3
+INITIAL_EASE = 2.5
+PERFECT_QUALITY = 5
+PASSING_QUALITY = 3  # lower ratings reset a word
+FAST_TRACK_INTERVAL = 14  # a perfect first rating jumps straight to this interval...
+FAST_TRACK_REPETITIONS = 2  # ...and repetition count
+RESET_INTERVAL = 1
+EARLY_INTERVALS = (1, 3, 7)  # by repetitions 0, 1, 2
+CEIL_BELOW_DAYS = 7  # shorter grown intervals round up, so a word never sticks at 1 day
+NO_REVIEW = -1  # replay(): no rating at this step
+NEW_WORD_SHARE = 0.4  # of a practice session, the rest being due reviews
+FAILED_PRIORITY_DAYS = 7  # a word failed last time ranks like one a week more overdue
+EASE_PRIORITY_DAYS = 5  # per 1.0 of ease below INITIAL_EASE
+
+
+class SRSState(NamedTuple):
+    repetitions: np.ndarray
+    interval_days: np.ndarray
+    ease_factor: np.ndarray
+
+
+def ease_change(quality):
+    """SM-2 ease adjustment for a rating (elementwise on arrays)."""
+    lapse = PERFECT_QUALITY - quality
+    return 0.1 - lapse * (0.08 + lapse * 0.02)
+
+
+def review(repetitions, interval_days, ease_factor, quality) -> SRSState:
+    """Apply one rating per element. Inputs broadcast against each other."""
+    reps, interval, ease, q = np.broadcast_arrays(
+        np.asarray(repetitions, dtype=np.int64),
+        np.asarray(interval_days, dtype=np.int64),
+        np.asarray(ease_factor, dtype=np.float64),
+        np.asarray(quality, dtype=np.int64),
+    )
+    fast = (reps == 0) & (q == PERFECT_QUALITY)
+    failed = ~fast & (q < PASSING_QUALITY)
+
+    grown = interval * ease
+    with np.errstate(invalid='ignore'):  # overflow only matters where the value is unused
+        grown_days = np.where(grown < CEIL_BELOW_DAYS, np.ceil(grown), np.round(grown)).astype(np.int64)
+    early = (reps >= 0) & (reps < len(EARLY_INTERVALS))
+    passed_interval = np.where(early, np.take(EARLY_INTERVALS, reps, mode='clip'), grown_days)
+
+    new_interval = np.select([fast, failed], [FAST_TRACK_INTERVAL, RESET_INTERVAL], passed_interval)
+    new_reps = np.select([fast, failed], [FAST_TRACK_REPETITIONS, 0], reps + 1)
+    new_ease = np.maximum(MIN_EASE, np.where(fast, INITIAL_EASE, ease) + ease_change(q))
+    return SRSState(new_reps, new_interval, new_ease)
+
+
+def review_scalar(repetitions: int, interval_days: int, ease_factor: float, quality: int) -> tuple[int, int, float]:
+    """review() for one word in plain Python: same rules and constants, no array dispatch."""
+    if repetitions == 0 and quality == PERFECT_QUALITY:
+        repetitions, interval_days, ease_factor = FAST_TRACK_REPETITIONS, FAST_TRACK_INTERVAL, INITIAL_EASE
+    elif quality < PASSING_QUALITY:
+        repetitions, interval_days = 0, RESET_INTERVAL
+    else:
+        if 0 <= repetitions < len(EARLY_INTERVALS):
+            interval_days = EARLY_INTERVALS[repetitions]
+        else:
+            grown = interval_days * ease_factor
+            interval_days = math.ceil(grown) if grown < CEIL_BELOW_DAYS else round(grown)
+        repetitions += 1
+    return repetitions, interval_days, max(MIN_EASE, ease_factor + ease_change(quality))
+
+
+def review_one(repetitions: int, interval_days: int, ease_factor: float, quality: int) -> tuple[int, int, float]:
+    """One word's review as plain Python values for ORM columns."""
+    return review_scalar(int(repetitions), int(interval_days), float(ease_factor), int(quality))
+
+
+def session_mix(words_count: int, new_available: int, due_available: int) -> tuple[int, int]:
+    """Return (new, due) word counts for a practice session of words_count words.
+
+    Aims for NEW_WORD_SHARE new words and due reviews for the rest; a shortfall in
+    either pool is made up from the other. Slots still open after that are filled
+    with words not yet due, soonest first.
+    """
+    target_new = round(words_count * NEW_WORD_SHARE)
+    target_review = words_count - target_new
+    take_new = min(target_new, new_available)
+    take_review = min(target_review, due_available)
+    if take_new < target_new:
+        take_review = min(target_review + target_new - take_new, due_available)
+    elif take_review < target_review:
+        take_new = min(target_new + target_review - take_review, new_available)
+    return take_new, take_review
+
+
+def review_priority(overdue_days: int, ease_factor: float | None, last_quality: int | None) -> float:
+    """Urgency of a due review in days-overdue units; higher is practised first.
+
+    Hard words (ease below INITIAL_EASE) and words failed at their last review
+    rank ahead of equally overdue ones; easy words rank slightly behind.
+    """
+    priority = overdue_days + EASE_PRIORITY_DAYS * (INITIAL_EASE - (ease_factor or INITIAL_EASE))
+    if last_quality is not None and last_quality < PASSING_QUALITY:
+        priority += FAILED_PRIORITY_DAYS
+    return priority
+
+
+def due_dates(today: date, interval_days) -> np.ndarray:
+    """Return datetime64[D] due dates, interval_days after today."""
+    return np.datetime64(today, 'D') + np.asarray(interval_days, dtype='timedelta64[D]')
+
+
+def replay(qualities, repetitions=0, interval_days=1, ease_factor=INITIAL_EASE) -> SRSState:
+    """Apply each column of a (words x reviews) rating matrix in turn.
+
+    NO_REVIEW entries leave that word unchanged at that step, so histories of
+    different lengths can share one matrix. Starting state defaults to a new word.
+    """
+    q = np.atleast_2d(np.asarray(qualities, dtype=np.int64))
+    n = q.shape[0]
+    reps = np.broadcast_to(np.asarray(repetitions, dtype=np.int64), (n,)).copy()
+    interval = np.broadcast_to(np.asarray(interval_days, dtype=np.int64), (n,)).copy()
+    ease = np.broadcast_to(np.asarray(ease_factor, dtype=np.float64), (n,)).copy()
+    for step in q.T:
+        rated = step != NO_REVIEW
+        if not rated.any():
+            continue
+        new = review(reps, interval, ease, np.where(rated, step, 3))
+        reps = np.where(rated, new.repetitions, reps)
+        interval = np.where(rated, new.interval_days, interval)
+        ease = np.where(rated, new.ease_factor, ease)
+    return SRSState(reps, interval, ease)
+
+
+def project(due_in, repetitions, interval_days, ease_factor, quality, days: int,
+            groups=None, n_groups: int = 1) -> np.ndarray:
+    """Simulate `days` days of reviews, rating every review `quality`.
+
+    due_in is the number of days until each word is next due (0 or less: today).
+    A reviewed word comes due again after its new interval, so the counts include
+    the follow-up reviews. groups assigns each word an index below n_groups (e.g.
+    its deck); the result is a (days x n_groups) array of review counts.
+    """
+    due = np.maximum(np.asarray(due_in, dtype=np.int64), 0)
+    n = due.shape[0]
+    reps = np.broadcast_to(np.asarray(repetitions, dtype=np.int64), (n,)).copy()
+    interval = np.broadcast_to(np.asarray(interval_days, dtype=np.int64), (n,)).copy()
+    ease = np.broadcast_to(np.asarray(ease_factor, dtype=np.float64), (n,)).copy()
+    groups = np.zeros(n, dtype=np.int64) if groups is None else np.asarray(groups, dtype=np.int64)
+
+    counts = np.zeros((days, n_groups), dtype=np.int64)
+    for day in range(days):
+        today = np.flatnonzero(due == day)
+        if not today.size:
+            continue
+        counts[day] = np.bincount(groups[today], minlength=n_groups)
+        new = review(reps[today], interval[today], ease[today], quality)
+        reps[today], interval[today], ease[today] = new
+        due[today] = day + new.interval_days
+    return counts
@@ -0,0 +1,110 @@
+"""Practice streaks, kept current without row locks.
+
+update_streak() runs when a session completes. It is a single conditional
+UPDATE ... RETURNING on user_profile: the CASE expression decides, from
+last_practice_date, whether the streak continues, restarts or stays the same.
+Concurrent completions for one user are therefore serialised by the UPDATE
+itself, with no SELECT ... FOR UPDATE held across round-trips.
+
+"Today" is the user's local date (UserProfile.timezone, an IANA name, falling
+back to DEFAULT_USER_TIMEZONE). Streaks that lapse because nobody practised
+are zeroed by reset_lapsed_streaks(), run by `flask laoshi reset-streaks`.
+Schedule it hourly so each timezone's midnight is covered soon after it
+passes. StreakResource then just returns the stored values.
+"""
+import logging
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import case, func, or_, update
+
+from config import Config
+from extensions import db
+from models import UserProfile
+
+logger = logging.getLogger(__name__)
+
+
+def is_valid_timezone(name) -> bool:
+    if not isinstance(name, str) or not name:
+        return False
+    try:
+        ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+    return True
+
+
+def user_zone(name: str | None) -> ZoneInfo:
+    """Return the zone for an IANA name, or the default zone if it is missing or unknown."""
+    if is_valid_timezone(name):
+        return ZoneInfo(name)
+    return ZoneInfo(Config.DEFAULT_USER_TIMEZONE)
+
+
+def local_today(timezone_name: str | None = None, now: datetime | None = None) -> date:
+    now = now or datetime.now(timezone.utc)
+    return now.astimezone(user_zone(timezone_name)).date()
+
+
+def update_streak(user_id: int, timezone_name: str | None = None, today: date | None = None):
+    """Record practice for today in the user's timezone.
+
+    Returns (current_streak, last_practice_date), or None if the user has no profile.
+    """
+    today = today or local_today(timezone_name)
+    last = UserProfile.last_practice_date
+    stmt = (
+        update(UserProfile)
+        .where(UserProfile.user_id == user_id)
+        .values(
+            current_streak=case(
+                (last >= today, func.coalesce(UserProfile.current_streak, 0)),  # already counted today
+                (last == today - timedelta(days=1), func.coalesce(UserProfile.current_streak, 0) + 1),
+                else_=1,
+            ),
+            last_practice_date=case((last > today, last), else_=today),
+        )
+        .returning(UserProfile.current_streak, UserProfile.last_practice_date)
+        .execution_options(synchronize_session=False)  # the commit below expires loaded profiles
+    )
+    try:
+        row = db.session.execute(stmt).first()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return tuple(row) if row else None
+
+
+def reset_lapsed_streaks(now: datetime | None = None) -> int:
+    """Zero streaks whose last practice was before yesterday in the user's timezone.
+
+    Issues one UPDATE per distinct timezone among users with a streak. Idempotent.
+    Returns the number of profiles reset.
+    """
+    now = now or datetime.now(timezone.utc)
+    zones = [tz for (tz,) in db.session.query(UserProfile.timezone)
+             .filter(UserProfile.current_streak > 0).distinct()]
+    reset = 0
+    try:
+        for tz in zones:
+            yesterday = local_today(tz, now) - timedelta(days=1)
+            same_zone = UserProfile.timezone.is_(None) if tz is None else UserProfile.timezone == tz
+            result = db.session.execute(
+                update(UserProfile)
+                .where(
+                    same_zone,
+                    UserProfile.current_streak > 0,
+                    or_(UserProfile.last_practice_date.is_(None), UserProfile.last_practice_date < yesterday),
+                )
+                .values(current_streak=0)
+                .execution_options(synchronize_session=False)
+            )
+            reset += result.rowcount
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    logger.info(f"Reset {reset} lapsed streak(s) across {len(zones)} timezone(s)")
+    return reset
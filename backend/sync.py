@@ -0,0 +1,217 @@
+"""Delta sync for offline clients (/api/sync).
+
+Decks, words and practice sessions carry updated_ds, set on insert and on
+every update, and deletions leave a SyncTombstone row. The session hook below
+writes tombstones in the deleting transaction; bulk DELETEs call
+SyncTombstone.record_bulk() themselves.
+
+A sync page is the user's next `limit` changes from one stream ordered by
+(timestamp, kind, id) across the four tables. Each table is read with a
+LIMITed keyset query on its (user_id, timestamp) index, so a page costs
+O(limit) whatever the size of the vocabulary.
+
+The cursor is an opaque token for the last position returned. It only moves
+forward, and never past now - SYNC_SETTLE_SECONDS: a row is stamped when it
+is flushed but only visible once its transaction commits, so younger changes
+are left for the next sync rather than skipped. It also carries the time the
+client's copy was last complete, since deletions after that must still be
+reported. Tombstones are purged after SYNC_TOMBSTONE_RETENTION_DAYS
+(`flask laoshi purge-sync-tombstones`); a cursor whose copy is older gets
+`reset: true` and a full sync, and the client replaces its copy with the
+result.
+
+Clients apply a page's deletions before its upserts.
+"""
+import base64
+import logging
+from datetime import date, datetime, timedelta, timezone
+from typing import NamedTuple
+
+from sqlalchemy import and_, event, inspect, or_, select
+from sqlalchemy.orm import Session
+
+from config import Config
+from extensions import db
+from models import Deck, SyncTombstone, User, UserSession, Word
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class _Source(NamedTuple):
+    key: str        # response key
+    model: type
+    stamp: str      # change timestamp column
+    fields: tuple   # columns sent for each row, in this order
+
+
+# Rank in the stream is the position in this tuple
+SOURCES = (
+    _Source('decks', Deck, 'updated_ds',
+            ('id', 'name', 'description', 'language', 'laoshi_message', 'updated_ds')),
+    _Source('words', Word, 'updated_ds',
+            ('id', 'deck_id', 'word', 'reading', 'meaning', 'notes', 'repetitions', 'interval_days',
+             'ease_factor', 'next_review_date', 'last_quality', 'marked_as_known', 'is_mastered', 'updated_ds')),
+    _Source('sessions', UserSession, 'updated_ds',
+            ('id', 'deck_id', 'session_start_ds', 'session_end_ds', 'words_per_session', 'summary_text',
+             'updated_ds')),
+    _Source('deleted', SyncTombstone, 'deleted_ds', ('id', 'entity', 'entity_id')),
+)
+DELETED_KEYS = {'deck': 'decks', 'word': 'words', 'session': 'sessions'}
+
+
+class Cursor(NamedTuple):
+    micros: int  # timestamp, microseconds since the epoch (UTC)
+    rank: int    # SOURCES index; len(SOURCES) once everything at `micros` was sent
+    id: int
+    synced: int  # when the client's copy was last complete (microseconds); tombstones from then on are needed
+
+    def encode(self) -> str:
+        raw = f"{self.micros}.{self.rank}.{self.id}.{self.synced}".encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    @classmethod
+    def decode(cls, token: str) -> 'Cursor':
+        """Raises ValueError for anything this server didn't issue."""
+        try:
+            raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+            micros, rank, row_id, synced = (int(part) for part in raw.split('.'))
+        except Exception:
+            raise ValueError(f"invalid sync cursor: {token!r}")
+        if micros < 0 or not 0 <= rank <= len(SOURCES) or row_id < 0 or synced < 0:
+            raise ValueError(f"invalid sync cursor: {token!r}")
+        return cls(micros, rank, row_id, synced)
+
+
+def to_micros(value: datetime) -> int:
+    if value.tzinfo is None:  # columns are stored as naive UTC
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def from_micros(micros: int) -> datetime:
+    """Naive UTC, like the stored columns (an aware value would be compared as timestamptz on PostgreSQL)."""
+    return (EPOCH + timedelta(microseconds=micros)).replace(tzinfo=None)
+
+
+def _compact(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+
+def _after(source, rank, cursor):
+    """Keyset condition: rows of source after cursor in (timestamp, rank, id) order."""
+    stamp, row_id = getattr(source.model, source.stamp), source.model.id
+    at = from_micros(cursor.micros)
+    if rank < cursor.rank:
+        return stamp > at
+    if rank > cursor.rank:
+        return stamp >= at
+    return or_(stamp > at, and_(stamp == at, row_id > cursor.id))
+
+
+def changes_since(user_id: int, token: str | None = None, limit: int | None = None, now: datetime | None = None) -> dict:
+    """The user's next page of changes after the cursor token (None: a full sync).
+
+    Returns {cursor, has_more, reset, decks, words, sessions, deleted}. Upserts
+    are {'fields': [...], 'rows': [[...], ...]}; deleted is {kind: [ids]}.
+    Raises ValueError for a bad token.
+    """
+    limit = limit or Config.SYNC_BATCH_SIZE
+    now = now or datetime.now(timezone.utc)
+    cursor = Cursor.decode(token) if token else None
+
+    reset = cursor is not None and cursor.synced < to_micros(now - timedelta(days=Config.SYNC_TOMBSTONE_RETENTION_DAYS))
+    if reset:
+        logger.info(f"Sync cursor for user {user_id} predates tombstone retention; sending a full sync")
+        cursor = None
+    upto = now - timedelta(seconds=Config.SYNC_SETTLE_SECONDS)
+    upto_at = from_micros(to_micros(upto))
+    # A full sync copies rows as of now, so only later deletions matter to it
+    synced = cursor.synced if cursor is not None else to_micros(upto)
+
+    changes = []  # ((micros, rank, id), source, row)
+    for rank, source in enumerate(SOURCES):
+        if cursor is None and source.key == 'deleted':
+            continue  # nothing to delete on a client syncing from scratch
+        model, stamp = source.model, getattr(source.model, source.stamp)
+        query = (
+            select(stamp, *(getattr(model, field) for field in source.fields))
+            .where(model.user_id == user_id, stamp <= upto_at)
+            .order_by(stamp, model.id)
+            .limit(limit + 1)
+        )
+        if cursor is not None:
+            query = query.where(_after(source, rank, cursor))
+        for row in db.session.execute(query):
+            changes.append(((to_micros(row[0]), rank, row.id), source, row[1:]))
+
+    changes.sort(key=lambda change: change[0])
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+
+    if has_more:
+        next_cursor = Cursor(*changes[-1][0], synced)
+    else:
+        next_cursor = Cursor(to_micros(upto), len(SOURCES), 0, to_micros(upto))
+        if cursor is not None and cursor[:3] > next_cursor[:3]:
+            next_cursor = cursor  # never move backwards (e.g. a shorter settle window)
+
+    result = {
+        'cursor': next_cursor.encode(),
+        'has_more': has_more,
+        'reset': reset,
+        'deleted': {key: [] for key in DELETED_KEYS.values()},
+    }
+    for source in SOURCES[:-1]:
+        result[source.key] = {'fields': list(source.fields), 'rows': []}
+    for _, source, row in changes:
+        if source.key == 'deleted':
+            _, entity, entity_id = row
+            result['deleted'][DELETED_KEYS[entity]].append(entity_id)
+        else:
+            result[source.key]['rows'].append([_compact(value) for value in row])
+    return result
+
+
+def purge_tombstones(now: datetime | None = None) -> int:
+    """Delete tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS. Returns the number deleted."""
+    now = now or datetime.now(timezone.utc)
+    return SyncTombstone.purge_before(now - timedelta(days=Config.SYNC_TOMBSTONE_RETENTION_DAYS))
+
+
+# ---- session hook ----
+
+_ENTITIES = {Deck: 'deck', Word: 'word', UserSession: 'session'}
+
+
+def _record_deletions(session, flush_context):
+    """Write a tombstone for each deck, word and session deleted in this flush."""
+    deleted_users = {obj.id for obj in session.deleted if isinstance(obj, User)}
+    now = datetime.now(timezone.utc)
+    rows = []
+    for obj in session.deleted:
+        entity = _ENTITIES.get(type(obj))
+        if entity is None:
+            continue
+        user_id = obj.user_id
+        if user_id is not None and user_id not in deleted_users:  # deleted accounts don't sync
+            rows.append({'user_id': user_id, 'entity': entity, 'entity_id': inspect(obj).identity[0],
+                         'deleted_ds': now})
+    if rows:
+        session.connection().execute(SyncTombstone.__table__.insert(), rows)
+
+
+_hooks_installed = False
+
+
+def install_hooks():
+    """Record tombstones for ORM deletes (idempotent)."""
+    global _hooks_installed
+    if not _hooks_installed:
+        event.listen(Session, 'after_flush', _record_deletions)
+        _hooks_installed = True
+
+
+def init_app(app):
+    install_hooks()
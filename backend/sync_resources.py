@@ -0,0 +1,30 @@
+"""Delta sync endpoint for offline clients."""
+from flask import request
+from flask_restful import Resource
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from config import Config
+from sync import changes_since
+
+
+class SyncResource(Resource):
+    @jwt_required()
+    def get(self):
+        """Decks, words and sessions changed since ?since=<cursor>, in pages of ?limit= changes.
+
+        Without `since` this is a full sync. Pass each response's `cursor` to
+        the next call; keep going while `has_more` is true. `reset: true`
+        means the cursor was too old and the response starts a full sync.
+        """
+        user_id = int(get_jwt_identity())
+        try:
+            limit = int(request.args.get('limit', Config.SYNC_BATCH_SIZE))
+        except ValueError:
+            limit = None
+        if limit is None or not 1 <= limit <= Config.SYNC_MAX_BATCH_SIZE:
+            return {'error': f'limit must be between 1 and {Config.SYNC_MAX_BATCH_SIZE}'}, 400
+
+        try:
+            return changes_since(user_id, request.args.get('since') or None, limit), 200
+        except ValueError as e:
+            return {'error': str(e)}, 400
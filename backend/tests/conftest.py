@@ -8,6 +8,8 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 from app import create_app
 from extensions import db as _db
 from config import TestConfig
+from due_queue import due_queue
+from tests.factories import add_user
 
 
 @pytest.fixture(scope='session')
@@ -25,9 +27,35 @@ def db(app):
         yield _db
         _db.session.rollback()
         _db.drop_all()
+        due_queue.clear()  # ids are reused by the next test's database
+
+
+@pytest.fixture(scope='function')
+def user(db):
+    """A user with no decks or words."""
+    return add_user()
 
 
 @pytest.fixture(scope='function')
 def client(app, db):
     """A Flask test client with a clean database."""
     return app.test_client()
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers', 'allow_sql_violations: the test deliberately breaks SQL budgets / repeats statements'
+    )
+
+
+@pytest.fixture(autouse=True)
+def sql_budget_guard(request):
+    """Fail any test whose requests tripped the N+1 detector or a SQL query budget."""
+    from query_inspector import recent_violations
+
+    recent_violations.clear()
+    yield
+    if recent_violations and not request.node.get_closest_marker('allow_sql_violations'):
+        found = '\n'.join(v.describe() for v in recent_violations)
+        recent_violations.clear()
+        pytest.fail(f"SQL budget violations:\n{found}")
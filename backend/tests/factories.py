@@ -0,0 +1,28 @@
+"""Builders for the users, decks and words tests set up directly in the database."""
+from datetime import date, timedelta
+
+from models import Deck, User, Word
+
+
+def add_user(username='learner'):
+    user = User(username=username, email=f'{username}@example.com', password='x')
+    user.add()
+    return user
+
+
+def add_deck(user, name='HSK1', **fields):
+    deck = Deck(name=name, user_id=user.id, **fields)
+    deck.add()
+    return deck
+
+
+def add_word(user, deck, *, due_in=None, today=None, **srs):
+    """A word in deck (or no deck), due due_in days after today, or new when due_in is None.
+
+    Other keyword arguments set Word columns (repetitions, interval_days, ease_factor, ...).
+    """
+    today = today or date.today()
+    word = Word(word='词', reading='ci', meaning='word', user_id=user.id, deck_id=deck.id if deck else None,
+                next_review_date=None if due_in is None else today + timedelta(days=due_in), **srs)
+    word.add()
+    return word
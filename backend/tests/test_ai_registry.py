@@ -0,0 +1,108 @@
+"""Tests for lazy AI-layer construction and the mem0 configuration CLI."""
+import os
+import subprocess
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from ai_layer.registry import Registry
+
+BACKEND_DIR = Path(__file__).resolve().parents[1]
+
+
+class TestRegistry:
+    def test_builds_once_on_first_get(self):
+        reg = Registry()
+        factory = MagicMock(return_value=object())
+        reg.register('thing', factory)
+        assert not reg.is_built('thing')
+        first = reg.get('thing')
+        assert reg.get('thing') is first
+        factory.assert_called_once()
+
+    def test_caches_none_results(self):
+        reg = Registry()
+        factory = MagicMock(return_value=None)
+        reg.register('optional', factory)
+        assert reg.get('optional') is None
+        assert reg.get('optional') is None
+        factory.assert_called_once()
+
+    def test_factories_can_depend_on_each_other(self):
+        reg = Registry()
+        reg.register('base', lambda: 2)
+        reg.register('derived', lambda: reg.get('base') * 10)
+        assert reg.get('derived') == 20
+
+    def test_reset_rebuilds(self):
+        reg = Registry()
+        reg.register('thing', object)
+        first = reg.get('thing')
+        reg.reset('thing')
+        assert reg.get('thing') is not first
+
+    def test_unknown_name_raises(self):
+        with pytest.raises(KeyError):
+            Registry().get('missing')
+
+
+class TestLazyImport:
+    def test_app_import_builds_nothing_and_skips_mem0(self):
+        """Importing the app needs no provider env vars, network, or mem0 SDK."""
+        env = {k: v for k, v in os.environ.items()
+               if not k.startswith(('DEEPSEEK_', 'GEMINI_', 'MEM0_', 'ANTHROPIC_'))}
+        env['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        env['MEMORY_OUTBOX_WORKER'] = 'false'
+        env['EMAIL_OUTBOX_WORKER'] = 'false'
+        env.pop('PYTHONPATH', None)
+        code = (
+            "import sys, app\n"
+            "from ai_layer.registry import registry\n"
+            "built = [n for n in ('provider_settings', 'zh_agents', 'mem0_client') if registry.is_built(n)]\n"
+            "print('mem0' in sys.modules, built)\n"
+        )
+        proc = subprocess.run([sys.executable, '-c', code], cwd=BACKEND_DIR, env=env,
+                              capture_output=True, text=True, timeout=120)
+        assert proc.returncode == 0, proc.stderr[-2000:]
+        assert proc.stdout.strip().splitlines()[-1] == 'False []'
+
+    def test_missing_env_vars_raise_on_first_use(self, monkeypatch):
+        from ai_layer import chat_agents  # noqa: F401 -- registers the factories
+        from ai_layer.registry import registry
+
+        monkeypatch.delenv('DEEPSEEK_API_KEY', raising=False)
+        registry.reset('provider_settings')
+        try:
+            with pytest.raises(ValueError):
+                registry.get('provider_settings')
+        finally:
+            registry.reset('provider_settings')
+
+    def test_default_agents_are_shared(self):
+        from ai_layer.chat_agents import build_agents
+
+        orchestrator, summary = build_agents()
+        again = build_agents()
+        assert again == (orchestrator, summary)
+        assert orchestrator.tools[0].name == 'evaluate_sentence'
+
+
+class TestConfigureMem0Command:
+    def test_pushes_instructions_and_categories(self, app):
+        client = MagicMock()
+        with patch('ai_layer.mem0_setup.get_mem0_client', return_value=client):
+            result = app.test_cli_runner().invoke(args=['laoshi', 'configure-mem0'])
+        assert result.exit_code == 0, result.output
+        kwargs = [c.kwargs for c in client.project.update.call_args_list]
+        assert 'custom_instructions' in kwargs[0]
+        assert 'custom_categories' in kwargs[1]
+
+    def test_reports_failure(self, app):
+        client = MagicMock()
+        client.project.update.side_effect = RuntimeError('invalid api key')
+        with patch('ai_layer.mem0_setup.get_mem0_client', return_value=client):
+            result = app.test_cli_runner().invoke(args=['laoshi', 'configure-mem0'])
+        assert result.exit_code != 0
+        assert 'invalid api key' in result.output
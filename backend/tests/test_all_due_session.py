@@ -0,0 +1,135 @@
+"""Tests for all-due practice sessions across decks."""
+import random
+from datetime import date, timedelta
+from unittest.mock import Mock, patch
+
+import pytest
+from sqlalchemy import event
+
+from ai_layer.practice_runner import hydrate_context, select_all_due_words
+from models import SessionWord, User, UserSession, Word
+from srs_engine import review_priority
+from tests.factories import add_deck, add_word
+
+TODAY = date.today()
+
+
+class TestReviewPriority:
+    def test_orders_by_overdue_ease_and_failure(self):
+        assert review_priority(3, 2.5, 4) > review_priority(1, 2.5, 4)
+        assert review_priority(1, 1.5, 4) > review_priority(1, 2.5, 4) > review_priority(1, 2.9, 4)
+        assert review_priority(1, 2.5, 1) > review_priority(5, 2.5, 4)
+        assert review_priority(0, None, None) == 0
+
+
+class TestSelectAllDueWords:
+    def test_ranks_across_decks_then_tops_up_with_new(self, db, user):
+        hsk1, hsk2 = add_deck(user, 'HSK1'), add_deck(user, 'HSK2')
+        overdue = add_word(user, hsk1, due_in=-6)
+        failed = add_word(user, hsk2, due_in=-1, last_quality=1)
+        hard = add_word(user, hsk2, due_in=-2, ease_factor=1.6)
+        add_word(user, hsk1, due_in=3)  # not due yet
+        add_word(user, None, due_in=-30)  # not in a deck
+        new = add_word(user, hsk2)
+        add_word(user, hsk1)
+
+        words, language = select_all_due_words(user.id, 4)
+        assert [w.id for w in words] == [failed.id, hard.id, overdue.id, new.id]
+        assert language == 'ZH'
+
+    def test_keeps_the_top_words_of_a_large_backlog(self, db, user):
+        deck = add_deck(user, 'HSK1')
+        rng = random.Random(1)
+        words = [Word(word='词', reading='ci', meaning='word', user_id=user.id, deck_id=deck.id,
+                      ease_factor=round(rng.uniform(1.3, 3.0), 2), last_quality=rng.randint(0, 5),
+                      next_review_date=TODAY - timedelta(days=rng.randint(0, 60)))
+                 for _ in range(2000)]
+        db.session.add_all(words)
+        db.session.commit()
+        expected = sorted(words, key=lambda w: (-review_priority((TODAY - w.next_review_date).days,
+                                                                 w.ease_factor, w.last_quality), w.id))
+        expected_ids = [w.id for w in expected[:25]]
+        user_id = user.id
+
+        statements = []
+        record = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            picked, _ = select_all_due_words(user_id, 25)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        assert [w.id for w in picked] == expected_ids
+        assert len(statements) == 2  # due words + the selected words
+
+    def test_session_takes_the_most_urgent_language(self, db, user):
+        zh, jp = add_deck(user, 'HSK1'), add_deck(user, 'N5', language='JP')
+        add_word(user, zh, due_in=-2)
+        urgent = add_word(user, jp, due_in=-9)
+        add_word(user, jp, due_in=-1)
+
+        words, language = select_all_due_words(user.id, 10)
+        assert language == 'JP' and words[0].id == urgent.id and len(words) == 2
+
+        words, language = select_all_due_words(user.id, 10, language='ZH')
+        assert language == 'ZH' and len(words) == 1
+
+    def test_new_words_only(self, db, user):
+        jp = add_deck(user, 'N5', language='JP')
+        first = add_word(user, jp)
+        add_word(user, add_deck(user, 'HSK1'))
+        words, language = select_all_due_words(user.id, 5)
+        assert [w.id for w in words] == [first.id] and language == 'JP'
+
+    def test_nothing_available(self, db, user):
+        add_word(user, add_deck(user, 'HSK1'), due_in=1)
+        assert select_all_due_words(user.id, 5) == ([], None)
+
+
+class TestMixedDeckContext:
+    def test_words_keep_their_deck_language(self, db, user):
+        zh, jp = add_deck(user, 'HSK1'), add_deck(user, 'N5', language='JP')
+        jp_word, zh_word = add_word(user, jp, due_in=-1), add_word(user, zh, due_in=-1)
+        session = UserSession(user_id=user.id, deck_id=None, words_per_session=2)
+        session.add()
+        for order, word in enumerate([jp_word, zh_word]):
+            SessionWord(word_id=word.id, session_id=session.id, word_order=order).add()
+
+        ctx = hydrate_context(user, session, SessionWord.get_list_by_session_id(session.id))
+        assert ctx.language == 'JP'
+        assert [w.language for w in ctx.word_roster] == ['JP', 'ZH']
+        assert ctx.current_word.language == 'JP'
+
+
+class TestAllDueSessionApi:
+    @pytest.fixture
+    def auth_headers(self, client):
+        client.post('/api/users', json={'username': 'dueuser', 'email': 'due@example.com', 'password': 'TestPass123'})
+        resp = client.post('/api/token', json={'username': 'dueuser', 'password': 'TestPass123'})
+        return {'Authorization': f"Bearer {resp.json['access_token']}"}
+
+    def test_session_across_decks(self, client, auth_headers):
+        user = User.get_by_username('dueuser')
+        Word.query.filter_by(user_id=user.id).delete()  # drop the sample deck's words
+        hsk1, hsk2 = add_deck(user, 'HSK1'), add_deck(user, 'HSK2')
+        add_word(user, hsk1, due_in=-2)
+        add_word(user, hsk2, due_in=-5)
+
+        with patch('ai_layer.practice_runner.run_async') as mock_run:
+            mock_run.return_value = Mock(final_output='Welcome!', raw_responses=[], new_items=[])
+            resp = client.post('/api/practice/sessions', json={'all_due': True}, headers=auth_headers)
+            assert resp.status_code == 201
+            session_id = resp.json['session']['id']
+            assert resp.json['session']['deck_id'] is None and resp.json['words_total'] == 2
+
+            resp = client.post(f'/api/practice/sessions/{session_id}/next-word', headers=auth_headers)
+            assert resp.status_code == 200
+            resp = client.post(f'/api/practice/sessions/{session_id}/next-word', headers=auth_headers)
+            assert resp.status_code == 200 and resp.json['session_complete'] is True
+
+    @pytest.mark.parametrize('body', [
+        {'all_due': True, 'deck_id': 1},
+        {'all_due': True, 'language': 'FR'},
+        {'all_due': 'yes'},
+    ])
+    def test_rejects_bad_requests(self, client, auth_headers, body):
+        assert client.post('/api/practice/sessions', json=body, headers=auth_headers).status_code == 400
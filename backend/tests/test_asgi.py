@@ -0,0 +1,158 @@
+"""Tests for the ASGI app and the async practice endpoints."""
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+
+import pytest
+from starlette.testclient import TestClient
+
+from asgi import create_asgi_app
+from models import User, Word, Deck, UserSession
+
+
+class TestAsyncPracticeEndpoints:
+    """The async handlers should behave like the Flask resources they shadow."""
+
+    @pytest.fixture
+    def asgi_client(self, app, db):
+        with TestClient(create_asgi_app(app, wsgi_threads=2)) as client:
+            yield client
+
+    @pytest.fixture
+    def auth_headers(self, asgi_client):
+        # Registration and login fall through to Flask
+        resp = asgi_client.post('/api/users', json={
+            'username': 'asyncuser', 'email': 'async@example.com', 'password': 'TestPass123'
+        })
+        assert resp.status_code == 201
+        resp = asgi_client.post('/api/token', json={'username': 'asyncuser', 'password': 'TestPass123'})
+        assert resp.status_code == 200
+        return {'Authorization': f"Bearer {resp.json()['access_token']}"}
+
+    @pytest.fixture
+    def deck(self, db, auth_headers):
+        user = User.query.filter_by(username='asyncuser').first()
+        deck = Deck(name='Async Deck', user_id=user.id, language='ZH')
+        deck.add()
+        for word, reading, meaning in [('你好', 'ni hao', 'hello'), ('谢谢', 'xie xie', 'thank you')]:
+            Word(user_id=user.id, deck_id=deck.id, word=word, reading=reading, meaning=meaning).add()
+        return deck
+
+    @pytest.fixture
+    def agent_run(self):
+        result = Mock(final_output="Welcome!", new_items=[])
+        with patch('ai_layer.practice_runner.run_with_retry', new=AsyncMock(return_value=result)) as run:
+            yield run, result
+
+    def test_requires_auth(self, asgi_client):
+        resp = asgi_client.post('/api/practice/sessions', json={'deck_id': 1})
+        assert resp.status_code == 401
+        assert 'Missing Authorization Header' in resp.json()['message']
+
+    def test_rejects_malformed_token(self, asgi_client):
+        resp = asgi_client.post('/api/practice/sessions', json={'deck_id': 1},
+                                headers={'Authorization': 'Bearer not-a-jwt'})
+        assert resp.status_code == 422
+
+    def test_validation_matches_flask(self, asgi_client, auth_headers):
+        resp = asgi_client.post('/api/practice/sessions', json={'deck_id': 'x'}, headers=auth_headers)
+        assert resp.status_code == 400
+        assert resp.json() == {'error': 'deck_id must be an integer'}
+
+    def test_session_flow(self, asgi_client, auth_headers, deck, agent_run):
+        run, result = agent_run
+        resp = asgi_client.post('/api/practice/sessions', json={'deck_id': deck.id}, headers=auth_headers)
+        assert resp.status_code == 201
+        data = resp.json()
+        assert data['greeting_message'] == "Welcome!"
+        session_id = data['session']['id']
+
+        result.final_output = "Good try!"
+        resp = asgi_client.post(f'/api/v1/practice/sessions/{session_id}/messages',
+                                json={'message': '你好世界'}, headers=auth_headers)
+        assert resp.status_code == 200
+        assert resp.json()['laoshi_response'] == "Good try!"
+        assert 'db;dur=' in resp.headers['server-timing']
+
+        result.final_output = '{"summaryText": "Well done"}'
+        resp = asgi_client.post(f'/api/practice/sessions/{session_id}/end', headers=auth_headers)
+        assert resp.status_code == 200
+        assert UserSession.get_by_id(session_id).session_end_ds is not None
+        assert run.await_count >= 3
+
+    def test_unknown_session_is_404(self, asgi_client, auth_headers, agent_run):
+        resp = asgi_client.post('/api/practice/sessions/9999/messages',
+                                json={'message': 'hi'}, headers=auth_headers)
+        assert resp.status_code == 404
+
+    def test_message_rate_limit_is_per_endpoint(self, asgi_client, auth_headers, agent_run):
+        from extensions import limiter
+        with patch.object(limiter, 'enabled', True), patch('async_resources.MESSAGE_RATE_LIMIT', '2 per minute'):
+            try:
+                statuses = [asgi_client.post(path, json={'message': 'hi'}, headers=auth_headers).status_code
+                            for path in ('/api/practice/sessions/9998/messages',
+                                         '/api/practice/sessions/9999/messages',
+                                         '/api/v1/practice/sessions/9997/messages')]
+            finally:
+                limiter.reset()
+        assert statuses == [404, 404, 429]
+
+    def test_other_routes_fall_through_to_flask(self, asgi_client, auth_headers):
+        resp = asgi_client.get('/api/practice/sessions/9999', headers=auth_headers)
+        assert resp.status_code == 404
+        assert resp.json() == {'error': 'Session not found'}
+
+    def test_cors_preflight(self, asgi_client):
+        resp = asgi_client.options('/api/practice/sessions', headers={
+            'Origin': 'http://localhost:5173', 'Access-Control-Request-Method': 'POST',
+        })
+        assert resp.status_code == 200
+        assert 'access-control-allow-origin' in resp.headers
+
+    def test_auth_errors_match_flask(self, app, db, asgi_client):
+        with TestClient(create_asgi_app(app, async_routes=False, wsgi_threads=2)) as flask_client:
+            for headers in ({}, {'Authorization': 'Bearer x'}, {'Authorization': 'Token x'}):
+                via_flask = flask_client.post('/api/practice/sessions', json={}, headers=headers)
+                via_async = asgi_client.post('/api/practice/sessions', json={}, headers=headers)
+                assert (via_async.status_code, via_async.json()) == (via_flask.status_code, via_flask.json())
+
+
+class TestAsyncDriver:
+    """Flows driven from the event loop await agent runs there and keep the sync contract."""
+
+    def test_agent_runs_overlap(self, app):
+        from ai_layer import practice_runner
+
+        active, peak = 0, 0
+
+        async def fake_run(agent, input, context, session=None):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.05)
+            active -= 1
+            return input.upper()
+
+        def flow(text):
+            reply = yield practice_runner.AgentCall(agent=None, input=text, context=None)
+            return reply, None
+
+        async def main():
+            return await asyncio.gather(*(practice_runner._drive_async(flow(f"m{i}")) for i in range(5)))
+
+        with patch('ai_layer.practice_runner.run_with_retry', new=fake_run):
+            results = asyncio.run(main())
+        assert results == [(f"M{i}", None) for i in range(5)]
+        assert peak == 5
+
+    def test_errors_are_thrown_into_the_flow(self):
+        from ai_layer import practice_runner
+
+        def flow():
+            try:
+                yield practice_runner.AgentCall(agent=None, input='x', context=None)
+            except ValueError as e:
+                return None, str(e)
+            return 'unreachable', None
+
+        with patch('ai_layer.practice_runner.run_with_retry', new=AsyncMock(side_effect=ValueError('boom'))):
+            assert asyncio.run(practice_runner._drive_async(flow())) == (None, 'boom')
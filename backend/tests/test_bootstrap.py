@@ -0,0 +1,73 @@
+"""Tests for the home screen bootstrap endpoint."""
+import pytest
+from sqlalchemy import event
+
+from models import Deck, User, Word
+
+
+@pytest.fixture
+def auth_headers(client):
+    client.post('/api/users', json={'username': 'bootuser', 'email': 'boot@example.com', 'password': 'TestPass123'})
+    resp = client.post('/api/token', json={'username': 'bootuser', 'password': 'TestPass123'})
+    return {'Authorization': f"Bearer {resp.json['access_token']}"}
+
+
+def count_statements(db, fn):
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        result = fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    return result, statements
+
+
+class TestBootstrap:
+    def test_matches_the_individual_endpoints(self, client, auth_headers):
+        client.put('/api/settings', json={'preferred_name': 'Boots', 'words_per_session': 12}, headers=auth_headers)
+
+        resp = client.get('/api/bootstrap', headers=auth_headers)
+        assert resp.status_code == 200
+        assert resp.json['me'] == client.get('/api/me', headers=auth_headers).json
+        assert resp.json['decks'] == client.get('/api/decks', headers=auth_headers).json['decks']
+        assert resp.json['stats'] == client.get('/api/progress/stats', headers=auth_headers).json
+        assert resp.json['streak'] == client.get('/api/progress/streak', headers=auth_headers).json
+        assert resp.json['settings'] == client.get('/api/settings', headers=auth_headers).json
+        assert resp.json['settings']['preferred_name'] == 'Boots'
+
+    def test_loads_the_user_once(self, client, auth_headers, db):
+        resp, statements = count_statements(db, lambda: client.get('/api/bootstrap', headers=auth_headers))
+        assert resp.status_code == 200
+        user_loads = [s for s in statements if 'FROM user ' in s.replace('"', '') or 'FROM user\n' in s]
+        assert len(user_loads) == 1
+        assert len(statements) <= 10
+
+    def test_field_selection(self, client, auth_headers):
+        resp = client.get('/api/bootstrap?fields=stats,streak', headers=auth_headers)
+        assert resp.status_code == 200 and set(resp.json) == {'stats', 'streak'}
+
+    @pytest.mark.parametrize('fields', ['stats,report_card', ',', 'me;decks'])
+    def test_rejects_unknown_fields(self, client, auth_headers, fields):
+        assert client.get(f'/api/bootstrap?fields={fields}', headers=auth_headers).status_code == 400
+
+    def test_etag_revalidation(self, client, auth_headers):
+        resp = client.get('/api/bootstrap', headers=auth_headers)
+        etag = resp.headers['ETag']
+        assert resp.headers['Cache-Control'] == 'private, no-cache'
+
+        resp = client.get('/api/bootstrap', headers={**auth_headers, 'If-None-Match': etag})
+        assert resp.status_code == 304 and resp.data == b''
+
+        user = User.get_by_username('bootuser')
+        deck = Deck(name='New deck', user_id=user.id)
+        deck.add()
+        Word(word='书', reading='shu', meaning='book', user_id=user.id, deck_id=deck.id).add()
+        resp = client.get('/api/bootstrap', headers={**auth_headers, 'If-None-Match': etag})
+        assert resp.status_code == 200 and resp.headers['ETag'] != etag
+
+    def test_requires_auth(self, client):
+        assert client.get('/api/bootstrap').status_code == 401
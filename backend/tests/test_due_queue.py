@@ -0,0 +1,197 @@
+"""Tests for the per-user due queue and its incremental maintenance."""
+import random
+from datetime import date, timedelta
+from unittest.mock import patch
+
+import fakeredis
+import pytest
+from sqlalchemy import event
+
+from ai_layer.practice_runner import select_srs_words
+from due_queue import DueQueue, due_queue
+from extensions import db as _db
+from models import Deck, Word
+from tests.factories import add_word
+
+TODAY = date.today()
+
+
+@pytest.fixture(params=['local', 'redis'])
+def queue(request, db):
+    """The queue the session hooks maintain: in-process, or on a fake Redis."""
+    if request.param == 'local':
+        yield due_queue
+        return
+    with patch.object(due_queue, 'redis_client', fakeredis.FakeRedis(server=fakeredis.FakeServer())):
+        yield due_queue
+
+
+def db_counts(user_id, deck_id=None):
+    """Ground truth from the word table."""
+    query = Word.query.filter(Word.user_id == user_id)
+    if deck_id is not None:
+        query = query.filter(Word.deck_id == deck_id)
+    return {'new': query.filter(Word.next_review_date.is_(None)).count(),
+            'due': query.filter(Word.next_review_date <= TODAY).count()}
+
+
+def db_session_ids(user_id, deck_id, words_count):
+    """select_srs_words' composition straight from SQL, minus the random new-word choice."""
+    from srs_engine import session_mix
+    base = Word.query.filter(Word.user_id == user_id, Word.deck_id == deck_id)
+    new = [w.id for w in base.filter(Word.next_review_date.is_(None))]
+    due = [w.id for w in base.filter(Word.next_review_date <= TODAY).order_by(Word.next_review_date, Word.id)]
+    later = [w.id for w in base.filter(Word.next_review_date > TODAY).order_by(Word.next_review_date, Word.id)]
+    take_new, take_due = session_mix(words_count, len(new), len(due))
+    return set(new), due[:take_due], later[:words_count - take_new - take_due]
+
+
+def assert_matches_db(queue, user_id, deck_ids):
+    assert queue.user_counts(user_id, TODAY) == db_counts(user_id)
+    assert queue.deck_counts(user_id, deck_ids, TODAY) == {d: db_counts(user_id, d) for d in deck_ids}
+    for deck_id in deck_ids:
+        for words_count in (1, 5, 12):
+            picked = queue.pick_session(user_id, deck_id, TODAY, words_count, random.Random(0))
+            new, due, later = db_session_ids(user_id, deck_id, words_count)
+            n_new = len(picked) - len(due) - len(later)
+            assert set(picked[:n_new]) <= new
+            assert picked[n_new:] == due + later
+
+
+class TestMaintenance:
+    def test_tracks_every_orm_change(self, queue, user):
+        hsk1, hsk2 = Deck(name='HSK1', user_id=user.id), Deck(name='HSK2', user_id=user.id)
+        hsk1.add()
+        hsk2.add()
+        words = [add_word(user, hsk1, due_in=due_in) for due_in in (None, None, None, -3, -3, 0, 2, 5)]
+        words += [add_word(user, hsk2, due_in=due_in) for due_in in (None, -1, 4)]
+        add_word(user, None, due_in=-2)
+        assert_matches_db(queue, user.id, [hsk1.id, hsk2.id])
+
+        words[0].update_srs(4)                              # practice rating
+        words[0].update()
+        words[3].next_review_date += timedelta(days=1)      # skip path
+        words[3].update()
+        words[4].mark_as_mastered()
+        words[4].update()
+        words[6].next_review_date = None                    # re-rate restores a snapshot
+        words[6].update()
+        words[8].deck_id = hsk1.id                          # moved between decks
+        words[8].update()
+        words[7].delete()
+        add_word(user, hsk2, due_in=-5)
+        assert_matches_db(queue, user.id, [hsk1.id, hsk2.id])
+
+        hsk2.delete()
+        assert_matches_db(queue, user.id, [hsk1.id, hsk2.id])
+
+    def test_rollback_discards_changes(self, queue, user):
+        deck = Deck(name='HSK1', user_id=user.id)
+        deck.add()
+        word = add_word(user, deck)
+        assert queue.user_counts(user.id, TODAY) == {'new': 1, 'due': 0}
+
+        word.next_review_date = TODAY
+        _db.session.flush()
+        _db.session.rollback()
+        assert queue.user_counts(user.id, TODAY) == {'new': 1, 'due': 0}
+
+    def test_bulk_reschedule_invalidates(self, queue, user):
+        deck = Deck(name='HSK1', user_id=user.id)
+        deck.add()
+        for _ in range(3):
+            add_word(user, deck)
+        assert queue.user_counts(user.id, TODAY)['new'] == 3
+        Word.reschedule_deck(deck.id, user.id, 4, today=TODAY - timedelta(days=1))
+        assert_matches_db(queue, user.id, [deck.id])
+
+    def test_sample_deck_seeding_invalidates(self, queue, user):
+        from sample_deck_service import seed_sample_deck_for_user
+        assert queue.user_counts(user.id, TODAY) == {'new': 0, 'due': 0}
+        deck = seed_sample_deck_for_user(user.id)
+        assert queue.user_counts(user.id, TODAY)['new'] == Word.query.filter_by(deck_id=deck.id).count() > 0
+
+    def test_account_deletion_drops_queue(self, queue, user):
+        add_word(user, None)
+        user_id = user.id
+        assert queue.user_counts(user_id, TODAY)['new'] == 1
+        _db.session.delete(user)
+        _db.session.commit()
+        assert queue.user_counts(user_id, TODAY) == {'new': 0, 'due': 0}
+
+    def test_bulk_delete_invalidates(self, queue, user):
+        add_word(user, None)
+        assert queue.user_counts(user.id, TODAY)['new'] == 1
+        Word.delete_all(user)
+        assert queue.user_counts(user.id, TODAY) == {'new': 0, 'due': 0}
+
+
+class TestLookups:
+    def test_session_start_loads_only_selected_words(self, db, user):
+        deck = Deck(name='HSK1', user_id=user.id)
+        deck.add()
+        for due_in in [None] * 30 + list(range(-10, 10)):
+            add_word(user, deck, due_in=due_in)
+        user_id, deck_id = user.id, deck.id
+        due_queue.user_counts(user_id, TODAY)  # build
+
+        statements = []
+        record = lambda conn, cursor, statement, *args: statements.append(statement)
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            words = select_srs_words(deck_id, user_id, 10)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        assert len(words) == 10 and len(statements) == 1
+        assert sum(w.next_review_date is None for w in words) == 4
+
+    def test_rebuild_racing_a_change_answers_from_snapshot(self, db, user):
+        deck = Deck(name='HSK1', user_id=user.id)
+        deck.add()
+        add_word(user, deck, due_in=0)
+        queue = DueQueue(redis_client=fakeredis.FakeRedis(server=fakeredis.FakeServer()))
+        original = DueQueue.load_entries
+
+        def load_then_race(user_id):
+            entries = original(user_id)
+            queue.apply({user_id: [(999, None, deck.id, 0)]})  # a commit lands mid-rebuild
+            return entries
+
+        with patch.object(DueQueue, 'load_entries', staticmethod(load_then_race)):
+            assert queue.user_counts(user.id, TODAY) == {'new': 0, 'due': 1}
+        assert queue.user_counts(user.id, TODAY) == {'new': 0, 'due': 1}  # rebuilt this time
+        assert queue.stats()['rebuilds'] == 2
+
+
+class TestRedisOutage:
+    def test_falls_back_and_repairs_after_recovery(self, db, user):
+        deck = Deck(name='HSK1', user_id=user.id)
+        deck.add()
+        word = add_word(user, deck)
+        server = fakeredis.FakeServer()
+        queue = due_queue
+        with patch.object(queue, 'redis_client', fakeredis.FakeRedis(server=server)):
+            assert queue.user_counts(user.id, TODAY) == {'new': 1, 'due': 0}
+
+            server.connected = False
+            word.next_review_date = TODAY
+            word.update()  # missed by Redis
+            assert queue.user_counts(user.id, TODAY) == {'new': 0, 'due': 1}  # in-process answer
+            assert queue.stats()['dirty_users'] == 1
+
+            server.connected = True
+            assert queue.user_counts(user.id, TODAY) == {'new': 0, 'due': 1}  # Redis copy rebuilt
+            assert queue.stats()['dirty_users'] == 0
+
+
+class TestRebuildCommand:
+    def test_rebuilds_from_database(self, app, db, user):
+        add_word(user, None, due_in=-1)
+        due_queue.user_counts(user.id, TODAY)
+        Word.query.update({Word.next_review_date: None})  # written behind the queue's back
+        _db.session.commit()
+
+        result = app.test_cli_runner().invoke(args=['laoshi', 'rebuild-due-queue'])
+        assert result.exit_code == 0, result.output
+        assert 'Rebuilt the due queue for 1 user(s).' in result.output
+        assert due_queue.user_counts(user.id, TODAY) == {'new': 1, 'due': 0}
@@ -0,0 +1,225 @@
+"""Tests for the email outbox: enqueue-only requests and batched background delivery."""
+import json
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import httpx
+import pytest
+
+from email_service import (
+    EmailSender,
+    LocalEmailBackend,
+    SendGridBackend,
+    purge_email_outbox,
+    send_password_reset_email,
+    send_welcome_email,
+    set_email_sender,
+)
+from models import EmailOutbox, User
+
+
+class FakeSendGrid:
+    """HTTP stand-in for SendGrid's v3 mail/send endpoint, served through httpx.MockTransport."""
+
+    def __init__(self):
+        self.requests = []
+        self.status_codes = []  # consumed one per request; 202 once empty
+        self.reject = set()  # recipients that make a request fail with 400
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        assert request.url.path == '/v3/mail/send'
+        assert request.headers['Authorization'] == 'Bearer fake-key'
+        payload = json.loads(request.content)
+        self.requests.append(payload)
+        if self.status_codes:
+            return httpx.Response(self.status_codes.pop(0), text='provider error')
+        recipients = {p['to'][0]['email'] for p in payload['personalizations']}
+        if recipients & self.reject:
+            return httpx.Response(400, json={'errors': [{'message': 'Invalid email'}]})
+        return httpx.Response(202)
+
+
+@pytest.fixture
+def sendgrid():
+    return FakeSendGrid()
+
+
+@pytest.fixture
+def sender(sendgrid):
+    backend = SendGridBackend('fake-key', 'from@example.com', base_url='http://sendgrid.test',
+                              transport=httpx.MockTransport(sendgrid))
+    svc = EmailSender(backend, max_attempts=3, backoff_base=0)
+    set_email_sender(svc)
+    yield svc
+    set_email_sender(None)
+
+
+def enqueue(to_email, template_id='tmpl-welcome', data=None):
+    return EmailOutbox.enqueue(to_email, template_id, data or {'first_name': to_email.split('@')[0]})
+
+
+def make_due(rows):
+    past = datetime.now(timezone.utc) - timedelta(seconds=1)
+    for row in rows:
+        row.next_attempt_ds = past
+    EmailOutbox.query.session.commit()
+
+
+class TestDelivery:
+    def test_rows_sharing_a_template_go_out_in_one_request(self, db, sender, sendgrid):
+        for n in range(3):
+            enqueue(f'user{n}@example.com')
+        enqueue('reset@example.com', template_id='tmpl-reset', data={'password_reset_link': 'https://x/reset'})
+
+        assert sender.flush_outbox() == {'sent': 4, 'retried': 0, 'failed': 0}
+        assert len(sendgrid.requests) == 2
+        welcome = next(r for r in sendgrid.requests if r['template_id'] == 'tmpl-welcome')
+        assert welcome['from'] == {'email': 'from@example.com'}
+        assert [p['to'][0]['email'] for p in welcome['personalizations']] == [
+            'user0@example.com', 'user1@example.com', 'user2@example.com']
+        assert welcome['personalizations'][0]['dynamic_template_data'] == {'first_name': 'user0'}
+
+        rows = EmailOutbox.query.all()
+        assert all(r.status == EmailOutbox.STATUS_SENT and r.sent_ds for r in rows)
+        assert all(r.template_data is None for r in rows)  # reset links don't linger
+        assert sender.stats() == {'sent': 4, 'failed': 0}
+
+    def test_respects_batch_size(self, db, sender, sendgrid):
+        for n in range(5):
+            enqueue(f'user{n}@example.com')
+        assert sender.flush_outbox(batch_size=2)['sent'] == 2
+        assert EmailOutbox.count_pending() == 3
+
+    def test_provider_error_is_retried_with_backoff(self, db, sendgrid):
+        backend = SendGridBackend('fake-key', 'from@example.com', base_url='http://sendgrid.test',
+                                  transport=httpx.MockTransport(sendgrid))
+        sender = EmailSender(backend, max_attempts=3, backoff_base=10)
+        enqueue('user@example.com')
+        sendgrid.status_codes = [503]
+
+        assert sender.flush_outbox() == {'sent': 0, 'retried': 1, 'failed': 0}
+        row = EmailOutbox.query.one()
+        assert row.status == EmailOutbox.STATUS_PENDING
+        assert row.attempts == 1
+        assert 'SendGrid returned 503' in row.last_error
+        assert sender.flush_outbox()['sent'] == 0  # not due yet
+
+        make_due([row])
+        assert sender.flush_outbox()['sent'] == 1
+        assert EmailOutbox.query.one().status == EmailOutbox.STATUS_SENT
+
+    def test_gives_up_after_max_attempts(self, db, sender, sendgrid):
+        row = enqueue('user@example.com')
+        sendgrid.status_codes = [500, 500, 500]
+        for _ in range(3):
+            sender.flush_outbox()
+            make_due([row])
+        row = EmailOutbox.query.one()
+        assert row.status == EmailOutbox.STATUS_FAILED
+        assert row.attempts == 3
+        assert row.template_data is None
+        assert sender.stats()['failed'] == 1
+
+    def test_rejected_batch_is_split_to_isolate_bad_recipient(self, db, sender, sendgrid):
+        for to_email in ('good1@example.com', 'bad@example', 'good2@example.com'):
+            enqueue(to_email)
+        sendgrid.reject = {'bad@example'}
+
+        assert sender.flush_outbox() == {'sent': 2, 'retried': 0, 'failed': 1}
+        assert len(sendgrid.requests) == 4  # the batch, then one per row
+        statuses = {r.to_email: r.status for r in EmailOutbox.query.all()}
+        assert statuses == {'good1@example.com': 'sent', 'bad@example': 'failed', 'good2@example.com': 'sent'}
+
+    def test_connection_errors_are_retried(self, db):
+        def refuse(request):
+            raise httpx.ConnectError('connection refused')
+
+        backend = SendGridBackend('fake-key', 'from@example.com', transport=httpx.MockTransport(refuse))
+        sender = EmailSender(backend, backoff_base=0)
+        enqueue('user@example.com')
+        assert sender.flush_outbox()['retried'] == 1
+        assert 'ConnectError' in EmailOutbox.query.one().last_error
+
+    def test_sends_outside_the_claiming_transaction(self, db, sender):
+        seen = {}
+
+        class InspectingBackend:
+            def send(self, template_id, messages):
+                seen['in_transaction'] = db.session().in_transaction()
+                seen['concurrent_flush'] = sender.flush_outbox()  # e.g. another worker
+
+        sender.backend = InspectingBackend()
+        enqueue('user@example.com')
+        assert sender.flush_outbox()['sent'] == 1
+        assert seen == {'in_transaction': False, 'concurrent_flush': {'sent': 0, 'retried': 0, 'failed': 0}}
+
+    def test_claim_expires_if_the_worker_dies(self, db, sender, sendgrid):
+        row = enqueue('user@example.com')
+        with patch.object(sender, '_deliver', side_effect=SystemExit):
+            with pytest.raises(SystemExit):
+                sender.flush_outbox()
+        assert sender.flush_outbox()['sent'] == 0  # still claimed
+        make_due([db.session.get(EmailOutbox, row.id)])
+        assert sender.flush_outbox()['sent'] == 1
+
+    def test_purges_finished_rows_after_retention(self, app, db, sender, sendgrid):
+        for to_email in ('old@example.com', 'new@example.com', 'pending@example.com'):
+            enqueue(to_email)
+        sendgrid.reject = {'pending@example.com'}
+        sender.flush_outbox()
+        old = EmailOutbox.query.filter_by(to_email='old@example.com').one()
+        old.created_ds = datetime.now(timezone.utc) - timedelta(days=app.config['EMAIL_OUTBOX_RETENTION_DAYS'] + 1)
+        pending = EmailOutbox.query.filter_by(to_email='pending@example.com').one()
+        pending.status, pending.created_ds = EmailOutbox.STATUS_PENDING, old.created_ds
+        db.session.commit()
+
+        result = app.test_cli_runner().invoke(args=['laoshi', 'purge-email-outbox'])
+        assert result.exit_code == 0, result.output
+        assert 'Purged 1 finished email(s).' in result.output
+        assert sorted(r.to_email for r in EmailOutbox.query) == ['new@example.com', 'pending@example.com']
+        assert purge_email_outbox() == 0
+
+    def test_local_backend_records_messages(self, db):
+        backend = LocalEmailBackend()
+        sender = EmailSender(backend)
+        enqueue('user@example.com')
+        assert sender.flush_outbox()['sent'] == 1
+        assert list(backend.sent) == [
+            {'to': 'user@example.com', 'template_id': 'tmpl-welcome', 'data': {'first_name': 'user'}}]
+
+
+class TestRequestsOnlyEnqueue:
+    @patch('email_service.ONBOARDING_EMAIL_TEMPLATE', 'tmpl-welcome')
+    def test_registration_queues_welcome_email(self, client, sendgrid, sender):
+        resp = client.post('/api/users', json={
+            'username': 'outboxuser', 'email': 'outbox@example.com', 'password': 'TestPassword1',
+        })
+        assert resp.status_code == 201
+        assert sendgrid.requests == []  # nothing sent inside the request
+
+        row = EmailOutbox.query.one()
+        assert row.user_id == resp.json['created_data']['id']
+        assert row.template_data == {'first_name': 'outboxuser', 'username': 'outboxuser'}
+
+        assert sender.flush_outbox()['sent'] == 1
+        assert sendgrid.requests[0]['personalizations'][0]['to'] == [{'email': 'outbox@example.com'}]
+
+    @patch('email_service.PASSWORD_RESET_EMAIL_TEMPLATE', 'tmpl-reset')
+    def test_password_reset_queues_email(self, client, db):
+        User(username='resetq', email='resetq@example.com', password='x').add()
+        resp = client.post('/api/password-reset/request', json={'email': 'resetq@example.com'})
+        assert resp.status_code == 200
+        row = EmailOutbox.query.one()
+        assert row.template_id == 'tmpl-reset'
+        assert '/reset-password?token=' in row.template_data['password_reset_link']
+
+    @patch('email_service.ONBOARDING_EMAIL_TEMPLATE', 'tmpl-welcome')
+    @patch('email_service.PASSWORD_RESET_EMAIL_TEMPLATE', 'tmpl-reset')
+    def test_pending_emails_are_deleted_with_the_user(self, db):
+        user = User(username='gone', email='gone@example.com', password='x')
+        user.add()
+        send_welcome_email(user.email, 'gone', 'gone', user_id=user.id)
+        send_password_reset_email(user.email, 'gone', 'tok', user_id=user.id)
+        db.session.delete(user)
+        db.session.commit()
+        assert EmailOutbox.query.count() == 0
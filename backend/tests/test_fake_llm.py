@@ -0,0 +1,121 @@
+"""Tests for the fake OpenAI-compatible LLM server used in load tests."""
+import asyncio
+import json
+import random
+
+import httpx
+import pytest
+from agents import Agent, OpenAIChatCompletionsModel, RunConfig, Runner
+from openai import AsyncOpenAI, RateLimitError
+
+from ai_layer.chat_agents import build_evaluate_sentence_tool, build_feedback_prompt, build_orchestrator_prompt
+from ai_layer.context import UserSessionContext, WordContext
+from ai_layer.practice_runner import _parse_json_from_string, validate_feedback
+from benchmarks.fake_llm import Behaviour, create_app, parse_latency
+
+RUN_CONFIG = RunConfig(tracing_disabled=True)
+
+
+def make_context():
+    current = WordContext(word_id=1, word='进度', reading='jin du', meaning='progress', language='ZH')
+    return UserSessionContext(
+        user_id=1, session_id=10, preferred_name='Tester', current_word=current,
+        session_word_dict={1: 0}, words_practiced=0, words_skipped=0, words_total=1,
+        session_complete=False, mem0_preferences=None, word_roster=[current], language='ZH',
+    )
+
+
+@pytest.fixture
+def fake_server():
+    return create_app(Behaviour(latency='fixed:0', tokens_per_s=0), seed=1)
+
+
+def make_agents(server):
+    client = AsyncOpenAI(base_url='http://fake-llm/v1', api_key='fake', max_retries=0,
+                         http_client=httpx.AsyncClient(transport=httpx.ASGITransport(app=server)))
+    model = OpenAIChatCompletionsModel(model='fake', openai_client=client)
+    feedback_agent = Agent[UserSessionContext](name='feedback_agent', instructions=build_feedback_prompt, model=model)
+    orchestrator = Agent[UserSessionContext](
+        name='laoshi_orchestrator', instructions=build_orchestrator_prompt, model=model,
+        tools=[build_evaluate_sentence_tool(feedback_agent, 'Mandarin')],
+    )
+    return orchestrator, feedback_agent
+
+
+class TestLatency:
+    def test_specs(self):
+        rng = random.Random(0)
+        assert parse_latency('fixed:250')(rng) == 0.25
+        assert 0.1 <= parse_latency('uniform:100:200')(rng) <= 0.2
+        assert parse_latency('normal:100:1000')(rng) >= 0  # clamped
+        assert parse_latency('lognormal:800:0.5')(rng) > 0
+
+    @pytest.mark.parametrize('spec', ['fixed', 'gamma:1:2', 'uniform:abc:1'])
+    def test_invalid_specs(self, spec):
+        with pytest.raises(ValueError):
+            parse_latency(spec)
+
+
+class TestPracticeFlow:
+    def test_sentence_goes_through_evaluate_sentence_tool(self, fake_server):
+        orchestrator, _ = make_agents(fake_server)
+        result = asyncio.run(Runner.run(orchestrator, '我们今天讨论了项目的进度。', context=make_context(),
+                                        run_config=RUN_CONFIG))
+
+        tool_outputs = [item.output for item in result.new_items if item.type == 'tool_call_output_item']
+        assert len(tool_outputs) == 1
+        feedback = validate_feedback(_parse_json_from_string(tool_outputs[0]))
+        assert feedback is not None
+        assert '进度' in feedback['exampleSentences'][0]
+        assert result.final_output.startswith('很好')
+
+        stats = fake_server.state.fake.stats
+        assert (stats['tool_call'], stats['feedback'], stats['reply']) == (1, 1, 1)
+
+    def test_instructions_get_a_reply(self, fake_server):
+        orchestrator, _ = make_agents(fake_server)
+        result = asyncio.run(Runner.run(orchestrator, 'Start the session. Greet the student and introduce the first word.',
+                                        context=make_context(), run_config=RUN_CONFIG))
+        assert result.final_output
+        assert fake_server.state.fake.stats['tool_call'] == 0
+
+    def test_streamed_run(self, fake_server):
+        orchestrator, _ = make_agents(fake_server)
+
+        async def run():
+            result = Runner.run_streamed(orchestrator, '这个进度太慢了。', context=make_context(), run_config=RUN_CONFIG)
+            deltas = [event async for event in result.stream_events() if event.type == 'raw_response_event']
+            return result, deltas
+
+        result, deltas = asyncio.run(run())
+        assert len(deltas) > 3
+        assert result.final_output.startswith('很好')
+        assert fake_server.state.fake.stats['feedback'] == 1
+
+
+class TestFailureInjection:
+    def test_rate_limit(self, fake_server):
+        fake_server.state.fake.behaviour.rate_limit_rate = 1.0
+        orchestrator, _ = make_agents(fake_server)
+        with pytest.raises(RateLimitError):
+            asyncio.run(Runner.run(orchestrator, 'hi', context=make_context(), run_config=RUN_CONFIG))
+        assert fake_server.state.fake.stats['injected_429'] == 1
+
+    def test_rpm_cap_and_runtime_config(self, fake_server):
+        async def call(client):
+            return await client.post('/v1/chat/completions', json={'model': 'fake', 'messages': [
+                {'role': 'system', 'content': 'Write a report card.'}, {'role': 'user', 'content': 'go'}]})
+
+        async def run():
+            transport = httpx.ASGITransport(app=fake_server)
+            async with httpx.AsyncClient(transport=transport, base_url='http://fake-llm') as client:
+                resp = await client.post('/_config', json={'rpm': 2, 'reset_stats': True})
+                assert resp.json()['rpm'] == 2
+                assert (await client.post('/_config', json={'nope': 1})).status_code == 400
+                statuses = [(await call(client)).status_code for _ in range(3)]
+                await client.post('/_config', json={'rpm': 0})
+                return statuses, await call(client)
+
+        statuses, ok = asyncio.run(run())
+        assert statuses == [200, 200, 429]
+        assert json.loads(ok.json()['choices'][0]['message']['content'])['feedback']
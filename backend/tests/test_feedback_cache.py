@@ -0,0 +1,180 @@
+"""Tests for the evaluate_sentence feedback cache."""
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, Mock, patch
+
+import pytest
+
+from ai_layer.feedback_cache import FeedbackCache, make_cache_key, normalize_sentence
+from ai_layer.context import UserSessionContext, WordContext
+
+
+VALID_FEEDBACK = {
+    'grammarScore': 9,
+    'usageScore': 8,
+    'naturalnessScore': 7,
+    'isCorrect': False,
+    'feedback': '很好',
+}
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeRedis:
+    """Minimal dict-backed stand-in for the redis client methods the cache uses."""
+
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def setex(self, key, ttl, value):
+        self.store[key] = value
+
+
+def make_context(word='你好', reading='ni hao', language='ZH'):
+    current = WordContext(word_id=1, word=word, reading=reading, meaning='hello', language=language)
+    return UserSessionContext(
+        user_id=1, session_id=10, preferred_name='Tester', current_word=current,
+        session_word_dict={1: 0}, words_practiced=0, words_skipped=0, words_total=1,
+        session_complete=False, mem0_preferences=None, word_roster=[current], language=language,
+    )
+
+
+class TestCacheKey:
+    def test_whitespace_variants_share_key(self):
+        a = make_cache_key('ZH', '你好', 'ni hao', '你好 ， 老师', 'deepseek-chat')
+        b = make_cache_key('ZH', '你好', 'ni hao', '  你好\t，\n老师  ', 'deepseek-chat')
+        assert a == b
+
+    def test_fullwidth_normalized(self):
+        assert normalize_sentence('ＡＢＣ　１２３') == 'ABC 123'
+
+    def test_model_is_part_of_key(self):
+        a = make_cache_key('ZH', '你好', 'ni hao', '你好', 'deepseek-chat')
+        b = make_cache_key('ZH', '你好', 'ni hao', '你好', 'claude')
+        assert a != b
+
+    def test_word_is_part_of_key(self):
+        a = make_cache_key('ZH', '你好', 'ni hao', '你好', 'm')
+        b = make_cache_key('ZH', '再见', 'zai jian', '你好', 'm')
+        assert a != b
+
+
+class TestFeedbackCache:
+    def test_miss_then_hit(self):
+        cache = FeedbackCache(max_entries=10, ttl_seconds=60)
+        assert cache.get('k') is None
+        cache.set('k', VALID_FEEDBACK)
+        assert cache.get('k') == VALID_FEEDBACK
+        stats = cache.stats()
+        assert stats['hits'] == 1
+        assert stats['misses'] == 1
+        assert stats['hit_rate'] == 0.5
+
+    def test_lru_eviction(self):
+        cache = FeedbackCache(max_entries=2, ttl_seconds=60)
+        cache.set('a', VALID_FEEDBACK)
+        cache.set('b', VALID_FEEDBACK)
+        cache.get('a')  # a is now most recently used
+        cache.set('c', VALID_FEEDBACK)
+        assert cache.get('b') is None
+        assert cache.get('a') is not None
+        assert cache.get('c') is not None
+        assert cache.stats()['evictions'] == 1
+
+    def test_ttl_expiry(self):
+        clock = FakeClock()
+        cache = FeedbackCache(max_entries=10, ttl_seconds=60, clock=clock)
+        cache.set('k', VALID_FEEDBACK)
+        clock.now += 61
+        assert cache.get('k') is None
+        assert cache.stats()['size'] == 0
+
+    def test_returned_value_is_a_copy(self):
+        cache = FeedbackCache(max_entries=10, ttl_seconds=60)
+        cache.set('k', VALID_FEEDBACK)
+        cache.get('k')['grammarScore'] = 1
+        assert cache.get('k')['grammarScore'] == 9
+
+    def test_redis_tier_shared_between_instances(self):
+        redis = FakeRedis()
+        writer = FeedbackCache(max_entries=10, ttl_seconds=60, redis_client=redis)
+        reader = FeedbackCache(max_entries=10, ttl_seconds=60, redis_client=redis)
+        writer.set('k', VALID_FEEDBACK)
+        assert reader.get('k') == VALID_FEEDBACK
+        assert reader.stats()['redis_hits'] == 1
+        # Promoted into the local tier
+        assert reader.get('k') == VALID_FEEDBACK
+        assert reader.stats()['hits'] == 1
+
+    def test_redis_errors_are_swallowed(self):
+        redis = MagicMock()
+        redis.get.side_effect = ConnectionError('down')
+        redis.setex.side_effect = ConnectionError('down')
+        cache = FeedbackCache(max_entries=10, ttl_seconds=60, redis_client=redis)
+        cache.set('k', VALID_FEEDBACK)
+        assert cache.get('other') is None
+
+
+class TestEvaluateSentenceCached:
+    @pytest.fixture(autouse=True)
+    def fresh_cache(self):
+        from ai_layer.feedback_cache import feedback_cache
+        feedback_cache.clear()
+        yield
+        feedback_cache.clear()
+
+    def _agent(self):
+        agent = Mock()
+        agent.model = Mock()
+        agent.model.model = 'deepseek-chat'
+        return agent
+
+    def test_second_identical_sentence_skips_llm(self):
+        from ai_layer.chat_agents import evaluate_sentence_cached
+
+        result = Mock()
+        result.final_output = json.dumps(VALID_FEEDBACK, ensure_ascii=False)
+        agent = self._agent()
+        ctx = make_context()
+
+        with patch('ai_layer.chat_agents.Runner.run', new=AsyncMock(return_value=result)) as mock_run:
+            first = asyncio.run(evaluate_sentence_cached(agent, ctx, '我说你好。'))
+            second = asyncio.run(evaluate_sentence_cached(agent, ctx, '  我说你好。 '))
+
+        assert mock_run.await_count == 1
+        assert json.loads(first) == VALID_FEEDBACK
+        assert json.loads(second) == VALID_FEEDBACK
+
+    def test_invalid_feedback_is_not_cached(self):
+        from ai_layer.chat_agents import evaluate_sentence_cached
+
+        result = Mock()
+        result.final_output = 'not json'
+        agent = self._agent()
+        ctx = make_context()
+
+        with patch('ai_layer.chat_agents.Runner.run', new=AsyncMock(return_value=result)) as mock_run:
+            asyncio.run(evaluate_sentence_cached(agent, ctx, '我说你好。'))
+            asyncio.run(evaluate_sentence_cached(agent, ctx, '我说你好。'))
+
+        assert mock_run.await_count == 2
+
+    def test_cached_output_extracted_by_handle_message_path(self):
+        """Cached tool output must round-trip through extract_feedback_from_result."""
+        from agents.items import ToolCallOutputItem
+        from ai_layer.practice_runner import extract_feedback_from_result
+
+        item = Mock(spec=ToolCallOutputItem)
+        item.output = json.dumps(VALID_FEEDBACK, ensure_ascii=False)
+        result = Mock()
+        result.new_items = [item]
+        assert extract_feedback_from_result(result) == VALID_FEEDBACK
@@ -0,0 +1,147 @@
+"""Tests for the review-load forecast and its projected simulation."""
+from datetime import date
+from functools import partial
+
+import numpy as np
+import pytest
+from sqlalchemy import event
+
+from forecast import due_forecast, projection_cache
+from models import User, Word
+from srs_engine import project, review_scalar
+from tests import factories
+from tests.factories import add_deck, add_user
+
+TODAY = date(2026, 3, 10)
+
+
+add_word = partial(factories.add_word, today=TODAY, repetitions=3, interval_days=7)
+
+
+@pytest.fixture(autouse=True)
+def clear_projection_cache():
+    projection_cache.clear()
+
+
+def count_statements(db, fn):
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', record)
+    try:
+        result = fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', record)
+    return result, statements
+
+
+class TestDueForecast:
+    def test_counts_per_day_and_deck(self, db, user):
+        hsk1, hsk2 = add_deck(user, 'HSK1'), add_deck(user, 'HSK2')
+        add_word(user, hsk1, due_in=-4)    # overdue -> today
+        add_word(user, hsk1, due_in=None)  # never scheduled -> today
+        add_word(user, hsk1, due_in=2)
+        add_word(user, hsk2, due_in=2)
+        add_word(user, hsk2, due_in=6)
+        add_word(user, None, due_in=1)
+        add_word(user, hsk2, due_in=7)     # outside a 7-day window
+
+        user_id = user.id
+        result, statements = count_statements(db, lambda: due_forecast(user_id, TODAY, days=7))
+        assert len(statements) == 1
+
+        assert result['total'] == 6
+        assert [d['due'] for d in result['by_day']] == [2, 1, 2, 0, 0, 0, 1]
+        assert result['by_day'][6]['date'] == '2026-03-16'
+        decks = {d['deck_name']: d for d in result['by_deck']}
+        assert decks['HSK1']['by_day'] == [2, 0, 1, 0, 0, 0, 0]
+        assert decks['HSK2']['total'] == 2
+        assert decks[None]['deck_id'] is None and decks[None]['by_day'][1] == 1
+
+    def test_other_users_words_are_excluded(self, db, user):
+        other = add_user('other')
+        add_word(other, add_deck(other, 'Theirs'), due_in=0)
+        assert due_forecast(user.id, TODAY, days=3)['total'] == 0
+
+
+class TestProjectedForecast:
+    def test_counts_follow_up_reviews(self, db, user):
+        deck = add_deck(user, 'HSK1')
+        add_word(user, deck, due_in=0, repetitions=0, interval_days=1)
+        result = due_forecast(user.id, TODAY, days=10, project=True, quality=4)
+        # quality 4 from new: intervals 1, 3, 7 -> reviews on days 0, 1, 4
+        assert [d['due'] for d in result['by_day']] == [1, 1, 0, 0, 1, 0, 0, 0, 0, 0]
+        assert result['projected'] is True and result['quality'] == 4
+        assert result['by_deck'][0]['deck_name'] == 'HSK1'
+
+    def test_cached_until_word_state_changes(self, db, user):
+        deck = add_deck(user, 'HSK1')
+        word = add_word(user, deck, due_in=0)
+        add_word(user, deck, due_in=3)
+
+        user_id = user.id
+        first, statements = count_statements(db, lambda: due_forecast(user_id, TODAY, project=True))
+        assert len(statements) == 2  # grouped query + word states
+        second, statements = count_statements(db, lambda: due_forecast(user_id, TODAY, project=True))
+        assert len(statements) == 1 and second == first
+
+        word.update_srs(5, today=TODAY)
+        word.update()
+        third = due_forecast(user_id, TODAY, project=True)
+        assert third != first
+        assert third['by_day'][0]['due'] == 0
+
+    def test_new_parameters_recompute(self, db, user):
+        add_word(user, add_deck(user, 'HSK1'), due_in=0, repetitions=0, interval_days=1)
+        fails = due_forecast(user.id, TODAY, days=5, project=True, quality=1)
+        assert [d['due'] for d in fails['by_day']] == [1, 1, 1, 1, 1]
+
+
+class TestProjectEngine:
+    def test_matches_day_by_day_simulation(self):
+        rng = np.random.default_rng(3)
+        n, days = 300, 40
+        due_in = rng.integers(-5, 30, n)
+        reps, intervals, eases = rng.integers(0, 8, n), rng.integers(1, 60, n), np.round(rng.uniform(1.3, 3, n), 2)
+        groups = rng.integers(0, 3, n)
+        counts = project(due_in, reps, intervals, eases, 4, days, groups, 3)
+
+        expected = np.zeros((days, 3), dtype=np.int64)
+        for i in range(n):
+            state, day = (int(reps[i]), int(intervals[i]), float(eases[i])), max(int(due_in[i]), 0)
+            while day < days:
+                expected[day, groups[i]] += 1
+                state = review_scalar(*state, 4)
+                day += state[1]
+        assert (counts == expected).all()
+
+
+class TestForecastApi:
+    @pytest.fixture
+    def auth_headers(self, client):
+        projection_cache.clear()
+        client.post('/api/users', json={'username': 'fcuser', 'email': 'fc@example.com', 'password': 'TestPass123'})
+        resp = client.post('/api/token', json={'username': 'fcuser', 'password': 'TestPass123'})
+        return {'Authorization': f"Bearer {resp.json['access_token']}"}
+
+    def test_forecast(self, client, auth_headers):
+        new_words = Word.query.filter_by(user_id=User.get_by_username('fcuser').id).count()  # sample deck
+
+        resp = client.get('/api/progress/forecast', headers=auth_headers)
+        assert resp.status_code == 200
+        assert resp.json['days'] == 30 and resp.json['total'] == new_words
+        assert resp.json['by_day'][0]['due'] == new_words
+
+        resp = client.get('/api/progress/forecast?days=14&project=true&quality=5', headers=auth_headers)
+        assert resp.status_code == 200
+        # quality 5 on a new word fast-tracks it to a 14-day interval
+        assert resp.json['total'] == new_words and resp.json['quality'] == 5
+
+    @pytest.mark.parametrize('query', ['days=0', 'days=1000', 'days=abc', 'quality=9', 'quality=-1', 'quality=4.5'])
+    def test_rejects_bad_parameters(self, client, auth_headers, query):
+        assert client.get(f'/api/progress/forecast?{query}', headers=auth_headers).status_code == 400
+
+    def test_requires_auth(self, client):
+        assert client.get('/api/progress/forecast').status_code == 401
@@ -0,0 +1,88 @@
+"""Tests for queue-based, configurable logging."""
+import io
+import json
+import logging
+
+import pytest
+
+from logging_setup import JsonFormatter, SamplingFilter, configure_logging, stop_logging
+
+
+@pytest.fixture
+def log_output():
+    stream = io.StringIO()
+    root = logging.getLogger()
+    level = root.level
+    yield stream
+    stop_logging()
+    root.setLevel(level)
+    logging.getLogger('laoshi.test.quiet').setLevel(logging.NOTSET)
+
+
+def emit(stream):
+    # stop_logging() drains the queue before returning
+    stop_logging()
+    return stream.getvalue().splitlines()
+
+
+class TestConfigureLogging:
+    def test_json_records_with_extras_and_traceback(self, log_output):
+        configure_logging({'LOG_FORMAT': 'json', 'LOG_LEVEL': 'INFO'}, stream=log_output)
+        logger = logging.getLogger('laoshi.test')
+        logger.info("hello %s", "world", extra={'session_id': 7})
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("failed")
+
+        first, second = (json.loads(line) for line in emit(log_output))
+        assert first['message'] == 'hello world'
+        assert first['level'] == 'INFO'
+        assert first['logger'] == 'laoshi.test'
+        assert first['session_id'] == 7
+        assert second['message'] == 'failed'
+        assert 'ValueError: boom' in second['exc_info']
+
+    def test_text_format_keeps_traceback(self, log_output):
+        configure_logging({'LOG_FORMAT': 'text'}, stream=log_output)
+        try:
+            raise KeyError('missing')
+        except KeyError:
+            logging.getLogger('laoshi.test').error("lookup failed", exc_info=True)
+        output = '\n'.join(emit(log_output))
+        assert 'ERROR [laoshi.test] lookup failed' in output
+        assert "KeyError: 'missing'" in output
+
+    def test_level_and_per_logger_overrides(self, log_output):
+        configure_logging({'LOG_LEVEL': 'DEBUG', 'LOG_LEVELS': 'laoshi.test.quiet=WARNING'}, stream=log_output)
+        logging.getLogger('laoshi.test').debug("shown")
+        logging.getLogger('laoshi.test.quiet').info("hidden")
+        lines = emit(log_output)
+        assert any('shown' in line for line in lines)
+        assert not any('hidden' in line for line in lines)
+
+    def test_reconfigure_replaces_handler(self, log_output):
+        configure_logging({}, stream=io.StringIO())
+        configure_logging({}, stream=log_output)
+        logging.getLogger('laoshi.test').warning("once")
+        assert sum('once' in line for line in emit(log_output)) == 1
+
+
+class TestSamplingFilter:
+    def make_record(self, sampled):
+        record = logging.makeLogRecord({'msg': 'diag'})
+        if sampled:
+            record.sampled = True
+        return record
+
+    def test_unsampled_records_always_pass(self):
+        assert SamplingFilter(0.0).filter(self.make_record(False))
+
+    def test_sampled_records_are_thinned(self):
+        flt = SamplingFilter(0.0)
+        assert not any(flt.filter(self.make_record(True)) for _ in range(100))
+        assert all(SamplingFilter(1.0).filter(self.make_record(True)) for _ in range(100))
+
+    def test_json_omits_sampling_marker(self):
+        entry = json.loads(JsonFormatter().format(self.make_record(True)))
+        assert 'sampled' not in entry
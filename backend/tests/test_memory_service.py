@@ -0,0 +1,205 @@
+"""Tests for the cached mem0 read path and the asynchronous write outbox."""
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock
+
+import pytest
+
+from ai_layer.memory_service import (
+    LocalMemoryClient,
+    MemoryService,
+    get_memory_service,
+    purge_memory_outbox,
+    set_memory_service,
+)
+from models import MemoryOutbox, User
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def user(db):
+    u = User(username='memuser', email='mem@example.com', password='x')
+    u.add()
+    return u
+
+
+@pytest.fixture
+def service():
+    svc = MemoryService(LocalMemoryClient(), cache_ttl=60, clock=FakeClock(), backoff_base=0)
+    set_memory_service(svc)
+    yield svc
+    set_memory_service(None)
+
+
+class TestLocalMemoryClient:
+    def test_search_ranks_by_overlap(self):
+        client = LocalMemoryClient()
+        client.add('Student prefers example sentences', user_id='1')
+        client.add('Student struggles with tones', user_id='1')
+        results = client.search('tones practice', user_id='1')
+        assert results[0]['memory'] == 'Student struggles with tones'
+
+    def test_search_is_scoped_per_user(self):
+        client = LocalMemoryClient()
+        client.add('likes 了 drills', user_id='1')
+        assert client.search('了', user_id='2') == []
+
+    def test_cjk_characters_match(self):
+        client = LocalMemoryClient()
+        client.add('经常把了放错位置', user_id='1')
+        client.add('Prefers short sessions', user_id='1')
+        assert client.search('了的用法', user_id='1')[0]['memory'] == '经常把了放错位置'
+
+
+class TestSearchCache:
+    def test_repeat_search_hits_cache(self):
+        client = MagicMock()
+        client.search.return_value = [{'memory': 'x'}]
+        svc = MemoryService(client, cache_ttl=60, clock=FakeClock())
+        svc.search(1, 'prefs')
+        svc.search(1, 'prefs')
+        assert client.search.call_count == 1
+        assert svc.stats()['search_hits'] == 1
+
+    def test_limit_is_left_to_the_client_by_default(self):
+        client = MagicMock()
+        client.search.return_value = []
+        svc = MemoryService(client, clock=FakeClock())
+        svc.search(1, 'prefs')
+        svc.search(1, 'prefs', limit=3)
+        assert [c.kwargs for c in client.search.call_args_list] == [
+            {'query': 'prefs', 'user_id': '1'}, {'query': 'prefs', 'user_id': '1', 'limit': 3}]
+
+    def test_entries_expire_after_ttl(self):
+        clock = FakeClock()
+        client = MagicMock()
+        client.search.return_value = []
+        svc = MemoryService(client, cache_ttl=60, clock=clock)
+        svc.search(1, 'prefs')
+        clock.now += 61
+        svc.search(1, 'prefs')
+        assert client.search.call_count == 2
+
+    def test_failure_returns_none_and_is_not_cached(self):
+        client = MagicMock()
+        client.search.side_effect = RuntimeError('mem0 down')
+        svc = MemoryService(client, clock=FakeClock())
+        assert svc.search(1, 'prefs') is None
+        client.search.side_effect = None
+        client.search.return_value = [{'memory': 'ok'}]
+        assert svc.search(1, 'prefs') == [{'memory': 'ok'}]
+
+    def test_cache_bounded_by_users(self):
+        client = MagicMock()
+        client.search.return_value = []
+        svc = MemoryService(client, max_cached_users=2, clock=FakeClock())
+        for uid in (1, 2, 3):
+            svc.search(uid, 'prefs')
+        assert svc.stats()['cached_users'] == 2
+
+
+class TestOutbox:
+    def test_enqueue_is_durable_and_does_not_write(self, user, service):
+        service.client = MagicMock(wraps=service.client)
+        assert service.enqueue_writes(user.id, ['Struggles with 把', '  ', 'Likes drills']) == 2
+        assert MemoryOutbox.count_pending() == 2
+        service.client.add.assert_not_called()
+
+    def test_flush_writes_and_invalidates_cache(self, user, service):
+        assert service.search(user.id, 'struggles') == []
+        service.enqueue_writes(user.id, ['Struggles with 把'])
+
+        result = service.flush_outbox()
+
+        assert result == {'sent': 1, 'retried': 0, 'failed': 0}
+        assert MemoryOutbox.count_pending() == 0
+        # Cached empty result was dropped, so the new memory is visible immediately
+        assert service.search(user.id, 'struggles')[0]['memory'] == 'Struggles with 把'
+
+    def test_failed_write_is_retried_then_marked_failed(self, user, service):
+        service.client = MagicMock()
+        service.client.add.side_effect = ConnectionError('mem0 unreachable')
+        service.max_attempts = 2
+        service.enqueue_writes(user.id, ['Struggles with tones'])
+
+        assert service.flush_outbox()['retried'] == 1
+        row = MemoryOutbox.query.one()
+        assert row.status == MemoryOutbox.STATUS_PENDING
+        assert row.attempts == 1
+        assert 'mem0 unreachable' in row.last_error
+
+        assert service.flush_outbox()['failed'] == 1
+        assert MemoryOutbox.query.one().status == MemoryOutbox.STATUS_FAILED
+
+    def test_backoff_defers_retry(self, user, service):
+        service.client = MagicMock()
+        service.client.add.side_effect = ConnectionError('down')
+        service.backoff_base = 60
+        service.enqueue_writes(user.id, ['a'])
+        service.flush_outbox()
+        assert service.flush_outbox() == {'sent': 0, 'retried': 0, 'failed': 0}
+        row = MemoryOutbox.query.one()
+        next_attempt = row.next_attempt_ds.replace(tzinfo=timezone.utc)
+        assert next_attempt > datetime.now(timezone.utc) + timedelta(seconds=50)
+
+    def test_flush_sends_rows_in_parallel(self, user, service):
+        import threading
+        barrier = threading.Barrier(3, timeout=5)
+        service.client = MagicMock()
+        service.client.add.side_effect = lambda *a, **k: barrier.wait()
+        service.max_workers = 3
+        service.enqueue_writes(user.id, ['a', 'b', 'c'])
+        # Would time out (BrokenBarrierError -> retried) if writes ran serially
+        assert service.flush_outbox()['sent'] == 3
+
+    def test_writes_outside_the_claiming_transaction(self, app, user, service, db):
+        session, seen = db.session(), {}
+
+        def add(text, user_id=None):
+            seen['in_transaction'] = session.in_transaction()  # the flushing thread's session
+            with app.app_context():
+                seen['concurrent_flush'] = service.flush_outbox()  # e.g. another worker
+
+        service.client = MagicMock()
+        service.client.add.side_effect = add
+        service.enqueue_writes(user.id, ['a'])
+        assert service.flush_outbox()['sent'] == 1
+        assert seen == {'in_transaction': False, 'concurrent_flush': {'sent': 0, 'retried': 0, 'failed': 0}}
+
+    def test_purges_finished_rows_after_retention(self, app, user, service, db):
+        service.enqueue_writes(user.id, ['old', 'new', 'pending'])
+        service.flush_outbox()
+        old = datetime.now(timezone.utc) - timedelta(days=app.config['MEMORY_OUTBOX_RETENTION_DAYS'] + 1)
+        for row in MemoryOutbox.query.filter(MemoryOutbox.text.in_(['old', 'pending'])):
+            row.created_ds = old
+            if row.text == 'pending':
+                row.status = MemoryOutbox.STATUS_PENDING
+        db.session.commit()
+
+        result = app.test_cli_runner().invoke(args=['laoshi', 'purge-memory-outbox'])
+        assert result.exit_code == 0, result.output
+        assert 'Purged 1 finished memory write(s).' in result.output
+        assert sorted(r.text for r in MemoryOutbox.query) == ['new', 'pending']
+        assert purge_memory_outbox() == 0
+
+    def test_rows_deleted_with_user(self, user, service, db):
+        service.enqueue_writes(user.id, ['a'])
+        db.session.delete(user)
+        db.session.commit()
+        assert MemoryOutbox.query.count() == 0
+
+
+class TestGetMemoryService:
+    def test_uses_local_backend_under_test_config(self, app):
+        set_memory_service(None)
+        try:
+            with app.app_context():
+                assert isinstance(get_memory_service().client, LocalMemoryClient)
+        finally:
+            set_memory_service(None)
@@ -0,0 +1,132 @@
+"""Tests for the metrics registry and /api/metrics."""
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from metrics import Registry, registry, http_request_duration, db_queries_per_request, llm_call_duration, llm_tokens
+from ai_layer.llm_metrics import llm_metrics_hooks
+
+
+@pytest.fixture(autouse=True)
+def clean_registry():
+    registry.reset()
+    yield
+    registry.reset()
+
+
+class TestRegistry:
+    def test_counter_sums_thread_shards(self):
+        reg = Registry()
+        counter = reg.counter('test_events_total', 'Events', ('kind',))
+
+        def work():
+            for _ in range(1000):
+                counter.inc(kind='a')
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        counter.inc(5, kind='b')
+        assert counter.values() == {('a',): 8000, ('b',): 5}
+
+    def test_finished_threads_are_folded_into_totals(self):
+        reg = Registry()
+        counter = reg.counter('test_requests_total', 'Requests')
+        hist = reg.histogram('test_request_seconds', 'Latency', buckets=(1.0,))
+
+        for batch in range(3):  # thread per request
+            threads = [threading.Thread(target=lambda: (counter.inc(), hist.observe(0.5))) for _ in range(20)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            assert counter.values() == {(): 20 * (batch + 1)}
+            assert hist.values() == {(): ([20 * (batch + 1), 0], 10.0 * (batch + 1))}
+            assert len(counter._shards) == len(hist._shards) == 0
+
+        counter.inc()  # this thread's shard stays live
+        assert counter.values() == {(): 61} and len(counter._shards) == 1
+
+    def test_histogram_renders_cumulative_buckets(self):
+        reg = Registry()
+        hist = reg.histogram('test_latency_seconds', 'Latency', ('route',), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.7, 3.0):
+            hist.observe(value, route='/x')
+        text = reg.render()
+        assert '# TYPE test_latency_seconds histogram' in text
+        assert 'test_latency_seconds_bucket{route="/x",le="0.1"} 1' in text
+        assert 'test_latency_seconds_bucket{route="/x",le="1.0"} 3' in text
+        assert 'test_latency_seconds_bucket{route="/x",le="+Inf"} 4' in text
+        assert 'test_latency_seconds_count{route="/x"} 4' in text
+        assert 'test_latency_seconds_sum{route="/x"} 4.25' in text
+
+    def test_wrong_labels_rejected(self):
+        counter = Registry().counter('test_total', 'Test', ('kind',))
+        with pytest.raises(ValueError):
+            counter.inc(other='x')
+
+    def test_collector_errors_do_not_break_scrape(self):
+        reg = Registry()
+
+        def broken():
+            raise RuntimeError('down')
+
+        reg.add_collector(broken)
+        reg.add_collector(lambda: [('test_up', 'Up', {}, 1)])
+        text = reg.render()
+        assert 'laoshi_metrics_collector_errors{collector="broken",error="RuntimeError"} 1' in text
+        assert 'test_up 1' in text
+
+
+class TestRequestMetrics:
+    def test_endpoint_reports_request_latency_and_queries(self, client):
+        client.post('/api/users', json={
+            'username': 'metricsuser', 'email': 'metrics@example.com', 'password': 'TestPass123'
+        })
+        resp = client.get('/api/metrics')
+        assert resp.status_code == 200
+        assert resp.content_type.startswith('text/plain')
+
+        text = resp.get_data(as_text=True)
+        assert 'laoshi_http_request_duration_seconds_count{endpoint="userlistresource",method="POST",status="201"} 1' in text
+        assert 'laoshi_cache_hit_ratio{cache="feedback"}' in text
+        assert 'laoshi_redis_breaker_state{state="closed"}' in text
+
+        queries = db_queries_per_request.values()[('userlistresource',)]
+        counts, _ = queries
+        assert sum(counts) == 1
+        assert counts[0] == 0  # more than one statement for a signup
+
+    def test_metrics_token(self, app, client):
+        app.config['METRICS_TOKEN'] = 'scrape-secret'
+        try:
+            assert client.get('/api/metrics').status_code == 401
+            resp = client.get('/api/metrics', headers={'Authorization': 'Bearer scrape-secret'})
+            assert resp.status_code == 200
+        finally:
+            app.config['METRICS_TOKEN'] = None
+
+    def test_unmatched_routes_share_a_label(self, client):
+        client.get('/api/does-not-exist')
+        assert any(key[0] == 'unmatched' for key in http_request_duration.values())
+
+
+class TestLLMMetricsHooks:
+    def test_records_latency_and_tokens_per_agent(self):
+        context = SimpleNamespace()
+        agent = SimpleNamespace(name='feedback_agent')
+        response = SimpleNamespace(usage=SimpleNamespace(input_tokens=120, output_tokens=30))
+
+        async def call():
+            await llm_metrics_hooks.on_llm_start(context, agent, None, [])
+            await llm_metrics_hooks.on_llm_end(context, agent, response)
+
+        asyncio.run(call())
+        asyncio.run(call())
+        assert llm_tokens.values() == {('feedback_agent', 'input'): 240, ('feedback_agent', 'output'): 60}
+        counts, _ = llm_call_duration.values()[('feedback_agent',)]
+        assert sum(counts) == 2
@@ -0,0 +1,140 @@
+"""Tests for the password hashing service (scheme/cost, rehash on login, bounded pool)."""
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+from passlib.hash import pbkdf2_sha256
+
+import password_hashing
+from models import User
+from password_hashing import HashingBusy, check_password, hash_password, verify_and_update
+
+
+@pytest.fixture
+def hashing_config(app):
+    """Reconfigure the service for a test, restoring the app's settings afterwards."""
+    def apply(**overrides):
+        password_hashing.configure({**app.config, **overrides})
+
+    yield apply
+    password_hashing.configure(app.config)
+
+
+class TestHashing:
+    def test_uses_configured_rounds(self, hashing_config):
+        hashing_config(PASSWORD_PBKDF2_ROUNDS=1234)
+        hashed = hash_password('secret')
+        assert hashed.startswith('$pbkdf2-sha256$1234$')
+        assert check_password('secret', hashed)
+        assert not check_password('wrong', hashed)
+
+    def test_old_cost_is_rehashed(self, hashing_config):
+        legacy = pbkdf2_sha256.using(rounds=2000).hash('secret')
+        hashing_config(PASSWORD_PBKDF2_ROUNDS=1500)
+        matches, new_hash = verify_and_update('secret', legacy)
+        assert matches
+        assert new_hash.startswith('$pbkdf2-sha256$1500$')
+        assert verify_and_update('secret', new_hash) == (True, None)
+
+    def test_wrong_password_is_not_rehashed(self, hashing_config):
+        legacy = pbkdf2_sha256.using(rounds=2000).hash('secret')
+        assert verify_and_update('wrong', legacy) == (False, None)
+
+    @pytest.mark.parametrize('stored', [None, '', 'not-a-hash'])
+    def test_missing_or_unknown_hash(self, stored):
+        assert verify_and_update('secret', stored) == (False, None)
+
+    def test_argon2_falls_back_without_argon2_cffi(self, hashing_config, caplog):
+        with patch('password_hashing._argon2_available', return_value=False):
+            hashing_config(PASSWORD_HASH_SCHEME='argon2')
+        assert 'argon2-cffi is not installed' in caplog.text
+        assert hash_password('secret').startswith('$pbkdf2-sha256$')
+
+    def test_unknown_scheme_rejected(self):
+        with pytest.raises(ValueError):
+            password_hashing.build_context({'PASSWORD_HASH_SCHEME': 'md5_crypt'})
+
+
+class TestBoundedPool:
+    def test_saturated_pool_sheds_calls(self, hashing_config):
+        hashing_config(PASSWORD_HASH_THREADS=1, PASSWORD_HASH_QUEUE=0, PASSWORD_HASH_WAIT=0.05)
+        started, release = threading.Event(), threading.Event()
+
+        def slow(context):
+            started.set()
+            release.wait(5)
+
+        blocker = threading.Thread(target=password_hashing._run, args=(slow,))
+        blocker.start()
+        try:
+            assert started.wait(5)
+            with pytest.raises(HashingBusy):
+                hash_password('secret')
+        finally:
+            release.set()
+            blocker.join()
+        assert check_password('secret', hash_password('secret'))
+
+    def test_over_queue_calls_do_not_wait(self, hashing_config):
+        hashing_config(PASSWORD_HASH_THREADS=1, PASSWORD_HASH_QUEUE=0, PASSWORD_HASH_WAIT=5)
+        started, release = threading.Event(), threading.Event()
+
+        def slow(context):
+            started.set()
+            release.wait(5)
+
+        blocker = threading.Thread(target=password_hashing._run, args=(slow,))
+        blocker.start()
+        try:
+            assert started.wait(5)
+            start = time.perf_counter()
+            with pytest.raises(HashingBusy):
+                hash_password('secret')
+            assert time.perf_counter() - start < 1
+        finally:
+            release.set()
+            blocker.join()
+
+    def test_slow_hash_is_shed_after_wait(self, hashing_config):
+        hashing_config(PASSWORD_HASH_THREADS=1, PASSWORD_HASH_QUEUE=0, PASSWORD_HASH_WAIT=0.05)
+        release = threading.Event()
+        with pytest.raises(HashingBusy):
+            password_hashing._run(lambda context: release.wait(5))
+        release.set()
+        password_hashing._get_executor().submit(lambda: None).result()  # the slow hash has finished
+        assert check_password('secret', hash_password('secret'))  # and returned its slot
+
+    def test_inline_mode(self, hashing_config):
+        hashing_config(PASSWORD_HASH_THREADS=0)
+        assert check_password('secret', hash_password('secret'))
+
+
+class TestLogin:
+    def register(self, client, username):
+        client.post('/api/users', json={
+            'username': username, 'email': f'{username}@example.com', 'password': 'TestPass123'
+        })
+
+    def test_login_upgrades_outdated_hash(self, app, client):
+        self.register(client, 'rehashuser')
+        with app.app_context():
+            user = User.get_by_username('rehashuser')
+            user.password = pbkdf2_sha256.using(rounds=2000).hash('TestPass123')
+            user.update()
+
+        resp = client.post('/api/token', json={'username': 'rehashuser', 'password': 'TestPass123'})
+        assert resp.status_code == 200
+        with app.app_context():
+            stored = User.get_by_username('rehashuser').password
+        assert stored.startswith(f"$pbkdf2-sha256${app.config['PASSWORD_PBKDF2_ROUNDS']}$")
+
+        resp = client.post('/api/token', json={'username': 'rehashuser', 'password': 'TestPass123'})
+        assert resp.status_code == 200
+
+    def test_busy_pool_returns_503(self, client):
+        self.register(client, 'busyuser')
+        with patch('resources.verify_and_update', side_effect=HashingBusy()):
+            resp = client.post('/api/token', json={'username': 'busyuser', 'password': 'TestPass123'})
+        assert resp.status_code == 503
+        assert resp.headers['Retry-After'] == '1'
@@ -316,12 +316,21 @@ class TestGetSession:
 
     def test_returns_redis_session_with_url(self, monkeypatch):
         """Should return RedisSession when REDIS_URI is set and Redis is reachable."""
-        from unittest.mock import patch, MagicMock
+        import fakeredis
         from agents.extensions.memory import RedisSession
-        monkeypatch.setenv("REDIS_URI", "redis://localhost:6379/0")
-
-        # Mock the synchronous Redis ping check so the test doesn't need a real server
-        mock_client = MagicMock()
-        with patch("redis.from_url", return_value=mock_client):
+        from redis_pool import RedisPool, set_redis_pool
+        url = "redis://localhost:6379/0"
+        monkeypatch.setenv("REDIS_URI", url)
+
+        # Local fake Redis so the test doesn't need a real server
+        server = fakeredis.FakeServer()
+        set_redis_pool(RedisPool(
+            url,
+            sync_client_factory=lambda: fakeredis.FakeRedis(server=server),
+            async_client_factory=lambda: fakeredis.FakeAsyncRedis(server=server),
+        ))
+        try:
             session = get_session(123)
             assert isinstance(session, RedisSession)
+        finally:
+            set_redis_pool(None)
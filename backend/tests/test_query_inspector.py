@@ -0,0 +1,112 @@
+"""Tests for per-request N+1 detection and SQL query budgets."""
+import pytest
+from sqlalchemy import text
+
+import query_inspector
+from extensions import db
+from metrics import registry
+from query_inspector import SQLBudgetError, budget_exceeded, repeated_statements, statement_shape
+
+
+@pytest.fixture
+def probe_app():
+    """A fresh app with routes that run a given number of statements."""
+    from app import create_app
+    from config import TestConfig
+
+    app = create_app(config_class=TestConfig)
+
+    @app.route('/api/_sql_probe/<int:selects>')
+    def sql_probe(selects):
+        for i in range(selects):
+            db.session.execute(text('SELECT :i'), {'i': i})
+        return {'ok': True}
+
+    registry.reset()
+    yield app
+    registry.reset()
+    query_inspector.recent_violations.clear()
+
+
+class TestStatementShape:
+    def test_folds_whitespace_and_in_lists(self):
+        a = statement_shape('SELECT word.id\nFROM word\n  WHERE word.id IN (?, ?, ?)')
+        b = statement_shape('SELECT word.id FROM word WHERE word.id IN (?)')
+        assert a == b == 'SELECT word.id FROM word WHERE word.id IN (...)'
+
+
+class TestFinish:
+    config = {'SQL_REPEAT_THRESHOLD': 3, 'SQL_QUERY_BUDGET_DEFAULT': 10, 'SQL_QUERY_BUDGETS': {'bulk': 100}}
+
+    def run(self, statements, endpoint='probe'):
+        token = query_inspector.start()
+        for statement in statements:
+            query_inspector._after_cursor_execute(None, None, statement, (), None, False)
+        return query_inspector.finish(token, endpoint, self.config)
+
+    def test_repeated_selects_are_flagged(self):
+        violation = self.run(['SELECT word.id FROM word WHERE word.id = ?'] * 3)
+        assert violation.repeated == [('SELECT word.id FROM word WHERE word.id = ?', 3)]
+        query_inspector.recent_violations.clear()
+
+    def test_repeated_inserts_only_count_toward_budget(self):
+        assert self.run(['INSERT INTO word (word) VALUES (?)'] * 5) is None
+
+    def test_budget_uses_endpoint_override(self):
+        statements = [f'SELECT {i}' for i in range(11)]
+        violation = self.run(statements)
+        assert 'probe: 11 statements (budget 10)' == violation.describe()
+        assert self.run(statements, endpoint='bulk') is None
+        query_inspector.recent_violations.clear()
+
+    def test_not_recording_outside_a_request(self):
+        query_inspector._after_cursor_execute(None, None, 'SELECT 1', (), None, False)
+        assert query_inspector._statements.get() is None
+
+
+class TestRequests:
+    @pytest.mark.allow_sql_violations
+    def test_log_mode_logs_and_counts(self, probe_app, caplog):
+        resp = probe_app.test_client().get('/api/_sql_probe/6')
+        assert resp.status_code == 200
+        assert 'SQL budget violation in sql_probe: 6x SELECT ?' in caplog.text
+        assert repeated_statements.values() == {('sql_probe',): 1}
+        assert budget_exceeded.values() == {}
+
+    def test_clean_request_passes(self, probe_app):
+        assert probe_app.test_client().get('/api/_sql_probe/2').status_code == 200
+        assert not query_inspector.recent_violations
+
+    @pytest.mark.allow_sql_violations
+    def test_raise_mode_raises(self, probe_app):
+        probe_app.config.update(SQL_INSPECTOR_MODE='raise', SQL_QUERY_BUDGETS={'sql_probe': 3})
+        with pytest.raises(SQLBudgetError, match=r'sql_probe: 4 statements \(budget 3\)'):
+            probe_app.test_client().get('/api/_sql_probe/4')
+        assert budget_exceeded.values() == {('sql_probe',): 1}
+
+    def test_off_mode_skips_inspection(self, probe_app):
+        probe_app.config['SQL_INSPECTOR_MODE'] = 'off'
+        assert probe_app.test_client().get('/api/_sql_probe/8').status_code == 200
+        assert not query_inspector.recent_violations
+
+
+class TestDeckList:
+    def test_stats_for_many_decks_without_a_query_per_deck(self, client):
+        client.post('/api/users', json={
+            'username': 'deckstatsuser', 'email': 'deckstats@example.com', 'password': 'TestPass123'
+        })
+        resp = client.post('/api/token', json={'username': 'deckstatsuser', 'password': 'TestPass123'})
+        headers = {'Authorization': f"Bearer {resp.get_json()['access_token']}"}
+        for i in range(6):
+            deck_id = client.post('/api/decks', json={'name': f'Deck {i}'}, headers=headers).get_json()['id']
+            client.post(f'/api/decks/{deck_id}/words', headers=headers, json={
+                'words': [{'word': f'字{j}', 'reading': 'zi', 'meaning': 'char'} for j in range(i + 1)]
+            })
+
+        decks = client.get('/api/decks', headers=headers).get_json()['decks']
+        assert not query_inspector.recent_violations  # the guard would also catch this
+        by_name = {d['name']: d for d in decks}
+        assert by_name['Deck 0']['word_count'] == 1
+        assert by_name['Deck 5']['word_count'] == 6
+        assert by_name['Deck 5']['mastery_percentage'] == 0
+        assert by_name['Deck 5']['last_practiced_at'] is None
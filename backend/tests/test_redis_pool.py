@@ -0,0 +1,190 @@
+"""Tests for the shared Redis pool, cached health state and circuit breaker."""
+import asyncio
+from unittest.mock import MagicMock
+
+import fakeredis
+import pytest
+
+from redis_pool import CircuitBreaker, RedisPool, get_redis_pool, set_redis_pool
+from async_utils import run_sync
+
+
+URL = "redis://fake:6379/0"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_pool(server=None, clock=None, sync_factory=None, **kwargs):
+    server = server or fakeredis.FakeServer()
+    return RedisPool(
+        URL,
+        clock=clock or FakeClock(),
+        sync_client_factory=sync_factory or (lambda: fakeredis.FakeRedis(server=server)),
+        async_client_factory=lambda: fakeredis.FakeAsyncRedis(server=server),
+        **kwargs,
+    )
+
+
+@pytest.fixture(autouse=True)
+def reset_global_pool():
+    set_redis_pool(None)
+    yield
+    set_redis_pool(None)
+
+
+class TestCircuitBreaker:
+    def test_opens_after_threshold(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+        assert breaker.allow_request()
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+        assert not breaker.allow_request()
+
+    def test_half_open_after_reset_timeout(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+        breaker.record_failure()
+        clock.now += 10
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        assert breaker.allow_request()
+
+    def test_half_open_failure_reopens(self):
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=3, reset_timeout=10, clock=clock)
+        for _ in range(3):
+            breaker.record_failure()
+        clock.now += 10
+        assert breaker.state == CircuitBreaker.HALF_OPEN
+        breaker.record_failure()
+        assert breaker.state == CircuitBreaker.OPEN
+
+    def test_success_closes(self):
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        breaker.record_success()
+        assert breaker.state == CircuitBreaker.CLOSED
+
+
+class TestRedisPool:
+    def test_health_is_cached_between_calls(self):
+        clock = FakeClock()
+        client = MagicMock()
+        pool = make_pool(clock=clock, sync_factory=lambda: client, health_ttl=30)
+        assert pool.is_available()
+        assert pool.is_available()
+        assert client.ping.call_count == 1
+        clock.now += 31
+        assert pool.is_available()
+        assert client.ping.call_count == 2
+
+    def test_sync_client_is_shared(self):
+        pool = make_pool()
+        assert pool.sync_client() is pool.sync_client()
+
+    def test_async_client_is_shared_per_loop(self):
+        pool = make_pool()
+
+        async def get_client():
+            return pool.async_client()
+
+        first = run_sync(get_client())
+        second = run_sync(get_client())
+        assert first is second
+
+    def test_breaker_skips_ping_while_open(self):
+        clock = FakeClock()
+        client = MagicMock()
+        client.ping.side_effect = ConnectionError('refused')
+        pool = make_pool(clock=clock, sync_factory=lambda: client,
+                         failure_threshold=2, reset_timeout=30)
+        assert not pool.is_available()
+        assert not pool.is_available()
+        assert pool.status()['breaker_state'] == CircuitBreaker.OPEN
+        # While open, no network round-trip is attempted
+        assert not pool.is_available()
+        assert client.ping.call_count == 2
+        assert pool.status()['last_fallback_reason'] == 'circuit_open'
+
+    def test_recovers_after_reset_timeout(self):
+        clock = FakeClock()
+        client = MagicMock()
+        client.ping.side_effect = ConnectionError('refused')
+        pool = make_pool(clock=clock, sync_factory=lambda: client,
+                         failure_threshold=1, reset_timeout=30)
+        assert not pool.is_available()
+        client.ping.side_effect = None
+        clock.now += 30
+        assert pool.is_available()
+        assert pool.status()['breaker_state'] == CircuitBreaker.CLOSED
+
+    def test_fallbacks_are_counted(self):
+        pool = RedisPool(None)
+        assert not pool.is_available()
+        assert not pool.is_available()
+        status = pool.status()
+        assert status['enabled'] is False
+        assert status['fallbacks'] == 2
+        assert status['last_fallback_reason'] == 'not_configured'
+
+
+class TestRedisSessionWithPool:
+    def test_sessions_share_client_and_persist_history(self, monkeypatch):
+        from ai_layer.practice_runner import get_session
+
+        monkeypatch.setenv("REDIS_URI", URL)
+        server = fakeredis.FakeServer()
+        set_redis_pool(make_pool(server=server))
+
+        first = get_session(1)
+        second = get_session(1)
+        assert first._redis is second._redis
+
+        async def roundtrip():
+            await first.add_items([{'role': 'user', 'content': '你好'}])
+            return await second.get_items()
+
+        items = run_sync(roundtrip())
+        assert items[0]['content'] == '你好'
+
+    def test_returns_none_when_redis_down(self, monkeypatch):
+        from ai_layer.practice_runner import get_session
+
+        monkeypatch.setenv("REDIS_URI", URL)
+        client = MagicMock()
+        client.ping.side_effect = ConnectionError('refused')
+        set_redis_pool(make_pool(sync_factory=lambda: client))
+        assert get_session(1) is None
+        assert get_redis_pool().status()['fallbacks'] == 1
+
+    def test_run_with_retry_falls_back_to_memory_on_redis_error(self, monkeypatch):
+        from unittest.mock import AsyncMock, patch
+        from redis.exceptions import ConnectionError as RedisConnectionError
+        from ai_layer.practice_runner import run_with_retry
+
+        monkeypatch.setenv("REDIS_URI", URL)
+        set_redis_pool(make_pool())
+        session = MagicMock()
+        result = MagicMock()
+        calls = []
+
+        async def fake_run(agent, input, context, session, **kwargs):
+            calls.append((input, session))
+            if len(calls) == 1:
+                raise RedisConnectionError('lost connection')
+            return result
+
+        with patch('ai_layer.practice_runner.Runner.run', new=fake_run), \
+                patch('ai_layer.practice_runner.asyncio.sleep', new=AsyncMock()):
+            out = asyncio.run(run_with_retry(MagicMock(), 'hello', MagicMock(), session=session))
+
+        assert out is result
+        # Retry re-sends the input with no session, since nothing is in memory yet
+        assert calls[1] == ('hello', None)
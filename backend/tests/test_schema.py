@@ -0,0 +1,81 @@
+"""Tests for schema management outside the app factory."""
+from unittest.mock import MagicMock, patch
+
+import pytest
+from sqlalchemy import inspect
+
+from app import create_app
+from config import TestConfig
+from extensions import db
+from schema import migration_lock
+
+
+def make_config(tmp_path, **overrides):
+    attrs = {'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'schema.db'}", **overrides}
+    return type('SchemaTestConfig', (TestConfig,), attrs)
+
+
+class TestAppFactory:
+    def test_factory_does_no_ddl(self, tmp_path):
+        app = create_app(config_class=make_config(tmp_path))
+        with app.app_context():
+            assert inspect(db.engine).get_table_names() == []
+            db.engine.dispose()
+
+    def test_auto_migrate_creates_schema(self, tmp_path):
+        app = create_app(config_class=make_config(tmp_path, AUTO_MIGRATE=True))
+        with app.app_context():
+            tables = inspect(db.engine).get_table_names()
+            db.engine.dispose()
+        assert 'user' in tables
+        assert 'alembic_version' in tables
+
+
+class TestMigrateCommand:
+    def test_creates_then_reports_head(self, tmp_path):
+        app = create_app(config_class=make_config(tmp_path))
+        runner = app.test_cli_runner()
+
+        first = runner.invoke(args=['laoshi', 'migrate'])
+        assert first.exit_code == 0, first.output
+        assert 'created' in first.output
+
+        second = runner.invoke(args=['laoshi', 'migrate'])
+        assert second.exit_code == 0, second.output
+        assert 'at migration head' in second.output
+
+        with app.app_context():
+            assert 'user' in inspect(db.engine).get_table_names()
+            db.engine.dispose()
+
+
+class TestMigrationLock:
+    def make_pg_db(self, lock_results):
+        conn = MagicMock()
+        conn.execute.return_value.scalar.side_effect = lock_results
+        fake_db = MagicMock()
+        fake_db.engine.dialect.name = 'postgresql'
+        fake_db.engine.connect.return_value.__enter__.return_value = conn
+        return fake_db, conn
+
+    def test_waits_for_lock_then_unlocks(self):
+        fake_db, conn = self.make_pg_db([False, True, None])
+        with patch('schema.db', fake_db), patch('schema.time.sleep'):
+            with migration_lock(timeout=10):
+                pass
+        statements = [str(c.args[0]) for c in conn.execute.call_args_list]
+        assert statements.count('SELECT pg_try_advisory_lock(:key)') == 2
+        assert statements[-1] == 'SELECT pg_advisory_unlock(:key)'
+
+    def test_times_out(self):
+        fake_db, conn = self.make_pg_db(None)
+        conn.execute.return_value.scalar.return_value = False
+        with patch('schema.db', fake_db), patch('schema.time.sleep'):
+            with pytest.raises(TimeoutError):
+                with migration_lock(timeout=0):
+                    pass
+
+    def test_noop_on_sqlite(self, app):
+        with app.app_context():
+            with migration_lock(timeout=0):
+                pass
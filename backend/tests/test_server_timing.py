@@ -0,0 +1,94 @@
+"""Tests for per-request Server-Timing phase timers."""
+from unittest.mock import Mock, patch
+
+import pytest
+
+import server_timing
+from crypto_utils import decrypt_api_key, encrypt_api_key
+
+
+def parse_header(value):
+    phases = {}
+    for part in value.split(', '):
+        name, *params = part.split(';')
+        phases[name] = dict(p.split('=', 1) for p in params)
+    return phases
+
+
+class TestPhaseTimers:
+    def test_records_only_inside_a_request(self):
+        with server_timing.timed('redis'):
+            pass  # no active request: no-op
+
+        token = server_timing.start()
+        with server_timing.timed('redis'):
+            pass
+        server_timing.record('db', 0.002)
+        server_timing.record('db', 0.003)
+        timings = server_timing.finish(token)
+
+        assert timings['db'] == (pytest.approx(5.0), 2)
+        assert timings['redis'][1] == 1
+        assert 'total' in timings
+
+    def test_header_value(self):
+        value = server_timing.header_value({'db': (12.34, 3), 'agent': (2500.0, 1), 'total': (2600.0, 1)})
+        assert value == 'db;dur=12.3;desc="3 queries", agent;dur=2500.0, total;dur=2600.0'
+
+
+class TestServerTimingHeader:
+    @pytest.fixture
+    def auth_headers(self, client):
+        client.post('/api/users', json={
+            'username': 'timinguser', 'email': 'timing@example.com', 'password': 'TestPass123'
+        })
+        resp = client.post('/api/token', json={'username': 'timinguser', 'password': 'TestPass123'})
+        return {'Authorization': f"Bearer {resp.get_json()['access_token']}"}
+
+    def test_header_has_db_phase(self, client, auth_headers):
+        resp = client.get('/api/me', headers=auth_headers)
+        phases = parse_header(resp.headers['Server-Timing'])
+        assert 'total' in phases
+        assert int(phases['db']['desc'].strip('"').split()[0]) >= 1
+
+    def test_agent_and_decrypt_phases(self):
+        from cryptography.fernet import Fernet
+        from app import create_app
+        from config import TestConfig
+
+        config = type('TimingConfig', (TestConfig,), {'ENCRYPTION_KEY': Fernet.generate_key().decode()})
+        app = create_app(config_class=config)
+        with app.app_context():
+            ciphertext = encrypt_api_key('sk-test')
+
+        async def fake_run(*args, **kwargs):
+            return Mock(final_output='ok')
+
+        @app.route('/api/_timing_probe')
+        def timing_probe():
+            from ai_layer.practice_runner import run_async, run_with_retry
+            assert decrypt_api_key(ciphertext) == 'sk-test'
+            with patch('ai_layer.practice_runner.Runner.run', new=fake_run):
+                run_async(run_with_retry(Mock(name='agent'), 'hi', None))
+            return {'ok': True}
+
+        resp = app.test_client().get('/api/_timing_probe')
+        phases = parse_header(resp.headers['Server-Timing'])
+        assert {'decrypt', 'agent', 'total'} <= set(phases)
+
+    def test_json_field_is_opt_in(self, app, client, auth_headers):
+        assert '_server_timing' not in client.get('/api/me', headers=auth_headers).get_json()
+        app.config['SERVER_TIMING_JSON'] = True
+        try:
+            body = client.get('/api/me', headers=auth_headers).get_json()
+        finally:
+            app.config['SERVER_TIMING_JSON'] = False
+        assert 'total' in body['_server_timing']
+
+    def test_disabled(self, app, client):
+        app.config['SERVER_TIMING_ENABLED'] = False
+        try:
+            resp = client.get('/api/metrics')
+        finally:
+            app.config['SERVER_TIMING_ENABLED'] = True
+        assert 'Server-Timing' not in resp.headers
@@ -0,0 +1,147 @@
+"""Tests for token-budgeted conversation history compaction."""
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from ai_layer.session_history import (
+    CompactingSession,
+    build_word_digest,
+    compact_history,
+    estimate_tokens,
+    fit_digest,
+    split_turns,
+)
+
+
+def make_turn(n, text='我今天很忙。'):
+    call_id = f"call_{n}"
+    return [
+        {'role': 'user', 'content': text},
+        {'type': 'function_call', 'call_id': call_id, 'name': 'evaluate_sentence', 'arguments': '{}'},
+        {'type': 'function_call_output', 'call_id': call_id, 'output': '{"grammarScore": 9}'},
+        {'type': 'message', 'role': 'assistant', 'content': [{'type': 'output_text', 'text': 'Nice!'}]},
+    ]
+
+
+def make_history(turns):
+    items = []
+    for n in range(turns):
+        items.extend(make_turn(n))
+    return items
+
+
+def make_sw(word_id, order, status, word='你好', reading='ni hao', scores=(8.0, 9.0, 7.0), is_correct=False):
+    return SimpleNamespace(
+        word_id=word_id, word_order=order, status=status, is_correct=is_correct,
+        word=SimpleNamespace(word=word, reading=reading),
+        grammar_score=scores[0], usage_score=scores[1], naturalness_score=scores[2],
+    )
+
+
+class TestEstimateTokens:
+    def test_cjk_counts_per_character(self):
+        assert estimate_tokens('你好世界') == 4
+
+    def test_ascii_counts_per_four_chars(self):
+        assert estimate_tokens('abcdefgh') == 2
+
+    def test_empty(self):
+        assert estimate_tokens('') == 0
+
+
+class TestSplitTurns:
+    def test_turns_start_at_user_messages(self):
+        turns = split_turns(make_history(3))
+        assert len(turns) == 3
+        assert all(t[0]['role'] == 'user' for t in turns)
+
+
+class TestCompactHistory:
+    def test_under_budget_returns_unchanged(self):
+        items = make_history(2)
+        assert compact_history(items, token_budget=10_000) is items
+
+    def test_zero_budget_disables(self):
+        items = make_history(50)
+        assert compact_history(items, token_budget=0) is items
+
+    def test_over_budget_keeps_recent_whole_turns(self):
+        items = make_history(40)
+        compacted = compact_history(items, token_budget=300, digest='Earlier:\n- 你好 (ni hao): correct')
+        assert compacted[0]['role'] == 'system'
+        assert '你好' in compacted[0]['content']
+        recent = compacted[1:]
+        assert recent[0]['role'] == 'user'
+        assert recent == items[-len(recent):]
+        # Tool calls are never separated from their outputs
+        call_ids = {i['call_id'] for i in recent if i.get('type') == 'function_call'}
+        output_ids = {i['call_id'] for i in recent if i.get('type') == 'function_call_output'}
+        assert call_ids == output_ids
+
+    def test_min_recent_turns_kept_even_if_over_budget(self):
+        items = make_history(10)
+        compacted = compact_history(items, token_budget=1, min_recent_turns=2)
+        assert compacted == items[-8:]
+
+    def test_digest_fits_half_budget(self):
+        digest = "Earlier:\n" + "\n".join(f"- 词{i} (ci{i}): correct; grammar 9.0" for i in range(200))
+        fitted = fit_digest(digest, 100)
+        assert estimate_tokens(fitted) <= 110
+        assert 'earlier word(s) omitted' in fitted
+        assert '词199' in fitted
+
+
+class TestBuildWordDigest:
+    def test_returns_none_without_finished_words(self):
+        assert build_word_digest([make_sw(1, 0, 0)], []) is None
+
+    def test_includes_scores_and_latest_correction(self):
+        attempts = [
+            SimpleNamespace(word_id=1, attempt_number=1, sentence='第一次', feedback_text='stale note'),
+            SimpleNamespace(word_id=1, attempt_number=2, sentence='第二次', feedback_text='Use 了 here.'),
+        ]
+        digest = build_word_digest([make_sw(1, 0, 1), make_sw(2, 1, 0, word='再见')], attempts)
+        assert '你好 (ni hao)' in digest
+        assert 'grammar 8.0' in digest
+        assert '第二次' in digest
+        assert 'Use 了 here.' in digest
+        assert 'stale note' not in digest
+        assert '再见' not in digest  # pending words are not digested
+
+    def test_skipped_words_marked(self):
+        digest = build_word_digest([make_sw(1, 0, -1, scores=(None, None, None))], [])
+        assert 'skipped' in digest
+
+
+class TestCompactingSession:
+    def test_get_items_compacts_and_writes_pass_through(self):
+        inner = MagicMock()
+        inner.session_id = 'session:1'
+        inner.get_items = AsyncMock(return_value=make_history(40))
+        inner.add_items = AsyncMock()
+        session = CompactingSession(inner, token_budget=300, digest='Earlier:\n- x')
+
+        items = asyncio.run(session.get_items())
+        assert len(items) < 160
+        asyncio.run(session.add_items([{'role': 'user', 'content': 'hi'}]))
+        inner.add_items.assert_awaited_once()
+
+    def test_get_session_wraps_when_session_words_given(self, monkeypatch, db):
+        import fakeredis
+        from ai_layer.practice_runner import get_session
+        from redis_pool import RedisPool, set_redis_pool
+
+        url = 'redis://fake:6379/0'
+        monkeypatch.setenv('REDIS_URI', url)
+        server = fakeredis.FakeServer()
+        set_redis_pool(RedisPool(
+            url,
+            sync_client_factory=lambda: fakeredis.FakeRedis(server=server),
+            async_client_factory=lambda: fakeredis.FakeAsyncRedis(server=server),
+        ))
+        try:
+            session = get_session(5, [make_sw(1, 0, 1)])
+            assert isinstance(session, CompactingSession)
+            assert '你好' in session.digest
+        finally:
+            set_redis_pool(None)
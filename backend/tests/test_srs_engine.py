@@ -0,0 +1,132 @@
+"""Parity and property tests for the array-based SRS engine.
+
+review_scalar, the single-word form of the rules (the original per-word code's
+branches on srs_engine's constants), serves as the oracle. Randomized cases (fixed seeds) cover the whole input space the app can
+produce, plus the rounding boundaries.
+"""
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from models import Deck, User, Word
+from srs_engine import MIN_EASE, NO_REVIEW, due_dates, replay, review, review_one, review_scalar, session_mix
+
+TODAY = date(2026, 3, 10)
+
+
+def random_states(rng, n):
+    eases = rng.uniform(1.3, 3.2, n)
+    eases[::2] = np.round(eases[::2], 2)  # short decimals hit exact .5 products more often
+    return rng.integers(0, 12, n), rng.integers(1, 400, n), eases, rng.integers(0, 6, n)
+
+
+class TestParity:
+    @pytest.mark.parametrize('seed', range(5))
+    def test_single_review_matches_scalar(self, seed):
+        reps, intervals, eases, qualities = random_states(np.random.default_rng(seed), 2000)
+        state = review(reps, intervals, eases, qualities)
+        for i in range(len(reps)):
+            expected = review_scalar(int(reps[i]), int(intervals[i]), float(eases[i]), int(qualities[i]))
+            actual = (int(state.repetitions[i]), int(state.interval_days[i]), float(state.ease_factor[i]))
+            assert actual == expected, (reps[i], intervals[i], eases[i], qualities[i])
+
+    @pytest.mark.parametrize('interval, ease', [(5, 1.5), (9, 1.5), (3, 2.5), (2, 3.0), (4, 1.75), (6, 1.3)])
+    def test_rounding_boundaries(self, interval, ease):
+        for quality in range(3, 6):
+            state = review(3, interval, ease, quality)
+            assert (int(state.repetitions), int(state.interval_days),
+                    float(state.ease_factor)) == review_scalar(3, interval, ease, quality)
+
+    def test_review_one_returns_python_types(self):
+        result = review_one(np.int64(3), np.int64(7), np.float64(2.5), np.int64(4))
+        assert result == review_scalar(3, 7, 2.5, 4)
+        assert [type(v) for v in result] == [int, int, float]
+
+    @pytest.mark.parametrize('seed', range(3))
+    def test_replay_matches_scalar_history(self, seed):
+        rng = np.random.default_rng(seed)
+        n, steps = 500, 12
+        qualities = rng.integers(0, 6, (n, steps))
+        qualities[rng.random((n, steps)) < 0.2] = NO_REVIEW  # gaps in the history
+        state = replay(qualities)
+        for i in range(n):
+            expected = (0, 1, 2.5)
+            for q in qualities[i]:
+                if q != NO_REVIEW:
+                    expected = review_scalar(*expected, int(q))
+            assert (int(state.repetitions[i]), int(state.interval_days[i]),
+                    float(state.ease_factor[i])) == expected
+
+    def test_word_update_srs_delegates(self):
+        word = Word(word='进度', reading='jin du', meaning='progress', repetitions=3, interval_days=7, ease_factor=2.5)
+        word.update_srs(4, today=TODAY)
+        assert (word.repetitions, word.interval_days, word.ease_factor) == review_scalar(3, 7, 2.5, 4)
+        assert word.next_review_date == TODAY + timedelta(days=word.interval_days)
+        assert type(word.repetitions) is int and type(word.ease_factor) is float
+
+
+class TestProperties:
+    def test_invariants(self):
+        reps, intervals, eases, qualities = random_states(np.random.default_rng(42), 10000)
+        state = review(reps, intervals, eases, qualities)
+        assert (state.ease_factor >= MIN_EASE).all()
+        assert (state.interval_days >= 1).all()
+        failed = qualities < 3
+        assert (state.repetitions[failed] == 0).all() and (state.interval_days[failed] == 1).all()
+        passed = ~failed & ~((reps == 0) & (qualities == 5))
+        assert (state.repetitions[passed] == reps[passed] + 1).all()
+
+    def test_better_rating_never_shortens_interval(self):
+        reps, intervals, eases, _ = random_states(np.random.default_rng(7), 5000)
+        by_quality = [review(reps, intervals, eases, q).interval_days for q in range(3, 6)]
+        assert (by_quality[0] <= by_quality[1]).all() and (by_quality[1] <= by_quality[2]).all()
+
+    def test_broadcasts_scalars(self):
+        state = review(np.array([0, 1, 2, 3]), 7, 2.5, 4)
+        assert state.interval_days.tolist() == [1, 3, 7, 18]
+
+    def test_replay_all_gaps_is_identity(self):
+        state = replay(np.full((3, 4), NO_REVIEW), repetitions=[1, 2, 3], interval_days=[3, 7, 18], ease_factor=2.0)
+        assert state.repetitions.tolist() == [1, 2, 3]
+        assert state.interval_days.tolist() == [3, 7, 18]
+
+    def test_due_dates(self):
+        assert due_dates(TODAY, [1, 14]).astype(date).tolist() == [TODAY + timedelta(days=1),
+                                                                    TODAY + timedelta(days=14)]
+
+
+class TestSessionMix:
+    @pytest.mark.parametrize('words, new, due, expected', [
+        (5, 10, 10, (2, 3)),   # 40% new, 60% due
+        (10, 10, 10, (4, 6)),
+        (5, 0, 10, (0, 5)),    # no new words: all due
+        (5, 1, 10, (1, 4)),    # new shortfall made up from due
+        (5, 10, 1, (4, 1)),    # due shortfall made up from new
+        (5, 1, 1, (1, 1)),     # both short: the rest comes from future words
+        (5, 0, 0, (0, 0)),
+    ])
+    def test_mix(self, words, new, due, expected):
+        assert session_mix(words, new, due) == expected
+
+
+class TestRescheduleDeck:
+    def test_rates_every_word_in_one_pass(self, db):
+        user = User(username='srsdeck', email='srsdeck@example.com', password='x')
+        user.add()
+        deck = Deck(name='Deck', user_id=user.id)
+        deck.add()
+        states = [(0, 1, 2.5), (1, 3, 2.36), (4, 20, 2.1), (7, 120, 1.3)]
+        for n, (reps, interval, ease) in enumerate(states):
+            Word(word=f'w{n}', reading='r', meaning='m', user_id=user.id, deck_id=deck.id,
+                 repetitions=reps, interval_days=interval, ease_factor=ease).add()
+
+        assert Word.reschedule_deck(deck.id, user.id, 4, today=TODAY) == 4
+        words = Word.query.filter_by(deck_id=deck.id).order_by(Word.id).all()
+        for word, before in zip(words, states):
+            expected = review_scalar(*before, 4)
+            assert (word.repetitions, word.interval_days, word.ease_factor) == expected
+            assert word.next_review_date == TODAY + timedelta(days=expected[1])
+
+    def test_empty_deck(self, db):
+        assert Word.reschedule_deck(999, 999, 4) == 0
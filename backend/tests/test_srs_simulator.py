@@ -0,0 +1,84 @@
+"""Tests for the offline SRS simulator (benchmarks/srs_simulator.py)."""
+from datetime import date
+
+import numpy as np
+import pytest
+
+from benchmarks.srs_simulator import csv_deck, parse_ratings, simulate, synthetic_deck
+from srs_engine import review_scalar, session_mix
+
+
+def reference_simulation(deck, days, words_per_session, sessions_per_day, quality, seed=0):
+    """Per-word version of the session loop with one fixed rating.
+
+    New words are taken in the simulator's random draw order, since later ties
+    between due dates are broken by word order.
+    """
+    words = [
+        {'state': (int(r), int(i), float(e)), 'due': int(d), 'new': bool(n)}
+        for r, i, e, d, n in zip(*deck)
+    ]
+    new_order = [words[i] for i in np.random.default_rng(seed).permutation(np.flatnonzero(deck.is_new))]
+    due_at_start, reviews, backlog = [], [], []
+    for day in range(days):
+        reviewed = 0
+        for session in range(sessions_per_day):
+            new = [w for w in new_order if w['new']]
+            due = sorted((w for w in words if not w['new'] and w['due'] <= day), key=lambda w: w['due'])
+            if session == 0:
+                due_at_start.append(len(due))
+            take_new, take_due = session_mix(words_per_session, len(new), len(due))
+            picked = new[:take_new] + due[:take_due]
+            future = sorted((w for w in words if not w['new'] and w['due'] > day), key=lambda w: w['due'])
+            picked += future[:words_per_session - len(picked)]
+            for w in picked:
+                w['state'] = review_scalar(*w['state'], quality)
+                w['due'], w['new'] = day + w['state'][1], False
+            reviewed += len(picked)
+        reviews.append(reviewed)
+        backlog.append(sum(1 for w in words if not w['new'] and w['due'] <= day))
+    return {'due_at_start': due_at_start, 'reviews': reviews, 'backlog': backlog}
+
+
+class TestSimulate:
+    @pytest.mark.parametrize('quality', [1, 3, 4, 5])
+    def test_matches_per_word_reference(self, quality):
+        deck = synthetic_deck(300, reviewed_fraction=0.5, seed=4)
+        result = simulate(deck, days=60, words_per_session=12, sessions_per_day=2, ratings=f'{quality}:1')
+        assert result['daily'] == reference_simulation(deck, 60, 12, 2, quality)
+
+    def test_session_composition_adds_up(self):
+        result = simulate(synthetic_deck(2000, reviewed_fraction=0.3), days=90, words_per_session=20)
+        sessions = result['sessions']
+        assert sessions['new'] + sessions['due'] + sessions['early'] == result['throughput']['reviews']
+        assert sessions['short'] == 0 and result['throughput']['reviews'] == 90 * 20
+
+    def test_small_deck_has_short_sessions(self):
+        result = simulate(synthetic_deck(5), days=3, words_per_session=10)
+        assert result['sessions']['short'] == 3 and result['throughput']['reviews'] == 15
+
+    def test_deterministic_for_a_seed(self):
+        deck = synthetic_deck(1000, reviewed_fraction=0.5)
+        first = simulate(deck, days=30, words_per_session=15, seed=7)
+        second = simulate(deck, days=30, words_per_session=15, seed=7)
+        assert first['daily'] == second['daily'] and first['final_state'] == second['final_state']
+
+
+class TestInputs:
+    def test_csv_deck(self, tmp_path):
+        path = tmp_path / 'deck.csv'
+        path.write_text('Word,Pinyin,Meaning,repetitions,interval_days,ease_factor,next_review_date\n'
+                        '文档,Wéndàng,documentation,,,,\n'
+                        '服务,Fúwù,service,3,7,2.2,2026-03-12\n', encoding='utf-8')
+        deck = csv_deck(str(path), today=date(2026, 3, 10))
+        assert deck.is_new.tolist() == [True, False]
+        assert deck.due_in.tolist()[1] == 2 and deck.ease_factor.tolist() == [2.5, 2.2]
+
+    @pytest.mark.parametrize('spec', ['', '7:1', '4:-1', '4:0'])
+    def test_rejects_bad_ratings(self, spec):
+        with pytest.raises(ValueError):
+            parse_ratings(spec)
+
+    def test_normalises_rating_weights(self):
+        qualities, probabilities = parse_ratings('3:1,5:3')
+        assert qualities.tolist() == [3, 5] and probabilities.tolist() == [0.25, 0.75]
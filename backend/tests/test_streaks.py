@@ -0,0 +1,119 @@
+"""Tests for atomic streak updates, per-user timezones and the lapsed-streak reset job."""
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+
+from extensions import db as _db
+from models import User, UserProfile
+from streaks import local_today, reset_lapsed_streaks, update_streak
+
+TODAY = date(2026, 3, 10)
+
+
+def make_profile(username, streak=0, last=None, tz=None):
+    user = User(username=username, email=f'{username}@example.com', password='x')
+    user.add()
+    profile = UserProfile(user_id=user.id, current_streak=streak, last_practice_date=last, timezone=tz)
+    profile.add()
+    return profile
+
+
+def stored(profile_id):
+    profile = _db.session.get(UserProfile, profile_id)
+    _db.session.refresh(profile)
+    return profile.current_streak, profile.last_practice_date
+
+
+class TestUpdateStreak:
+    @pytest.mark.parametrize('streak, last, expected', [
+        (0, None, 1),                              # first practice
+        (4, TODAY - timedelta(days=1), 5),         # practised yesterday
+        (4, TODAY - timedelta(days=3), 1),         # lapsed
+        (4, TODAY, 4),                             # already counted today
+    ])
+    def test_transitions(self, db, streak, last, expected):
+        profile = make_profile('streaker', streak, last)
+        assert update_streak(profile.user_id, today=TODAY) == (expected, TODAY)
+        assert stored(profile.id) == (expected, TODAY)
+
+    def test_later_date_is_kept(self, db):
+        # e.g. the user moved to a timezone behind the one they last practised in
+        profile = make_profile('traveller', 3, TODAY + timedelta(days=1))
+        assert update_streak(profile.user_id, today=TODAY) == (3, TODAY + timedelta(days=1))
+
+    def test_no_profile(self, db):
+        assert update_streak(12345, today=TODAY) is None
+
+    def test_single_update_statement_without_locks(self, db):
+        user_id = make_profile('atomic', 2, TODAY - timedelta(days=1)).user_id
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(db.engine, 'before_cursor_execute', record)
+        try:
+            update_streak(user_id, today=TODAY)
+        finally:
+            event.remove(db.engine, 'before_cursor_execute', record)
+        assert len(statements) == 1
+        assert statements[0].lstrip().upper().startswith('UPDATE USER_PROFILE')
+        assert 'FOR UPDATE' not in statements[0].upper()
+
+    def test_uses_the_users_timezone(self, db):
+        # 20:00 UTC on the 10th is already the 11th in Shanghai
+        now = datetime(2026, 3, 10, 20, 0, tzinfo=timezone.utc)
+        assert local_today('Asia/Shanghai', now) == date(2026, 3, 11)
+        assert local_today(None, now) == date(2026, 3, 10)
+        assert local_today('Not/AZone', now) == date(2026, 3, 10)
+
+
+class TestResetLapsedStreaks:
+    def test_resets_only_lapsed_streaks_per_timezone(self, db):
+        now = datetime(2026, 3, 10, 20, 0, tzinfo=timezone.utc)  # 11 March in Shanghai
+        kept_utc = make_profile('kept_utc', 3, date(2026, 3, 9))
+        lapsed_utc = make_profile('lapsed_utc', 3, date(2026, 3, 8))
+        lapsed_sh = make_profile('lapsed_sh', 5, date(2026, 3, 9), tz='Asia/Shanghai')
+        kept_sh = make_profile('kept_sh', 5, date(2026, 3, 10), tz='Asia/Shanghai')
+        no_streak = make_profile('no_streak', 0, None)
+
+        assert reset_lapsed_streaks(now) == 2
+        assert stored(kept_utc.id)[0] == 3
+        assert stored(lapsed_utc.id)[0] == 0
+        assert stored(lapsed_sh.id)[0] == 0
+        assert stored(kept_sh.id)[0] == 5
+        assert stored(no_streak.id)[0] == 0
+        assert reset_lapsed_streaks(now) == 0  # idempotent
+
+    def test_cli_command(self, app, db):
+        make_profile('lapsed_cli', 2, date.today() - timedelta(days=5))
+        result = app.test_cli_runner().invoke(args=['laoshi', 'reset-streaks'])
+        assert result.exit_code == 0, result.output
+        assert 'Reset 1 lapsed streak(s).' in result.output
+
+
+class TestStreakApi:
+    @pytest.fixture
+    def auth_headers(self, client):
+        client.post('/api/users', json={'username': 'tzuser', 'email': 'tz@example.com', 'password': 'TestPass123'})
+        resp = client.post('/api/token', json={'username': 'tzuser', 'password': 'TestPass123'})
+        return {'Authorization': f"Bearer {resp.json['access_token']}"}
+
+    def test_set_timezone(self, client, auth_headers):
+        resp = client.put('/api/settings', json={'timezone': 'Asia/Shanghai'}, headers=auth_headers)
+        assert resp.status_code == 200
+        assert resp.json['timezone'] == 'Asia/Shanghai'
+
+        resp = client.put('/api/settings', json={'timezone': 'Mars/Olympus_Mons'}, headers=auth_headers)
+        assert resp.status_code == 400
+
+    def test_streak_endpoint_returns_stored_values(self, client, auth_headers):
+        client.put('/api/settings', json={'timezone': 'Asia/Shanghai'}, headers=auth_headers)
+        user = User.get_by_username('tzuser')
+        update_streak(user.id, timezone_name='Asia/Shanghai')
+
+        resp = client.get('/api/progress/streak', headers=auth_headers)
+        assert resp.status_code == 200
+        assert resp.json == {'current_streak': 1,
+                             'last_practice_date': local_today('Asia/Shanghai').isoformat()}
@@ -0,0 +1,215 @@
+"""Tests for delta sync (/api/sync)."""
+from datetime import date, datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import event
+
+from config import Config
+from extensions import db as _db
+from models import Deck, SyncTombstone, User, UserSession, Word
+from sync import Cursor, changes_since, to_micros
+from tests.factories import add_deck, add_user, add_word
+
+TODAY = date.today()
+
+
+@pytest.fixture(autouse=True)
+def no_settle_window():
+    with patch.object(Config, 'SYNC_SETTLE_SECONDS', 0):
+        yield
+
+
+def ids(result, key):
+    fields = result[key]['fields']
+    return [dict(zip(fields, row))['id'] for row in result[key]['rows']]
+
+
+def sync_all(user_id, token=None, limit=None, max_pages=50):
+    """Follow has_more to the end; returns every page."""
+    pages = [changes_since(user_id, token, limit)]
+    while pages[-1]['has_more']:
+        assert len(pages) < max_pages, 'sync cursor is not advancing'
+        pages.append(changes_since(user_id, pages[-1]['cursor'], limit))
+    return pages
+
+
+class TestChangesSince:
+    def test_full_then_incremental(self, db, user):
+        deck = add_deck(user)
+        words = [add_word(user, deck) for _ in range(3)]
+        other = add_user('other')
+        add_word(other, None)
+
+        full = changes_since(user.id)
+        assert not full['has_more'] and not full['reset']
+        assert ids(full, 'decks') == [deck.id]
+        assert ids(full, 'words') == [w.id for w in words]
+        assert full['words']['fields'][0] == 'id' and len(full['words']['rows'][0]) == len(full['words']['fields'])
+
+        assert ids(changes_since(user.id, full['cursor']), 'words') == []
+
+        words[1].update_srs(4)
+        words[1].update()
+        session = UserSession(user_id=user.id, deck_id=deck.id, words_per_session=3)
+        session.add()
+        delta = changes_since(user.id, full['cursor'])
+        assert ids(delta, 'decks') == [] and ids(delta, 'words') == [words[1].id]
+        assert ids(delta, 'sessions') == [session.id]
+        row = dict(zip(delta['words']['fields'], delta['words']['rows'][0]))
+        assert row['repetitions'] == 1 and row['next_review_date'] == words[1].next_review_date.isoformat()
+
+    def test_deletions_are_reported(self, db, user):
+        hsk1, hsk2 = add_deck(user, 'HSK1'), add_deck(user, 'HSK2')
+        loose = add_word(user, hsk1)
+        cascaded = [add_word(user, hsk2) for _ in range(2)]
+        cursor = changes_since(user.id)['cursor']
+
+        loose_id, deck_id, cascaded_ids = loose.id, hsk2.id, [w.id for w in cascaded]
+        loose.delete()
+        hsk2.delete()
+        delta = changes_since(user.id, cursor)
+        assert delta['deleted'] == {'decks': [deck_id], 'words': sorted([loose_id] + cascaded_ids), 'sessions': []}
+
+        Word.delete_all(user)
+        assert changes_since(user.id, delta['cursor'])['deleted']['words'] == []  # none left to delete
+        add_word(user, hsk1)
+        cursor = changes_since(user.id, delta['cursor'])['cursor']
+        remaining = [w.id for w in Word.query.filter_by(user_id=user.id)]
+        Word.delete_all(user)
+        assert changes_since(user.id, cursor)['deleted']['words'] == remaining
+
+    def test_rolled_back_deletes_leave_no_tombstone(self, db, user):
+        word = add_word(user, None)
+        _db.session.delete(word)
+        _db.session.flush()
+        _db.session.rollback()
+        assert SyncTombstone.query.count() == 0
+
+    def test_account_deletion(self, db, user):
+        add_word(user, add_deck(user))
+        _db.session.delete(user)
+        _db.session.commit()
+        assert SyncTombstone.query.count() == 0
+
+    def test_bulk_writes_are_stamped(self, db, user):
+        from sample_deck_service import seed_sample_deck_for_user
+        deck = seed_sample_deck_for_user(user.id)
+        full = changes_since(user.id)
+        assert ids(full, 'decks') == [deck.id]
+        assert len(ids(full, 'words')) == Word.query.filter_by(deck_id=deck.id).count() > 0
+
+        Word.reschedule_deck(deck.id, user.id, 4, today=TODAY)
+        assert len(ids(changes_since(user.id, full['cursor']), 'words')) == len(ids(full, 'words'))
+
+    def test_pages_through_tied_timestamps(self, db, user):
+        decks = [add_deck(user, f'Deck {i}') for i in range(3)]
+        words = [add_word(user, decks[i % 3]) for i in range(7)]
+        # Older than tombstone retention: paging through old rows must not reset
+        tied = datetime.now(timezone.utc) - timedelta(days=Config.SYNC_TOMBSTONE_RETENTION_DAYS + 30)
+        for model in (Deck, Word):
+            model.query.filter_by(user_id=user.id).update({model.updated_ds: tied}, synchronize_session=False)
+        _db.session.commit()
+
+        pages = sync_all(user.id, limit=2)
+        assert len(pages) == 5 and all(len(ids(p, 'decks') + ids(p, 'words')) <= 2 for p in pages)
+        assert [i for p in pages for i in ids(p, 'decks')] == [d.id for d in decks]
+        assert [i for p in pages for i in ids(p, 'words')] == [w.id for w in words]
+
+        # Later changes and deletions arrive after the last page
+        words[0].meaning = 'changed'
+        words[0].update()
+        deleted_id = words[1].id
+        words[1].delete()
+        pages = sync_all(user.id, pages[-1]['cursor'], limit=1)
+        assert [i for p in pages for i in ids(p, 'words')] == [words[0].id]
+        assert [i for p in pages for i in p['deleted']['words']] == [deleted_id]
+
+    def test_settle_window_holds_back_fresh_changes(self, db, user):
+        deck = add_deck(user)
+        now = datetime.now(timezone.utc)
+        with patch.object(Config, 'SYNC_SETTLE_SECONDS', 60):
+            result = changes_since(user.id, now=now)
+            assert ids(result, 'decks') == []
+            assert Cursor.decode(result['cursor']).micros == to_micros(now - timedelta(seconds=60))
+        later = changes_since(user.id, result['cursor'])
+        assert ids(later, 'decks') == [deck.id]
+
+    def test_cursor_never_moves_backwards(self, db, user):
+        cursor = changes_since(user.id)['cursor']
+        with patch.object(Config, 'SYNC_SETTLE_SECONDS', 3600):
+            assert changes_since(user.id, cursor)['cursor'] == cursor
+
+    def test_expired_cursor_resets(self, db, user):
+        deck = add_deck(user)
+        stale = to_micros(datetime.now(timezone.utc) - timedelta(days=Config.SYNC_TOMBSTONE_RETENTION_DAYS + 1))
+        result = changes_since(user.id, Cursor(stale, 4, 0, stale).encode())
+        assert result['reset'] is True and ids(result, 'decks') == [deck.id]
+        assert changes_since(user.id, result['cursor'])['reset'] is False
+
+    @pytest.mark.parametrize('token', ['garbage', Cursor(1, 4, 0, 1).encode()[:-2], Cursor(1, 9, 0, 1).encode(), 'MS40LjA', '-1.0.0'])
+    def test_rejects_bad_cursors(self, db, user, token):
+        with pytest.raises(ValueError):
+            changes_since(user.id, token)
+
+    def test_incremental_sync_is_o_changes(self, db, user):
+        deck = add_deck(user)
+        _db.session.add_all(Word(word='词', reading='ci', meaning='word', user_id=user.id, deck_id=deck.id)
+                            for _ in range(500))
+        _db.session.commit()
+        cursor = changes_since(user.id)['cursor']
+        changed = Word.query.filter_by(user_id=user.id).order_by(Word.id.desc()).limit(2).all()
+        for word in changed:
+            word.update_srs(3)
+        _db.session.commit()
+        user_id, changed_ids = user.id, sorted(w.id for w in changed)
+
+        statements = []
+        record = lambda conn, cur, statement, *args: statements.append(statement)
+        event.listen(_db.engine, 'before_cursor_execute', record)
+        try:
+            delta = changes_since(user_id, cursor)
+        finally:
+            event.remove(_db.engine, 'before_cursor_execute', record)
+        assert ids(delta, 'words') == changed_ids
+        assert len(statements) == 4 and all('LIMIT' in s for s in statements)
+
+
+class TestSyncApi:
+    @pytest.fixture
+    def auth_headers(self, client):
+        client.post('/api/users', json={'username': 'syncapi', 'email': 'syncapi@example.com', 'password': 'TestPass123'})
+        resp = client.post('/api/token', json={'username': 'syncapi', 'password': 'TestPass123'})
+        return {'Authorization': f"Bearer {resp.json['access_token']}"}
+
+    def test_full_then_incremental(self, client, auth_headers):
+        resp = client.get('/api/sync', headers=auth_headers)
+        assert resp.status_code == 200
+        assert set(resp.json) == {'cursor', 'has_more', 'reset', 'decks', 'words', 'sessions', 'deleted'}
+        sample_words = len(resp.json['words']['rows'])
+
+        user = User.get_by_username('syncapi')
+        add_word(user, None)
+        resp = client.get(f"/api/sync?since={resp.json['cursor']}", headers=auth_headers)
+        assert resp.status_code == 200 and len(resp.json['words']['rows']) == 1
+        assert sample_words > 0
+
+    @pytest.mark.parametrize('query', ['since=garbage', 'limit=0', 'limit=abc', f'limit={Config.SYNC_MAX_BATCH_SIZE + 1}'])
+    def test_rejects_bad_requests(self, client, auth_headers, query):
+        assert client.get(f'/api/sync?{query}', headers=auth_headers).status_code == 400
+
+    def test_requires_auth(self, client):
+        assert client.get('/api/sync').status_code == 401
+
+
+class TestPurgeCommand:
+    def test_purges_expired_tombstones(self, app, db, user):
+        old = datetime.now(timezone.utc) - timedelta(days=Config.SYNC_TOMBSTONE_RETENTION_DAYS + 1)
+        _db.session.add_all([SyncTombstone(user_id=user.id, entity='word', entity_id=1, deleted_ds=old),
+                             SyncTombstone(user_id=user.id, entity='word', entity_id=2)])
+        _db.session.commit()
+
+        result = app.test_cli_runner().invoke(args=['laoshi', 'purge-sync-tombstones'])
+        assert result.exit_code == 0, result.output
+        assert 'Purged 1 sync tombstone(s).' in result.output
+        assert [t.entity_id for t in SyncTombstone.query] == [2]
@@ -0,0 +1,72 @@
+"""Tests for case-insensitive username/email uniqueness and the indexed lookups."""
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from models import User
+
+
+@pytest.fixture
+def user(db):
+    u = User(username='MixedCase', email='Mixed.Case@Example.com', password='x')
+    u.add()
+    return u
+
+
+def register(client, username, email):
+    return client.post('/api/users', json={'username': username, 'email': email, 'password': 'TestPassword1'})
+
+
+def query_plan(db, sql, **params):
+    return ' '.join(row[-1] for row in db.session.execute(text(f'EXPLAIN QUERY PLAN {sql}'), params))
+
+
+class TestLookups:
+    def test_validity_checks_ignore_case(self, user):
+        assert not User.is_username_valid('mixedcase')
+        assert not User.is_email_valid('mixed.case@example.COM')
+        assert User.is_username_valid('othername')
+        assert User.is_email_valid('other@example.com')
+
+    def test_wildcards_are_not_patterns(self, user):
+        assert User.is_username_valid('Mixed%')
+        assert User.is_email_valid('%@example.com')
+
+    def test_get_by_email(self, user):
+        assert User.get_by_email('MIXED.CASE@example.com').id == user.id
+        assert User.get_by_email('nobody@example.com') is None
+
+    @pytest.mark.parametrize('column, index', [('username', 'uq_user_username_lower'),
+                                               ('email', 'uq_user_email_lower')])
+    def test_lookups_use_functional_index(self, db, column, index):
+        plan = query_plan(db, f'SELECT id FROM "user" WHERE lower({column}) = lower(:value)', value='X')
+        assert f'USING INDEX {index}' in plan
+
+
+class TestUniqueness:
+    def test_database_rejects_case_variants(self, db, user):
+        with pytest.raises(IntegrityError):
+            User(username='MIXEDCASE', email='new@example.com', password='x').add()
+        with pytest.raises(IntegrityError):
+            User(username='new', email='MIXED.CASE@EXAMPLE.COM', password='x').add()
+
+    def test_signup_rejects_case_variant(self, client, user):
+        resp = register(client, 'mixedCASE', 'new@example.com')
+        assert resp.status_code == 400
+        resp = register(client, 'newuser', 'mixed.case@example.com')
+        assert resp.status_code == 400
+
+    def test_concurrent_signup_loses_cleanly(self, client, user):
+        # Both checks pass (the other signup hadn't committed yet) but the insert conflicts
+        with patch.object(User, 'is_username_valid', return_value=True), \
+                patch.object(User, 'is_email_valid', return_value=True):
+            resp = register(client, 'mixedcase', 'mixed.case@example.com')
+        assert resp.status_code == 400
+        assert 'already registered' in resp.json['error']
+
+    def test_password_reset_finds_user_in_any_case(self, client, user):
+        with patch('password_reset_resources.send_password_reset_email', return_value=True):
+            resp = client.post('/api/password-reset/request', json={'email': 'MIXED.case@example.com'})
+        assert resp.json['registered'] is True
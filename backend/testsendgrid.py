@@ -1,3 +1,5 @@
+# Manual SendGrid smoke test. The app calls SendGrid's v3 API over httpx (email_service.py),
+# so the SDK used here isn't in requirements.txt: pip install sendgrid to run it.
 import os
 from dotenv import load_dotenv
 from sendgrid import SendGridAPIClient
@@ -1,17 +1,18 @@
 # this file contains helper functions that are general and are used in multiple places throughout the project code
-from passlib.hash import pbkdf2_sha256
 from datetime import datetime
 from sqlalchemy import and_
 
+import password_hashing
 
 
 def hash_password(plain_text_password: str):
     # Passwword validation (abc + 123) should occur on frontend
-    return pbkdf2_sha256.hash(plain_text_password)
+    # Scheme, cost and the bounded hashing pool are configured in password_hashing.py
+    return password_hashing.hash_password(plain_text_password)
 
 def check_password(plain_text_password, hashed):
     # this function validates a plain-text password against the stored, hashed password to determine if they match
-    return pbkdf2_sha256.verify(plain_text_password, hashed)
+    return password_hashing.check_password(plain_text_password, hashed)
 
 
 def paginate_query(query, page=1, per_page=20, max_per_page=100):